@@ -1,23 +1,71 @@
-from mock_api import MockAPI
-from bedrock_service import BedrockService
-import datetime
+from mock_api import get_api
+from bedrock_service import get_bedrock_service, RESPONSE_TEMPLATE_PLACEHOLDERS
+from field_paths import compile_field_path
+from fuzzy_index import index_for
+from po_draft import PODraft, build_api_payload as build_strict_payload, format_date_api
+from rule_nlu import RuleNLU
+from concurrent.futures import ThreadPoolExecutor
+import tracing
 import json
+import os
 import re
+import time
 
 
 # Conversational States
 STATE_ACTIVE = "ACTIVE"
 STATE_DONE = "DONE"
 
+ANALYSIS_ERROR_RESPONSE = "I encountered an error analyzing your request. Please try again."
+ALREADY_SUBMITTED_RESPONSE = "This PO has already been submitted, so I haven't created it again. Say \"start over\" to raise a new one."
+
+# Human-readable names for payload keys, used when filling fused-turn response templates
+FIELD_LABELS = {
+    "po_type": "PO type",
+    "vendor_id": "supplier",
+    "purchase_org_id": "purchase organization",
+    "plant_id": "plant",
+    "purchase_grp_id": "purchase group",
+    "po_date": "PO date",
+    "validityEnd": "validity end date",
+    "delivery_date": "delivery date",
+    "currency": "currency",
+    "material_id": "material",
+    "short_text": "item description",
+    "quantity": "quantity",
+    "price": "price",
+    "remarks": "remarks",
+    "payment_terms": "payment terms",
+    "inco_terms": "incoterms",
+}
+
 class POAgent:
-    def __init__(self):
-        self.api = MockAPI()
-        self.nlu = BedrockService()
+    def __init__(self, fused_turn=None, api=None, nlu=None, fast_path=None):
+        # Backend and model clients are process-wide (get_api / get_bedrock_service); a POAgent
+        # holds only per-conversation settings and stats, so one per session is cheap
+        self.api = api or get_api()
+        self.nlu = nlu or get_bedrock_service()
+        # Fused turn: a single model call returns the plan plus a response template
+        # that is filled locally, instead of analyze_user_input + generate_response.
+        if fused_turn is None:
+            fused_turn = os.getenv("PO_AGENT_FUSED_TURN", "false").lower() == "true"
+        self.fused_turn = fused_turn
+        # Fast path: simple turns ("qty 5", "yes, create it") are analyzed by local rules and
+        # answered from a template; the model is called only below this confidence.
+        if fast_path is None:
+            fast_path = os.getenv("PO_AGENT_FAST_PATH", "on").lower() not in ("off", "0", "false")
+        self.rules = RuleNLU() if fast_path else None
+        self.fast_path_confidence = float(os.getenv("PO_AGENT_FAST_PATH_CONFIDENCE", "0.85"))
+        self.nlu_stats = {"turns": 0, "fast_path": 0, "model": 0, "rules_ms": 0.0, "model_ms": 0.0}
+        # Max concurrent entity lookups per turn (supplier, material, plant, group...)
+        self.resolve_concurrency = int(os.getenv("PO_AGENT_RESOLVE_CONCURRENCY", "4"))
+        # Trace of the last turn when tracing is on (see tracing)
+        self.last_trace = None
         
     def get_initial_state(self):
         return {
             "current_step": STATE_ACTIVE,
-            "payload": {
+            "payload": PODraft({
                 "line_items": [],
                 "projects": [],
                 "currency": "INR", # Default
@@ -26,7 +74,7 @@ class POAgent:
                 "is_pr_based": False,
                 "is_rfq_based": False,
                 "noc": "No"
-            },
+            }),
             "conversation_history": [],
             "last_analysis": None
         }
@@ -65,28 +113,197 @@ class POAgent:
         
         return missing
 
+    def _fast_path_analysis(self, user_text, state):
+        """Rule-based analysis if it is confident enough to skip the model, else None."""
+        self.nlu_stats["turns"] += 1
+        if self.rules is None:
+            return None
+        start = time.perf_counter()
+        with tracing.span("analyze.rules") as span:
+            analysis = self.rules.analyze(user_text, state["payload"], self.identify_missing_fields(state["payload"]))
+            span.set(confidence=analysis["confidence"], accepted=analysis["confidence"] >= self.fast_path_confidence)
+        self.nlu_stats["rules_ms"] += (time.perf_counter() - start) * 1000
+        if analysis["confidence"] < self.fast_path_confidence:
+            return None
+        self.nlu_stats["fast_path"] += 1
+        print(f"DEBUG: Fast path (confidence {analysis['confidence']:.2f}): {analysis['thought_process']}")
+        return analysis
+
+    def _record_model_analysis(self, started):
+        self.nlu_stats["model"] += 1
+        self.nlu_stats["model_ms"] += (time.perf_counter() - started) * 1000
+
+    def fast_path_stats(self):
+        """Share of turns answered by the rules and the model time that saved (at the mean model analysis time)."""
+        stats = self.nlu_stats
+        mean_model_ms = stats["model_ms"] / stats["model"] if stats["model"] else 0.0
+        return {
+            "turns": stats["turns"],
+            "fast_path_turns": stats["fast_path"],
+            "fast_path_rate": stats["fast_path"] / stats["turns"] if stats["turns"] else 0.0,
+            "mean_model_analysis_ms": round(mean_model_ms, 2),
+            "mean_rules_ms": round(stats["rules_ms"] / stats["turns"], 3) if stats["turns"] else 0.0,
+            "est_saved_ms": round(stats["fast_path"] * mean_model_ms - stats["rules_ms"], 1),
+        }
+
     def process_input(self, user_text, state):
+        with tracing.trace("turn", chars=len(user_text), fused=self.fused_turn) as turn:
+            response = self._process_input(user_text, state)
+        self.last_trace = turn.trace
+        return response
+
+    def _process_input(self, user_text, state):
         current_payload = state["payload"]
         
-        # 1. Analyze User Input
+        # 1. Analyze User Input (rules first, model when they are not confident)
         print(f"DEBUG: Analyzing input: {user_text}")
-        try:
-            analysis = self.nlu.analyze_user_input(user_text, current_payload, state["conversation_history"])
-        except Exception as e:
-            print(f"Analysis Error: {e}")
-            return "I encountered an error analyzing your request. Please try again."
+        analysis = self._fast_path_analysis(user_text, state)
+        if analysis is None:
+            started = time.perf_counter()
+            try:
+                with tracing.span("analyze.model", fused=self.fused_turn):
+                    if self.fused_turn:
+                        analysis = self.nlu.analyze_and_respond(user_text, current_payload, state["conversation_history"], context_state=state)
+                    else:
+                        analysis = self.nlu.analyze_user_input(user_text, current_payload, state["conversation_history"], context_state=state)
+            except Exception as e:
+                print(f"Analysis Error: {e}")
+                return ANALYSIS_ERROR_RESPONSE
+            self._record_model_analysis(started)
+
+        execution_results, final_response_override = self._execute_turn(state, analysis)
+
+        # 5. Generate Response
+        with tracing.span("respond") as span:
+            if final_response_override:
+                response = final_response_override
+                span.set(source="override")
+            else:
+                missing_fields = self.identify_missing_fields(current_payload)
+                response = None
+                if self.fused_turn or analysis.get("source") == "rules":
+                    response = self._render_response_template(analysis.get("response_template"), execution_results, missing_fields)
+                    span.set(source="template")
+                if response is None:
+                    # Two-call path (also the fallback when the fused template is unusable)
+                    span.set(source="model")
+                    response = self.nlu.generate_response(user_text, analysis, execution_results, current_payload, missing_fields)
+        
+        self._record_turn(state, user_text, response)
+        return response
 
+    def process_input_stream(self, user_text, state):
+        """
+        Streaming variant of process_input: yields response text chunks as they are generated.
+        Entity resolution starts as soon as items_to_resolve has streamed in, while the
+        model is still writing the rest of the analysis.
+        """
+        with tracing.trace("turn", chars=len(user_text), fused=self.fused_turn, stream=True) as turn:
+            yield from self._process_input_stream(user_text, state)
+        self.last_trace = turn.trace
+
+    def _process_input_stream(self, user_text, state):
+        current_payload = state["payload"]
+        early = {}
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        def start_resolution(items):
+            early["items"] = items
+            early["future"] = executor.submit(tracing.bind(self._resolve_entities), items, current_payload)
+
+        # 1. Analyze User Input (rules first, otherwise streamed from the model)
+        print(f"DEBUG: Analyzing input (stream): {user_text}")
+        resolution_map = None
+        analysis = self._fast_path_analysis(user_text, state)
+        if analysis is None:
+            started = time.perf_counter()
+            try:
+                with tracing.span("analyze.model", fused=self.fused_turn, stream=True):
+                    analysis = self.nlu.analyze_user_input_stream(
+                        user_text, current_payload, state["conversation_history"],
+                        on_items_to_resolve=start_resolution, fused=self.fused_turn, context_state=state
+                    )
+                # Only reuse the early lookups if the final analysis agrees on what to resolve
+                if early and early["items"] == analysis.get("items_to_resolve", []):
+                    resolution_map = early["future"].result()
+            except Exception as e:
+                print(f"Analysis Error: {e}")
+                yield ANALYSIS_ERROR_RESPONSE
+                return
+            finally:
+                executor.shutdown(wait=False)
+            self._record_model_analysis(started)
+        else:
+            executor.shutdown(wait=False)
+
+        execution_results, final_response_override = self._execute_turn(state, analysis, resolution_map)
+
+        # 5. Generate Response (streamed)
+        chunks = []
+        with tracing.span("respond", stream=True) as span:
+            if final_response_override:
+                span.set(source="override")
+                chunks.append(final_response_override)
+                yield final_response_override
+            else:
+                missing_fields = self.identify_missing_fields(current_payload)
+                response = None
+                if self.fused_turn or analysis.get("source") == "rules":
+                    response = self._render_response_template(analysis.get("response_template"), execution_results, missing_fields)
+                if response is not None:
+                    span.set(source="template")
+                    chunks.append(response)
+                    yield response
+                else:
+                    span.set(source="model")
+                    for chunk in self.nlu.generate_response_stream(user_text, analysis, execution_results, current_payload, missing_fields):
+                        chunks.append(chunk)
+                        yield chunk
+
+        self._record_turn(state, user_text, "".join(chunks))
+
+    def _record_turn(self, state, user_text, response):
+        # Update History
+        state["conversation_history"].append({"role": "user", "content": user_text})
+        state["conversation_history"].append({"role": "assistant", "content": response})
+
+    def _execute_turn(self, state, analysis, resolution_map=None):
+        """
+        Steps 2-4 of a turn: resolve entities, apply actions and handle special intents.
+        Returns (execution_results, final_response_override).
+        """
         print(f"DEBUG: Analysis Result: {json.dumps(analysis, indent=2)}")
         
+        # 2. Resolve Entities
+        if resolution_map is None:
+            resolution_map = self._resolve_entities(analysis.get("items_to_resolve", []), state["payload"])
+
+        execution_results, final_response_override, api_payload = self._apply_analysis(state, analysis, resolution_map)
+        
+        if api_payload is not None:
+            print(f"DEBUG: Submitting PO: {json.dumps(api_payload, indent=2)}")
+            with tracing.span("create_po", line_items=len(api_payload.get("line_items", []))) as span:
+                result = self.api.create_po(api_payload)
+                span.set(success=bool(result.get("success") or result.get("po_number")), po_number=result.get("po_number"))
+            self._handle_submission_result(state, result, execution_results)
+
+        return execution_results, final_response_override
+
+    def _apply_analysis(self, state, analysis, resolution_map):
+        """
+        The I/O-free part of steps 2-4: report failed lookups, apply actions and handle
+        special intents. Returns (execution_results, final_response_override, api_payload),
+        where api_payload is the strict create-PO payload when the PO is ready to submit.
+        """
+        current_payload = state["payload"]
+        
         intents = analysis.get("intents", [])
         actions = analysis.get("actions", [])
-        to_resolve = analysis.get("items_to_resolve", [])
         
         execution_results = []
+        api_payload = None
         state["last_analysis"] = analysis
         
-        # 2. Resolve Entities
-        resolution_map = self._resolve_entities(to_resolve, current_payload)
         for term, res in resolution_map.items():
             if res["found"]:
                 # Log success
@@ -95,16 +312,11 @@ class POAgent:
                 execution_results.append(f"Note: Could not find '{term}' in the database.")
                 
         # 3. Apply Actions
-        for action in actions:
-            try:
-                msg = self._apply_action(current_payload, action, resolution_map)
-                if msg: execution_results.append(msg)
-            except Exception as e:
-                execution_results.append(f"Failed to update {action.get('field_path')}: {str(e)}")
-                print(f"Action Error: {e}")
+        with tracing.span("apply_actions", actions=len(actions)):
+            execution_results.extend(self._apply_actions(current_payload, actions, resolution_map))
 
-        # Recalculate totals if line items changed
-        if any("line_item" in a.get("field_path", "") for a in actions):
+        # Recalculate totals if line items changed (a PODraft keeps its running total itself)
+        if not isinstance(current_payload, PODraft) and any("line_item" in a.get("field_path", "") for a in actions):
             try:
                 total = sum(float(i.get("quantity", 0)) * float(i.get("price", 0)) for i in current_payload.get("line_items", []))
                 current_payload["total"] = total
@@ -116,176 +328,130 @@ class POAgent:
         
         if "CANCEL_PO" in intents:
             state["payload"] = self.get_initial_state()["payload"]
+            state["current_step"] = STATE_ACTIVE
             execution_results.append("Conversation reset.")
             final_response_override = "I've cancelled the current PO and reset the form. What ID you like to do?"
             
+        elif "CONFIRM_PO" in intents and state["current_step"] == STATE_DONE:
+            # The submitted draft is still complete: another "ok" must not create a duplicate PO
+            execution_results.append("Note: PO already submitted; not submitted again.")
+            final_response_override = ALREADY_SUBMITTED_RESPONSE
+
         elif "CONFIRM_PO" in intents:
-            # 0. SELF-HEAL: Fix common data issues before validation
-            # Fix Material ID if it ended up in short_text
-            for item in current_payload.get("line_items", []):
-                s_text = str(item.get("short_text", ""))
-                if not item.get("material_id") and s_text.isdigit():
-                    item["material_id"] = int(s_text)
-                    item["short_text"] = f"Material {s_text}" # Temp description
-            
-            # Fix Purchase Group key alias in main payload
-            if "purchase_group_id" in current_payload and not current_payload.get("purchase_grp_id"):
-                 current_payload["purchase_grp_id"] = current_payload.pop("purchase_group_id")
-            
-            # Map PO Type to API format
-            pt = current_payload.get("po_type", "")
-            if pt.lower() == "regular purchase":
-                current_payload["po_type"] = "regularPurchase"
+            api_payload, missing = self.confirm_payload(current_payload)
+            if missing:
+                execution_results.append(f"Validation Failed: Missing fields {', '.join(missing)}")
 
-            # 1. Identify Missing Fields
+        return execution_results, final_response_override, api_payload
+
+    def confirm_payload(self, current_payload):
+        """
+        CONFIRM_PO: self-heal the draft, then validate it. Returns (api_payload, missing)
+        where api_payload is the strict create-PO payload, or None if fields are missing.
+        Shared by the chat turn and bulk_import.
+        """
+        # 0. SELF-HEAL: Fix common data issues before validation
+        # Fix Material ID if it ended up in short_text
+        for item in current_payload.get("line_items", []):
+            s_text = str(item.get("short_text", ""))
+            if not item.get("material_id") and s_text.isdigit():
+                item["material_id"] = int(s_text)
+                item["short_text"] = f"Material {s_text}" # Temp description
+        
+        # Fix Purchase Group key alias in main payload
+        if "purchase_group_id" in current_payload and not current_payload.get("purchase_grp_id"):
+             current_payload["purchase_grp_id"] = current_payload.pop("purchase_group_id")
+        
+        # Map PO Type to API format
+        pt = current_payload.get("po_type", "")
+        if pt.lower() == "regular purchase":
+            current_payload["po_type"] = "regularPurchase"
+
+        # 1. Identify Missing Fields
+        with tracing.span("confirm") as span:
             missing = self.identify_missing_fields(current_payload)
-            
-            if not missing:
-                # 2. CONSTRUCT STRICT PAYLOAD (Whitelist approach)
-                
-                # Helper for Date Format: "Fri Jan 23 2026 13:15:24 GMT+0530 (India Standard Time)"
-                def format_date_api(date_val):
-                    if not date_val: return ""
-                    try:
-                        # Try parsing YYYY-MM-DD
-                        dt = datetime.datetime.strptime(str(date_val).split(" ")[0], "%Y-%m-%d")
-                        # Set a default time if none (using fixed time from example or current)
-                        # User example has 13:15:24. Let's use current time 
-                        now = datetime.datetime.now()
-                        dt = dt.replace(hour=now.hour, minute=now.minute, second=now.second)
-                        # Hardcoded timezone part as per user requirement to match "correct" payload
-                        return dt.strftime(f"%a %b %d %Y %H:%M:%S GMT+0530 (India Standard Time)")
-                    except:
-                        return str(date_val) # Fallback
-
-                allowed_header_keys = [
-                    "po_type", "vendor_id", "purchase_org_id", "plant_id", "purchase_grp_id",
-                    "po_date", "validityEnd", "currency", "line_items", "projects",
-                    "is_epcg_applicable", "remarks", "is_pr_based", "is_rfq_based", "noc",
-                    "total", "payment_terms", "inco_terms", "datasupplier", "inco_terms_description",
-                    "payment_terms_description", "alternate_supplier_name", 
-                    "alternate_supplier_email", "alternate_supplier_contact_number"
-                ]
-                
-                api_payload = {}
-                for key in allowed_header_keys:
-                    val = current_payload.get(key)
-                    
-                    # Date Formatting
-                    if key in ["po_date", "validityEnd"] and val:
-                        val = format_date_api(val)
-                    
-                    # Handle Boolean/None defaults
-                    if key not in ["line_items", "projects"]:
-                         if val is None:
-                             api_payload[key] = ""
-                         elif isinstance(val, bool):
-                             api_payload[key] = val # Sent as bool, mock_api will stringify
-                         else:
-                             api_payload[key] = val
-                    elif key in current_payload:
-                        api_payload[key] = val
-
-                # Fix 'noc' if it is "No" -> ""
-                if api_payload.get("noc") == "No":
-                    api_payload["noc"] = ""
-                    
-                # Ensure Defaults for critical fields
-                if "projects" not in api_payload: api_payload["projects"] = []
-                # Projects cleanup
-                clean_projects = []
-                for p in api_payload.get("projects", []):
-                    clean_projects.append({
-                        "project_code": p.get("project_code", ""),
-                        "project_name": p.get("project_name", "")
-                    })
-                if clean_projects:
-                    api_payload["projects"] = clean_projects
-                
-                # Payment Terms & Inco Terms defaults (from user example)
-                if not api_payload.get("payment_terms"): api_payload["payment_terms"] = "189" 
-                if not api_payload.get("inco_terms"): api_payload["inco_terms"] = "13"
+            span.set(missing=len(missing))
+        if missing:
+            return None, missing
+        with tracing.span("build_payload", line_items=len(current_payload.get("line_items", []))):
+            return self.build_api_payload(current_payload), []
 
-                # 3. CLEAN LINE ITEMS
-                clean_items = []
-                header_del_date = current_payload.get("delivery_date")
-                
-                total_sum = 0.0
-                
-                for item in api_payload.get("line_items", []):
-                    # Ensure numeric types
-                    try: mat_grp = int(item.get("material_group_id", 1)) 
-                    except: mat_grp = 1
-                    try: u_id = int(item.get("unit_id", 1))
-                    except: u_id = 1
-                    try: tax_c = int(item.get("tax_code", 118)) # User example defaulted to 118
-                    except: tax_c = 118
-                    try: m_id = int(item.get("material_id"))
-                    except: m_id = 0
-                    
-                    qty = float(item.get("quantity", 0))
-                    price = float(item.get("price", 0))
-                    item_total = qty * price
-                    total_sum += item_total
-
-                    clean_item = {
-                        "material_id": m_id,
-                        "quantity": str(qty).rstrip("0").rstrip(".") if qty.is_integer() else str(qty),
-                        "price": str(price).rstrip("0").rstrip(".") if price.is_integer() else str(price),
-                        "short_text": str(item.get("short_text", "") or "Item"),
-                        "material_group_id": mat_grp,
-                        "unit_id": u_id,
-                        "tax_code": tax_c,
-                        "control_code": "",
-                        "subServices": "",
-                        "short_desc": str(item.get("short_text", "") or "Item"),
-                        "sub_total": f"{item_total:.2f}",
-                        "tax": str(item.get("tax", "5")), # Defaulting to 5 as per example
-                        "delivery_date": format_date_api(item.get("delivery_date") or header_del_date)
-                    }
-                    clean_items.append(clean_item)
-                
-                api_payload["line_items"] = clean_items
-                
-                # 2.1 Final Total Calculation
-                api_payload["total"] = f"{total_sum:.2f}"
-                
-                print(f"DEBUG: Submitting PO: {json.dumps(api_payload, indent=2)}")
-                result = self.api.create_po(api_payload)
-                
-                if result.get("success") or result.get("po_number"):
-                    po_num = result.get("po_number", "Created")
-                    execution_results.append(f"SUCCESS: PO Created! Number: {po_num}")
-                    state["current_step"] = STATE_DONE
-                else:
-                    err_msg = result.get("message", "Unknown Error")
-                    if "unexpected field" in str(result) or "extra fields" in str(result):
-                        err_msg += " (API Validation Error: The backend rejected the data format.)"
-                    if "data" in result and isinstance(result["data"], list):
-                         sap_errs = [d.get("msg") for d in result["data"] if d.get("type") == "E"]
-                         if sap_errs: err_msg = "; ".join(sap_errs)
-                    execution_results.append(f"ERROR: Submission Failed. {err_msg}")
-            else:
-                execution_results.append(f"Validation Failed: Missing fields {', '.join(missing)}")
+    def build_api_payload(self, current_payload):
+        """
+        CONSTRUCT STRICT PAYLOAD (Whitelist approach) for create_po from a complete draft.
+        """
+        if isinstance(current_payload, PODraft):
+            return current_payload.to_api_payload()
+        return build_strict_payload(current_payload)
 
-        # 5. Generate Response
-        if final_response_override:
-            response = final_response_override
+    def _handle_submission_result(self, state, result, execution_results):
+        if result.get("success") or result.get("po_number"):
+            po_num = result.get("po_number", "Created")
+            execution_results.append(f"SUCCESS: PO Created! Number: {po_num}")
+            state["current_step"] = STATE_DONE
         else:
-            missing_fields = self.identify_missing_fields(current_payload)
-            response = self.nlu.generate_response(user_text, analysis, execution_results, current_payload, missing_fields)
-        
-        # Update History
-        state["conversation_history"].append({"role": "user", "content": user_text})
-        state["conversation_history"].append({"role": "assistant", "content": response})
-        
-        return response
+            err_msg = result.get("message", "Unknown Error")
+            if "unexpected field" in str(result) or "extra fields" in str(result):
+                err_msg += " (API Validation Error: The backend rejected the data format.)"
+            if "data" in result and isinstance(result["data"], list):
+                 sap_errs = [d.get("msg") for d in result["data"] if d.get("type") == "E"]
+                 if sap_errs: err_msg = "; ".join(sap_errs)
+            execution_results.append(f"ERROR: Submission Failed. {err_msg}")
+
+    def _render_response_template(self, template, execution_results, missing_fields):
+        """
+        Fill a fused-turn response template from local execution results.
+        Returns None if the template is unusable so the caller can fall back to generate_response.
+        """
+        if not isinstance(template, str) or "{next_step}" not in template:
+            return None
+        # Reject templates with placeholders we don't know how to fill
+        if set(re.findall(r"\{[^{}]*\}", template)) - set(RESPONSE_TEMPLATE_PLACEHOLDERS):
+            return None
+
+        updates, issues, success = [], [], None
+        for result in execution_results:
+            if result.startswith("SUCCESS:"):
+                success = result[len("SUCCESS:"):].strip()
+            elif result.startswith("Updated "):
+                key = result[len("Updated "):].split(" to ")[0]
+                label = FIELD_LABELS.get(key, key.replace("_", " "))
+                if label not in updates: updates.append(label)
+            elif result == "Added new line item.":
+                updates.append("a new line item")
+            elif result != "Conversation reset.":
+                issues.append(result)
+
+        updates_text = ""
+        if updates:
+            joined = updates[0] if len(updates) == 1 else ", ".join(updates[:-1]) + " and " + updates[-1]
+            updates_text = f"I've updated the {joined}."
+
+        if success:
+            next_step = success
+        elif not missing_fields:
+            next_step = "Everything is ready. Shall I create the purchase order now?"
+        else:
+            next_step = f"I still need: {', '.join(missing_fields)}."
+
+        response = (template.replace("{updates}", updates_text)
+                            .replace("{issues}", " ".join(issues))
+                            .replace("{missing}", ", ".join(missing_fields))
+                            .replace("{next_step}", next_step))
+        return re.sub(r"\s+", " ", response).strip()
 
     def _resolve_entities(self, to_resolve, current_payload):
         """
         Resolve entity text to IDs using MockAPI.
         Returns: {"Original Text": {"found": True, "id": 123, "details": {...}}}
+
+        Only plant and group lookups depend on the purchase org, so the org is
+        resolved first and every other lookup then runs concurrently.
         """
+        with tracing.span("resolve", entities=len(to_resolve)):
+            return self._resolve_all(to_resolve, current_payload)
+
+    def _resolve_all(self, to_resolve, current_payload):
         results = {}
         
         # Pre-scan for Purchase Org to help dependent lookups (Plant, Group)
@@ -295,125 +461,139 @@ class POAgent:
         for item in to_resolve:
             kind = item.get("entity_type", "").lower()
             text = item.get("value")
-            if "org" in kind or "organization" in kind:
-                try:
-                    matches = self.api.get_purchase_orgs()
-                    found = self._fuzzy_match(text, matches)
-                    if found:
-                        temp_org_id = int(found["id"])
-                        print(f"DEBUG: Pre-resolved Org '{text}' -> {temp_org_id}")
-                except: pass
-
-        # 2. Resolve Others
+            if text and ("org" in kind or "organization" in kind):
+                res = self._resolve_one(kind, text, temp_org_id)
+                if res["found"]:
+                    temp_org_id = res["id"]
+                    print(f"DEBUG: Pre-resolved Org '{text}' -> {temp_org_id}")
+                results[str(text).strip().lower()] = res
+
+        # 2. Resolve Others concurrently (bounded)
+        pending = []
         for item in to_resolve:
             text = item.get("value")
             kind = item.get("entity_type", "").lower()
-            if not text: continue
-            
-            print(f"DEBUG: Resolving entity '{kind}': {text}")
-            
-            res = {"found": False, "id": None, "details": None}
-            
-            try:
-                if "supplier" in kind:
-                    # Search Supplier
-                    matches = self.api.search_suppliers(query=text)
-                    if matches:
-                        res = {"found": True, "id": matches[0]["vendor_id"], "details": matches[0]}
-                
-                elif "material" in kind:
-                    matches = self.api.get_materials(query=text)
-                    if matches:
-                        match = matches[0]
-                        res = {"found": True, "id": int(match["id"]), "details": match}
-                
-                elif "plant" in kind:
-                    # Use pre-resolved org ID if available
-                    matches = self.api.get_plants(org_ids=[temp_org_id] if temp_org_id else None)
-                    found = self._fuzzy_match(text, matches)
-                    if found:
-                        res = {"found": True, "id": found["id"], "details": found}
-                    else:
-                         print(f"DEBUG: Plant '{text}' not found in {len(matches)} candidates (Org: {temp_org_id})")
-
-                elif "org" in kind or "organization" in kind:
-                    # Already tried, but run again to populate results map
-                    matches = self.api.get_purchase_orgs()
-                    found = self._fuzzy_match(text, matches)
-                    if found:
-                        res = {"found": True, "id": int(found["id"]), "details": found}
-                        
-                elif "group" in kind or "purch" in kind: # catch 'purchase group' or 'group'
-                    matches = self.api.get_purchase_groups(org_ids=[temp_org_id] if temp_org_id else None)
-                    found = self._fuzzy_match(text, matches)
-                    if found:
-                            res = {"found": True, "id": int(found["id"]), "details": found}
-                    else:
-                         print(f"DEBUG: Group '{text}' not found in {len(matches)} candidates")
+            if not text or str(text).strip().lower() in results: continue
+            pending.append((kind, text))
 
-            except Exception as e:
-                print(f"Error resolving {kind} '{text}': {e}")
-            
+        if len(pending) > 1 and self.resolve_concurrency > 1:
+            with ThreadPoolExecutor(max_workers=min(self.resolve_concurrency, len(pending))) as pool:
+                resolved = list(pool.map(tracing.bind(lambda p: self._resolve_one(p[0], p[1], temp_org_id)), pending))
+        else:
+            resolved = [self._resolve_one(kind, text, temp_org_id) for kind, text in pending]
+
+        for (kind, text), res in zip(pending, resolved):
             results[str(text).strip().lower()] = res
         return results
 
-    def _fuzzy_match(self, text, candidates):
-        """Helper to match text against name/id in a list of dicts"""
-        text = str(text).lower().strip()
-        # 1. Extract ID match
-        for cand in candidates:
-            if str(cand.get("id")).lower() == text:
-                return cand
-        # 2. Substring match
-        for cand in candidates:
-            if text in cand.get("name", "").lower():
-                return cand
-        # 3. All words match
-        words = text.replace("-", " ").split()
-        for cand in candidates:
-            c_name = cand.get("name", "").lower()
-            if all(w in c_name for w in words):
-                return cand
+    def _resolve_one(self, kind, text, org_id):
+        """Resolve a single entity; plant/group lookups are filtered by org_id when known."""
+        print(f"DEBUG: Resolving entity '{kind}': {text}")
+        
+        res = {"found": False, "id": None, "details": None}
+        plan = self._lookup_plan(kind, text, org_id)
+        if plan is None:
+            return res
+        
+        entity, method, kwargs = plan
+        with tracing.span("lookup", entity=entity, text=text, method=method) as span:
+            try:
+                matches = getattr(self.api, method)(**kwargs)
+                res = self._pick_match(entity, text, matches, org_id) or res
+            except Exception as e:
+                print(f"Error resolving {kind} '{text}': {e}")
+            span.set(found=res["found"])
+        
+        return res
+
+    def _lookup_plan(self, kind, text, org_id):
+        """
+        Map an entity_type to (entity, api_method_name, kwargs). Shared by the sync and
+        async resolvers so both issue exactly the same lookups. None if unsupported.
+        """
+        org_filter = [org_id] if org_id else None
+        if "supplier" in kind:
+            return "supplier", "search_suppliers", {"query": text}
+        elif "material" in kind:
+            return "material", "get_materials", {"query": text}
+        elif "plant" in kind:
+            # Use pre-resolved org ID if available
+            return "plant", "get_plants", {"org_ids": org_filter}
+        elif "org" in kind or "organization" in kind:
+            return "org", "get_purchase_orgs", {}
+        elif "group" in kind or "purch" in kind: # catch 'purchase group' or 'group'
+            return "group", "get_purchase_groups", {"org_ids": org_filter}
         return None
 
+    def _pick_match(self, entity, text, matches, org_id=None):
+        """Pick the resolution entry for an entity from its lookup result (None if no match)."""
+        if entity == "supplier":
+            if matches:
+                return {"found": True, "id": matches[0]["vendor_id"], "details": matches[0]}
+        
+        elif entity == "material":
+            if matches:
+                match = matches[0]
+                return {"found": True, "id": int(match["id"]), "details": match}
+        
+        elif entity == "plant":
+            found = self._fuzzy_match(text, matches)
+            if found:
+                return {"found": True, "id": found["id"], "details": found}
+            print(f"DEBUG: Plant '{text}' not found in {len(matches)} candidates (Org: {org_id})")
+
+        elif entity == "org":
+            found = self._fuzzy_match(text, matches)
+            if found:
+                return {"found": True, "id": int(found["id"]), "details": found}
+                
+        elif entity == "group":
+            found = self._fuzzy_match(text, matches)
+            if found:
+                return {"found": True, "id": int(found["id"]), "details": found}
+            print(f"DEBUG: Group '{text}' not found in {len(matches)} candidates")
+        
+        return None
+
+    def _fuzzy_match(self, text, candidates):
+        """Best-ranked candidate for text by id/name (see fuzzy_index), or None"""
+        if not candidates:
+            return None
+        return index_for(candidates).best(text)
+
+    def _apply_actions(self, payload, actions, resolution_map):
+        """
+        Apply a whole action list in one pass. Every field path is compiled (and validated)
+        before anything is written; returns the execution messages, including a failure
+        note for each action that could not be applied.
+        """
+        compiled = []
+        for action in actions:
+            try:
+                compiled.append(compile_field_path(action.get("field_path", "")))
+            except Exception as e:
+                compiled.append(e)
+
+        results = []
+        for action, field in zip(actions, compiled):
+            try:
+                if isinstance(field, Exception):
+                    raise field
+                msg = self._apply_compiled(payload, action, field, resolution_map)
+                if msg: results.append(msg)
+            except Exception as e:
+                results.append(f"Failed to update {action.get('field_path')}: {str(e)}")
+                print(f"Action Error: {e}")
+        return results
+
     def _apply_action(self, payload, action, resolution_map):
+        return self._apply_compiled(payload, action, compile_field_path(action.get("field_path", "")), resolution_map)
+
+    def _apply_compiled(self, payload, action, field, resolution_map):
         op = action.get("operation", "").upper()
-        path = action.get("field_path", "")
         raw_val = action.get("value")
-        
-        # Field Aliases
-        ALIASES = {
-            "supplier": "vendor_id",
-            "vendor": "vendor_id",
-            "val_end_date": "validityEnd",
-            "validity_end": "validityEnd",
-            "purchase_org": "purchase_org_id",
-            "organization": "purchase_org_id",
-            "org": "purchase_org_id",
-            "plant": "plant_id",
-            "purchase_group": "purchase_grp_id",
-            "purchase_group_id": "purchase_grp_id", # Fix common alias
-            "group": "purchase_grp_id",
-            "material": "material_id",
-            "currency": "currency",
-            "po_date": "po_date"
-        }
-        
-        # Normalize Path using Aliases
-        # Handle indexed paths like line_items[0].material
-        base_key = path
-        idx_str = ""
-        if "[" in path and "]" in path:
-            base_key = path.split("[")[0] # e.g. line_items
-            remainder = path.split("]")[1] # e.g. .material
-            idx_str = path[path.find("["):path.find("]")+1] # e.g. [0]
-            if remainder.startswith("."):
-                sub_key = remainder[1:]
-                if sub_key in ALIASES:
-                    path = f"{base_key}{idx_str}.{ALIASES[sub_key]}"
-        elif path in ALIASES:
-            path = ALIASES[path]
-            
+        path = field.path
+
         print(f"DEBUG: Action {op} on {path} with val '{raw_val}'")
 
         # 1. Substitute Value if Resolved
@@ -436,40 +616,33 @@ class POAgent:
                 print(f"DEBUG: Resolved '{raw_val}' to ID {val}")
         
         # 2. Logic to map resolved objects (like Material) to multiple fields
-        # If we found a material, we shouldn't just set 'material_id', we might need 'price', 'short_text', etc.
-        # Check if this executed action is about a material
-        if ("material_id" in path or "material" in path) and is_resolved:
-             # Try to hydrate line item from resolved details
+        # A resolved material on line_items[i] also fills that item's text, price, group and unit
+        if field.item_index is not None and is_resolved:
              details = resolution_map.get(lookup_key, {}).get("details")
              if details:
-                 # We need to find which line item we are touching
-                 # Assuming path is like line_items[0].material_id OR line_items[0].material
-                 if "[" in path and "]" in path:
-                     idx = int(path.split("[")[1].split("]")[0])
-                     items = payload.setdefault("line_items", [])
-                     while len(items) <= idx:
-                        items.append({})
-                        
-                     if idx < len(items):
-                         item = items[idx]
-                         item["material_id"] = int(details["id"]) # Ensure ID is set
-                         item["short_text"] = details.get("name")
-                         # Only override price if it's 0 or missing, to allow user override
-                         if not item.get("price"):
-                             item["price"] = float(details.get("price", 0))
-                         item["material_group_id"] = int(details.get("material_group_id", 1))
-                         item["unit_id"] = int(details.get("unit_id", 1))
-                         item["tax_code"] = None 
-                         
-                         # If path was generic "material", redirect to 'material_id' for final set
-                         if path.endswith(".material"):
-                             path = path.replace(".material", ".material_id")
-                             key = "material_id"
-                             val = int(details["id"]) 
+                 idx = field.item_index
+                 items = payload.setdefault("line_items", [])
+                 while len(items) <= idx:
+                    items.append({})
+
+                 item = items[idx]
+                 item["material_id"] = int(details["id"]) # Ensure ID is set
+                 item["short_text"] = details.get("name")
+                 # Only override price if it's 0 or missing, to allow user override
+                 if not item.get("price"):
+                     item["price"] = float(details.get("price", 0))
+                 item["material_group_id"] = int(details.get("material_group_id", 1))
+                 item["unit_id"] = int(details.get("unit_id", 1))
+                 item["tax_code"] = None 
+
+                 # If path was generic "material", redirect to 'material_id' for final set
+                 if field.material_redirect:
+                     field = compile_field_path(field.material_redirect)
+                     val = int(details["id"]) 
         
         # 3. Navigate and Apply
         # Handle 'ADD' to list (special case)
-        if op == "ADD" and (path == "line_items" or path.endswith("line_items")):
+        if op == "ADD" and field.is_line_items:
             # Create new item
             new_item = {
                 "short_text": "",
@@ -482,7 +655,7 @@ class POAgent:
                 new_item.update(val)
             elif is_resolved: # Use resolved material
                 # If the ADD action value was a material name
-                 details = resolution_map.get(raw_val.strip().lower(), {}).get("details")
+                 details = resolution_map.get(lookup_key, {}).get("details")
                  if details:
                      new_item["material_id"] = int(details["id"])
                      new_item["short_text"] = details.get("name")
@@ -493,48 +666,8 @@ class POAgent:
 
             return "Added new line item."
 
-        # Handle Standard Path Navigation
-        parts = path.split('.')
-        target = payload
-        
-        for i, part in enumerate(parts[:-1]):
-            key = part
-            idx = None
-            if "[" in part:
-                 key = part.split("[")[0]
-                 idx = int(part.split("[")[1].rstrip("]"))
-                 
-            if isinstance(target, dict):
-                target = target.setdefault(key, [] if idx is not None else {})
-            
-            if idx is not None:
-                if isinstance(target, list):
-                    while len(target) <= idx:
-                         target.append({}) # Expand list if needed
-                    target = target[idx]
-
-        # Final Set
-        last_part = parts[-1]
-        key = last_part
-        idx = None
-        if "[" in last_part:
-             key = last_part.split("[")[0]
-             idx = int(last_part.split("[")[1].rstrip("]"))
-        
-        if idx is not None:
-            # Setting a list item directly? Rare.
-            pass
-        else:
-            if isinstance(target, dict):
-                # Type Conversion for IDs
-                if key.endswith("_id") and str(val).isdigit():
-                    val = int(val)
-                # Type Conversion for Booleans
-                if isinstance(val, str):
-                    if val.lower() == "true": val = True
-                    elif val.lower() == "false": val = False
-                    
-                target[key] = val
-                return f"Updated {key} to {val}"
-
+        # Compiled path: intermediate dicts/lists are created, IDs and booleans coerced
+        val = field.coerce(val)
+        if field.set(payload, val):
+            return f"Updated {field.key} to {val}"
         return None
@@ -1,6 +1,11 @@
 import streamlit as st
+import html
 import json
+import uuid
 from agent_logic import POAgent
+from bulk_import import BulkImporter, load_rows
+from conversation_store import ConversationConflict, get_conversation_store
+from po_draft import PODraft
 
 # Page Config
 st.set_page_config(page_title="SupplierX AI Agent", layout="wide")
@@ -19,6 +24,11 @@ st.markdown("""
         color: #6B7280;
         margin-bottom: 20px;
     }
+    .trace-row { display: flex; align-items: center; font-size: 11px; line-height: 18px; }
+    .trace-label { width: 42%; overflow: hidden; white-space: nowrap; text-overflow: ellipsis; }
+    .trace-track { position: relative; flex: 1; height: 10px; background: #F3F4F6; }
+    .trace-bar { position: absolute; top: 0; height: 10px; background: #1E3A8A; }
+    .trace-ms { width: 52px; text-align: right; color: #6B7280; }
 </style>
 """, unsafe_allow_html=True)
 
@@ -26,25 +36,66 @@ st.markdown("""
 st.markdown('<div class="main-header">🤖 SupplierX Conversational PO Agent</div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-header">Create Purchase Orders through natural conversation</div>', unsafe_allow_html=True)
 
+GREETING = "Hi 👋 What type of PO do you want to create?\n\n1. **Independent PO**\n2. PR-based PO _(coming soon)_\n3. RFQ-based PO _(coming soon)_"
+
+# Durable conversations (PO_AGENT_CONVERSATION_DB): the id travels in the URL, so a chat
+# resumes after a restart or on any replica
+store = get_conversation_store()
+
+
+def show_conversation(state):
+    st.session_state.conversation_state = state
+    # The transcript of a resumed chat is its conversation history
+    st.session_state.messages = [{"role": "assistant", "content": GREETING}] + [dict(m) for m in state["conversation_history"]]
+
+
 # Initialize Session State
 if "agent" not in st.session_state:
+    # Light per-session object: the SupplierX / Bedrock clients and caches are process-wide
     st.session_state.agent = POAgent()
-    st.session_state.conversation_state = st.session_state.agent.get_initial_state()
-    st.session_state.messages = [
-        {"role": "assistant", "content": "Hi 👋 What type of PO do you want to create?\n\n1. **Independent PO**\n2. PR-based PO _(coming soon)_\n3. RFQ-based PO _(coming soon)_"}
-    ]
+if "conversation_state" not in st.session_state:
+    conversation_id = st.query_params.get("conversation")
+    state = store.load(conversation_id) if store is not None and conversation_id else None
+    if state is None:
+        conversation_id = uuid.uuid4().hex
+        state = st.session_state.agent.get_initial_state()
+    if store is not None:
+        st.query_params["conversation"] = conversation_id
+    st.session_state.conversation_id = conversation_id
+    show_conversation(state)
+
+
+def sync_conversation():
+    # Another tab or replica may have saved turns since this session loaded the chat
+    if store is not None and not store.is_current(st.session_state.conversation_id, st.session_state.conversation_state):
+        state = store.load(st.session_state.conversation_id)
+        if state is not None:
+            show_conversation(state)
+
+
+def save_conversation():
+    if store is None:
+        return
+    try:
+        store.save(st.session_state.conversation_id, st.session_state.conversation_state)
+    except ConversationConflict:
+        # Never overwrite the other writer's turns: show them and ask for this one again
+        sync_conversation()
+        st.session_state.messages.append({"role": "assistant", "content":
+            "⚠️ This chat was updated in another window, so your last message was not saved. Please send it again."})
 
 # Sidebar - Payload Monitor
 with st.sidebar:
     st.header("📄 Live Payload Monitor")
     st.info("This shows the JSON building in real-time.")
     
+    payload = st.session_state.conversation_state["payload"]
+
     # Show payload in collapsible sections
     with st.expander("View Full Payload", expanded=False):
-        st.json(st.session_state.conversation_state["payload"])
+        st.json(payload.to_dict() if isinstance(payload, PODraft) else payload)
     
     # Show key fields
-    payload = st.session_state.conversation_state["payload"]
     st.markdown("### Quick View")
     if payload.get("po_type"):
         st.success(f"✅ PO Type: {payload['po_type']}")
@@ -60,14 +111,60 @@ with st.sidebar:
     # Current State
     current_state = st.session_state.conversation_state["current_step"]
     st.markdown(f"**Current State:** `{current_state}`")
-    
+
+    # Turns answered by the rule-based fast path instead of the model
+    fast_path = st.session_state.agent.fast_path_stats()
+    if fast_path["turns"]:
+        st.caption(f"Fast path: {fast_path['fast_path_turns']}/{fast_path['turns']} turns, ~{fast_path['est_saved_ms'] / 1000:.1f}s of model time saved")
+
+    # Waterfall of the last traced turn (PO_AGENT_TRACING=on, see tracing)
+    trace = st.session_state.agent.last_trace
+    if trace is not None:
+        with st.expander(f"⏱ Last Turn Trace ({trace.duration_ms:.0f} ms)", expanded=False):
+            total = trace.duration_ms or 1.0
+            rows = []
+            for span in trace.waterfall():
+                left = span["offset_ms"] / total * 100
+                width = max(span["duration_ms"] / total * 100, 0.5)
+                details = html.escape(json.dumps(span["attributes"], default=str), quote=True)
+                rows.append(
+                    f'<div class="trace-row" title="{details}">'
+                    f'<span class="trace-label" style="padding-left:{span["depth"] * 10}px">{html.escape(span["name"])}</span>'
+                    f'<span class="trace-track"><span class="trace-bar" style="left:{left:.1f}%;width:{width:.1f}%"></span></span>'
+                    f'<span class="trace-ms">{span["duration_ms"]:.1f} ms</span></div>'
+                )
+            st.markdown("".join(rows), unsafe_allow_html=True)
+            st.caption("Hover a row for its attributes (endpoint, cache hit, tokens...).")
+
     st.divider()
     
     if st.button("🔄 Reset Conversation", type="secondary"):
         del st.session_state.conversation_state
         del st.session_state.messages
+        if "conversation" in st.query_params:
+            del st.query_params["conversation"]
         st.rerun()
 
+    st.divider()
+
+    # Bulk mode: one sheet row per line item, rows grouped into POs (see bulk_import)
+    with st.expander("📥 Bulk Import (CSV / Excel)", expanded=False):
+        sheet = st.file_uploader("PO sheet", type=["csv", "xlsx"])
+        if sheet is not None and st.button("Create POs", type="primary"):
+            with st.spinner("Resolving and submitting..."):
+                try:
+                    rows = load_rows(sheet, sheet.name)
+                    report = BulkImporter(api=st.session_state.agent.api).run(rows)
+                    st.session_state.bulk_report = report
+                except Exception as e:
+                    st.error(f"❌ Bulk import failed: {e}")
+        report = st.session_state.get("bulk_report")
+        if report is not None:
+            st.metric("POs / minute", f"{report.pos_per_minute:.0f}")
+            st.caption(report.summary())
+            st.dataframe(report.rows(), use_container_width=True)
+            st.download_button("Download report", report.to_csv(), file_name="bulk_po_report.csv", mime="text/csv")
+
 # Chat Display
 for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
@@ -75,6 +172,7 @@ for msg in st.session_state.messages:
 
 # Function to handle button click as user input
 def handle_po_type_selection(po_type_text):
+    sync_conversation()
     # Add user message
     st.session_state.messages.append({"role": "user", "content": po_type_text})
     
@@ -86,6 +184,7 @@ def handle_po_type_selection(po_type_text):
                 st.session_state.conversation_state
             )
             st.session_state.messages.append({"role": "assistant", "content": response})
+            save_conversation()
         except Exception as e:
             error_msg = f"❌ Error: {str(e)}"
             st.session_state.messages.append({"role": "assistant", "content": error_msg})
@@ -107,23 +206,24 @@ if len(st.session_state.messages) == 1:
 
 # User Input
 if prompt := st.chat_input("Type your message here..."):
+    sync_conversation()
     # Add user message
     st.session_state.messages.append({"role": "user", "content": prompt})
     
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Process with agent
+    # Process with agent (streamed: text appears as soon as the model starts answering)
     with st.chat_message("assistant"):
         with st.spinner("Thinking..."):
             try:
-                response = st.session_state.agent.process_input(
+                response = st.write_stream(st.session_state.agent.process_input_stream(
                     prompt, 
                     st.session_state.conversation_state
-                )
+                ))
                 
-                st.markdown(response)
                 st.session_state.messages.append({"role": "assistant", "content": response})
+                save_conversation()
                 
             except Exception as e:
                 error_msg = f"❌ Error: {str(e)}\n\nPlease try again or type 'Hi' to restart."
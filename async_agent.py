@@ -0,0 +1,203 @@
+import asyncio
+import json
+import time
+
+import tracing
+from agent_logic import POAgent, ANALYSIS_ERROR_RESPONSE
+from async_bedrock_service import AsyncBedrockService
+from async_mock_api import AsyncMockAPI
+
+
+class AsyncPOAgent(POAgent):
+    """
+    asyncio variant of POAgent. Turn logic (action application, payload building,
+    missing-field checks, response templates) is inherited; only the I/O steps -
+    analysis, entity lookups, create_po and response generation - are awaited, so
+    many conversations can share one event loop. process_input_stream is an async
+    generator of response chunks.
+    """
+
+    def __init__(self, fused_turn=None, api=None, nlu=None, fast_path=None):
+        super().__init__(fused_turn=fused_turn, api=api or AsyncMockAPI(), nlu=nlu or AsyncBedrockService(), fast_path=fast_path)
+
+    async def process_input(self, user_text, state):
+        with tracing.trace("turn", chars=len(user_text), fused=self.fused_turn) as turn:
+            response = await self._process_input(user_text, state)
+        self.last_trace = turn.trace
+        return response
+
+    async def _process_input(self, user_text, state):
+        current_payload = state["payload"]
+
+        # 1. Analyze User Input (rules first, model when they are not confident)
+        analysis = self._fast_path_analysis(user_text, state)
+        if analysis is None:
+            started = time.perf_counter()
+            try:
+                with tracing.span("analyze.model", fused=self.fused_turn):
+                    if self.fused_turn:
+                        analysis = await self.nlu.analyze_and_respond(user_text, current_payload, state["conversation_history"], context_state=state)
+                    else:
+                        analysis = await self.nlu.analyze_user_input(user_text, current_payload, state["conversation_history"], context_state=state)
+            except Exception as e:
+                print(f"Analysis Error: {e}")
+                return ANALYSIS_ERROR_RESPONSE
+            self._record_model_analysis(started)
+
+        execution_results, final_response_override = await self._execute_turn(state, analysis)
+
+        # 5. Generate Response
+        with tracing.span("respond") as span:
+            if final_response_override:
+                response = final_response_override
+                span.set(source="override")
+            else:
+                missing_fields = self.identify_missing_fields(current_payload)
+                response = None
+                if self.fused_turn or analysis.get("source") == "rules":
+                    response = self._render_response_template(analysis.get("response_template"), execution_results, missing_fields)
+                    span.set(source="template")
+                if response is None:
+                    span.set(source="model")
+                    response = await self.nlu.generate_response(user_text, analysis, execution_results, current_payload, missing_fields)
+
+        self._record_turn(state, user_text, response)
+        return response
+
+    async def process_input_stream(self, user_text, state):
+        """
+        Async generator variant of POAgent.process_input_stream: yields response text
+        chunks. Entity lookups start (as a task) once items_to_resolve has streamed in.
+        """
+        with tracing.trace("turn", chars=len(user_text), fused=self.fused_turn, stream=True) as turn:
+            async for chunk in self._process_input_stream(user_text, state):
+                yield chunk
+        self.last_trace = turn.trace
+
+    async def _process_input_stream(self, user_text, state):
+        current_payload = state["payload"]
+        early = {}
+
+        def start_resolution(items):
+            early["items"] = items
+            early["task"] = asyncio.ensure_future(self._resolve_entities(items, current_payload))
+
+        # 1. Analyze User Input (rules first, otherwise streamed from the model)
+        resolution_map = None
+        analysis = self._fast_path_analysis(user_text, state)
+        if analysis is None:
+            started = time.perf_counter()
+            try:
+                with tracing.span("analyze.model", fused=self.fused_turn, stream=True):
+                    analysis = await self.nlu.analyze_user_input_stream(
+                        user_text, current_payload, state["conversation_history"],
+                        on_items_to_resolve=start_resolution, fused=self.fused_turn, context_state=state
+                    )
+                # Only reuse the early lookups if the final analysis agrees on what to resolve
+                if early and early["items"] == analysis.get("items_to_resolve", []):
+                    resolution_map = await early["task"]
+            except Exception as e:
+                print(f"Analysis Error: {e}")
+                yield ANALYSIS_ERROR_RESPONSE
+                return
+            finally:
+                if early and resolution_map is None:
+                    early["task"].cancel()
+            self._record_model_analysis(started)
+
+        execution_results, final_response_override = await self._execute_turn(state, analysis, resolution_map)
+
+        # 5. Generate Response (streamed)
+        chunks = []
+        with tracing.span("respond", stream=True) as span:
+            if final_response_override:
+                span.set(source="override")
+                chunks.append(final_response_override)
+                yield final_response_override
+            else:
+                missing_fields = self.identify_missing_fields(current_payload)
+                response = None
+                if self.fused_turn or analysis.get("source") == "rules":
+                    response = self._render_response_template(analysis.get("response_template"), execution_results, missing_fields)
+                if response is not None:
+                    span.set(source="template")
+                    chunks.append(response)
+                    yield response
+                else:
+                    span.set(source="model")
+                    async for chunk in self.nlu.generate_response_stream(user_text, analysis, execution_results, current_payload, missing_fields):
+                        chunks.append(chunk)
+                        yield chunk
+
+        self._record_turn(state, user_text, "".join(chunks))
+
+    async def _execute_turn(self, state, analysis, resolution_map=None):
+        print(f"DEBUG: Analysis Result: {json.dumps(analysis)}")
+
+        # 2. Resolve Entities
+        if resolution_map is None:
+            resolution_map = await self._resolve_entities(analysis.get("items_to_resolve", []), state["payload"])
+
+        execution_results, final_response_override, api_payload = self._apply_analysis(state, analysis, resolution_map)
+
+        if api_payload is not None:
+            with tracing.span("create_po", line_items=len(api_payload.get("line_items", []))) as span:
+                result = await self.api.create_po(api_payload)
+                span.set(success=bool(result.get("success") or result.get("po_number")), po_number=result.get("po_number"))
+            self._handle_submission_result(state, result, execution_results)
+
+        return execution_results, final_response_override
+
+    async def _resolve_entities(self, to_resolve, current_payload):
+        """Same dependency order as POAgent._resolve_entities: org first, then the rest concurrently."""
+        with tracing.span("resolve", entities=len(to_resolve)):
+            return await self._resolve_all(to_resolve, current_payload)
+
+    async def _resolve_all(self, to_resolve, current_payload):
+        results = {}
+        temp_org_id = current_payload.get("purchase_org_id")
+
+        # 1. Resolve Purchase Org First
+        for item in to_resolve:
+            kind = item.get("entity_type", "").lower()
+            text = item.get("value")
+            if text and ("org" in kind or "organization" in kind):
+                res = await self._resolve_one(kind, text, temp_org_id)
+                if res["found"]:
+                    temp_org_id = res["id"]
+                results[str(text).strip().lower()] = res
+
+        # 2. Resolve Others concurrently (bounded)
+        pending = []
+        for item in to_resolve:
+            text = item.get("value")
+            kind = item.get("entity_type", "").lower()
+            if not text or str(text).strip().lower() in results: continue
+            pending.append((kind, text))
+
+        semaphore = asyncio.Semaphore(max(1, self.resolve_concurrency))
+
+        async def bounded(kind, text):
+            async with semaphore:
+                return await self._resolve_one(kind, text, temp_org_id)
+
+        resolved = await asyncio.gather(*(bounded(kind, text) for kind, text in pending))
+        for (kind, text), res in zip(pending, resolved):
+            results[str(text).strip().lower()] = res
+        return results
+
+    async def _resolve_one(self, kind, text, org_id):
+        res = {"found": False, "id": None, "details": None}
+        plan = self._lookup_plan(kind, text, org_id)
+        if plan is None:
+            return res
+
+        entity, method, kwargs = plan
+        with tracing.span("lookup", entity=entity, text=text, method=method) as span:
+            try:
+                matches = await getattr(self.api, method)(**kwargs)
+                res = self._pick_match(entity, text, matches, org_id) or res
+            except Exception as e:
+                print(f"Error resolving {kind} '{text}': {e}")
+            span.set(found=res["found"])
+        return res
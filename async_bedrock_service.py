@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+import json
+import os
+from urllib.parse import quote
+
+import httpx
+
+import tracing
+from bedrock_service import PROMPTS, DEFAULT_RESPONSE, get_bedrock_service
+from structured_output import ANALYSIS_TOOL, FUSED_ANALYSIS_TOOL, RESPONSE_TOOL
+
+
+class AsyncBedrockService:
+    """
+    asyncio counterpart of the BedrockService methods used on a chat turn.
+
+    Prompts, request bodies and response parsing are reused from BedrockService so the
+    payload semantics are identical; only transport differs. boto3 has no asyncio
+    support, so with the live backend the InvokeModel call is SigV4-signed with botocore
+    and sent with a pooled httpx.AsyncClient instead of blocking a thread per call.
+    Other backends (BEDROCK_BACKEND=record / replay / synthetic, or backend=...) go
+    through the service's model client: awaited directly when it has ainvoke_model
+    (synthetic), otherwise in a worker thread.
+
+    The streaming calls run BedrockService's streaming methods in a worker thread and
+    hand their chunks (and the items_to_resolve callback) back to the event loop.
+    """
+
+    def __init__(self, service=None, http_client=None, backend=None):
+        self.service = service or get_bedrock_service()
+        self.backend = (backend or os.getenv("BEDROCK_BACKEND", "live")).lower()
+        self.model_id = self.service.model_id
+        self.region = os.getenv('AWS_REGION')
+        self._credentials = None
+        self._http = http_client
+
+    @property
+    def http(self):
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=5.0))
+        return self._http
+
+    @property
+    def credentials(self):
+        # boto3 is imported and credentials resolved on the first live call, not at import
+        # or construction: the stub backends never need them (see model_backends.create_live_client)
+        if self._credentials is None:
+            import boto3
+            self._credentials = boto3.Session(
+                aws_access_key_id=os.getenv('AWS_ACCESS_KEY'),
+                aws_secret_access_key=os.getenv('AWS_SECRET_KEY'),
+                region_name=self.region
+            ).get_credentials()
+        return self._credentials
+
+    def _signed_request(self, body):
+        from botocore.auth import SigV4Auth
+        from botocore.awsrequest import AWSRequest
+
+        url = f"https://bedrock-runtime.{self.region}.amazonaws.com/model/{quote(str(self.model_id), safe='')}/invoke"
+        request = AWSRequest(method="POST", url=url, data=body,
+                             headers={"Content-Type": "application/json", "Accept": "application/json"})
+        SigV4Auth(self.credentials.get_frozen_credentials(), "bedrock", self.region).add_auth(request)
+        return url, dict(request.headers.items())
+
+    async def _invoke(self, body):
+        """Response body (parsed) of one InvokeModel call."""
+        if self.backend == "live":
+            url, headers = self._signed_request(body)
+            response = await self.http.post(url, content=body, headers=headers)
+            response.raise_for_status()
+            return response.json()
+        client = self.service.client
+        if hasattr(client, "ainvoke_model"):
+            response = await client.ainvoke_model(modelId=self.model_id, body=body)
+        else:
+            response = await asyncio.to_thread(client.invoke_model, modelId=self.model_id, body=body)
+        return json.loads(response['body'].read())
+
+    async def _call_claude(self, system_prompt, user_text, method=None, tool=None):
+        """Async equivalent of BedrockService._call_claude (same body, same parsing, same response cache)."""
+        with tracing.span("llm", method=method, tool=tool["name"] if tool else None) as span:
+            cached = self.service._cache_lookup(method, system_prompt, user_text)
+            if cached:
+                span.set(cache_hit=cached[2] is not None)
+            if cached and cached[2] is not None:
+                return cached[2]
+            body = json.dumps(self.service._build_request(system_prompt, user_text, tool))
+            try:
+                result = self.service._result_from_body(await self._invoke(body))
+                if cached:
+                    self.service.response_cache.store(cached[0], cached[1], result)
+                return result
+            except Exception as e:
+                print(f"Error calling Bedrock: {e}")
+                span.set(error=str(e))
+                return {"error": str(e)}
+
+    async def analyze_user_input(self, user_text, current_payload, conversation_history, context_state=None):
+        system_prompt = self.service._build_analysis_prompt()
+        return await self._call_claude(system_prompt, self.service._build_analysis_context(user_text, current_payload, conversation_history, context_state), method="analyze_user_input", tool=ANALYSIS_TOOL)
+
+    async def analyze_and_respond(self, user_text, current_payload, conversation_history, context_state=None):
+        system_prompt = PROMPTS.get("analysis_fused")
+        return await self._call_claude(system_prompt, self.service._build_analysis_context(user_text, current_payload, conversation_history, context_state), method="analyze_and_respond", tool=FUSED_ANALYSIS_TOOL)
+
+    async def generate_response(self, user_text, analysis_result, execution_results, current_payload, missing_fields):
+        system_prompt, user_message = self.service._build_response_messages(user_text, analysis_result, execution_results, current_payload, missing_fields)
+        result = await self._call_claude(system_prompt, user_message, tool=RESPONSE_TOOL)
+        return result.get("response", DEFAULT_RESPONSE)
+
+    async def analyze_user_input_stream(self, user_text, current_payload, conversation_history, on_items_to_resolve=None, fused=False, context_state=None):
+        """Async BedrockService.analyze_user_input_stream; on_items_to_resolve is called on the event loop."""
+        callback = None
+        if on_items_to_resolve is not None:
+            loop = asyncio.get_running_loop()
+            callback = lambda items: loop.call_soon_threadsafe(on_items_to_resolve, items)  # noqa: E731
+        return await asyncio.to_thread(self.service.analyze_user_input_stream, user_text, current_payload, conversation_history,
+                                       on_items_to_resolve=callback, fused=fused, context_state=context_state)
+
+    async def generate_response_stream(self, user_text, analysis_result, execution_results, current_payload, missing_fields):
+        """Async generator over BedrockService.generate_response_stream."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        def produce():
+            try:
+                for chunk in self.service.generate_response_stream(user_text, analysis_result, execution_results, current_payload, missing_fields):
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        # Copy the context so the stream's spans land in the current trace
+        producer = loop.run_in_executor(None, contextvars.copy_context().run, produce)
+        while (chunk := await queue.get()) is not done:
+            yield chunk
+        await producer
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import weakref
+
+import httpx
+
+from http_transport import TransportConfig
+from master_data_cache import get_master_data_cache
+from catalog_index import get_local_catalog
+from single_flight import get_single_flight
+from mock_api import (
+    BASE_URL, MockAPI, _auth_headers, _org_filter_payload,
+    ALTERNATE_SUPPLIER_ENDPOINT, SUPPLIERS_ENDPOINT, MATERIALS_ENDPOINT, SERVICES_ENDPOINT,
+    CREATE_PO_ENDPOINT, PURCHASE_ORGS_ENDPOINT, PURCHASE_GROUPS_ENDPOINT, PLANTS_ENDPOINT,
+    CURRENCIES_ENDPOINT, PAYMENT_TERMS_ENDPOINT, INCOTERMS_ENDPOINT, PROJECTS_ENDPOINT,
+    TAX_CODES_ENDPOINT,
+    _normalize_suppliers, _normalize_alternate_supplier, _normalize_materials, _normalize_services,
+    _normalize_purchase_orgs, _normalize_purchase_groups, _normalize_plants, _normalize_currencies,
+    _normalize_payment_terms, _normalize_incoterms, _normalize_projects, _normalize_tax_codes,
+)
+
+# One pooled httpx.AsyncClient per event loop, shared by every AsyncMockAPI on that loop
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(config=None):
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        config = config or TransportConfig()
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=config.pool_maxsize, max_keepalive_connections=config.pool_maxsize),
+            timeout=httpx.Timeout(config.read_timeout, connect=config.connect_timeout),
+        )
+        _clients[loop] = client
+    return client
+
+
+class AsyncMockAPI:
+    """
+    asyncio counterpart of MockAPI: same endpoints, request payloads, retry policy,
+    master-data cache and normalized results, but non-blocking so many conversations
+    can share one event loop.
+    """
+
+    # Building the create_po body is pure and shared with the sync client
+    _build_create_po_request = MockAPI._build_create_po_request
+
+    def __init__(self, client=None, base_url=None, cache=None, config=None, catalog=None, single_flight=None):
+        # requests silently drops None-valued headers; httpx rejects them
+        self.headers = {k: v for k, v in _auth_headers().items() if v is not None}
+        self.config = config or TransportConfig()
+        self._client = client
+        self.base_url = base_url or BASE_URL
+        # Shared TTL/LRU cache for reference data; pass cache=False to always hit the backend
+        self.cache = None if cache is False else (cache or get_master_data_cache())
+        # Shared local material/supplier index; searches are in-memory, loading is done by its own sync client
+        self.catalog = None if catalog is False else (catalog or get_local_catalog())
+        # Identical lookups in flight from other tasks on this loop share one request
+        self.single_flight = None if single_flight is False else (single_flight or get_single_flight())
+
+    @property
+    def client(self):
+        return self._client or get_async_client(self.config)
+
+    async def _request(self, method, endpoint, idempotent=False, **kwargs):
+        attempts = 1 + (self.config.max_retries if idempotent else 0)
+        url = f"{self.base_url}{endpoint}"
+        for attempt in range(attempts):
+            last_try = attempt == attempts - 1
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if last_try:
+                    raise
+            else:
+                if last_try or response.status_code not in self.config.retry_statuses:
+                    return response
+            await asyncio.sleep(self.config.backoff_factor * (2 ** attempt))
+
+    async def _coalesced(self, method, endpoint, payload, call):
+        if self.single_flight is None:
+            return await call()
+        key = (method, self.base_url + endpoint, json.dumps(payload, sort_keys=True, default=str))
+        return await self.single_flight.ado(key, call)
+
+    async def _get(self, endpoint, params=None):
+        return await self._coalesced("GET", endpoint, params, lambda: self._send_get(endpoint, params))
+
+    async def _send_get(self, endpoint, params=None):
+        try:
+            response = await self._request("GET", endpoint, idempotent=True, headers=self.headers, params=params)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            print(f"API Error ({endpoint}): {e}")
+            return []
+
+    async def _post(self, endpoint, payload, idempotent=True):
+        if not idempotent:
+            return await self._send_post(endpoint, payload, idempotent)
+        return await self._coalesced("POST", endpoint, payload, lambda: self._send_post(endpoint, payload, idempotent))
+
+    async def _send_post(self, endpoint, payload, idempotent=True):
+        try:
+            response = await self._request("POST", endpoint, idempotent=idempotent, headers=self.headers, json=payload)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            try:
+                error_body = e.response.json()
+            except Exception:
+                error_body = e.response.text
+            print(f"API Error ({endpoint}): {e}")
+            return {"success": False, "error": True, "message": str(e), "details": error_body}
+        except Exception as e:
+            print(f"API Error ({endpoint}): {e}")
+            return {"success": False, "error": True, "message": str(e)}
+
+    async def _cached_post(self, endpoint, payload, normalize):
+        async def load():
+            return normalize(await self._post(endpoint, payload))
+        if self.cache is None:
+            return await load()
+        return await self.cache.aget_or_load(endpoint, payload, load, self.base_url)
+
+    # --- Wrapper Methods matching MockAPI ---
+
+    def get_po_main_types(self):
+        return MockAPI.get_po_main_types(self)
+
+    def get_po_sub_types(self):
+        return MockAPI.get_po_sub_types(self)
+
+    async def search_suppliers(self, query=None, limit=10):
+        if query and self.catalog is not None:
+            local = self.catalog.suppliers.search(query, k=limit or 10)
+            if local:
+                return local
+        payload = {"search": query} if query else {}
+        results = _normalize_suppliers(await self._post(SUPPLIERS_ENDPOINT, payload))
+        if query and self.catalog is not None:
+            self.catalog.suppliers.upsert(results)
+        return results[:limit]
+
+    async def get_alternate_supplier_details(self, vendor_id):
+        return _normalize_alternate_supplier(await self._get(f"{ALTERNATE_SUPPLIER_ENDPOINT}{vendor_id}"))
+
+    async def get_purchase_orgs(self):
+        return await self._cached_post(PURCHASE_ORGS_ENDPOINT, {}, _normalize_purchase_orgs)
+
+    async def get_purchase_groups(self, org_ids=None):
+        return await self._cached_post(PURCHASE_GROUPS_ENDPOINT, _org_filter_payload(org_ids), _normalize_purchase_groups)
+
+    async def get_plants(self, org_ids=None):
+        return await self._cached_post(PLANTS_ENDPOINT, _org_filter_payload(org_ids), _normalize_plants)
+
+    async def get_currencies(self):
+        return await self._cached_post(CURRENCIES_ENDPOINT, {}, _normalize_currencies)
+
+    async def get_payment_terms(self):
+        return await self._cached_post(PAYMENT_TERMS_ENDPOINT, {}, _normalize_payment_terms)
+
+    async def get_incoterms(self):
+        return await self._cached_post(INCOTERMS_ENDPOINT, {}, _normalize_incoterms)
+
+    async def get_projects(self):
+        return await self._cached_post(PROJECTS_ENDPOINT, {}, _normalize_projects)
+
+    async def get_materials(self, plant_id=None, query=None):
+        if self.catalog is not None:
+            local = self.catalog.materials.search(query, k=50) if query else self.catalog.materials.all()
+            if local:
+                return local
+        payload = {"search": query} if query else {}
+        results = _normalize_materials(await self._post(MATERIALS_ENDPOINT, payload))
+        if query and self.catalog is not None:
+            self.catalog.materials.upsert(results)
+        return results
+
+    async def get_services(self, query=None):
+        payload = {"search": query} if query else {}
+        return _normalize_services(await self._post(SERVICES_ENDPOINT, payload))
+
+    async def get_tax_codes(self):
+        return await self._cached_post(TAX_CODES_ENDPOINT, {}, _normalize_tax_codes)
+
+    async def create_po(self, payload):
+        headers, body = self._build_create_po_request(payload)
+        response = None
+        try:
+            # Not idempotent: never retried automatically
+            response = await self._request("POST", CREATE_PO_ENDPOINT, headers=headers, content=body.aiter_chunks())
+            print("Create PO Status Code:", response.status_code)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            err_msg = str(e)
+            if response is not None:
+                try:
+                    return response.json()
+                except Exception:
+                    err_msg += f" | Body: {response.text}"
+            print(f"API Error (Create PO): {err_msg}")
+            return {"success": False, "error": True, "message": err_msg}
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
@@ -1,54 +1,291 @@
 
-import boto3
 import json
 import os
 import re
+import threading
 from dotenv import load_dotenv
+from context_builder import ContextBuilder
+from model_backends import get_model_client
+from po_draft import PODraft
+from prompt_registry import PromptRegistry
+from response_cache import get_response_cache
+from streaming import IncrementalJSONScanner, JSONStringFieldStreamer
+from structured_output import (
+    ANALYSIS_TOOL, FUSED_ANALYSIS_TOOL, PO_INTENT_TOOL, RESPONSE_TOOL, parse_model_json, tool_request_fields,
+)
+import tracing
 
 load_dotenv()
 
+DEFAULT_RESPONSE = "I've updated the details. What would you like to do next?"
+
+# Placeholders the agent fills locally in fused-turn mode (see POAgent._render_response_template)
+RESPONSE_TEMPLATE_PLACEHOLDERS = ("{updates}", "{issues}", "{missing}", "{next_step}")
+
+FUSED_TURN_INSTRUCTIONS = """
+
+        RESPONSE TEMPLATE (FUSED TURN):
+        Also include a "response_template" string in the same JSON object. It is the reply
+        shown to the user AFTER your actions are applied. You do not yet know the outcome of
+        entity lookups or submission, so write it with these placeholders instead of facts:
+        - {updates}   : what was added/updated this turn
+        - {issues}    : lookup failures or submission errors (may be empty)
+        - {missing}   : fields still missing (may be empty)
+        - {next_step} : the closing question / PO number announcement
+        Rules: be concise, no filler phrases, do not list field values yourself, and always
+        end with {next_step}. Example: "{updates} {issues} {next_step}"
+        Use no other curly-brace placeholders.
+"""
+
+# Streamed analyses are consumed incrementally; asking for items_to_resolve first lets
+# entity lookups start while the model is still writing the actions.
+STREAMING_ORDER_INSTRUCTIONS = """
+
+        OUTPUT ORDER: Emit "intents" first, then "items_to_resolve", then "actions", then the rest.
+"""
+
+# Appended to the agent prompt file for analysis calls
+ANALYSIS_INSTRUCTIONS = """
+        
+        INSTRUCTIONS:
+        Analyze the latest user input based on the payload and history.
+        
+        CRITICAL RE-SCAN RULE:
+        If user says "yes", "add them", "proceed", or "do it", and fields are missing:
+        1. SCAN the 'conversation_history' (and 'earlier_conversation', if present) for any entities or values mentioned previously but not in 'current_payload'.
+        2. GENERATE actions to add those missing values immediately.
+
+        CONTEXT NOTES:
+        - 'current_payload' lists only filled fields. 'payload_changes' lists what changed since the previous turn.
+        - If 'line_items_total' is present, only some line items are shown; each shown item carries its "index" for line_items[i] paths.
+        
+        OUTPUT FORMAT:
+        Return a JSON object with:
+        {
+            "intents": ["INTENT_NAME", ...],
+            "actions": [
+                {
+                    "operation": "ADD|UPDATE|REMOVE", 
+                    "field_path": "payload_key", 
+                    "value": "extracted value"
+                }
+            ],
+            
+            FIELD_PATH_REFERENCE:
+            - po_type (Values: "regularPurchase", "service", etc.)
+            - vendor_id (Supplier ID or name)
+            - purchase_org_id (Org ID or name)
+            - plant_id (Plant ID or name)
+            - purchase_grp_id (Group ID or name)
+            - po_date (YYYY-MM-DD)
+            - validityEnd (YYYY-MM-DD)
+            - delivery_date (YYYY-MM-DD)
+            - currency (e.g., INR)
+            - line_items[i].material_id
+            - line_items[i].quantity
+            - line_items[i].price
+            - line_items[i].short_text
+            - line_items[i].plant_id (if distinct)
+
+            "items_to_resolve": [
+                {"entity_type": "supplier|material|plant|org|group|project|payment_term|incoterm", "value": "raw text"}
+            ],
+            "thought_process": "Brief explanation of reasoning"
+        }
+        """
+
+RESPONSE_SYSTEM_PROMPT = """You are the Voice of the PO Agent. You are efficient, direct, and execution-focused.
+        
+        Your Goal: Generate a response that confirms ACTIONS TAKEN and states MISSING INFO.
+        
+        INPUTS:
+        - User Input: What the user just said.
+        - Analysis: What you understood.
+        - Execution Results: What specifically changed (e.g. "Supplier found and set", "Line item 1 created").
+        - Current Payload: The current state.
+        - Missing Fields: List of fields still needed.
+        
+        STRICT RESPONSE RULES:
+        1. DO NOT use these phrases:
+           - "Let me work on that"
+           - "Would you like to proceed?"
+           - "I need to check..."
+           - "Is there anything else?"
+        
+        2. STRUCTURE your response:
+           - First: Summarize exactly what was added/updated based on 'Execution Results'.
+           - Second: If there are errors (e.g. material not found), state them clearly.
+           - Third: List what is still MISSING (from 'Missing Fields').
+           - Fourth: If 'Missing Fields' is empty, ask EXACTLY: "Everything is ready. Shall I create the purchase order now?"
+           
+        3. BE CONCISE.
+           Example: "I've added the supplier Smartsaa, purchase org, plant, and a line item for 'scooty'. I still need the Purchase Group."
+           
+        4. If CONFIRM_PO was successful:
+           - Announce the PO Number clearly.
+        
+        OUTPUT FORMAT:
+        Return JSON: {"response": "Your message string here"}
+        """
+
+PROMPT_FILE = "supplierx_po_agent_prompt.md"
+
+# Prompts at least this long are sent as a cacheable system block. Shorter ones are below
+# the model's minimum cacheable prefix (~1024 tokens) and are sent as plain strings.
+PROMPT_CACHE_MIN_CHARS = 4000
+
+
+def _prompt_path():
+    # Try absolute path first, then relative
+    prompt_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), PROMPT_FILE)
+    return prompt_path if os.path.exists(prompt_path) else PROMPT_FILE
+
+
+def _load_agent_prompt():
+    try:
+        with open(_prompt_path(), "r", encoding='utf-8') as f:
+            return f.read()
+    except Exception as e:
+        print(f"Error loading prompt: {e}")
+        return "You are a Purchase Order Agent."
+
+
+# System prompts are assembled once and rebuilt only when the prompt file changes
+PROMPTS = PromptRegistry()
+_PROMPT_FILES = (_prompt_path(),)
+PROMPTS.register("analysis", lambda: _load_agent_prompt() + ANALYSIS_INSTRUCTIONS, _PROMPT_FILES)
+PROMPTS.register("analysis_fused", lambda: PROMPTS.get("analysis") + FUSED_TURN_INSTRUCTIONS, _PROMPT_FILES)
+PROMPTS.register("analysis_stream", lambda: PROMPTS.get("analysis") + STREAMING_ORDER_INSTRUCTIONS, _PROMPT_FILES)
+PROMPTS.register("analysis_stream_fused", lambda: PROMPTS.get("analysis_fused") + STREAMING_ORDER_INSTRUCTIONS, _PROMPT_FILES)
+PROMPTS.register("response", lambda: RESPONSE_SYSTEM_PROMPT)
+
 class BedrockService:
-    def __init__(self):
-        self.client = boto3.client(
-            'bedrock-runtime',
-            region_name=os.getenv('AWS_REGION'),
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_KEY')
-        )
+    def __init__(self, client=None, cache=None):
+        # Model backend (live / record / replay / synthetic, see model_backends); defaults to the
+        # process-wide client, fetched on first use
+        self._client = client
+        # Shared cache of deterministic results for opted-in methods; pass cache=False to always call the model
+        self.response_cache = None if cache is False else (cache or get_response_cache())
         self.model_id = os.getenv('ANTHROPIC_MODEL_ID')
-
-    def _call_claude(self, system_prompt, user_text):
-        """Internal method to call Claude API"""
-        payload = {
+        # Mark long system prompts as a prompt-cache block (disable for models without caching)
+        self.prompt_cache = os.getenv('BEDROCK_PROMPT_CACHE', 'on').lower() not in ('off', '0', 'false')
+        # Force a tool call for the JSON-returning calls (see structured_output); off = plain text JSON
+        self.structured_output = os.getenv('BEDROCK_STRUCTURED_OUTPUT', 'on').lower() not in ('off', '0', 'false')
+        # How model results were obtained: tool_use input, text JSON parsed as-is / repaired, or unparseable
+        self.parse_stats = {"tool_use": 0, "ok": 0, "repaired": 0, "failed": 0}
+        # Token usage reported by the model, summed over calls
+        self.usage = {"input_tokens": 0, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0, "output_tokens": 0}
+        # Token-budgeted analysis context (PO_AGENT_CONTEXT_TOKENS)
+        self.context_builder = ContextBuilder()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_model_client()
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
+    def _build_request(self, system_prompt, user_text, tool=None):
+        system = system_prompt
+        if self.prompt_cache and len(system_prompt) >= PROMPT_CACHE_MIN_CHARS:
+            # Static system prompt as a cached prefix; only the per-turn context is billed in full
+            system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+        request = {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 1500,
-            "system": system_prompt,
+            "system": system,
             "messages": [{"role": "user", "content": user_text}],
             "temperature": 0
         }
-        
-        try:
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(payload)
-            )
-            
-            result_body = json.loads(response['body'].read())
-            content_text = result_body['content'][0]['text']
+        if tool is not None and self.structured_output:
+            request.update(tool_request_fields(tool))
+        return request
+
+    def _record_usage(self, usage):
+        span = tracing.current_span()
+        for key in self.usage:
+            tokens = (usage or {}).get(key) or 0
+            self.usage[key] += tokens
+            if tokens:
+                span.add(key, tokens)
+
+    def _parse_json_text(self, content_text):
+        # Tolerant: fences, trailing commas and truncated replies are recovered where possible
+        result, status = parse_model_json(content_text)
+        self.parse_stats[status] += 1
+        if result is None:
+            raise ValueError(f"No JSON object in model reply: {content_text[:80]!r}")
+        return result
+
+    def _result_from_body(self, result_body):
+        """Parsed result of an InvokeModel response body: the forced tool call's input, else the text JSON."""
+        self._record_usage(result_body.get('usage'))
+        content = result_body.get('content', [])
+        for block in content:
+            if block.get('type') == 'tool_use':
+                self.parse_stats["tool_use"] += 1
+                return block['input']
+        return self._parse_json_text("".join(block.get('text', '') for block in content))
+
+    def _cache_lookup(self, method, system_prompt, user_text):
+        """(key, values, result) from the response cache, or None when method is not cached."""
+        if method is None or self.response_cache is None or not self.response_cache.enabled_for(method):
+            return None
+        return self.response_cache.lookup(method, self.model_id, system_prompt, user_text)
+
+    def _call_claude(self, system_prompt, user_text, method=None, tool=None):
+        """Internal method to call Claude API (served from the response cache when method opts in)"""
+        with tracing.span("llm", method=method, tool=tool["name"] if tool else None) as span:
+            cached = self._cache_lookup(method, system_prompt, user_text)
+            if cached:
+                span.set(cache_hit=cached[2] is not None)
+            if cached and cached[2] is not None:
+                return cached[2]
+            payload = self._build_request(system_prompt, user_text, tool)
             
-            # Extract JSON from the text
-            if "```json" in content_text:
-                json_str = content_text.split("```json")[1].split("```")[0].strip()
-            elif "{" in content_text:
-                json_str = content_text[content_text.find('{'):content_text.rfind('}')+1]
-            else:
-                json_str = "{}"
-            
-            return json.loads(json_str)
-            
-        except Exception as e:
-            print(f"Error calling Bedrock: {e}")
-            return {"error": str(e)}
+            try:
+                response = self.client.invoke_model(
+                    modelId=self.model_id,
+                    body=json.dumps(payload)
+                )
+                
+                result = self._result_from_body(json.loads(response['body'].read()))
+                if cached:
+                    self.response_cache.store(cached[0], cached[1], result)
+                return result
+                
+            except Exception as e:
+                print(f"Error calling Bedrock: {e}")
+                span.set(error=str(e))
+                return {"error": str(e)}
+
+    def _stream_claude(self, system_prompt, user_text, tool=None):
+        """Streaming variant of _call_claude: yields raw text (or tool input JSON) deltas as the model generates them."""
+        with tracing.span("llm", stream=True, tool=tool["name"] if tool else None):
+            yield from self._stream_deltas(system_prompt, user_text, tool)
+
+    def _stream_deltas(self, system_prompt, user_text, tool):
+        payload = self._build_request(system_prompt, user_text, tool)
+        response = self.client.invoke_model_with_response_stream(
+            modelId=self.model_id,
+            body=json.dumps(payload)
+        )
+        for event in response['body']:
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+            data = json.loads(chunk['bytes'])
+            if data.get('type') == 'content_block_delta' and data['delta'].get('type') == 'text_delta':
+                yield data['delta']['text']
+            elif data.get('type') == 'content_block_delta' and data['delta'].get('type') == 'input_json_delta':
+                yield data['delta']['partial_json']
+            elif data.get('type') == 'message_start':
+                self._record_usage(data.get('message', {}).get('usage'))
+            elif data.get('type') == 'message_delta':
+                self._record_usage({"output_tokens": data.get('usage', {}).get('output_tokens')})
 
     def extract_po_intent(self, user_text, conversation_history=None):
         """
@@ -90,7 +327,7 @@ Output: {"material_name": "laptops", "quantity": 10, "supplier_name": "Dell"}
 
 Return ONLY valid JSON. If a field is not mentioned, omit it."""
 
-        return self._call_claude(system_prompt, user_text)
+        return self._call_claude(system_prompt, user_text, method="extract_po_intent", tool=PO_INTENT_TOOL)
 
     def extract_date_with_context(self, user_text, last_question=None):
         """
@@ -130,7 +367,7 @@ Output: {{"date": "2025-12-30", "purpose": "unclear"}}
 
 Return ONLY valid JSON."""
 
-        return self._call_claude(system_prompt, user_text)
+        return self._call_claude(system_prompt, user_text, method="extract_date_with_context")
 
     def extract_price_from_text(self, user_text):
         """
@@ -173,7 +410,7 @@ Output: {"price": null}
 
 Return ONLY valid JSON with numeric price or null."""
 
-        result = self._call_claude(system_prompt, user_text)
+        result = self._call_claude(system_prompt, user_text, method="extract_price_from_text")
         return result.get("price")
 
     def extract_field_value(self, user_text, field_name, last_question=None):
@@ -205,7 +442,7 @@ Output: {{"value": "immediate payment"}}
 
 Return ONLY valid JSON with the extracted value."""
 
-        result = self._call_claude(system_prompt, user_text)
+        result = self._call_claude(system_prompt, user_text, method="extract_field_value")
         return result.get("value")
 
     def detect_intent_type(self, user_text):
@@ -250,125 +487,110 @@ Return ONLY valid JSON with the extracted value."""
         
         Return: {{"entities": {{...}}}}"""
         
-        result = self._call_claude(system_prompt, user_text)
+        result = self._call_claude(system_prompt, user_text, method="analyze_intent")
         return result if "entities" in result else {"entities": result}
 
-    def analyze_user_input(self, user_text, current_payload, conversation_history):
+    def _build_analysis_prompt(self):
+        """The agent prompt file plus the action-extraction instructions (assembled once, see PROMPTS)."""
+        return PROMPTS.get("analysis")
+
+    def _build_analysis_context(self, user_text, current_payload, conversation_history, context_state=None):
+        # Compact payload (+ changes since the last turn) and as much history as fits the budget
+        return self.context_builder.build(user_text, current_payload, conversation_history, context_state)
+
+    def analyze_user_input(self, user_text, current_payload, conversation_history, context_state=None):
         """
         Master Agent Logic: Analyzes intent and extracts actions using the system prompt.
         """
-        try:
-            # Try absolute path first, then relative
-            base_path = os.path.dirname(os.path.abspath(__file__))
-            prompt_path = os.path.join(base_path, "supplierx_po_agent_prompt.md")
-            if not os.path.exists(prompt_path):
-                prompt_path = "supplierx_po_agent_prompt.md"
-                
-            with open(prompt_path, "r", encoding='utf-8') as f:
-                base_prompt = f.read()
-        except Exception as e:
-            print(f"Error loading prompt: {e}")
-            base_prompt = "You are a Purchase Order Agent."
+        system_prompt = self._build_analysis_prompt()
+        return self._call_claude(system_prompt, self._build_analysis_context(user_text, current_payload, conversation_history, context_state), method="analyze_user_input", tool=ANALYSIS_TOOL)
 
-        system_prompt = base_prompt + """
-        
-        INSTRUCTIONS:
-        Analyze the latest user input based on the payload and history.
-        
-        CRITICAL RE-SCAN RULE:
-        If user says "yes", "add them", "proceed", or "do it", and fields are missing:
-        1. SCAN the 'conversation_history' for any entities or values mentioned previously but not in 'current_payload'.
-        2. GENERATE actions to add those missing values immediately.
-        
-        OUTPUT FORMAT:
-        Return a JSON object with:
-        {
-            "intents": ["INTENT_NAME", ...],
-            "actions": [
-                {
-                    "operation": "ADD|UPDATE|REMOVE", 
-                    "field_path": "payload_key", 
-                    "value": "extracted value"
-                }
-            ],
-            
-            FIELD_PATH_REFERENCE:
-            - po_type (Values: "regularPurchase", "service", etc.)
-            - vendor_id (Supplier ID or name)
-            - purchase_org_id (Org ID or name)
-            - plant_id (Plant ID or name)
-            - purchase_grp_id (Group ID or name)
-            - po_date (YYYY-MM-DD)
-            - validityEnd (YYYY-MM-DD)
-            - delivery_date (YYYY-MM-DD)
-            - currency (e.g., INR)
-            - line_items[i].material_id
-            - line_items[i].quantity
-            - line_items[i].price
-            - line_items[i].short_text
-            - line_items[i].plant_id (if distinct)
-
-            "items_to_resolve": [
-                {"entity_type": "supplier|material|plant|org|group|project|payment_term|incoterm", "value": "raw text"}
-            ],
-            "thought_process": "Brief explanation of reasoning"
-        }
+    def analyze_and_respond(self, user_text, current_payload, conversation_history, context_state=None):
         """
-        
-        # Prepare context
-        context_str = json.dumps({
-            "current_payload": current_payload,
-            "conversation_history": conversation_history[-10:] if conversation_history else [],
-            "latest_user_input": user_text
-        }, indent=2, default=str)
-        
-        return self._call_claude(system_prompt, f"Current Context:\n{context_str}")
+        Fused turn: one model call returning the analysis plus a "response_template"
+        that the agent fills locally once entities are resolved and actions applied.
+        """
+        system_prompt = PROMPTS.get("analysis_fused")
+        return self._call_claude(system_prompt, self._build_analysis_context(user_text, current_payload, conversation_history, context_state), method="analyze_and_respond", tool=FUSED_ANALYSIS_TOOL)
 
     def generate_response(self, user_text, analysis_result, execution_results, current_payload, missing_fields):
         """
         Generates the final natural language response.
         """
-        system_prompt = """You are the Voice of the PO Agent. You are efficient, direct, and execution-focused.
-        
-        Your Goal: Generate a response that confirms ACTIONS TAKEN and states MISSING INFO.
-        
-        INPUTS:
-        - User Input: What the user just said.
-        - Analysis: What you understood.
-        - Execution Results: What specifically changed (e.g. "Supplier found and set", "Line item 1 created").
-        - Current Payload: The current state.
-        - Missing Fields: List of fields still needed.
-        
-        STRICT RESPONSE RULES:
-        1. DO NOT use these phrases:
-           - "Let me work on that"
-           - "Would you like to proceed?"
-           - "I need to check..."
-           - "Is there anything else?"
-        
-        2. STRUCTURE your response:
-           - First: Summarize exactly what was added/updated based on 'Execution Results'.
-           - Second: If there are errors (e.g. material not found), state them clearly.
-           - Third: List what is still MISSING (from 'Missing Fields').
-           - Fourth: If 'Missing Fields' is empty, ask EXACTLY: "Everything is ready. Shall I create the purchase order now?"
-           
-        3. BE CONCISE.
-           Example: "I've added the supplier Smartsaa, purchase org, plant, and a line item for 'scooty'. I still need the Purchase Group."
-           
-        4. If CONFIRM_PO was successful:
-           - Announce the PO Number clearly.
-        
-        OUTPUT FORMAT:
-        Return JSON: {"response": "Your message string here"}
+        system_prompt, user_message = self._build_response_messages(user_text, analysis_result, execution_results, current_payload, missing_fields)
+        result = self._call_claude(system_prompt, user_message, tool=RESPONSE_TOOL)
+        return result.get("response", DEFAULT_RESPONSE)
+
+    def generate_response_stream(self, user_text, analysis_result, execution_results, current_payload, missing_fields):
+        """
+        Streaming variant of generate_response: yields the "response" text as it is generated.
+        """
+        system_prompt, user_message = self._build_response_messages(user_text, analysis_result, execution_results, current_payload, missing_fields)
+        streamer = JSONStringFieldStreamer("response")
+        raw = []
+        try:
+            for delta in self._stream_claude(system_prompt, user_message, RESPONSE_TOOL):
+                raw.append(delta)
+                text = streamer.feed(delta)
+                if text:
+                    yield text
+        except Exception as e:
+            print(f"Error streaming from Bedrock: {e}")
+
+        if not streamer.found:
+            # Model ignored the JSON format (or the stream failed): fall back to the whole body
+            full_text = "".join(raw)
+            try:
+                yield self._parse_json_text(full_text).get("response", DEFAULT_RESPONSE)
+            except Exception:
+                yield full_text.strip() or DEFAULT_RESPONSE
+
+    def analyze_user_input_stream(self, user_text, current_payload, conversation_history, on_items_to_resolve=None, fused=False, context_state=None):
         """
+        Streaming variant of analyze_user_input / analyze_and_respond. Calls
+        on_items_to_resolve(items) as soon as the items_to_resolve array has been
+        generated, so lookups can start before the rest of the analysis arrives.
+        """
+        system_prompt = PROMPTS.get("analysis_stream_fused" if fused else "analysis_stream")
+
+        def on_field(key, value):
+            if key == "items_to_resolve" and on_items_to_resolve and isinstance(value, list):
+                on_items_to_resolve(value)
+
+        scanner = IncrementalJSONScanner(on_field)
+        raw = []
+        try:
+            context = self._build_analysis_context(user_text, current_payload, conversation_history, context_state)
+            for delta in self._stream_claude(system_prompt, context, FUSED_ANALYSIS_TOOL if fused else ANALYSIS_TOOL):
+                raw.append(delta)
+                scanner.feed(delta)
+            return self._parse_json_text("".join(raw))
+        except Exception as e:
+            print(f"Error streaming from Bedrock: {e}")
+            return {"error": str(e)}
+
+    def _build_response_messages(self, user_text, analysis_result, execution_results, current_payload, missing_fields):
+        system_prompt = PROMPTS.get("response")
         
         user_message = json.dumps({
             "user_input": user_text,
             "analysis": analysis_result,
             "execution_results": execution_results,
-            "payload_summary": current_payload,
+            "payload_summary": current_payload.to_context() if isinstance(current_payload, PODraft) else current_payload,
             "missing_fields": missing_fields
         }, indent=2, default=str)
-        
-        result = self._call_claude(system_prompt, user_message)
-        return result.get("response", "I've updated the details. What would you like to do next?")
+        return system_prompt, user_message
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_bedrock_service():
+    """Return the process-wide BedrockService (shared by every POAgent), creating it on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = BedrockService()
+    return _service
@@ -0,0 +1,37 @@
+"""Shared offline stand-ins for the benchmark scripts (recorded model turns, tiny catalog)."""
+import json
+import os
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "recorded_turns.json")
+
+CATALOG = {
+    "/api/v1/supplier/supplier/sapRegisteredVendorsList": {"data": [{"id": "a888ee02-b479-45ba-899b-40daba67d7d7", "sap_code": "123", "supplier_name": "Smartsaa"}]},
+    "/api/v1/supplier/purchaseOrg/listing": {"data": {"rows": [{"id": 40, "description": "Ashapura"}]}},
+    "/api/v1/admin/plants/list": {"data": {"rows": [{"id": "25b8ef1f-b058-4d48-80d4-6eee943f4930", "plantName": "Ail Dhaneti"}]}},
+    "/api/v1/admin/purchaseGroup/list": {"data": {"rows": [{"id": 365, "name": "CPT"}]}},
+    "/api/v1/supplier/materials/list": {"data": {"rows": [{"id": 95942, "code": "453", "name": "Scooty", "unit": {"code": "EA", "id": 208}, "material_group": {"id": 520}}]}},
+}
+
+
+def load_turns():
+    with open(DATA_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def recorded_reply(request, turns_by_text):
+    """Return the recorded model text for a Bedrock request body (analysis, fused or response call)."""
+    system = request["system"] if isinstance(request["system"], str) else json.dumps(request["system"])
+    content = request["messages"][0]["content"]
+    if content.startswith("Current Context:"):
+        turn = turns_by_text[json.loads(content.split("\n", 1)[1])["latest_user_input"]]
+        result = dict(turn["analysis"])
+        if "RESPONSE TEMPLATE (FUSED TURN)" in system:
+            result["response_template"] = turn["response_template"]
+    else:
+        turn = turns_by_text[json.loads(content)["user_input"]]
+        result = {"response": turn["response"]}
+    return system, content, json.dumps(result)
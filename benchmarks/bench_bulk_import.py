@@ -0,0 +1,113 @@
+"""
+Benchmark: bulk PO import throughput against the local backend stub (fake_supplierx).
+
+A synthetic sheet of --pos POs with --lines line items each (suppliers and materials
+drawn from a small pool, as in a real buyer sheet) is created:
+- one PO at a time the way a chat session does it: POAgent._resolve_entities per PO,
+  then the CONFIRM_PO builder and create_po
+- with bulk_import.BulkImporter at each --concurrency (de-duplicated batched lookups,
+  concurrent create_po)
+
+Every backend call sleeps --api-ms. Reports POs/minute and backend lookup calls.
+
+Usage: python benchmarks/bench_bulk_import.py [--pos 60] [--lines 5] [--api-ms 40] [--concurrency 1 8 16]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from agent_logic import POAgent  # noqa: E402
+from bulk_import import BulkImporter  # noqa: E402
+from fake_supplierx import FakeSupplierX, FaultProfile, SyntheticCatalog, in_process_transport  # noqa: E402
+from mock_api import CREATE_PO_ENDPOINT, MockAPI  # noqa: E402
+
+
+def make_sheet(catalog, pos, lines, seed=7):
+    rng = random.Random(seed)
+    suppliers = [catalog.supplier_row(i)["supplier_name"] for i in range(10)]
+    materials = [catalog.material_row(i)["name"] for i in range(40)]
+    rows = []
+    for p in range(pos):
+        header = {"po_ref": f"PO{p:04d}", "supplier": rng.choice(suppliers), "purchase_org": "Ashapura",
+                  "plant": "Ail Dhaneti", "purchase_group": "CPT", "po_date": "2025-12-29", "validity_end": "2025-12-31"}
+        for _ in range(lines):
+            rows.append(dict(header, material=rng.choice(materials), quantity=rng.randint(1, 20)))
+    return rows
+
+
+def backend(catalog, api_ms):
+    fake = FakeSupplierX(catalog, FaultProfile(latency_ms=api_ms))
+    # No master-data cache or local catalog: every lookup reaches the backend
+    api = MockAPI(transport=in_process_transport(fake), base_url="http://fake-supplierx", cache=False, catalog=False)
+    return fake, api
+
+
+def one_at_a_time(api, rows):
+    agent = POAgent(api=api, nlu=object(), fast_path=False)
+    by_po = {}
+    for row in rows:
+        by_po.setdefault(row["po_ref"], []).append(row)
+    created = 0
+    for po_rows in by_po.values():
+        header = po_rows[0]
+        to_resolve = [{"entity_type": kind, "value": header[column]} for column, kind in
+                      (("purchase_org", "org"), ("supplier", "supplier"), ("plant", "plant"), ("purchase_group", "group"))]
+        to_resolve += [{"entity_type": "material", "value": row["material"]} for row in po_rows]
+        resolution_map = agent._resolve_entities(to_resolve, {})
+        draft = agent.get_initial_state()["payload"]
+        actions = [{"operation": "UPDATE", "field_path": field, "value": value} for field, value in (
+            ("po_type", "regularPurchase"), ("vendor_id", header["supplier"]), ("purchase_org_id", header["purchase_org"]),
+            ("plant_id", header["plant"]), ("purchase_grp_id", header["purchase_group"]),
+            ("po_date", header["po_date"]), ("validityEnd", header["validity_end"]))]
+        for i, row in enumerate(po_rows):
+            actions.append({"operation": "ADD", "field_path": "line_items", "value": {"quantity": row["quantity"]}})
+            actions.append({"operation": "UPDATE", "field_path": f"line_items[{i}].material", "value": row["material"]})
+        agent._apply_actions(draft, actions, resolution_map)
+        api_payload, missing = agent.confirm_payload(draft)
+        if not missing and api.create_po(api_payload).get("success"):
+            created += 1
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pos", type=int, default=60)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--api-ms", type=float, default=40)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16])
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(materials=2000, suppliers=500)
+    rows = make_sheet(catalog, args.pos, args.lines)
+
+    results = []
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        fake, api = backend(catalog, args.api_ms)
+        start = time.perf_counter()
+        created = one_at_a_time(api, rows)
+        elapsed = time.perf_counter() - start
+        lookups = sum(n for path, n in fake.calls.items() if path != CREATE_PO_ENDPOINT)
+        results.append(("one PO at a time", created, elapsed, lookups))
+
+        for concurrency in args.concurrency:
+            fake, api = backend(catalog, args.api_ms)
+            report = BulkImporter(api=api, concurrency=concurrency).run([dict(r) for r in rows])
+            results.append((f"bulk, concurrency {concurrency}", report.created, report.elapsed_s, report.lookups))
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{args.pos} POs x {args.lines} lines, {args.api_ms:.0f} ms per backend call")
+    print(f"{'mode':<24}{'created':>8}{'seconds':>9}{'lookups':>9}{'POs/min':>9}")
+    for mode, created, elapsed, lookups in results:
+        print(f"{mode:<24}{created:>8}{elapsed:>9.2f}{lookups:>9}{created / elapsed * 60:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: local catalog index vs remote search for material/supplier lookups.
+
+The remote side is fake_supplierx in-process (no network, no injected latency), so the
+remote numbers are a lower bound: a real backend adds a round trip per query.
+
+Usage: python benchmarks/bench_catalog_index.py [--materials 100000] [--suppliers 50000] [--repeat 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_index import LocalCatalog  # noqa: E402
+from fake_supplierx import FakeSupplierX, SyntheticCatalog, in_process_transport  # noqa: E402
+from mock_api import MockAPI  # noqa: E402
+
+
+def per_call_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--materials", type=int, default=100000)
+    parser.add_argument("--suppliers", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        fake = FakeSupplierX(SyntheticCatalog(materials=args.materials, suppliers=args.suppliers))
+        transport = in_process_transport(fake)
+        remote = MockAPI(transport=transport, base_url="http://supplierx.local", cache=False, catalog=False)
+        catalog = LocalCatalog(remote)
+        start = time.perf_counter()
+        catalog.load()
+        load_s = time.perf_counter() - start
+        local = MockAPI(transport=transport, base_url="http://supplierx.local", cache=False, catalog=catalog)
+
+        rows = [
+            ("material 'Scooty'", lambda api: api.get_materials(query="Scooty")),
+            ("material 'steel pipe'", lambda api: api.get_materials(query="steel pipe")),
+            ("supplier 'Smartsaa'", lambda api: api.search_suppliers("Smartsaa")),
+        ]
+        results = [(label, per_call_ms(lambda: fn(remote), max(1, args.repeat // 10)), per_call_ms(lambda: fn(local), args.repeat))
+                   for label, fn in rows]
+        catalog.materials.prefix("warm")  # token list is built lazily on first use
+        prefix_ms = per_call_ms(lambda: catalog.materials.prefix("scoo"), args.repeat)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"bulk load + index ({args.materials} materials, {args.suppliers} suppliers): {load_s:.1f} s")
+    print(f"{'query':<24}{'remote ms':>11}{'local ms':>10}")
+    for label, remote_ms, local_ms in results:
+        print(f"{label:<24}{remote_ms:>11.2f}{local_ms:>10.3f}")
+    print(f"{'prefix scoo':<24}{'-':>11}{prefix_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
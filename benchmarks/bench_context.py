@@ -0,0 +1,70 @@
+"""
+Benchmark: analysis context size and build time, indented full dump vs ContextBuilder.
+
+Simulates one conversation where every turn adds line items and the assistant replies
+verbosely, and reports model input tokens (len/4 estimate) and build time at a few turns.
+
+Usage: python benchmarks/bench_context.py [--turns 50] [--items-per-turn 10] [--budget 2500]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_builder import ContextBuilder  # noqa: E402
+from model_backends import estimate_tokens  # noqa: E402
+
+
+def legacy_context(user_text, current_payload, conversation_history):
+    # BedrockService._build_analysis_context before the context builder
+    context_str = json.dumps({
+        "current_payload": current_payload,
+        "conversation_history": conversation_history[-10:] if conversation_history else [],
+        "latest_user_input": user_text
+    }, indent=2, default=str)
+    return f"Current Context:\n{context_str}"
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--items-per-turn", type=int, default=10)
+    parser.add_argument("--budget", type=int, default=2500)
+    args = parser.parse_args()
+
+    builder = ContextBuilder(max_tokens=args.budget)
+    state = {}
+    payload = {"po_type": "regularPurchase", "vendor_id": "a888ee02-b479-45ba-899b-40daba67d7d7",
+               "purchase_org_id": 40, "plant_id": "25b8ef1f-b058-4d48-80d4-6eee943f4930", "purchase_grp_id": 365,
+               "currency": "INR", "remarks": "", "projects": [], "is_epcg_applicable": False, "line_items": []}
+    history = []
+    report_at = {1, 5, 10, 25, args.turns}
+
+    print(f"{'turn':>5}{'items':>7}{'legacy tok':>12}{'legacy ms':>11}{'budgeted tok':>14}{'budgeted ms':>13}")
+    for turn in range(1, args.turns + 1):
+        for _ in range(args.items_per_turn):
+            i = len(payload["line_items"])
+            payload["line_items"].append({"material_id": 95942 + i, "short_text": f"Steel pipe grade {i}", "quantity": 10,
+                                          "price": 120.0, "unit_id": 208, "material_group_id": 520, "remarks": "",
+                                          "delivery_date": "2026-03-01", "tax_code": None})
+        user_text = f"Add {args.items_per_turn} more pipes, grade {turn}"
+        legacy, legacy_ms = timed(legacy_context, user_text, payload, history)
+        budgeted, budgeted_ms = timed(builder.build, user_text, payload, history, state)
+        if turn in report_at:
+            print(f"{turn:>5}{len(payload['line_items']):>7}{estimate_tokens(legacy):>12}{legacy_ms:>11.2f}"
+                  f"{estimate_tokens(budgeted):>14}{budgeted_ms:>13.2f}")
+        history.append({"role": "user", "content": user_text})
+        history.append({"role": "assistant", "content": "I've added the line items and updated the purchase order. " * 12})
+
+
+if __name__ == "__main__":
+    main()
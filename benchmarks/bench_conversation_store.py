@@ -0,0 +1,135 @@
+"""
+Benchmark: per-turn save / load cost of the conversation store.
+
+--conversations drafts advance --turns turns each, interleaved as concurrent users are,
+saved from --threads threads into one SQLite file:
+- full state: the whole state as JSON, upserted into one row per conversation each turn
+  (what persisting st.session_state directly amounts to)
+- delta log: conversation_store.SQLiteConversationStore (append-only deltas + snapshots)
+
+A turn edits a couple of header fields, adds or edits a line item, appends a user and an
+assistant message and replaces last_analysis. Reports save time per turn (mean / p95),
+bytes written per turn, the database size and the time to load one finished
+conversation in a fresh store (a resume on another replica).
+
+Usage: python benchmarks/bench_conversation_store.py [--conversations 2000] [--turns 20] [--threads 8]
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from agent_logic import POAgent  # noqa: E402
+from conversation_store import SQLiteConversationStore, _dumps  # noqa: E402
+from po_draft import PODraft  # noqa: E402
+
+
+class FullStateStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute("CREATE TABLE IF NOT EXISTS conversations (conversation_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self.stats = {"bytes_written": 0}
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def save(self, conversation_id, state):
+        raw = _dumps({"current_step": state["current_step"], "payload": state["payload"].to_dict(),
+                      "conversation_history": state["conversation_history"], "last_analysis": state["last_analysis"]})
+        self._connection().execute("INSERT OR REPLACE INTO conversations VALUES (?, ?)", (conversation_id, raw))
+        self.stats["bytes_written"] += len(raw)
+
+    def load(self, conversation_id):
+        data = json.loads(self._connection().execute(
+            "SELECT data FROM conversations WHERE conversation_id = ?", (conversation_id,)).fetchone()[0])
+        data["payload"] = PODraft(data["payload"])
+        return data
+
+
+def advance(state, turn):
+    payload = state["payload"]
+    payload["remarks"] = f"Turn {turn} remarks"
+    payload["vendor_id"] = f"a888ee02-b479-45ba-899b-{turn % 3:012d}"
+    if turn % 2 == 0:
+        payload["line_items"].append({"material_id": 95000 + turn, "short_text": f"Material {turn}", "quantity": turn + 1,
+                                      "price": 125.5, "material_group_id": 520, "unit_id": 208})
+    else:
+        payload["line_items"][-1]["quantity"] = turn * 3
+    state["conversation_history"] += [
+        {"role": "user", "content": f"please set quantity of item {turn} to {turn * 3} and use the usual supplier"},
+        {"role": "assistant", "content": "Done. " + "The line item has been updated with the requested quantity. " * 3},
+    ]
+    state["last_analysis"] = {"intents": ["UPDATE"], "items_to_resolve": [{"entity_type": "material", "value": f"Material {turn}"}],
+                              "actions": [{"operation": "UPDATE", "field_path": f"line_items[{turn // 2}].quantity", "value": turn * 3}],
+                              "response": "Done."}
+
+
+def run(store, conversations, turns, threads):
+    agent = POAgent(api=object(), nlu=object())
+    states = {f"conv-{i}": agent.get_initial_state() for i in range(conversations)}
+    timings = []
+
+    def save_turn(item):
+        conversation_id, state, turn = item
+        advance(state, turn)
+        start = time.perf_counter()
+        store.save(conversation_id, state)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(threads) as pool:
+        for turn in range(turns):
+            timings += pool.map(save_turn, [(cid, state, turn) for cid, state in states.items()])
+    return states, timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.conversations} conversations x {args.turns} turns, {args.threads} writer threads")
+    print(f"{'store':<12}{'save ms':>9}{'p95 ms':>8}{'bytes/turn':>12}{'db MB':>8}{'load ms':>9}")
+    for name, make in (("full state", FullStateStore), ("delta log", SQLiteConversationStore)):
+        workdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(workdir, "conversations.db")
+            store = make(path)
+            states, timings = run(store, args.conversations, args.turns, args.threads)
+            sqlite3.connect(path).execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            size = os.path.getsize(path)
+
+            fresh = make(path)
+            start = time.perf_counter()
+            for i in range(100):
+                loaded = fresh.load(f"conv-{i}")
+            load_ms = (time.perf_counter() - start) / 100 * 1000
+            assert loaded["payload"].to_dict() == states["conv-99"]["payload"].to_dict()
+            assert loaded["conversation_history"] == states["conv-99"]["conversation_history"]
+
+            timings.sort()
+            print(f"{name:<12}{statistics.mean(timings) * 1000:>9.3f}{timings[int(len(timings) * 0.95)] * 1000:>8.3f}"
+                  f"{store.stats['bytes_written'] / len(timings):>12.0f}{size / 1e6:>8.1f}{load_ms:>9.3f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: two-call turn (analyze_user_input + generate_response) vs fused turn
+(analyze_and_respond + local template fill) on recorded turns.
+
+The Bedrock client is replaced by a replayer serving the recorded responses in
+benchmarks/data/recorded_turns.json with a latency model of
+base + per-output-token time, so the numbers reflect model call count and
+generated tokens rather than network noise. MockAPI is served from memory.
+
+Usage: python benchmarks/bench_fused_turn.py [--rounds 5] [--base-ms 350] [--token-ms 15]
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from agent_logic import POAgent  # noqa: E402
+from bedrock_service import BedrockService  # noqa: E402
+from mock_api import MockAPI  # noqa: E402
+from _stubs import CATALOG, estimate_tokens, load_turns, recorded_reply  # noqa: E402
+
+class InMemoryAPI(MockAPI):
+    def __init__(self):
+        super().__init__(cache=False)
+
+    def _post(self, endpoint, payload, idempotent=True):
+        return CATALOG.get(endpoint, {"data": []})
+
+    def create_po(self, payload):
+        return {"success": True, "po_number": "PO-MOCKED-12345"}
+
+
+class RecordedBedrockClient:
+    """Stands in for boto3 bedrock-runtime, serving recorded turns with modelled latency."""
+
+    def __init__(self, turns, base_ms, token_ms):
+        self.turns = {t["user_text"]: t for t in turns}
+        self.base_ms = base_ms
+        self.token_ms = token_ms
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def invoke_model(self, modelId, body):
+        system, content, text = recorded_reply(json.loads(body), self.turns)
+        out_tokens = estimate_tokens(text)
+        self.calls += 1
+        self.input_tokens += estimate_tokens(system) + estimate_tokens(content)
+        self.output_tokens += out_tokens
+        time.sleep((self.base_ms + self.token_ms * out_tokens) / 1000.0)
+        return {"body": io.BytesIO(json.dumps({"content": [{"type": "text", "text": text}]}).encode())}
+
+
+def run_mode(fused, turns, rounds, base_ms, token_ms):
+    latencies = []
+    client = RecordedBedrockClient(turns, base_ms, token_ms)
+    for _ in range(rounds):
+        agent = POAgent(fused_turn=fused, api=InMemoryAPI(), nlu=BedrockService(client=client))
+        state = agent.get_initial_state()
+        for turn in turns:
+            start = time.perf_counter()
+            agent.process_input(turn["user_text"], state)
+            latencies.append(time.perf_counter() - start)
+    n = len(latencies)
+    latencies.sort()
+    return {
+        "turns": n,
+        "model_calls_per_turn": client.calls / n,
+        "input_tokens_per_turn": client.input_tokens / n,
+        "output_tokens_per_turn": client.output_tokens / n,
+        "mean_ms": sum(latencies) / n * 1000,
+        "p95_ms": latencies[min(n - 1, int(n * 0.95))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--base-ms", type=float, default=350)
+    parser.add_argument("--token-ms", type=float, default=15)
+    args = parser.parse_args()
+
+    turns = load_turns()
+
+    # Agent DEBUG prints are noise here
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        results = {
+            "two-call": run_mode(False, turns, args.rounds, args.base_ms, args.token_ms),
+            "fused": run_mode(True, turns, args.rounds, args.base_ms, args.token_ms),
+        }
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{'mode':<10}{'calls/turn':>12}{'in tok/turn':>14}{'out tok/turn':>14}{'mean ms':>10}{'p95 ms':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<10}{r['model_calls_per_turn']:>12.2f}{r['input_tokens_per_turn']:>14.0f}"
+              f"{r['output_tokens_per_turn']:>14.0f}{r['mean_ms']:>10.1f}{r['p95_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark: indexed MatchIndex vs the previous linear three-pass _fuzzy_match.
+
+Candidates are synthetic names from fake_supplierx. Queries cover an id hit, an exact
+name, a substring, out-of-order words, a typo and a miss. The index is built once per
+candidate list (as for a cached master-data snapshot), so build time is reported
+separately from per-query time. "best" is the single-match lookup POAgent uses;
+"top5" fills a ranked top-k including fuzzy neighbours. Speedup is linear vs best.
+"scan" is LinearMatcher.best, what index_for uses for a list seen only once (e.g. with
+the master-data cache off); compare it with the build time.
+
+Usage: python benchmarks/bench_fuzzy_match.py [--sizes 10000 100000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_supplierx import SyntheticCatalog  # noqa: E402
+from fuzzy_index import LinearMatcher, MatchIndex  # noqa: E402
+
+
+def linear_fuzzy_match(text, candidates):
+    """The original POAgent._fuzzy_match (first hit, three linear passes)."""
+    text = str(text).lower().strip()
+    for cand in candidates:
+        if str(cand.get("id")).lower() == text:
+            return cand
+    for cand in candidates:
+        if text in cand.get("name", "").lower():
+            return cand
+    words = text.replace("-", " ").split()
+    for cand in candidates:
+        c_name = cand.get("name", "").lower()
+        if all(w in c_name for w in words):
+            return cand
+    return None
+
+
+def make_candidates(size):
+    catalog = SyntheticCatalog(materials=size, suppliers=1, orgs=1)
+    return [{"id": row["id"], "name": row["name"]} for row in catalog.search_materials()]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        candidates = make_candidates(size)
+        mid = candidates[size // 2]
+        queries = {
+            "id": str(mid["id"]),
+            "exact": mid["name"],
+            "substring": mid["name"].split()[-1],
+            "words": " ".join(reversed(mid["name"].split()[:2])),
+            "typo": mid["name"][:-2] + mid["name"][-1],
+            "miss": "zzz qqq",
+        }
+        start = time.perf_counter()
+        index = MatchIndex(candidates)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\n{size} candidates (index build {build_ms:.0f} ms)")
+        print(f"{'query':<10}{'linear ms':>11}{'scan ms':>9}{'best ms':>9}{'top5 ms':>9}{'speedup':>9}  index top hit")
+        for label, query in queries.items():
+            linear_ms, _ = timed(lambda: linear_fuzzy_match(query, candidates), args.repeat)
+            scan_ms, _ = timed(lambda: LinearMatcher(candidates).best(query), args.repeat)
+            best_ms, _ = timed(lambda: index.best(query), args.repeat)
+            top5_ms, hits = timed(lambda: index.search(query, k=5), args.repeat)
+            top = f"{hits[0][1]['name']} ({hits[0][0]})" if hits else "-"
+            print(f"{label:<10}{linear_ms:>11.2f}{scan_ms:>9.2f}{best_ms:>9.3f}{top5_ms:>9.3f}"
+                  f"{linear_ms / max(best_ms, 1e-6):>8.0f}x  {top}")
+
+
+if __name__ == "__main__":
+    main()
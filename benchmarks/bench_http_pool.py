@@ -0,0 +1,98 @@
+"""
+Benchmark: pooled keep-alive transport vs. one-shot requests.post.
+
+Starts a local HTTP/1.1 stub of the SupplierX listing endpoints, fires the same
+sequence of master-data lookups through both paths and reports how many TCP
+connections the server accepted and the wall time.
+
+Usage: python benchmarks/bench_http_pool.py [--calls 200] [--threads 8]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_transport import TransportConfig, reset_transport  # noqa: E402
+from mock_api import MockAPI  # noqa: E402
+
+ROWS = {"data": {"rows": [{"id": i, "description": f"Org {i}", "name": f"Group {i}"} for i in range(50)]}}
+BODY = json.dumps(ROWS).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        # Avoid Nagle/delayed-ACK stalls on keep-alive connections
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    do_GET = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, server, call, calls, threads):
+    server.connections = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: call(), range(calls)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} calls={calls:<5} connections={server.connections:<5} "
+          f"time={elapsed * 1000:8.1f} ms  ({elapsed / calls * 1000:.2f} ms/call)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_stub()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    url = f"{base_url}/api/v1/supplier/purchaseOrg/listing"
+
+    def unpooled():
+        # Previous behaviour: module-level requests.post => fresh connection per call
+        requests.post(url, json={}).json()
+
+    transport = reset_transport(TransportConfig(pool_maxsize=args.threads))
+    api = MockAPI(transport=transport, base_url=base_url, cache=False)
+
+    run("requests.post (no pool)", server, unpooled, args.calls, args.threads)
+    run("MockAPI shared transport", server, api.get_purchase_orgs, args.calls, args.threads)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
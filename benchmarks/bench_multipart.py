@@ -0,0 +1,113 @@
+"""
+Benchmark: create_po request body, legacy files= dict vs the streaming MultipartEncoder.
+
+legacy: the previous MockAPI._build_create_po_request (value-formatted copy, recursive
+flatten, (None, str) tuples) plus the multipart body requests renders from it.
+streaming: len(MultipartEncoder) (for Content-Length) and one pass over its chunks, as
+the transport consumes it.
+
+For POs of --lines line items reports time per body and peak traced memory (tracemalloc).
+Both produce identical bytes (checked here and in tests/test_payload_repro.py).
+
+Usage: python benchmarks/bench_multipart.py [--lines 10 100 1000 5000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from multipart_encoder import MultipartEncoder  # noqa: E402
+from po_draft import PODraft  # noqa: E402
+
+
+def make_payload(n):
+    draft = PODraft({
+        "po_type": "regularPurchase", "vendor_id": "a888ee02-b479-45ba-899b-40daba67d7d7", "purchase_org_id": 40,
+        "plant_id": "25b8ef1f-b058-4d48-80d4-6eee943f4930", "purchase_grp_id": 365, "po_date": "2025-12-29",
+        "validityEnd": "2025-12-31", "currency": "INR", "is_epcg_applicable": False, "remarks": "", "is_pr_based": False,
+        "is_rfq_based": False, "noc": "No", "projects": [],
+        "line_items": [{"material_id": 95000 + i, "short_text": f"Material {i}", "quantity": i % 7 + 1,
+                        "price": float(10 + i % 50), "material_group_id": 520, "unit_id": 208} for i in range(n)],
+    })
+    return draft.to_api_payload()
+
+
+def legacy_body(payload):
+    def format_payload_values(value):
+        if isinstance(value, dict):
+            return {k: format_payload_values(v) for k, v in value.items()}
+        elif isinstance(value, list):
+            return [format_payload_values(v) for v in value]
+        elif isinstance(value, bool):
+            return str(value).lower()
+        elif value is None:
+            return ""
+        return value
+
+    def flatten_payload(y):
+        out = {}
+        def flatten(x, name=''):
+            if type(x) is dict:
+                for a in x:
+                    flatten(x[a], name + a + '.')
+            elif type(x) is list:
+                i = 0
+                for a in x:
+                    flatten(a, name[:-1] + '[' + str(i) + '].')
+                    i += 1
+            else:
+                out[name[:-1]] = x
+        flatten(y)
+        return out
+
+    multipart_data = {k: (None, str(v)) for k, v in flatten_payload(format_payload_values(payload)).items()}
+    return requests.Request("POST", "http://fake/create", files=multipart_data).prepare().body
+
+
+def streaming_body(payload, boundary=None):
+    body = MultipartEncoder(payload, boundary=boundary)
+    size = len(body)
+    sent = 0
+    for chunk in body:
+        sent += len(chunk)
+    assert sent == size
+    return body
+
+
+def measure(fn, payload, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(payload)
+    ms = (time.perf_counter() - start) / repeat * 1000
+    tracemalloc.start()
+    fn(payload)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return ms, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'lines':>6}{'body KB':>9}{'legacy ms':>11}{'stream ms':>11}{'legacy peak KB':>16}{'stream peak KB':>16}")
+    for n in args.lines:
+        payload = make_payload(n)
+        legacy = legacy_body(payload)
+        boundary = legacy.split(b"\r\n", 1)[0][2:].decode()
+        assert MultipartEncoder(payload, boundary=boundary).to_bytes() == legacy
+        legacy_ms, legacy_kb = measure(legacy_body, payload, args.repeat)
+        stream_ms, stream_kb = measure(streaming_body, payload, args.repeat)
+        print(f"{n:>6}{len(legacy) / 1024:>9.0f}{legacy_ms:>11.2f}{stream_ms:>11.2f}{legacy_kb:>16.0f}{stream_kb:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: sequential vs dependency-aware concurrent POAgent._resolve_entities.
+
+Each backend lookup sleeps for a fixed latency (per endpoint) so the wall time of
+a typical one-shot PO message can be compared: sequential resolution costs the
+sum of the lookups, concurrent resolution roughly org + the slowest other lookup.
+
+Usage: python benchmarks/bench_parallel_resolve.py [--rounds 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from agent_logic import POAgent  # noqa: E402
+from mock_api import MockAPI  # noqa: E402
+
+# Simulated backend latency per endpoint (seconds)
+LATENCY = {
+    "/api/v1/supplier/supplier/sapRegisteredVendorsList": 0.12,
+    "/api/v1/supplier/materials/list": 0.15,
+    "/api/v1/supplier/purchaseOrg/listing": 0.06,
+    "/api/v1/admin/plants/list": 0.08,
+    "/api/v1/admin/purchaseGroup/list": 0.08,
+}
+
+ROWS = {
+    "/api/v1/supplier/supplier/sapRegisteredVendorsList": {"data": [{"id": "v-1", "supplier_name": "Smartsaa"}]},
+    "/api/v1/supplier/materials/list": {"data": {"rows": [{"id": 95942, "name": "Scooty"}]}},
+    "/api/v1/supplier/purchaseOrg/listing": {"data": {"rows": [{"id": 40, "description": "Ashapura"}]}},
+    "/api/v1/admin/plants/list": {"data": {"rows": [{"id": "p-1", "plantName": "Ail Dhaneti"}]}},
+    "/api/v1/admin/purchaseGroup/list": {"data": {"rows": [{"id": 365, "name": "CPT"}]}},
+}
+
+ONE_SHOT = [
+    {"entity_type": "supplier", "value": "Smartsaa"},
+    {"entity_type": "org", "value": "Ashapura"},
+    {"entity_type": "plant", "value": "Ail Dhaneti"},
+    {"entity_type": "group", "value": "CPT"},
+    {"entity_type": "material", "value": "Scooty"},
+]
+
+
+class SlowAPI(MockAPI):
+    def __init__(self):
+        super().__init__(cache=False)  # measure the lookups, not the cache
+
+    def _post(self, endpoint, payload, idempotent=True):
+        time.sleep(LATENCY.get(endpoint, 0.05))
+        return ROWS.get(endpoint, {"data": []})
+
+
+def measure(concurrency, rounds):
+    agent = POAgent()
+    agent.api = SlowAPI()
+    agent.resolve_concurrency = concurrency
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = agent._resolve_entities(ONE_SHOT, {})
+        timings.append(time.perf_counter() - start)
+        assert all(r["found"] for r in result.values()), result
+    return sum(timings) / len(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        sequential = measure(1, args.rounds)
+        concurrent = measure(4, args.rounds)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    expected_sum = sum(LATENCY.values()) * 1000
+    expected_critical = (LATENCY["/api/v1/supplier/purchaseOrg/listing"] + max(
+        v for k, v in LATENCY.items() if k != "/api/v1/supplier/purchaseOrg/listing")) * 1000
+    print(f"sum of lookups          : {expected_sum:7.1f} ms")
+    print(f"org + slowest lookup    : {expected_critical:7.1f} ms")
+    print(f"sequential (1 worker)   : {sequential:7.1f} ms")
+    print(f"concurrent (4 workers)  : {concurrent:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: typed PO draft (po_draft.PODraft) vs the plain-dict payload.
+
+For drafts of --lines line items (hydrated like a resolved material) reports:
+- memory per draft (tracemalloc, values included)
+- a line quantity change plus the new total: the dict payload re-sums every line (as
+  _apply_analysis did), the draft adjusts its running total
+- the model-context projection and the strict create-PO body (the draft reuses the
+  per-line projections of lines that did not change)
+
+Usage: python benchmarks/bench_po_draft.py [--lines 1000 5000] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from agent_logic import POAgent  # noqa: E402
+from context_builder import _compact, _empty  # noqa: E402
+from po_draft import PODraft, build_api_payload  # noqa: E402
+
+
+def make_items(n):
+    return [{
+        "material_id": 95000 + i, "short_text": f"Material {i}", "quantity": i % 7 + 1,
+        "price": float(10 + i % 50), "material_group_id": 520, "unit_id": 208, "tax_code": None,
+    } for i in range(n)]
+
+
+def make_draft(kind, n):
+    payload = POAgent(api=object(), nlu=object()).get_initial_state()["payload"].to_dict()
+    payload.update({"po_type": "regularPurchase", "vendor_id": "a888ee02", "purchase_org_id": 40,
+                    "plant_id": "25b8ef1f", "purchase_grp_id": 365, "po_date": "2025-12-30", "validityEnd": "2025-12-31"})
+    payload["line_items"] = make_items(n)
+    return PODraft(payload) if kind == "draft" else payload
+
+
+def memory_kb(kind, n, copies=5):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    drafts = [make_draft(kind, n) for _ in range(copies)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del drafts
+    return used / copies / 1024
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def update_and_total(payload, i):
+    items = payload["line_items"]
+    items[i % len(items)]["quantity"] = i % 9 + 1
+    if isinstance(payload, PODraft):
+        return payload["total"]
+    payload["total"] = sum(float(item.get("quantity", 0)) * float(item.get("price", 0)) for item in items)
+    return payload["total"]
+
+
+def dict_context(payload):
+    header = {k: _compact(v) for k, v in payload.items() if k != "line_items" and not _empty(v)}
+    header["line_items"] = [_compact(item) for item in payload["line_items"]]
+    return header
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'lines':>6} {'payload':<8}{'KB/draft':>10}{'B/line':>8}{'update+total us':>17}{'context us':>12}{'api body us':>13}")
+    for n in args.lines:
+        for kind in ("dict", "draft"):
+            kb = memory_kb(kind, n)
+            payload = make_draft(kind, n)
+            update_us = per_call_us(lambda i: update_and_total(payload, i), args.repeat)
+            if kind == "draft":
+                # One line changes per turn; the rest of the projection is cached
+                context_us = per_call_us(lambda i: (update_and_total(payload, i), payload.to_context()), args.repeat // 4 or 1) - update_us
+                api_us = per_call_us(lambda i: payload.to_api_payload(), max(1, args.repeat // 20))
+            else:
+                context_us = per_call_us(lambda i: dict_context(payload), args.repeat // 4 or 1)
+                api_us = per_call_us(lambda i: build_api_payload(payload), max(1, args.repeat // 20))
+            print(f"{n:>6} {kind:<8}{kb:>10.0f}{kb * 1024 / n:>8.0f}{update_us:>17.1f}{context_us:>12.0f}{api_us:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
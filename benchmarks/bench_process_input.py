@@ -0,0 +1,113 @@
+"""
+Benchmark: POAgent.process_input throughput with no network.
+
+The model is served by a model_backends client (synthetic latency-shaped replies built
+from benchmarks/data/recorded_turns.json, or a replay store) and SupplierX by
+fake_supplierx in-process. Model sleep time is tracked separately, so the report
+splits each turn into model time and our own overhead.
+
+Usage: python benchmarks/bench_process_input.py [--rounds 20] [--base-ms 0] [--token-ms 0] [--no-fast-path]
+       python benchmarks/bench_process_input.py --backend replay --store /tmp/bedrock-recordings
+(replay seeds an empty store once by recording the synthetic replies)
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("ANTHROPIC_MODEL_ID", "stub-model")
+
+from agent_logic import POAgent  # noqa: E402
+from bedrock_service import BedrockService  # noqa: E402
+from fake_supplierx import FakeSupplierX, SyntheticCatalog, in_process_transport  # noqa: E402
+from mock_api import MockAPI  # noqa: E402
+from model_backends import RecordingClient, RecordingStore, ReplayClient, SyntheticClient  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+from _stubs import load_turns, recorded_reply  # noqa: E402
+
+
+def make_client(args, turns):
+    by_text = {t["user_text"]: t for t in turns}
+    synthetic = SyntheticClient(responder=lambda request: recorded_reply(request, by_text)[2],
+                                base_ms=args.base_ms, token_ms=args.token_ms)
+    if args.backend == "synthetic":
+        return synthetic
+    store = RecordingStore(args.store)
+    if not len(store):
+        seed = RecordingClient(store, live_client=SyntheticClient(responder=synthetic.responder, base_ms=0, token_ms=0))
+        run(seed, turns, 1, args)
+    return ReplayClient(store)
+
+
+def run(client, turns, rounds, args, stats=None):
+    catalog = SyntheticCatalog(args.materials, args.suppliers)
+    # One response cache per run (shared by its conversations) so runs don't warm each other
+    response_cache = ResponseCache(disk_path="") if args.response_cache else False
+    latencies = []
+    for _ in range(rounds):
+        # Fresh fake per conversation so PO numbers (and so replayed requests) repeat exactly
+        api = MockAPI(transport=in_process_transport(FakeSupplierX(catalog)),
+                      base_url="http://supplierx.local", cache=None if args.cache else False)
+        agent = POAgent(fused_turn=args.fused, api=api, nlu=BedrockService(client=client, cache=response_cache),
+                        fast_path=args.fast_path)
+        state = agent.get_initial_state()
+        for turn in turns:
+            start = time.perf_counter()
+            agent.process_input(turn["user_text"], state)
+            latencies.append(time.perf_counter() - start)
+        if stats is not None:
+            for key, value in agent.nlu_stats.items():
+                stats[key] = stats.get(key, 0) + value
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=("synthetic", "replay"), default="synthetic")
+    parser.add_argument("--store", default=os.path.join("recordings", "bench"))
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--base-ms", type=float, default=0, help="synthetic time to first token")
+    parser.add_argument("--token-ms", type=float, default=0, help="synthetic time per output token")
+    parser.add_argument("--materials", type=int, default=10000)
+    parser.add_argument("--suppliers", type=int, default=5000)
+    parser.add_argument("--fused", action="store_true")
+    parser.add_argument("--no-cache", dest="cache", action="store_false")
+    parser.add_argument("--no-response-cache", dest="response_cache", action="store_false")
+    parser.add_argument("--no-fast-path", dest="fast_path", action="store_false", help="always call the model for analysis")
+    args = parser.parse_args()
+
+    turns = load_turns()
+
+    # Agent DEBUG prints are noise here
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        client = make_client(args, turns)
+        nlu_stats = {}
+        latencies = run(client, turns, args.rounds, args, nlu_stats)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    n = len(latencies)
+    total = sum(latencies)
+    model_s = getattr(client, "model_seconds", 0.0)
+    latencies.sort()
+    print(json.dumps({
+        "backend": args.backend,
+        "turns": n,
+        "turns_per_s": round(n / total, 1),
+        "mean_turn_ms": round(total / n * 1000, 2),
+        "p95_turn_ms": round(latencies[min(n - 1, int(n * 0.95))] * 1000, 2),
+        "model_ms_per_turn": round(model_s / n * 1000, 2),
+        "overhead_ms_per_turn": round((total - model_s) / n * 1000, 2),
+        "replay_misses": getattr(client, "misses", 0),
+        "model_calls_per_turn": round(getattr(client, "calls", 0) / n, 2),
+        "fast_path_rate": round(nlu_stats["fast_path"] / nlu_stats["turns"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
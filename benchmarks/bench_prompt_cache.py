@@ -0,0 +1,93 @@
+"""
+Benchmark: system prompt caching (PromptRegistry + Bedrock prompt-cache blocks).
+
+1. Prompt assembly: the old per-call path probe + file read + concatenation vs PROMPTS.get.
+2. Time to first token and billed input tokens per analysis call, with the cached system
+   block off vs on. The model is model_backends.SyntheticClient with a prefill cost per
+   1k uncached input tokens, replaying benchmarks/data/recorded_turns.json.
+
+Billed input is weighted like Bedrock pricing: uncached x1, cache writes x1.25, cache reads x0.1.
+
+Usage: python benchmarks/bench_prompt_cache.py [--rounds 5] [--prefill-ms 120] [--base-ms 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("ANTHROPIC_MODEL_ID", "stub-model")
+
+from agent_logic import POAgent  # noqa: E402
+from bedrock_service import ANALYSIS_INSTRUCTIONS, PROMPTS, BedrockService, _load_agent_prompt  # noqa: E402
+from model_backends import SyntheticClient  # noqa: E402
+from _stubs import load_turns, recorded_reply  # noqa: E402
+
+
+def legacy_prompt():
+    # What _build_analysis_prompt did on every turn before the registry
+    return _load_agent_prompt() + ANALYSIS_INSTRUCTIONS
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(cache, turns, args):
+    by_text = {t["user_text"]: t for t in turns}
+    client = SyntheticClient(responder=lambda request: recorded_reply(request, by_text)[2],
+                             base_ms=args.base_ms, token_ms=0, prefill_ms=args.prefill_ms)
+    service = BedrockService(client=client)
+    service.prompt_cache = cache
+    payload = POAgent(api=object(), nlu=service).get_initial_state()["payload"]
+    ttfts = []
+    for _ in range(args.rounds):
+        history = []
+        for turn in turns:
+            context = service._build_analysis_context(turn["user_text"], payload, history)
+            start = time.perf_counter()
+            stream = service._stream_claude(PROMPTS.get("analysis"), context)
+            next(stream)
+            ttfts.append(time.perf_counter() - start)
+            for _ in stream:
+                pass
+            history.append({"role": "user", "content": turn["user_text"]})
+    usage = service.usage
+    billed = (usage["input_tokens"] + 1.25 * usage["cache_creation_input_tokens"]
+              + 0.1 * usage["cache_read_input_tokens"])
+    n = len(ttfts)
+    ttfts.sort()
+    return sum(ttfts) / n * 1000, ttfts[min(n - 1, int(n * 0.95))] * 1000, billed / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--prefill-ms", type=float, default=120, help="synthetic prefill per 1k uncached input tokens")
+    parser.add_argument("--base-ms", type=float, default=50, help="synthetic fixed time to first token")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    turns = load_turns()
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        legacy_us = per_call_us(legacy_prompt, args.repeat)
+        registry_us = per_call_us(lambda: PROMPTS.get("analysis"), args.repeat)
+        results = {cache: run(cache, turns, args) for cache in (False, True)}
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"system prompt: {len(PROMPTS.get('analysis'))} chars")
+    print(f"prompt assembly: per-call read {legacy_us:.1f} us, registry {registry_us:.2f} us")
+    print(f"{'prompt cache':<14}{'mean TTFT ms':>14}{'p95 TTFT ms':>13}{'billed input tok/turn':>23}")
+    for cache, (mean_ms, p95_ms, billed) in results.items():
+        print(f"{'on' if cache else 'off':<14}{mean_ms:>14.1f}{p95_ms:>13.1f}{billed:>23.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: model response cache (response_cache.ResponseCache) across many users.
+
+Every user replays benchmarks/data/recorded_turns.json with the rule fast path off, so
+each turn reaches BedrockService; the model is a SyntheticClient (--model-ms per call).
+Reports model calls, hit rate by method and mean turn time with the cache off and on,
+plus the cost of a cache lookup itself. The analysis calls are opted in here
+(response_cache.ANALYSIS_METHODS); by default only the extractors are cached.
+
+Usage: python benchmarks/bench_response_cache.py [--users 50] [--model-ms 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("ANTHROPIC_MODEL_ID", "stub-model")
+
+from agent_logic import POAgent  # noqa: E402
+from bedrock_service import PROMPTS, BedrockService  # noqa: E402
+from fake_supplierx import FakeSupplierX, SyntheticCatalog, in_process_transport  # noqa: E402
+from mock_api import MockAPI  # noqa: E402
+from model_backends import SyntheticClient  # noqa: E402
+from response_cache import ANALYSIS_METHODS, DEFAULT_CACHED_METHODS, ResponseCache  # noqa: E402
+from _stubs import load_turns, recorded_reply  # noqa: E402
+
+
+def run(users, turns, cache, model_ms):
+    by_text = {t["user_text"]: t for t in turns}
+    client = SyntheticClient(responder=lambda request: recorded_reply(request, by_text)[2], base_ms=model_ms, token_ms=0)
+    catalog = SyntheticCatalog(materials=1000, suppliers=500)
+    start = time.perf_counter()
+    for _ in range(users):
+        api = MockAPI(transport=in_process_transport(FakeSupplierX(catalog)), base_url="http://supplierx.local", cache=False)
+        agent = POAgent(fused_turn=False, api=api, nlu=BedrockService(client=client, cache=cache), fast_path=False)
+        state = agent.get_initial_state()
+        for turn in turns:
+            agent.process_input(turn["user_text"], state)
+    elapsed = time.perf_counter() - start
+    return client.calls, elapsed / (users * len(turns)) * 1000
+
+
+def lookup_us(cache, text, repeat=20000):
+    prompt = PROMPTS.get("analysis")
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cache.lookup("analyze_user_input", "stub-model", prompt, text)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--model-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    turns = load_turns()
+    cache = ResponseCache(disk_path="", methods=DEFAULT_CACHED_METHODS + ANALYSIS_METHODS)
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        off_calls, off_ms = run(args.users, turns, False, args.model_ms)
+        on_calls, on_ms = run(args.users, turns, cache, args.model_ms)
+        stats = cache.stats()
+        context = BedrockService(cache=False)._build_analysis_context("Independent PO", POAgent(api=object(), nlu=object()).get_initial_state()["payload"], [])
+        hit_us = lookup_us(cache, context)
+        miss_us = lookup_us(cache, context + " (new)")
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{args.users} users x {len(turns)} turns, model {args.model_ms:.0f} ms/call")
+    print(f"{'response cache':<16}{'model calls':>12}{'mean turn ms':>14}")
+    print(f"{'off':<16}{off_calls:>12}{off_ms:>14.1f}")
+    print(f"{'on':<16}{on_calls:>12}{on_ms:>14.1f}")
+    print(f"hit rate {stats['hit_rate']:.0%}: " + ", ".join(f"{m} {v['hits']}/{v['hits'] + v['misses']}" for m, v in stats["by_method"].items()))
+    print(f"lookup cost: hit {hit_us:.1f} us, miss {miss_us:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
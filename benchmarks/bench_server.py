@@ -0,0 +1,82 @@
+"""
+Benchmark: po_server throughput by number of worker processes.
+
+Starts po_server.POServer with the synthetic model backend (BEDROCK_BACKEND=synthetic,
+--model-ms per call plus 0.2 ms per output token), opens --conversations conversations
+and drives each one from its own client thread for --turns free-text turns (analysis
+plus response model calls, no SupplierX lookups). Reports turns/second and turn
+latency for each --workers value.
+
+Usage: python benchmarks/bench_server.py [--workers 1 2 4] [--conversations 32] [--turns 5] [--model-ms 50]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from po_server import POServer  # noqa: E402
+
+TEXTS = ("can you tell me what is still missing", "what does validity end mean here",
+         "remind me which fields you have so far", "is the currency already set", "what should I do next")
+
+
+def post(url, body):
+    req = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), method="POST")
+    with urllib.request.urlopen(req, timeout=120) as response:
+        return json.loads(response.read())
+
+
+def drive(url, conversation_id, turns):
+    latencies = []
+    for i in range(turns):
+        start = time.perf_counter()
+        post(f"{url}/conversations/{conversation_id}/turns", {"text": TEXTS[i % len(TEXTS)]})
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=8, help="concurrent turns per worker")
+    parser.add_argument("--conversations", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--model-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    # Inherited by the spawned workers
+    os.environ.update(BEDROCK_BACKEND="synthetic", BEDROCK_SYNTHETIC_BASE_MS=str(args.model_ms),
+                      BEDROCK_SYNTHETIC_TOKEN_MS="0.2", BEDROCK_RESPONSE_CACHE="off", PO_AGENT_CONVERSATION_DB="")
+
+    results = []
+    for workers in args.workers:
+        real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+        server = POServer(port=0, workers=workers, threads=args.threads).start()
+        try:
+            ids = [post(server.base_url + "/conversations", {})["conversation_id"] for _ in range(args.conversations)]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.conversations) as pool:
+                latencies = [s for run in pool.map(lambda cid: drive(server.base_url, cid, args.turns), ids) for s in run]
+            elapsed = time.perf_counter() - start
+        finally:
+            server.close()
+            sys.stdout.close()
+            sys.stdout = real_stdout
+        latencies.sort()
+        results.append((workers, len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95)]))
+
+    print(f"{args.conversations} conversations x {args.turns} turns, {args.threads} turns in flight per worker, {args.model_ms:.0f} ms per model call")
+    print(f"{'workers':>8}{'turns/s':>9}{'p50 ms':>8}{'p95 ms':>8}")
+    for workers, rate, p50, p95 in results:
+        print(f"{workers:>8}{rate:>9.1f}{p50 * 1000:>8.0f}{p95 * 1000:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
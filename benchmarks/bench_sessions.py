@@ -0,0 +1,78 @@
+"""
+Benchmark: cost of a new chat session (one POAgent per Streamlit session).
+
+per-session: what each session used to build - a MockAPI that re-reads .env, a
+BedrockService and its own boto3 bedrock-runtime client (created on the session's first
+model call; created up front here).
+shared: POAgent() on the process-wide MockAPI / BedrockService / model client
+(get_api, get_bedrock_service, get_model_client); the first session pays for them once.
+
+--sessions agents are created and kept alive, as Streamlit keeps session_state. Reports
+creation time per session and memory retained per session (tracemalloc).
+
+Usage: python benchmarks/bench_sessions.py [--sessions 200]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from dotenv import load_dotenv  # noqa: E402
+
+from agent_logic import POAgent  # noqa: E402
+from bedrock_service import BedrockService  # noqa: E402
+from mock_api import MockAPI  # noqa: E402
+from model_backends import create_live_client  # noqa: E402
+
+
+def per_session():
+    load_dotenv(override=True)
+    agent = POAgent(api=MockAPI(), nlu=BedrockService(client=create_live_client()))
+    return agent, agent.get_initial_state()
+
+
+def shared():
+    agent = POAgent()
+    return agent, agent.get_initial_state()
+
+
+def measure(make, sessions):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    alive = []
+    start = time.perf_counter()
+    for _ in range(sessions):
+        alive.append(make())
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return elapsed / sessions * 1000, retained / sessions / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    args = parser.parse_args()
+
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        results = [(name, *measure(make, args.sessions)) for name, make in (("per-session", per_session), ("shared", shared))]
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{args.sessions} sessions")
+    print(f"{'mode':<14}{'ms / session':>14}{'KB / session':>14}")
+    for name, ms, kb in results:
+        print(f"{name:<14}{ms:>14.2f}{kb:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: concurrent identical SupplierX lookups with and without single-flight.
+
+--sessions threads start together (a burst right after the master-data cache expired, so
+the response cache is off) and each runs the lookups a new PO needs: purchase orgs,
+plants of org 40 and one of a few popular supplier searches, against the in-process fake
+SupplierX with --latency-ms per request. Reports backend calls made and lookup latency
+with coalescing (single_flight on) and without (single_flight=False).
+
+Usage: python benchmarks/bench_single_flight.py [--sessions 64] [--latency-ms 50] [--rounds 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from fake_supplierx import FakeSupplierX, FaultProfile, SyntheticCatalog, in_process_transport  # noqa: E402
+from mock_api import MockAPI  # noqa: E402
+from single_flight import SingleFlight  # noqa: E402
+
+SEARCHES = ("Smartsaa", "Tata", "Reliance", "Infosys")
+
+
+def run(single_flight, sessions, latency_ms, rounds):
+    fake = FakeSupplierX(SyntheticCatalog(materials=500, suppliers=300), FaultProfile(latency_ms=latency_ms))
+    api = MockAPI(transport=in_process_transport(fake), base_url="http://fake", cache=False, catalog=False,
+                  single_flight=single_flight)
+
+    def session(i, barrier):
+        barrier.wait()
+        start = time.perf_counter()
+        api.get_purchase_orgs()
+        api.get_plants(org_ids=[40])
+        api.search_suppliers(SEARCHES[i % len(SEARCHES)])
+        return time.perf_counter() - start
+
+    latencies = []
+    with ThreadPoolExecutor(sessions) as pool:
+        for _ in range(rounds):
+            barrier = threading.Barrier(sessions)
+            latencies += pool.map(lambda i: session(i, barrier), range(sessions))
+    latencies.sort()
+    return sum(fake.calls.values()), statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        results = [(name, *run(flight, args.sessions, args.latency_ms, args.rounds))
+                   for name, flight in (("off", False), ("single-flight", SingleFlight()))]
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{args.sessions} concurrent sessions x {args.rounds} rounds, 3 lookups each, {args.latency_ms:.0f} ms per SupplierX request")
+    print(f"{'mode':<15}{'backend calls':>14}{'p50 ms':>8}{'p95 ms':>8}")
+    for name, calls, p50, p95 in results:
+        print(f"{name:<15}{calls:>14}{p50 * 1000:>8.0f}{p95 * 1000:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: cold start of the chat path (what a freshly scaled-out container pays).
+
+Each run is a new interpreter that imports agent_logic and answers a first turn
+("Independent PO", answered by the rule fast path) with the live backends configured.
+- eager: boto3 and requests imported up front, as agent_logic used to pull them in
+- lazy: the current layout; boto3 / requests load with the first model call / backend
+  request, pandas only for an .xlsx bulk import
+
+Reports `python -X importtime` totals (sum of all module import times) for
+`import agent_logic`, and the median wall time from spawning the process to its first
+response, over --runs processes.
+
+Usage: python benchmarks/bench_startup.py [--runs 7]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("boto3", "requests", "pandas")
+
+PRELOAD = {"eager": "import boto3, requests", "lazy": ""}
+
+FIRST_TURN = """
+import os, sys, time
+real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+{preload}
+import agent_logic
+agent = agent_logic.POAgent()
+agent.process_input("Independent PO", agent.get_initial_state())
+loaded = ",".join(m for m in {heavy!r} if m in sys.modules) or "-"
+real_stdout.write(loaded + "\\n")
+real_stdout.flush()
+"""
+
+
+def child_env():
+    env = dict(os.environ, PYTHONPATH=ROOT, BEDROCK_BACKEND="live")
+    env.setdefault("AWS_REGION", "us-east-1")
+    return env
+
+
+def import_time_ms(preload):
+    code = f"{preload}\nimport agent_logic" if preload else "import agent_logic"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=child_env(),
+                            capture_output=True, text=True, check=True)
+    total_us = 0
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and parts[0].split(":")[1].strip().isdigit():
+            total_us += int(parts[0].split(":")[1])
+    return total_us / 1000
+
+
+def first_response_ms(preload):
+    code = FIRST_TURN.format(preload=preload, heavy=HEAVY)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, env=child_env(),
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    loaded = proc.stdout.readline().strip()
+    elapsed = (time.perf_counter() - start) * 1000
+    proc.wait()
+    return elapsed, loaded
+
+
+def interpreter_ms():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    baseline = statistics.median(interpreter_ms() for _ in range(args.runs))
+    print(f"interpreter start (python -c pass): {baseline:.0f} ms")
+    print(f"{'layout':<8}{'importtime ms':>15}{'first response ms':>19}  heavy modules loaded")
+    for name, preload in PRELOAD.items():
+        imports = statistics.median(import_time_ms(preload) for _ in range(args.runs))
+        runs = [first_response_ms(preload) for _ in range(args.runs)]
+        print(f"{name:<8}{imports:>15.0f}{statistics.median(ms for ms, _ in runs):>19.0f}  {runs[-1][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: tool-use structured output vs JSON scraped from text replies.
+
+Replays the analysis and response calls of benchmarks/data/recorded_turns.json against a
+SyntheticClient. In text mode the model answers the way the prompts' examples invite -
+pretty-printed JSON in a ```json fence after a short lead-in - and --truncate-rate of the
+replies are cut off part-way (a max_tokens stop). Three setups are compared:
+
+- text + legacy parse : the old split-on-fence / first "{" to last "}" slicing
+- text + tolerant     : structured_output.parse_model_json
+- tool_use            : forced tool call; the input arrives as a parsed object (compact,
+                        and not truncated here since it is far shorter than max_tokens)
+
+Reports output tokens per call and the share of calls that came back as {"error": ...},
+each of which costs the user a retry turn.
+
+Usage: python benchmarks/bench_structured_output.py [--rounds 50] [--truncate-rate 0.1]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("ANTHROPIC_MODEL_ID", "stub-model")
+
+from bedrock_service import BedrockService  # noqa: E402
+from model_backends import SyntheticClient  # noqa: E402
+from structured_output import RESPONSE_TOOL  # noqa: E402
+from _stubs import load_turns, recorded_reply  # noqa: E402
+
+
+class LegacyParseService(BedrockService):
+    """BedrockService with the JSON extraction it used before structured_output."""
+
+    def _parse_json_text(self, content_text):
+        if "```json" in content_text:
+            json_str = content_text.split("```json")[1].split("```")[0].strip()
+        elif "{" in content_text:
+            json_str = content_text[content_text.find('{'):content_text.rfind('}') + 1]
+        else:
+            json_str = "{}"
+        return json.loads(json_str)
+
+
+def text_responder(by_text, truncate_rate, rng):
+    def respond(request):
+        result = json.loads(recorded_reply(request, by_text)[2])
+        text = "Here is the result:\n```json\n" + json.dumps(result, indent=2) + "\n```"
+        if rng.random() < truncate_rate:
+            text = text[:rng.randint(len(text) // 3, len(text) - 5)]
+        return text
+    return respond
+
+
+def run(service_cls, structured, rounds, turns, truncate_rate, seed):
+    by_text = {t["user_text"]: t for t in turns}
+    client = SyntheticClient(responder=text_responder(by_text, 0 if structured else truncate_rate, random.Random(seed)), base_ms=0, token_ms=0)
+    service = service_cls(client=client, cache=False)
+    service.structured_output = structured
+    errors = 0
+    for _ in range(rounds):
+        for turn in turns:
+            analysis = service.analyze_user_input(turn["user_text"], {}, [])
+            errors += "error" in analysis
+            response = service._call_claude(*service._build_response_messages(turn["user_text"], turn["analysis"], [], {}, []), tool=RESPONSE_TOOL)
+            errors += "error" in response
+    return client.calls, client.output_tokens / client.calls, errors / client.calls, service.parse_stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--truncate-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    turns = load_turns()
+    setups = [
+        ("text + legacy parse", LegacyParseService, False),
+        ("text + tolerant", BedrockService, False),
+        ("tool_use", BedrockService, True),
+    ]
+    rows = []
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        for label, cls, structured in setups:
+            rows.append((label,) + run(cls, structured, args.rounds, turns, args.truncate_rate, args.seed))
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{args.rounds} rounds x {len(turns)} turns x 2 calls, text replies truncated at rate {args.truncate_rate:.0%}")
+    print(f"{'setup':<22}{'calls':>7}{'out tok/call':>14}{'error rate':>12}  parse outcomes")
+    for label, calls, tokens, error_rate, stats in rows:
+        outcomes = ", ".join(f"{k} {v}" for k, v in stats.items() if v)
+        print(f"{label:<22}{calls:>7}{tokens:>14.1f}{error_rate:>12.1%}  {outcomes or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: cost of tracing (tracing.py), off vs on.
+
+- span(): time to open and close one span with a couple of attributes, outside any
+  trace (what every instrumented call pays with tracing off) and inside a trace
+- process_input: mean time of the recorded turns (benchmarks/data/recorded_turns.json)
+  with no model or network latency (synthetic model client, in-process fake_supplierx),
+  so the difference is the tracing overhead itself; "on + file" also exports JSONL
+
+Usage: python benchmarks/bench_tracing.py [--rounds 30] [--spans 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("ANTHROPIC_MODEL_ID", "stub-model")
+
+import tracing  # noqa: E402
+from agent_logic import POAgent  # noqa: E402
+from bedrock_service import BedrockService  # noqa: E402
+from fake_supplierx import FakeSupplierX, SyntheticCatalog, in_process_transport  # noqa: E402
+from mock_api import MockAPI  # noqa: E402
+from model_backends import SyntheticClient  # noqa: E402
+from _stubs import load_turns, recorded_reply  # noqa: E402
+
+
+def loop_ns(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def span_ns(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        with tracing.span("lookup", entity="material") as span:
+            span.set(found=True)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def turn_ms(turns, rounds, catalog):
+    by_text = {t["user_text"]: t for t in turns}
+    client = SyntheticClient(responder=lambda request: recorded_reply(request, by_text)[2], base_ms=0, token_ms=0)
+    elapsed, count = 0.0, 0
+    for _ in range(rounds):
+        api = MockAPI(transport=in_process_transport(FakeSupplierX(catalog)), base_url="http://supplierx.local")
+        agent = POAgent(api=api, nlu=BedrockService(client=client, cache=False))
+        state = agent.get_initial_state()
+        for turn in turns:
+            start = time.perf_counter()
+            agent.process_input(turn["user_text"], state)
+            elapsed += time.perf_counter() - start
+            count += 1
+    return elapsed / count * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--spans", type=int, default=200000)
+    args = parser.parse_args()
+
+    turns = load_turns()
+    catalog = SyntheticCatalog(2000, 1000)
+    trace_file = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+    results = {}
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        results["empty loop iteration"] = ("ns", loop_ns(args.spans))
+        tracing.configure(enabled=False)
+        results["span(), tracing off"] = ("ns", span_ns(args.spans))
+        tracing.configure(enabled=True, path="")
+        with tracing.trace("bench"):
+            results["span(), inside a trace"] = ("ns", span_ns(args.spans // 10))
+
+        turn_ms(turns, 2, catalog)  # warm up imports / indexes
+        for label, enabled, path in (("off", False, ""), ("on", True, ""), ("on + file", True, trace_file)):
+            tracing.configure(enabled=enabled, path=path)
+            results[f"process_input, tracing {label}"] = ("ms", turn_ms(turns, args.rounds, catalog))
+    finally:
+        tracing.configure()
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    for label, (unit, value) in results.items():
+        print(f"{label:<34}{value:>10.3f} {unit}")
+    with open(trace_file) as f:
+        print(f"exported {sum(1 for _ in f)} traces to {trace_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Load test for the async pipeline (AsyncPOAgent + AsyncMockAPI + AsyncBedrockService).
+
+All sessions share one event loop. SupplierX is served in-process by fake_supplierx
+(synthetic catalog, injected latency/jitter/errors) and Bedrock by the synthetic model
+backend answering with the recorded replies, so the harness measures how well the
+pipeline overlaps I/O rather than network conditions. Each session replays
+the recorded turns in benchmarks/data/recorded_turns.json (ending in a PO submission).
+
+Usage: python benchmarks/load_test_async.py [--sessions 10 100 500] [--model-ms 300] [--api-ms 40]
+       [--materials 100000] [--suppliers 50000] [--error-rate 0.01]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("ANTHROPIC_MODEL_ID", "stub-model")
+
+import httpx  # noqa: E402
+
+from async_agent import AsyncPOAgent  # noqa: E402
+from async_bedrock_service import AsyncBedrockService  # noqa: E402
+from async_mock_api import AsyncMockAPI  # noqa: E402
+from bedrock_service import BedrockService  # noqa: E402
+from _stubs import load_turns, recorded_reply  # noqa: E402
+from fake_supplierx import FakeSupplierX, FaultProfile, SyntheticCatalog, httpx_transport  # noqa: E402
+from model_backends import SyntheticClient  # noqa: E402
+
+
+def supplierx_fake(args):
+    catalog = SyntheticCatalog(materials=args.materials, suppliers=args.suppliers)
+    faults = FaultProfile(args.api_ms, args.jitter_ms, args.error_rate, seed=1)
+    return httpx_transport(FakeSupplierX(catalog, faults))
+
+
+def bedrock_stub(turns, args):
+    by_text = {t["user_text"]: t for t in turns}
+    return SyntheticClient(lambda request: recorded_reply(request, by_text)[2],
+                           base_ms=args.model_ms, token_ms=0, jitter_ms=args.jitter_ms, seed=1)
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+async def run_level(sessions, turns, args):
+    api_client = httpx.AsyncClient(transport=supplierx_fake(args))
+    # Clients are process-wide; per-conversation state is just the state dict
+    api = AsyncMockAPI(client=api_client, base_url="http://supplierx.local", cache=None if args.cache else False)
+    nlu = AsyncBedrockService(service=BedrockService(client=bedrock_stub(turns, args), cache=None if args.response_cache else False),
+                              backend="synthetic")
+    agent = AsyncPOAgent(fused_turn=args.fused, api=api, nlu=nlu)
+
+    latencies = []
+    done = 0
+
+    async def conversation():
+        nonlocal done
+        state = agent.get_initial_state()
+        for turn in turns:
+            start = time.perf_counter()
+            await agent.process_input(turn["user_text"], state)
+            latencies.append(time.perf_counter() - start)
+        if state["current_step"] == "DONE":
+            done += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation() for _ in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    await api_client.aclose()
+
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "turns": len(latencies),
+        "completed_pos": done,
+        "elapsed_s": elapsed,
+        "turns_per_s": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--model-ms", type=float, default=300)
+    parser.add_argument("--api-ms", type=float, default=40)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--materials", type=int, default=10000, help="synthetic catalog size")
+    parser.add_argument("--suppliers", type=int, default=5000, help="synthetic catalog size")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="injected SupplierX 503 rate")
+    parser.add_argument("--fused", action="store_true", help="use the single-call fused turn")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="disable the master-data cache")
+    parser.add_argument("--no-response-cache", dest="response_cache", action="store_false", help="disable the model response cache")
+    args = parser.parse_args()
+
+    turns = load_turns()
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        results = [asyncio.run(run_level(n, turns, args)) for n in args.sessions]
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{'sessions':>9}{'turns':>8}{'POs':>6}{'turns/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        print(f"{r['sessions']:>9}{r['turns']:>8}{r['completed_pos']:>6}{r['turns_per_s']:>10.1f}"
+              f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
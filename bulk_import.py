@@ -0,0 +1,400 @@
+"""
+Bulk PO import from a CSV / XLSX sheet.
+
+Each row is one line item. Rows sharing a po_ref (or, without that column, the same
+header values) form one PO. An import runs in three steps:
+1. resolve: every distinct supplier, org, plant, group and material is looked up once,
+   through the same POAgent lookup plans and match rules as the chat. Lookups that end
+   up as the same MockAPI call (e.g. the plants of one org) are de-duplicated too.
+2. build: each PO is filled through POAgent._apply_actions and validated by
+   POAgent.confirm_payload, the CONFIRM_PO payload builder.
+3. submit: create_po runs with bounded concurrency.
+
+run() returns a BulkReport with one result per sheet row plus throughput in POs/minute.
+
+CLI: python bulk_import.py orders.xlsx [--concurrency 8] [--report results.csv]
+     [--fake [--latency-ms 50]]   (--fake submits to the in-process fake_supplierx backend)
+"""
+import argparse
+import csv
+import io
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_logic import POAgent
+
+# Sheet column -> header field / entity kind. Names are matched after lower-casing and
+# turning spaces and dashes into underscores ("Purchase Org" -> "purchase_org").
+COLUMN_ALIASES = {
+    "po": "po_ref", "po_no": "po_ref", "po_number": "po_ref", "po_id": "po_ref", "reference": "po_ref",
+    "type": "po_type",
+    "vendor": "supplier", "vendor_id": "supplier", "supplier_name": "supplier",
+    "org": "purchase_org", "organization": "purchase_org", "purchase_org_id": "purchase_org",
+    "plant_id": "plant",
+    "group": "purchase_group", "purchase_grp": "purchase_group", "purchase_group_id": "purchase_group",
+    "purchase_grp_id": "purchase_group",
+    "date": "po_date",
+    "validity": "validity_end", "validityend": "validity_end", "validity_end_date": "validity_end",
+    "val_end_date": "validity_end",
+    "item": "material", "material_id": "material", "material_name": "material",
+    "qty": "quantity", "unit_price": "price", "net_price": "price",
+}
+
+# Header column -> (payload field, entity kind to resolve or None)
+HEADER_COLUMNS = {
+    "po_type": ("po_type", None),
+    "supplier": ("vendor_id", "supplier"),
+    "purchase_org": ("purchase_org_id", "org"),
+    "plant": ("plant_id", "plant"),
+    "purchase_group": ("purchase_grp_id", "group"),
+    "po_date": ("po_date", None),
+    "validity_end": ("validityEnd", None),
+    "currency": ("currency", None),
+    "remarks": ("remarks", None),
+}
+# Line item columns copied onto the item (material is resolved separately)
+ITEM_COLUMNS = ("quantity", "price", "delivery_date")
+NUMERIC_COLUMNS = ("quantity", "price")
+
+DEFAULT_PO_TYPE = "regularPurchase"
+
+REPORT_FIELDS = ("row", "po_ref", "status", "po_number", "message")
+
+
+def normalize_column(name):
+    key = re.sub(r"[\s\-]+", "_", str(name).strip().lower())
+    return COLUMN_ALIASES.get(key, key)
+
+
+def _cell(value):
+    """Spreadsheet cell -> plain value: blanks/NaN become None, dates ISO strings, 2.0 -> 2."""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return None
+        return int(value) if value.is_integer() else value
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _read_csv(source):
+    if hasattr(source, "read"):
+        data = source.read()
+        text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    else:
+        with open(source, encoding="utf-8-sig", newline="") as f:
+            text = f.read()
+    reader = csv.reader(io.StringIO(text, newline=""), skipinitialspace=True)
+    return next(reader, []), reader
+
+
+def load_rows(source, filename=None):
+    """
+    Read a CSV or XLSX (by file suffix) into row dicts with normalized column names.
+    source is a path or a file-like object (e.g. a Streamlit upload; pass its name).
+    Each row carries its 1-based sheet row number (header = row 1) under "row".
+    CSV is read with the csv module; pandas (and openpyxl) are only needed for XLSX.
+    """
+    name = str(filename or source).lower()
+    if name.endswith((".xlsx", ".xls")):
+        import pandas as pd
+
+        frame = pd.read_excel(source, dtype=object)
+        columns, records = frame.columns, frame.itertuples(index=False, name=None)
+    else:
+        columns, records = _read_csv(source)
+    columns = [normalize_column(c) for c in columns]
+    rows = []
+    for i, values in enumerate(records):
+        row = {k: _cell(v) for k, v in zip(columns, values)}
+        if any(v is not None for v in row.values()):
+            row["row"] = i + 2
+            rows.append(row)
+    return rows
+
+
+class BulkPO:
+    """One PO of the sheet: its rows, the draft built from them and the outcome."""
+
+    __slots__ = ("ref", "rows", "header", "draft", "api_payload", "errors", "result")
+
+    def __init__(self, ref):
+        self.ref = ref
+        self.rows = []
+        self.header = {}
+        self.draft = None
+        self.api_payload = None
+        self.errors = []
+        self.result = None
+
+    def add(self, row):
+        self.rows.append(row)
+        # First non-empty value of each header column wins
+        for column in HEADER_COLUMNS:
+            if self.header.get(column) is None and row.get(column) is not None:
+                self.header[column] = row[column]
+
+    @property
+    def org_text(self):
+        return self.header.get("purchase_org")
+
+    def entities(self):
+        """(kind, text) pairs this PO needs resolved, header first."""
+        pairs = [(kind, self.header[column]) for column, (_, kind) in HEADER_COLUMNS.items()
+                 if kind and self.header.get(column) is not None]
+        pairs.extend(("material", row["material"]) for row in self.rows if row.get("material") is not None)
+        return pairs
+
+    @property
+    def created(self):
+        return bool(self.result) and bool(self.result.get("success") or self.result.get("po_number"))
+
+
+def group_rows(rows):
+    """Group row dicts into BulkPOs in sheet order (by po_ref, else by header values)."""
+    groups = {}
+    for n, row in enumerate(rows, start=1):
+        row.setdefault("row", n)
+        if row.get("po_ref") is not None:
+            key = ("ref", str(row["po_ref"]))
+        else:
+            key = ("header",) + tuple(str(row.get(column)) for column in HEADER_COLUMNS)
+        if key not in groups:
+            groups[key] = BulkPO(row.get("po_ref") if row.get("po_ref") is not None else f"PO-{len(groups) + 1}")
+        groups[key].add(row)
+    return list(groups.values())
+
+
+class BulkReport:
+    def __init__(self, pos, elapsed_s, lookups, timings):
+        self.pos = pos
+        self.elapsed_s = elapsed_s
+        self.lookups = lookups  # distinct MockAPI lookup calls issued
+        self.timings = timings  # seconds per step: resolve, build, submit
+
+    @property
+    def created(self):
+        return sum(1 for po in self.pos if po.created)
+
+    @property
+    def failed(self):
+        return len(self.pos) - self.created
+
+    @property
+    def pos_per_minute(self):
+        return self.created / self.elapsed_s * 60 if self.elapsed_s else 0.0
+
+    def rows(self):
+        """Per sheet-row results (REPORT_FIELDS), in sheet order."""
+        out = []
+        for po in self.pos:
+            if po.errors:
+                status, po_number, message = "invalid", "", "; ".join(po.errors)
+            elif po.created:
+                status, po_number, message = "created", po.result.get("po_number", ""), ""
+            else:
+                result = po.result or {}
+                status, po_number = "failed", ""
+                message = str(result.get("message", "create_po failed"))
+                if result.get("data"):
+                    message += f": {result['data']}"
+            for row in po.rows:
+                out.append({"row": row["row"], "po_ref": po.ref, "status": status,
+                            "po_number": po_number, "message": message})
+        return sorted(out, key=lambda r: r["row"])
+
+    def summary(self):
+        return (f"{len(self.pos)} POs: {self.created} created, {self.failed} not created in {self.elapsed_s:.1f}s "
+                f"({self.pos_per_minute:.0f} POs/min, {self.lookups} lookups)")
+
+    def to_csv(self):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(self.rows())
+        return buffer.getvalue()
+
+
+class BulkImporter:
+    def __init__(self, api=None, agent=None, concurrency=None):
+        # Bulk import never calls the model; the agent is only used for its lookup plans,
+        # action application and CONFIRM_PO validation
+        self.agent = agent or POAgent(api=api, nlu=object(), fast_path=False)
+        self.api = api or self.agent.api
+        if concurrency is None:
+            concurrency = int(os.getenv("PO_AGENT_BULK_CONCURRENCY", "8"))
+        self.concurrency = max(1, concurrency)
+
+    def run(self, rows):
+        """Resolve, build and submit every PO in rows. Returns a BulkReport."""
+        started = time.perf_counter()
+        pos = group_rows(rows)
+        resolved, lookups = self.resolve(pos)
+        after_resolve = time.perf_counter()
+        for po in pos:
+            self.build(po, resolved)
+        after_build = time.perf_counter()
+        self.submit([po for po in pos if po.api_payload is not None])
+        finished = time.perf_counter()
+        timings = {"resolve": after_resolve - started, "build": after_build - after_resolve,
+                   "submit": finished - after_build}
+        return BulkReport(pos, finished - started, lookups, timings)
+
+    def _map(self, fn, items):
+        if len(items) > 1 and self.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(items))) as pool:
+                return list(pool.map(fn, items))
+        return [fn(item) for item in items]
+
+    def _lookup_batch(self, entities):
+        """
+        Resolve distinct (kind, text, org_id) entities, org_id being the org a plant or
+        group lookup is filtered by. Entities whose lookup plans are the same MockAPI call
+        share it. Returns ({entity: resolution}, number of calls).
+        """
+        plans, calls = {}, {}
+        for entity in entities:
+            kind, text, org_id = entity
+            plan = self.agent._lookup_plan(kind, str(text), org_id)
+            if plan is None:
+                continue
+            _, method, kwargs = plan
+            call = (method, tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in kwargs.items())))
+            plans[entity] = (plan[0], call)
+            calls.setdefault(call, kwargs)
+
+        def fetch(call):
+            try:
+                return getattr(self.api, call[0])(**calls[call])
+            except Exception as e:
+                print(f"Bulk lookup error {call[0]}: {e}")
+                return []
+
+        call_keys = list(calls)
+        matches = dict(zip(call_keys, self._map(fetch, call_keys)))
+
+        results = {}
+        for entity in entities:
+            kind, text, org_id = entity
+            res = None
+            if entity in plans:
+                name, call = plans[entity]
+                res = self.agent._pick_match(name, str(text), matches[call], org_id)
+            results[entity] = res or {"found": False, "id": None, "details": None}
+        return results, len(call_keys)
+
+    def resolve(self, pos):
+        """
+        Batched entity resolution for all POs. Orgs go first since plant and group lookups
+        are filtered by org. Returns ({(kind, text, org_id): resolution}, lookup calls).
+        """
+        orgs = list(dict.fromkeys(("org", po.org_text, None) for po in pos if po.org_text is not None))
+        resolved, org_calls = self._lookup_batch(orgs)
+
+        wanted = {}
+        for po in pos:
+            for kind, text in po.entities():
+                if kind != "org":
+                    wanted[(kind, text, self._scope(kind, po, resolved))] = None
+        others, calls = self._lookup_batch(list(wanted))
+        resolved.update(others)
+        return resolved, org_calls + calls
+
+    @staticmethod
+    def _scope(kind, po, resolved):
+        """Org id a plant/group lookup of po is filtered by (None for other kinds)."""
+        if kind not in ("plant", "group") or po.org_text is None:
+            return None
+        return resolved.get(("org", po.org_text, None), {}).get("id")
+
+    def build(self, po, resolved):
+        """Fill a draft for po through the agent's action path and run CONFIRM_PO on it."""
+        draft = self.agent.get_initial_state()["payload"]
+        resolution_map, actions = {}, []
+
+        def use(kind, text):
+            res = resolved.get((kind, text, self._scope(kind, po, resolved)))
+            if res is None or not res["found"]:
+                po.errors.append(f"Could not find {kind} '{text}'")
+                return False
+            resolution_map[str(text).strip().lower()] = res
+            return True
+
+        header = dict(po.header)
+        header.setdefault("po_type", DEFAULT_PO_TYPE)
+        for column, (field, kind) in HEADER_COLUMNS.items():
+            value = header.get(column)
+            if value is None or (kind and not use(kind, value)):
+                continue
+            actions.append({"operation": "UPDATE", "field_path": field, "value": str(value) if kind else value})
+
+        for i, row in enumerate(po.rows):
+            item = {k: row[k] for k in ITEM_COLUMNS if row.get(k) is not None}
+            for column in NUMERIC_COLUMNS:
+                if column in item:
+                    try:
+                        item[column] = _cell(float(item[column]))
+                    except (TypeError, ValueError):
+                        po.errors.append(f"Row {row['row']}: invalid {column} '{item[column]}'")
+            actions.append({"operation": "ADD", "field_path": "line_items", "value": item})
+            material = row.get("material")
+            if material is not None and use("material", material):
+                actions.append({"operation": "UPDATE", "field_path": f"line_items[{i}].material", "value": str(material)})
+
+        for message in self.agent._apply_actions(draft, actions, resolution_map):
+            if message.startswith("Failed"):
+                po.errors.append(message)
+        po.draft = draft
+        if po.errors:
+            return
+        po.api_payload, missing = self.agent.confirm_payload(draft)
+        if missing:
+            po.errors.append(f"Missing fields {', '.join(missing)}")
+
+    def submit(self, pos):
+        """create_po for each ready PO, at most self.concurrency in flight."""
+        def create(po):
+            try:
+                return self.api.create_po(po.api_payload)
+            except Exception as e:
+                return {"success": False, "error": True, "message": str(e)}
+
+        for po, result in zip(pos, self._map(create, pos)):
+            po.result = result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create POs in bulk from a CSV/XLSX sheet (one row per line item)")
+    parser.add_argument("sheet")
+    parser.add_argument("--concurrency", type=int, default=None, help="max create_po / lookup calls in flight")
+    parser.add_argument("--report", help="write per-row results to this CSV")
+    parser.add_argument("--fake", action="store_true", help="submit to the in-process fake_supplierx backend")
+    parser.add_argument("--latency-ms", type=float, default=0, help="injected backend latency with --fake")
+    args = parser.parse_args()
+
+    api = None
+    if args.fake:
+        from fake_supplierx import FakeSupplierX, FaultProfile, in_process_transport
+        from mock_api import MockAPI
+        fake = FakeSupplierX(faults=FaultProfile(latency_ms=args.latency_ms))
+        api = MockAPI(transport=in_process_transport(fake), base_url="http://fake-supplierx")
+
+    report = BulkImporter(api=api, concurrency=args.concurrency).run(load_rows(args.sheet))
+    for row in report.rows():
+        print(f"row {row['row']:>4}  {row['po_ref']:<12} {row['status']:<8} {row['po_number']:<12} {row['message']}")
+    print(report.summary())
+    if args.report:
+        with open(args.report, "w", newline="") as f:
+            f.write(report.to_csv())
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Opt-in local search index for the material and supplier catalogs.
+
+Instead of a backend POST per resolution attempt (or per keystroke in an autocomplete),
+the catalogs are bulk-loaded once and searched in memory (prefix, token and fuzzy search
+via fuzzy_index.MatchIndex). Refreshes run in the background and are applied
+incrementally: the new listing is diffed against the index by id and only added,
+changed or removed records touch it.
+
+Searches return None when the index is missing or older than max_staleness, and
+callers (MockAPI / AsyncMockAPI) then fall back to the remote search.
+
+Enable with SUPPLIERX_CATALOG_INDEX=on.
+"""
+import bisect
+import heapq
+import json
+import os
+import threading
+import time
+
+from fuzzy_index import MatchIndex, normalize
+
+# A full rebuild is cheaper than carrying more tombstones than this share of the index
+_COMPACT_RATIO = 0.3
+
+# Upper bound on prefix candidates examined per query (keeps one-letter prefixes cheap)
+_PREFIX_SCAN = 1000
+
+
+def _digest(record):
+    return json.dumps(record, sort_keys=True, default=str)
+
+
+class CatalogIndex:
+    """In-memory index over one catalog (materials or suppliers) with background refresh."""
+
+    def __init__(self, name, loader, id_key="id", refresh_interval=None, max_staleness=None):
+        self.name = name
+        self.loader = loader  # () -> full list of normalized records
+        self.id_key = id_key
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(os.getenv("SUPPLIERX_CATALOG_REFRESH", "900"))
+        self.max_staleness = max_staleness if max_staleness is not None else float(os.getenv("SUPPLIERX_CATALOG_MAX_STALENESS", "3600"))
+
+        self._index = None
+        self._slots = {}  # record id -> slot in the index
+        self._digests = {}  # record id -> digest, to detect changes on refresh
+        self._tombstones = 0
+        self._prefix_tokens = None  # prefix structures, rebuilt lazily after changes
+        self.loaded_at = None
+        self._lock = threading.RLock()
+        self._refreshing = False
+        self.local_hits = 0
+        self.fallbacks = 0
+
+    # --- Loading ---
+
+    def load(self):
+        """Fetch the full listing and apply it (blocking). Returns the number of changed records."""
+        records = self.loader()
+        if not records:
+            # Empty usually means the backend call failed; keep serving the previous snapshot
+            return 0
+        # Digests and full rebuilds are computed off-lock so queries keep being served
+        entries = {}
+        for record in records:
+            entries.setdefault(record.get(self.id_key), (_digest(record), record))
+        with self._lock:
+            rebuild = self._index is None or self._tombstones > _COMPACT_RATIO * len(self._index)
+        if rebuild:
+            index = MatchIndex([], id_key=self.id_key)
+            slots = {record_id: index.add(record) for record_id, (_, record) in entries.items()}
+            with self._lock:
+                self._index, self._slots = index, slots
+                self._digests = {record_id: digest for record_id, (digest, _) in entries.items()}
+                self._tombstones = 0
+                self._prefix_tokens = None
+                changed = len(slots)
+        else:
+            with self._lock:
+                changed = self._apply_diff(entries)
+        self.loaded_at = time.monotonic()
+        print(f"DEBUG: Catalog '{self.name}' refreshed: {len(self._slots)} records, {changed} changed")
+        return changed
+
+    def _apply_diff(self, entries):
+        changed = sum(1 for record_id, (digest, record) in entries.items() if self._upsert(record_id, record, digest))
+        for record_id in [r for r in self._slots if r not in entries]:
+            self._index.discard(self._slots.pop(record_id))
+            del self._digests[record_id]
+            self._tombstones += 1
+            changed += 1
+        return changed
+
+    def _upsert(self, record_id, record, digest=None):
+        digest = digest or _digest(record)
+        if self._digests.get(record_id) == digest:
+            return False
+        if record_id in self._slots:
+            self._index.discard(self._slots[record_id])
+            self._tombstones += 1
+        self._slots[record_id] = self._index.add(record)
+        self._digests[record_id] = digest
+        self._prefix_tokens = None
+        return True
+
+    def upsert(self, records):
+        """Merge records seen elsewhere (e.g. a remote search) into a loaded index."""
+        with self._lock:
+            if self._index is None:
+                return
+            for record in records:
+                self._upsert(record.get(self.id_key), record)
+
+    def refresh_async(self):
+        """Start a background load unless one is already running."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.load()
+            except Exception as e:
+                print(f"DEBUG: Catalog '{self.name}' refresh failed: {e}")
+            finally:
+                self._refreshing = False
+        threading.Thread(target=run, name=f"catalog-refresh-{self.name}", daemon=True).start()
+
+    def usable(self):
+        """True if the index can answer queries; schedules a refresh when it is due."""
+        if self.loaded_at is None:
+            self.refresh_async()
+            return False
+        age = time.monotonic() - self.loaded_at
+        if age > self.refresh_interval:
+            self.refresh_async()
+        return age <= self.max_staleness
+
+    # --- Queries (None means "not usable, ask the backend") ---
+
+    def search(self, query, k=10):
+        """Ranked token/fuzzy search."""
+        if not self.usable():
+            self.fallbacks += 1
+            return None
+        with self._lock:
+            results = [cand for _, cand in self._index.search(query, k=k)]
+        self.local_hits += 1
+        return results
+
+    def prefix(self, text, k=10):
+        """
+        Autocomplete. Names starting with the typed text come first (shortest first), then
+        names where a later word starts with the last typed word and the rest are contained.
+        """
+        if not self.usable():
+            self.fallbacks += 1
+            return None
+        words = normalize(text).split()
+        if not words:
+            return []
+        *complete, partial = words
+        phrase = " ".join(words)
+        with self._lock:
+            sorted_names, tokens, postings = self._prefix_index()
+            names = self._index.names
+
+            # 1. Whole-name prefix (bounded scan so one-letter prefixes stay cheap)
+            pos = bisect.bisect_left(sorted_names, (phrase, -1))
+            leading = []
+            while pos < len(sorted_names) and sorted_names[pos][0].startswith(phrase) and len(leading) < _PREFIX_SCAN:
+                leading.append(sorted_names[pos])
+                pos += 1
+            ranked = [slot for _, slot in heapq.nsmallest(k, leading, key=lambda e: (len(e[0]), e))]
+
+            # 2. Word-start matches, shortest completions first (a sample is enough here:
+            #    these are all equally weak matches)
+            if len(ranked) < k:
+                seen = set(ranked)
+                extra = []
+                lo = bisect.bisect_left(tokens, partial)
+                hi = bisect.bisect_left(tokens, partial + "\uffff")
+                for token in sorted(tokens[lo:hi], key=len):
+                    for slot in postings[token]:
+                        if slot not in seen and names[slot] and all(w in names[slot] for w in complete):
+                            seen.add(slot)
+                            extra.append(slot)
+                        if len(extra) >= k * 20:
+                            break
+                    if len(extra) >= k * 20:
+                        break
+                ranked += heapq.nsmallest(k - len(ranked), extra, key=lambda s: (len(names[s]), s))
+            results = [self._index.candidates[s] for s in ranked]
+        self.local_hits += 1
+        return results
+
+    def _prefix_index(self):
+        """Sorted (name, slot) pairs, sorted distinct tokens and token -> slots; rebuilt lazily after changes."""
+        if self._prefix_tokens is None:
+            postings = {}
+            for slot, name in enumerate(self._index.names):
+                for token in set(name.split()):
+                    postings.setdefault(token, []).append(slot)
+            sorted_names = sorted((name, slot) for slot, name in enumerate(self._index.names) if name)
+            self._prefix_tokens = (sorted_names, sorted(postings), postings)
+        return self._prefix_tokens
+
+    def all(self):
+        """Every live record, or None if not usable."""
+        if not self.usable():
+            self.fallbacks += 1
+            return None
+        with self._lock:
+            records = [c for c in self._index.candidates if c is not None]
+        self.local_hits += 1
+        return records
+
+    def stats(self):
+        return {
+            "records": len(self._slots),
+            "tombstones": self._tombstones,
+            "age_s": None if self.loaded_at is None else time.monotonic() - self.loaded_at,
+            "local_hits": self.local_hits,
+            "fallbacks": self.fallbacks,
+        }
+
+
+class LocalCatalog:
+    """Material and supplier indexes loaded through a MockAPI that bypasses the index itself."""
+
+    def __init__(self, api=None, refresh_interval=None, max_staleness=None):
+        if api is None:
+            from mock_api import MockAPI
+            api = MockAPI(cache=False, catalog=False)
+        self.materials = CatalogIndex("materials", lambda: api.get_materials(), id_key="id",
+                                      refresh_interval=refresh_interval, max_staleness=max_staleness)
+        self.suppliers = CatalogIndex("suppliers", lambda: api.search_suppliers(limit=None), id_key="vendor_id",
+                                      refresh_interval=refresh_interval, max_staleness=max_staleness)
+
+    def load(self):
+        self.materials.load()
+        self.suppliers.load()
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_local_catalog():
+    """Return the process-wide LocalCatalog, or None unless enabled via env."""
+    global _catalog
+    if os.getenv("SUPPLIERX_CATALOG_INDEX", "off").lower() not in ("on", "1", "true"):
+        return None
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = LocalCatalog()
+    return _catalog
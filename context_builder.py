@@ -0,0 +1,182 @@
+"""
+Token-budgeted conversation context for the analysis call.
+
+The model input used to be the full payload plus the last 10 history entries as indented
+JSON, so it grew with the conversation and with the number of line items. ContextBuilder
+keeps it under max_tokens (PO_AGENT_CONTEXT_TOKENS) and sends minified JSON with:
+
+- current_payload: the filled fields only; when the line items do not fit, the changed,
+  first and last items are kept (with their index) and the rest are counted
+- payload_changes: fields and line item indexes changed since the previous turn
+- conversation_history: the newest entries that fit, long replies clipped
+- earlier_conversation: what the user asked in turns that no longer fit
+"""
+import json
+import os
+import zlib
+
+from model_backends import estimate_tokens
+from po_draft import PODraft
+
+# History entries kept verbatim at most (the old fixed window)
+HISTORY_WINDOW = 10
+
+# Longest history entry sent as is; longer ones (verbose assistant replies) are clipped
+ENTRY_MAX_CHARS = 400
+
+# Length of each user request quoted in earlier_conversation
+SUMMARY_ENTRY_CHARS = 80
+
+# Share of the budget left after the fixed parts that line items may use
+ITEM_SHARE = 0.6
+
+# Share of the whole budget for earlier_conversation
+SUMMARY_SHARE = 0.1
+
+
+def dumps(value):
+    """Minified JSON, as sent to the model."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _empty(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _compact(item):
+    return {k: v for k, v in item.items() if not _empty(v)} if isinstance(item, dict) else item
+
+
+def _digest(text):
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def _clip(text, limit):
+    text = str(text)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+class ContextBuilder:
+    def __init__(self, max_tokens=None):
+        self.max_tokens = max_tokens if max_tokens is not None else int(os.getenv("PO_AGENT_CONTEXT_TOKENS", "2500"))
+
+    def build(self, user_text, current_payload, conversation_history, context_state=None):
+        """
+        Return the "Current Context:" message. context_state is the per-conversation dict
+        (the agent state) where the payload baseline for the next turn's delta is kept;
+        without it no payload_changes are sent.
+        """
+        if isinstance(current_payload, PODraft):
+            # Compact projection, cached per line item until it changes
+            header = current_payload.to_context()
+            items = header.pop("line_items", [])
+        else:
+            header = {k: _compact(v) for k, v in current_payload.items() if k != "line_items" and not _empty(v)}
+            items = [_compact(item) for item in current_payload.get("line_items") or []]
+        item_texts = [dumps(item) for item in items]
+
+        baseline = {"fields": {k: _digest(dumps(v)) for k, v in header.items()},
+                    "items": [_digest(t) for t in item_texts]}
+        changes, changed_items = None, set()
+        previous = context_state.get("context_baseline") if context_state is not None else None
+        if previous:
+            changes = self._changes(header, baseline, previous)
+            changed_items = set(changes.get("line_items", ()))
+        if context_state is not None:
+            context_state["context_baseline"] = baseline
+
+        context = {"current_payload": header}
+        if changes:
+            context["payload_changes"] = changes
+        context["latest_user_input"] = user_text
+        budget = self.max_tokens - estimate_tokens(dumps(context))
+
+        # Line items: all of them if they fit, otherwise changed + first + last within the share
+        item_tokens = [estimate_tokens(t) + 1 for t in item_texts]
+        if sum(item_tokens) <= budget * ITEM_SHARE:
+            header["line_items"] = items
+            budget -= sum(item_tokens)
+        elif items:
+            shown = self._select_items(item_tokens, changed_items, budget * ITEM_SHARE)
+            header["line_items"] = [dict(items[i], index=i) for i in shown]
+            header["line_items_total"] = len(items)
+            header["line_items_omitted"] = len(items) - len(shown)
+            budget -= sum(item_tokens[i] + 3 for i in shown) + 12
+
+        history, earlier = self._fit_history(conversation_history or [], budget)
+        if earlier:
+            context["earlier_conversation"] = earlier
+        context["conversation_history"] = history
+        # latest_user_input last, as before
+        context["latest_user_input"] = context.pop("latest_user_input")
+        return f"Current Context:\n{dumps(context)}"
+
+    @staticmethod
+    def _changes(header, baseline, previous):
+        old_fields, old_items = previous.get("fields", {}), previous.get("items", [])
+        changes = {}
+        fields = {k: header[k] for k, d in baseline["fields"].items() if old_fields.get(k) != d}
+        fields.update({k: None for k in old_fields if k not in baseline["fields"]})
+        if fields:
+            changes["fields"] = fields
+        new_items = baseline["items"]
+        changed = [i for i, d in enumerate(new_items) if i >= len(old_items) or old_items[i] != d]
+        if changed:
+            changes["line_items"] = changed
+        if len(old_items) > len(new_items):
+            changes["line_items_removed"] = len(old_items) - len(new_items)
+        return changes
+
+    @staticmethod
+    def _select_items(item_tokens, changed, budget):
+        """Indexes of the items to show: changed ones first, then alternating from both ends."""
+        n = len(item_tokens)
+        order = sorted(changed)
+        lo, hi = 0, n - 1
+        while lo <= hi:
+            order.append(hi)
+            if lo != hi:
+                order.append(lo)
+            lo, hi = lo + 1, hi - 1
+        shown, used = set(), 0
+        for i in order:
+            if i in shown:
+                continue
+            if used + item_tokens[i] + 3 > budget:
+                break
+            shown.add(i)
+            used += item_tokens[i] + 3
+        return sorted(shown)
+
+    def _fit_history(self, history, budget):
+        """Newest entries that fit the budget, and a short summary of the user's earlier requests."""
+        summary_budget = SUMMARY_SHARE * self.max_tokens
+        budget -= summary_budget
+        kept, used = [], 0
+        start = len(history)
+        for entry in reversed(history[-HISTORY_WINDOW:]):
+            entry = {"role": entry.get("role"), "content": _clip(entry.get("content", ""), ENTRY_MAX_CHARS)}
+            cost = estimate_tokens(dumps(entry)) + 1
+            if used + cost > budget:
+                break
+            kept.append(entry)
+            used += cost
+            start -= 1
+        kept.reverse()
+
+        # Older user requests carry the entities the prompt's re-scan rule looks for
+        requests = [_clip(e.get("content", ""), SUMMARY_ENTRY_CHARS) for e in history[:start] if e.get("role") == "user"]
+        if not requests:
+            return kept, None
+        summary_budget += max(0, budget - used)
+        quoted, cost = [], 0
+        for text in reversed(requests):
+            cost += estimate_tokens(text) + 2
+            if cost > summary_budget:
+                break
+            quoted.append(text)
+        quoted.reverse()
+        summary = {"user_requests": quoted}
+        if len(quoted) < len(requests):
+            summary["older_requests_omitted"] = len(requests) - len(quoted)
+        return kept, summary
@@ -0,0 +1,359 @@
+"""
+Durable conversation state, so a chat can be resumed after a restart or on another replica.
+
+A conversation is the POAgent state dict: payload (a PODraft), conversation_history,
+last_analysis and current_step (other keys, e.g. the context builder's baseline, are
+process-local caches and are not stored).
+
+Storage is an append-only log per conversation. A turn appends one delta holding only
+what changed since the previous save: the header fields and line items that differ, the
+history entries appended, and last_analysis / current_step if they changed. Every
+snapshot_every deltas (and on a conversation's first save) a full snapshot is written instead
+and the rows before it are dropped, so a load reads at most one snapshot plus
+snapshot_every deltas.
+
+Loads are lazy: nothing is read until a conversation is opened, and then only its log
+from the latest snapshot on. Concurrent writers of the same conversation (two replicas)
+are detected on append: a row is only written if its seq directly follows the
+conversation's last row, so a replica whose baseline is stale (including one overtaken
+by another replica's snapshot) cannot slip a delta in. Nothing is overwritten: the
+losing save raises ConversationConflict and the caller reloads the conversation and
+reapplies its turn. is_current() tells a caller, before running a turn, whether the
+conversation was saved from elsewhere since its copy was loaded or saved.
+
+ConversationStore holds the delta logic; a backend implements _read / _append / _delete.
+SQLiteConversationStore is the local backend (WAL mode, one connection per thread).
+Enable with PO_AGENT_CONVERSATION_DB=<path of the SQLite file> (see get_conversation_store).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from po_draft import PODraft
+
+def _dumps(value):
+    return json.dumps(value, default=str, separators=(",", ":"))
+
+
+def _split_payload(payload):
+    """(header, line items) as fresh plain copies of the draft."""
+    if isinstance(payload, PODraft):
+        data = payload.to_dict()
+        items = data.pop("line_items")
+    else:
+        data = dict(payload)
+        items = [dict(item) for item in data.pop("line_items", None) or ()]
+    data.pop("total", None)  # Derived from the line items
+    return data, items
+
+
+class _Baseline:
+    """
+    What the store last wrote (or read) for a conversation: the header and line items as
+    plain copies (from PODraft.to_dict), the rest as JSON or lengths. owner is the state
+    dict it was taken from.
+    """
+
+    __slots__ = ("owner", "seq", "deltas", "step", "analysis", "header", "items", "history_len", "history_last")
+
+    def __init__(self, state, header, items):
+        self.owner = state
+        self.seq = 0
+        self.deltas = 0
+        self.step = state["current_step"]
+        self.analysis = _dumps(state["last_analysis"])
+        # to_dict copies the header and items; nested lists (e.g. projects) are copied here
+        self.header = {k: list(v) if isinstance(v, list) else v for k, v in header.items()}
+        self.items = items
+        history = state["conversation_history"]
+        self.history_len = len(history)
+        self.history_last = _dumps(history[-1]) if history else None
+
+    def delta_from(self, base, state, header, items):
+        """The delta turning base into this state (header/items: the state's split payload)."""
+        delta = {}
+        if self.step != base.step:
+            delta["current_step"] = state["current_step"]
+        if self.analysis != base.analysis:
+            delta["last_analysis"] = state["last_analysis"]
+
+        changed = {k: v for k, v in header.items() if k not in base.header or base.header[k] != v}
+        if changed:
+            delta["set"] = changed
+        removed = [k for k in base.header if k not in self.header]
+        if removed:
+            delta["unset"] = removed
+        item_changes = {str(i): item for i, item in enumerate(items) if i >= len(base.items) or base.items[i] != item}
+        if item_changes or len(self.items) != len(base.items):
+            delta["items_len"] = len(self.items)
+            if item_changes:
+                delta["items"] = item_changes
+
+        history = state["conversation_history"]
+        n = base.history_len
+        if len(history) >= n and (n == 0 or _dumps(history[n - 1]) == base.history_last):
+            if len(history) > n:
+                delta["history_add"] = history[n:]
+        else:
+            delta["history"] = list(history)  # Rewritten (e.g. trimmed), not appended
+        return delta
+
+
+def _snapshot(state, header, items):
+    return {
+        "current_step": state["current_step"],
+        "header": header,
+        "items": items,
+        "conversation_history": list(state["conversation_history"]),
+        "last_analysis": state["last_analysis"],
+    }
+
+
+def _apply_delta(data, delta):
+    if "current_step" in delta:
+        data["current_step"] = delta["current_step"]
+    if "last_analysis" in delta:
+        data["last_analysis"] = delta["last_analysis"]
+    header = data["header"]
+    header.update(delta.get("set", {}))
+    for key in delta.get("unset", ()):
+        header.pop(key, None)
+    if "items_len" in delta:
+        items = data["items"]
+        del items[delta["items_len"]:]
+        for index, item in delta.get("items", {}).items():
+            index = int(index)
+            if index < len(items):
+                items[index] = item
+            else:
+                items.append(item)
+    if "history" in delta:
+        data["conversation_history"] = delta["history"]
+    else:
+        data["conversation_history"].extend(delta.get("history_add", ()))
+
+
+class ConversationConflict(Exception):
+    """
+    The conversation was saved by another process since this store's baseline. Raised by
+    a backend's _append (seq does not directly follow the conversation's last row) and by
+    ConversationStore.save, which writes nothing in that case.
+    """
+
+
+class ConversationStore(ABC):
+    """
+    Delta-logged conversation store (see module docstring). Backends implement:
+    _read(conversation_id) -> [(seq, kind, data)] from the latest snapshot on, in seq order
+    _append(conversation_id, seq, kind, data) -> atomically checks that the conversation's
+        last seq is seq - 1 (0 if it has none), raising ConversationConflict otherwise;
+        a "snapshot" also drops the rows before it
+    _delete(conversation_id)
+    """
+
+    def __init__(self, snapshot_every=None, max_baselines=None):
+        self.snapshot_every = snapshot_every if snapshot_every is not None else int(os.getenv("PO_AGENT_CONVERSATION_SNAPSHOT_EVERY", "20"))
+        # Fingerprints of the last save per (conversation, state dict), LRU-bounded; a miss
+        # makes the next save conflict, i.e. costs the caller a reload
+        self.max_baselines = max_baselines if max_baselines is not None else int(os.getenv("PO_AGENT_CONVERSATION_BASELINES", "10000"))
+        self._baselines = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "deltas": 0, "snapshots": 0, "conflicts": 0, "bytes_written": 0}
+
+    def load(self, conversation_id):
+        """The conversation's state dict, or None if it was never saved."""
+        rows = self._read(conversation_id)
+        data = None
+        for seq, kind, raw in rows:
+            record = json.loads(raw)
+            if kind == "snapshot":
+                data = record
+            elif data is not None:
+                _apply_delta(data, record)
+        if data is None:
+            return None
+        state = {
+            "current_step": data["current_step"],
+            "payload": PODraft(dict(data["header"], line_items=data["items"])),
+            "conversation_history": data["conversation_history"],
+            "last_analysis": data["last_analysis"],
+        }
+        baseline = _Baseline(state, data["header"], data["items"])
+        baseline.seq, baseline.deltas = rows[-1][0], len(rows) - 1
+        self._remember(conversation_id, baseline)
+        self._count("loads")
+        return state
+
+    def save(self, conversation_id, state):
+        """
+        Append what changed in state since the last save/load (one row per call). Raises
+        ConversationConflict, writing nothing, if the conversation was saved from anywhere
+        else since then (or it exists but this state was not loaded from it): load() it
+        and reapply.
+        """
+        header, items = _split_payload(state["payload"])
+        current = _Baseline(state, header, items)
+        base = self._baseline(conversation_id, state)
+        if base is None:
+            kind, record = "snapshot", _snapshot(state, header, items)
+            current.seq, current.deltas = 1, 0
+        else:
+            delta = current.delta_from(base, state, header, items)
+            if not delta:
+                return
+            if base.deltas < self.snapshot_every:
+                kind, record = "delta", delta
+                current.seq, current.deltas = base.seq + 1, base.deltas + 1
+            else:
+                kind, record = "snapshot", _snapshot(state, header, items)
+                current.seq, current.deltas = base.seq + 1, 0
+        try:
+            self._write(conversation_id, current.seq, kind, record)
+        except ConversationConflict:
+            self._count("conflicts")
+            with self._lock:
+                self._baselines.pop((conversation_id, id(state)), None)
+            raise
+        self._remember(conversation_id, current)
+        self._count("deltas" if kind == "delta" else "snapshots")
+
+    def is_current(self, conversation_id, state):
+        """True if saving state would not conflict: nothing was saved to the conversation since state was loaded or saved."""
+        base = self._baseline(conversation_id, state)
+        last_seq = self._last_seq(conversation_id)
+        return last_seq == (base.seq if base is not None else 0)
+
+    def delete(self, conversation_id):
+        with self._lock:
+            for key in [key for key in self._baselines if key[0] == conversation_id]:
+                del self._baselines[key]
+        self._delete(conversation_id)
+
+    def _write(self, conversation_id, seq, kind, record):
+        raw = _dumps(record)
+        self._append(conversation_id, seq, kind, raw)
+        self._count("bytes_written", len(raw))
+
+    def _count(self, key, amount=1):
+        # The store is shared by every worker thread
+        with self._lock:
+            self.stats[key] += amount
+
+    def _baseline(self, conversation_id, state):
+        # Keyed by the state dict's id: each copy of a conversation (e.g. two browser tabs)
+        # has its own baseline; the baseline holds the dict, so the id is not reused meanwhile
+        with self._lock:
+            base = self._baselines.get((conversation_id, id(state)))
+        return base if base is not None and base.owner is state else None
+
+    def _remember(self, conversation_id, baseline):
+        key = (conversation_id, id(baseline.owner))
+        with self._lock:
+            self._baselines[key] = baseline
+            self._baselines.move_to_end(key)
+            while len(self._baselines) > self.max_baselines:
+                self._baselines.popitem(last=False)
+
+    @abstractmethod
+    def _read(self, conversation_id):
+        ...
+
+    @abstractmethod
+    def _append(self, conversation_id, seq, kind, data):
+        ...
+
+    @abstractmethod
+    def _delete(self, conversation_id):
+        ...
+
+    def _last_seq(self, conversation_id):
+        rows = self._read(conversation_id)
+        return rows[-1][0] if rows else 0
+
+
+class SQLiteConversationStore(ConversationStore):
+    """Local SQLite backend; safe to share between threads and processes on one host."""
+
+    def __init__(self, path, snapshot_every=None, max_baselines=None):
+        super().__init__(snapshot_every, max_baselines)
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS conversation_log ("
+                " conversation_id TEXT NOT NULL, seq INTEGER NOT NULL, kind TEXT NOT NULL,"
+                " data TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (conversation_id, seq)) WITHOUT ROWID"
+            )
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            # WAL: readers never block the writer; NORMAL sync is durable across crashes of the process
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _read(self, conversation_id):
+        return self._connection().execute(
+            "SELECT seq, kind, data FROM conversation_log WHERE conversation_id = ? AND seq >= COALESCE("
+            " (SELECT MAX(seq) FROM conversation_log WHERE conversation_id = ? AND kind = 'snapshot'), 0)"
+            " ORDER BY seq",
+            (conversation_id, conversation_id),
+        ).fetchall()
+
+    # Inserts only if seq follows the conversation's last row; one statement, so the check
+    # and the insert happen under the same write lock
+    _INSERT_NEXT = (
+        "INSERT INTO conversation_log SELECT ?, ?, ?, ?, ? WHERE"
+        " (SELECT COALESCE(MAX(seq), 0) FROM conversation_log WHERE conversation_id = ?) = ?"
+    )
+
+    def _append(self, conversation_id, seq, kind, data):
+        db = self._connection()
+        row = (conversation_id, seq, kind, data, time.time(), conversation_id, seq - 1)
+        try:
+            if kind != "snapshot":
+                # A delta is a single autocommit INSERT
+                inserted = db.execute(self._INSERT_NEXT, row).rowcount
+            else:
+                with db:
+                    db.execute("BEGIN IMMEDIATE")
+                    inserted = db.execute(self._INSERT_NEXT, row).rowcount
+                    if inserted:
+                        db.execute("DELETE FROM conversation_log WHERE conversation_id = ? AND seq < ?", (conversation_id, seq))
+        except sqlite3.IntegrityError:
+            inserted = 0
+        if not inserted:
+            raise ConversationConflict(conversation_id, seq)
+
+    def _delete(self, conversation_id):
+        self._connection().execute("DELETE FROM conversation_log WHERE conversation_id = ?", (conversation_id,))
+
+    def _last_seq(self, conversation_id):
+        row = self._connection().execute(
+            "SELECT MAX(seq) FROM conversation_log WHERE conversation_id = ?", (conversation_id,)).fetchone()
+        return row[0] or 0
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store():
+    """Return the process-wide conversation store, or None unless PO_AGENT_CONVERSATION_DB is set."""
+    global _store
+    path = os.getenv("PO_AGENT_CONVERSATION_DB", "")
+    if not path:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SQLiteConversationStore(path)
+    return _store
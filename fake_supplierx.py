@@ -0,0 +1,381 @@
+"""
+Local stand-in for the SupplierX backend used by MockAPI / AsyncMockAPI.
+
+Serves every endpoint the clients touch from a synthetic, deterministic catalog of
+configurable size, with latency, jitter and error-rate injection. It can run:
+- in-process behind requests (``in_process_transport``) or httpx (``httpx_transport``)
+- as a local HTTP server (``serve`` / ``python fake_supplierx.py --port 8085``)
+
+so throughput and tail-latency benchmarks are reproducible offline.
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+from http_transport import HTTPTransport
+from mock_api import (
+    ALTERNATE_SUPPLIER_ENDPOINT, SUPPLIERS_ENDPOINT, MATERIALS_ENDPOINT, SERVICES_ENDPOINT,
+    CREATE_PO_ENDPOINT, PURCHASE_ORGS_ENDPOINT, PURCHASE_GROUPS_ENDPOINT, PLANTS_ENDPOINT,
+    CURRENCIES_ENDPOINT, PAYMENT_TERMS_ENDPOINT, INCOTERMS_ENDPOINT, PROJECTS_ENDPOINT,
+    TAX_CODES_ENDPOINT,
+)
+
+_ADJECTIVES = ["Steel", "Copper", "Plastic", "Industrial", "Heavy", "Compact", "Precision", "Galvanized",
+               "Electric", "Hydraulic", "Portable", "Rubber", "Aluminium", "Ceramic", "Digital", "Thermal"]
+_NOUNS = ["Pipe", "Valve", "Bearing", "Cable", "Pump", "Motor", "Bolt", "Gasket", "Sensor", "Switch",
+          "Filter", "Panel", "Drill", "Helmet", "Glove", "Scooter", "Laptop", "Chair", "Tyre", "Battery"]
+_COMPANY = ["Tata", "Reliance", "Mahindra", "Bharat", "Shree", "Ganesh", "Apex", "Sunrise", "Global",
+            "National", "Prime", "Vardhman", "Kaveri", "Orient", "Zenith", "Smart"]
+_COMPANY_SUFFIX = ["Industries", "Traders", "Enterprises", "Steel", "Solutions", "Suppliers", "Exports", "Corp"]
+_CITIES = ["Dhaneti", "Mundra", "Pune", "Nagpur", "Surat", "Chennai", "Vizag", "Bhuj", "Indore", "Jaipur"]
+
+
+class SyntheticCatalog:
+    """
+    Deterministic master data in the backend's raw response shape. Bulk rows (materials,
+    suppliers) are rendered on demand from their index, so 100k+ records stay cheap.
+    The records used by the repo's tests (Smartsaa, Ashapura/40, Ail Dhaneti, CPT, Scooty)
+    are always present as fixtures.
+    """
+
+    def __init__(self, materials=1000, suppliers=500, orgs=20, plants_per_org=5, groups_per_org=8,
+                 services=200, seed=42):
+        self.seed = seed
+        self.material_count = materials
+        self.supplier_count = suppliers
+        self.service_count = services
+
+        rng = random.Random(seed)
+        self._material_names = ["Scooty"] + [
+            f"{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {i:05d}" for i in range(1, materials)]
+        self._material_prices = [50000.0] + [round(rng.uniform(10, 5000), 2) for _ in range(1, materials)]
+        self._supplier_names = ["Smartsaa"] + [
+            f"{rng.choice(_COMPANY)} {rng.choice(_COMPANY_SUFFIX)} {i:05d}" for i in range(1, suppliers)]
+        self._material_lower = [n.lower() for n in self._material_names]
+        self._supplier_lower = [n.lower() for n in self._supplier_names]
+
+        self.orgs = [{"id": 40, "code": "40", "description": "Ashapura"}] + [
+            {"id": 100 + i, "code": str(100 + i), "description": f"{rng.choice(_COMPANY)} Org {i}"} for i in range(1, orgs)]
+        self.plants = []
+        self.groups = []
+        for org in self.orgs:
+            for j in range(plants_per_org):
+                name = "Ail Dhaneti" if (org["id"] == 40 and j == 0) else f"{rng.choice(_CITIES)} Plant {org['id']}-{j}"
+                self.plants.append({"id": str(uuid.UUID(int=rng.getrandbits(128))), "plantCode": f"{org['id']}{j:02d}",
+                                    "plantName": name, "purchase_org_id": org["id"]})
+            for j in range(groups_per_org):
+                gid = 365 if (org["id"] == 40 and j == 0) else org["id"] * 100 + j
+                name = "CPT" if gid == 365 else f"Group {rng.choice(_NOUNS)} {org['id']}-{j}"
+                self.groups.append({"id": gid, "code": name[:3].upper(), "name": name, "purchase_org_id": org["id"]})
+
+        self.services = [{"id": 5000 + i, "serviceCode": f"S{i:04d}", "serviceDescription": f"{rng.choice(_NOUNS)} Maintenance {i}",
+                          "price": round(rng.uniform(100, 20000), 2), "uom": "AU"} for i in range(services)]
+        self.currencies = [{"currencyCode": c} for c in ("INR", "USD", "EUR", "GBP", "JPY")]
+        self.payment_terms = [{"id": 189, "paymentTermCode": "0001", "description": "Immediate Payment"}] + [
+            {"id": 190 + i, "paymentTermCode": f"{i:04d}", "description": f"Net {15 * i} days"} for i in range(1, 12)]
+        self.incoterms = [{"id": 13, "incoTermCode": "FOR", "description": "Free On Road"}] + [
+            {"id": 13 + i, "incoTermCode": c, "description": c} for i, c in enumerate(("EXW", "FOB", "CIF", "DAP", "DDP"), 1)]
+        self.projects = [{"projectCode": f"P{i:06d}", "projectName": f"Project {rng.choice(_CITIES)} {i}"} for i in range(50)]
+        self.tax_codes = [{"id": 118 + i, "code": f"G{i}", "description": f"GST {r}%"} for i, r in enumerate((0, 5, 12, 18, 28))]
+
+    # --- Bulk rows rendered on demand ---
+
+    def material_row(self, i):
+        return {
+            "id": 95942 if i == 0 else 100000 + i,
+            "code": str(453 + i),
+            "name": self._material_names[i],
+            "price": self._material_prices[i],
+            "unit": {"id": 208 if i == 0 else 200 + i % 20, "code": "EA"},
+            "material_group": {"id": 520 if i == 0 else 500 + i % 50},
+            "hsn_code": {"id": 7000 + i % 100},
+        }
+
+    def supplier_row(self, i):
+        return {
+            "id": "a888ee02-b479-45ba-899b-40daba67d7d7" if i == 0 else str(uuid.uuid5(uuid.NAMESPACE_OID, f"{self.seed}-supplier-{i}")),
+            "sap_code": str(1000000 + i),
+            "supplier_name": self._supplier_names[i],
+            "email": f"vendor{i}@example.com",
+            "contact_no": f"98{i:08d}",
+        }
+
+    def search_materials(self, query=None, limit=None):
+        return [self.material_row(i) for i in _search(self._material_lower, query, limit)]
+
+    def search_suppliers(self, query=None, limit=None):
+        return [self.supplier_row(i) for i in _search(self._supplier_lower, query, limit)]
+
+
+def _search(lower_names, query, limit):
+    if not query:
+        indexes = range(len(lower_names))
+    else:
+        q = str(query).lower()
+        indexes = [i for i, name in enumerate(lower_names) if q in name]
+    return list(indexes[:limit] if limit else indexes)
+
+
+class FaultProfile:
+    """Latency / jitter / error-rate injection, optionally overridden per endpoint."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503, per_endpoint=None, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.per_endpoint = per_endpoint or {}  # endpoint -> dict of overrides
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, endpoint):
+        """Return (delay_seconds, error_status_or_None) for one request."""
+        cfg = self.per_endpoint.get(endpoint, {})
+        latency = cfg.get("latency_ms", self.latency_ms)
+        jitter = cfg.get("jitter_ms", self.jitter_ms)
+        error_rate = cfg.get("error_rate", self.error_rate)
+        with self._lock:
+            delay = (latency + (self._rng.uniform(0, jitter) if jitter else 0)) / 1000.0
+            failed = error_rate and self._rng.random() < error_rate
+        return delay, (cfg.get("error_status", self.error_status) if failed else None)
+
+
+class FakeSupplierX:
+    """Request router over a SyntheticCatalog. Transport adapters call handle()."""
+
+    def __init__(self, catalog=None, faults=None, max_rows=None):
+        self.catalog = catalog or SyntheticCatalog()
+        self.faults = faults or FaultProfile()
+        self.max_rows = max_rows  # cap for unfiltered bulk listings (None = everything, like the real API)
+        self.calls = Counter()
+        self.created = []
+        self._po_seq = 0
+        self._lock = threading.Lock()
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls.clear()
+
+    def handle(self, method, path, body=None, form=None):
+        """Route one request. Returns (status, json_body). Does not sleep; see sample()."""
+        with self._lock:
+            self.calls[path] += 1
+        body = body or {}
+        cat = self.catalog
+
+        if path == SUPPLIERS_ENDPOINT:
+            return 200, {"data": cat.search_suppliers(body.get("search"), self.max_rows)}
+        if path.startswith(ALTERNATE_SUPPLIER_ENDPOINT):
+            vendor_id = path[len(ALTERNATE_SUPPLIER_ENDPOINT):]
+            return 200, {"data": [{"alternate_supplier_name": f"Alt {vendor_id[:8]}",
+                                   "alternate_supplier_email": "alt@example.com",
+                                   "alternate_supplier_contact_number": "9000000000"}]}
+        if path == MATERIALS_ENDPOINT:
+            return 200, {"data": {"rows": cat.search_materials(body.get("search"), self.max_rows)}}
+        if path == SERVICES_ENDPOINT:
+            q = str(body.get("search") or "").lower()
+            return 200, {"data": {"rows": [s for s in cat.services if q in s["serviceDescription"].lower()]}}
+        if path == PURCHASE_ORGS_ENDPOINT:
+            return 200, {"data": {"rows": cat.orgs}}
+        if path == PLANTS_ENDPOINT:
+            return 200, {"data": {"rows": _filter_by_org(cat.plants, body)}}
+        if path == PURCHASE_GROUPS_ENDPOINT:
+            return 200, {"data": {"rows": _filter_by_org(cat.groups, body)}}
+        if path == CURRENCIES_ENDPOINT:
+            return 200, {"data": cat.currencies}
+        if path == PAYMENT_TERMS_ENDPOINT:
+            return 200, {"data": {"rows": cat.payment_terms}}
+        if path == INCOTERMS_ENDPOINT:
+            return 200, {"data": {"rows": cat.incoterms}}
+        if path == PROJECTS_ENDPOINT:
+            return 200, {"data": {"rows": cat.projects}}
+        if path == TAX_CODES_ENDPOINT:
+            return 200, {"data": {"rows": {"other_tax_codes": cat.tax_codes[2:], "related_tax_codes": cat.tax_codes[:2]}}}
+        if path == CREATE_PO_ENDPOINT:
+            return self._create_po(form or {})
+        return 404, {"error": True, "message": f"Unknown endpoint {path}"}
+
+    def _create_po(self, form):
+        errors = [f"{key} is required" for key in ("po_type", "vendor_id", "purchase_org_id", "plant_id", "purchase_grp_id")
+                  if not form.get(key)]
+        if "line_items[0].material_id" not in form:
+            errors.append("at least one line item is required")
+        if errors:
+            return 400, {"success": False, "message": "Validation Failed", "data": [{"msg": e, "type": "E"} for e in errors]}
+        with self._lock:
+            self._po_seq += 1
+            po_number = f"45{self._po_seq:08d}"
+            self.created.append(form)
+        return 200, {"success": True, "po_number": po_number, "message": "Purchase order created"}
+
+    # --- Raw HTTP helpers shared by the adapters ---
+
+    def handle_raw(self, method, path, content_type, raw_body):
+        """Decode a raw request body, apply fault injection, route. Returns (delay, status, bytes)."""
+        delay, error_status = self.faults.sample(path)
+        if error_status:
+            with self._lock:
+                self.calls[path] += 1
+            return delay, error_status, json.dumps({"error": True, "message": "Injected failure"}).encode()
+        body, form = None, None
+        if raw_body and content_type.startswith("multipart/form-data"):
+            form = parse_multipart(raw_body, content_type)
+        elif raw_body:
+            try:
+                body = json.loads(raw_body)
+            except ValueError:
+                body = None
+        status, data = self.handle(method, path, body if isinstance(body, dict) else None, form)
+        return delay, status, json.dumps(data).encode()
+
+
+def _filter_by_org(rows, body):
+    org_ids = body.get("purchase_org_id")
+    if not org_ids:
+        return [{k: v for k, v in r.items() if k != "purchase_org_id"} for r in rows]
+    wanted = {int(o) for o in org_ids}
+    return [{k: v for k, v in r.items() if k != "purchase_org_id"} for r in rows if r["purchase_org_id"] in wanted]
+
+
+def parse_multipart(raw_body, content_type):
+    """Minimal multipart/form-data parser for text fields (enough for create_po)."""
+    boundary = content_type.split("boundary=", 1)[1].strip().strip('"').encode()
+    fields = {}
+    for part in raw_body.split(b"--" + boundary):
+        part = part.strip(b"\r\n")
+        if not part or part == b"--":
+            continue
+        head, _, value = part.partition(b"\r\n\r\n")
+        for line in head.split(b"\r\n"):
+            if line.lower().startswith(b"content-disposition") and b'name="' in line:
+                name = line.split(b'name="', 1)[1].split(b'"', 1)[0].decode()
+                fields[name] = value.decode()
+    return fields
+
+
+# --- Transport adapters ---
+
+class FakeSupplierXAdapter(BaseAdapter):
+    """requests adapter that answers from a FakeSupplierX in-process (sleeping for injected latency)."""
+
+    def __init__(self, fake):
+        super().__init__()
+        self.fake = fake
+
+    def send(self, request, **kwargs):
+        body = request.body
+        if hasattr(body, "read"):
+            body = body.read()
+        elif body is not None and not isinstance(body, (bytes, str)):
+            body = b"".join(body)  # streamed / generator bodies
+        if isinstance(body, str):
+            body = body.encode()
+        delay, status, content = self.fake.handle_raw(
+            request.method, urlsplit(request.url).path, request.headers.get("Content-Type", ""), body or b"")
+        if delay:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers["Content-Type"] = "application/json"
+        response.raw = BytesIO(content)
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        response.reason = "OK" if status < 400 else "Error"
+        return response
+
+    def close(self):
+        pass
+
+
+def in_process_transport(fake, config=None):
+    """HTTPTransport whose session is served by the fake (no sockets)."""
+    transport = HTTPTransport(config)
+    adapter = FakeSupplierXAdapter(fake)
+    transport.session.mount("http://", adapter)
+    transport.session.mount("https://", adapter)
+    return transport
+
+
+def httpx_transport(fake):
+    """httpx.MockTransport for AsyncMockAPI; injected latency is awaited, not slept."""
+    import httpx
+
+    async def handler(request):
+        delay, status, content = fake.handle_raw(
+            request.method, request.url.path, request.headers.get("Content-Type", ""), await request.aread())
+        if delay:
+            await asyncio.sleep(delay)
+        return httpx.Response(status, content=content, headers={"Content-Type": "application/json"})
+    return httpx.MockTransport(handler)
+
+
+def serve(fake, host="127.0.0.1", port=0):
+    """Run the fake as a local HTTP/1.1 server in a daemon thread; returns the server (see .base_url)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _dispatch(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+            delay, status, content = fake.handle_raw(
+                self.command, urlsplit(self.path).path, self.headers.get("Content-Type", ""), raw)
+            if delay:
+                time.sleep(delay)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = _dispatch
+        do_POST = _dispatch
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SupplierX backend stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--materials", type=int, default=100000)
+    parser.add_argument("--suppliers", type=int, default=50000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    fake = FakeSupplierX(
+        SyntheticCatalog(materials=args.materials, suppliers=args.suppliers, seed=args.seed),
+        FaultProfile(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed),
+    )
+    server = serve(fake, args.host, args.port)
+    print(f"Fake SupplierX listening on {server.base_url} (set SUPPLIERX_BASE_URL to use it)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
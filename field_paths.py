@@ -0,0 +1,124 @@
+"""
+Compiled field paths for POAgent action application.
+
+Model actions address the draft payload with paths such as "supplier", "po_date" or
+"line_items[3].material". compile_field_path turns each distinct path into a FieldPath
+once (aliases applied, indices parsed and validated) and caches it, so applying an
+action is a walk over pre-parsed steps instead of re-splitting the string every time.
+A malformed path raises ValueError at compile time, before anything is written.
+"""
+import functools
+import re
+
+from po_draft import SlotRecord
+
+# Model-facing names -> payload keys. Applied to a whole top-level path, or to the key
+# right after the first index ("line_items[0].material" -> "line_items[0].material_id").
+FIELD_ALIASES = {
+    "supplier": "vendor_id",
+    "vendor": "vendor_id",
+    "val_end_date": "validityEnd",
+    "validity_end": "validityEnd",
+    "purchase_org": "purchase_org_id",
+    "organization": "purchase_org_id",
+    "org": "purchase_org_id",
+    "plant": "plant_id",
+    "purchase_group": "purchase_grp_id",
+    "purchase_group_id": "purchase_grp_id",  # Fix common alias
+    "group": "purchase_grp_id",
+    "material": "material_id",
+    "currency": "currency",
+    "po_date": "po_date",
+}
+
+_INDEX_RE = re.compile(r"-?\d+")
+
+
+def _normalize(path):
+    if "[" in path and "]" in path:
+        base_key = path.split("[")[0]
+        remainder = path.split("]")[1]
+        idx_str = path[path.find("["):path.find("]") + 1]
+        if remainder.startswith(".") and remainder[1:] in FIELD_ALIASES:
+            return f"{base_key}{idx_str}.{FIELD_ALIASES[remainder[1:]]}"
+        return path
+    return FIELD_ALIASES.get(path, path)
+
+
+def _parse_index(text, path):
+    if not _INDEX_RE.fullmatch(text):
+        raise ValueError(f"Invalid index '{text}' in field path '{path}'")
+    return int(text)
+
+
+def _parse_part(part, path):
+    """(key, index or None) for one dotted segment; "items[2]" -> ("items", 2)."""
+    if "[" not in part:
+        return part, None
+    return part.split("[")[0], _parse_index(part.split("[")[1].rstrip("]"), path)
+
+
+class FieldPath:
+    """A normalized field path with its steps pre-parsed. Build with compile_field_path."""
+
+    __slots__ = ("raw", "path", "steps", "key", "index", "is_line_items", "item_index", "coerce_id", "material_redirect")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.path = path = _normalize(raw)
+        parts = path.split(".")
+        self.steps = tuple(_parse_part(part, path) for part in parts[:-1])
+        self.key, self.index = _parse_part(parts[-1], path)
+        # ADD on a line_items path appends a new item instead of setting a value
+        self.is_line_items = path == "line_items" or path.endswith("line_items")
+        # Line item a resolved material hydrates (first index in the path)
+        self.item_index = None
+        if "material" in path and "[" in path and "]" in path:
+            self.item_index = _parse_index(path.split("[")[1].split("]")[0], path)
+        self.coerce_id = self.key.endswith("_id")
+        self.material_redirect = path.replace(".material", ".material_id") if path.endswith(".material") else None
+
+    def __repr__(self):
+        return f"FieldPath({self.path!r})"
+
+    def resolve(self, payload):
+        """The container the last key lives in, creating intermediate dicts/lists as needed."""
+        target = payload
+        for key, idx in self.steps:
+            if isinstance(target, (dict, SlotRecord)):
+                target = target.setdefault(key, [] if idx is not None else {})
+            if idx is not None and isinstance(target, list):
+                while len(target) <= idx:
+                    target.append({})  # Expand list if needed
+                target = target[idx]
+        return target
+
+    def coerce(self, value):
+        """ID-like keys take digit strings as ints; "true"/"false" become booleans."""
+        if self.coerce_id and str(value).isdigit():
+            return int(value)
+        if isinstance(value, str):
+            if value.lower() == "true":
+                return True
+            if value.lower() == "false":
+                return False
+        return value
+
+    def set(self, payload, value):
+        """Store an already coerced value; returns False if the path does not name a dict key."""
+        if self.index is not None:
+            # Setting a list item directly? Rare.
+            return False
+        target = self.resolve(payload)
+        if not isinstance(target, (dict, SlotRecord)):
+            return False
+        target[self.key] = value
+        return True
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_field_path(path):
+    """Cached FieldPath for path; raises ValueError for malformed indices."""
+    if not isinstance(path, str):
+        raise ValueError(f"Field path must be a string, got {type(path).__name__}")
+    return FieldPath(path)
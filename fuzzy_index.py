@@ -0,0 +1,271 @@
+"""
+Prebuilt match index for resolving user text ("ail dhaneti", "CPT", "40") against
+master-data candidate lists (plants, orgs, groups...).
+
+MatchIndex keeps normalized names, an id map and a trigram inverted index, and returns
+ranked top-k candidates with scores:
+
+    1.0        exact id or exact (normalized) name
+    0.9 - 0.99 the query is a substring of the name (longer coverage ranks higher)
+    0.8 - 0.89 every query word appears in the name
+    < 0.8      trigram (Dice) similarity, for typos and near misses (only when
+               nothing above matched)
+
+index_for picks the matcher for a candidate list. Building an index costs several scans,
+so it only pays off for a list that is searched again: lists handed out by the
+master-data cache are indexed (and the index cached) the second time they are seen, while
+small lists and lists seen once (e.g. fresh lookup results with the cache disabled) are
+scanned linearly with the same scoring (LinearMatcher).
+"""
+import re
+import threading
+from collections import Counter, OrderedDict
+
+# Fuzzy (typo-tolerant) matches below this score are not accepted by best()
+DEFAULT_MIN_SCORE = 0.6
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    return _NON_ALNUM.sub(" ", str(text).lower()).strip()
+
+
+def trigrams(normalized):
+    """Padded per-word trigrams (pg_trgm style): 'cpt' -> {'  c', ' cp', 'cpt', 'pt '}."""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+
+def _containment_score(query, words, name):
+    """Exact / substring / all-words tier score of a normalized name, or None."""
+    if name == query:
+        return 1.0
+    if query in name:
+        return 0.9 + 0.09 * len(query) / len(name)
+    if all(w in name for w in words):
+        return 0.8 + 0.09 * sum(len(w) for w in words) / len(name)
+    return None
+
+
+def _ranked(scores, names, candidates, k):
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], len(names[item[0]]), item[0]))
+    return [(round(score, 4), candidates[i]) for i, score in ranked[:k]]
+
+
+class MatchIndex:
+    def __init__(self, candidates, name_key="name", id_key="id"):
+        self.candidates = candidates
+        self.name_key = name_key
+        self.id_key = id_key
+        self.names = [normalize(c.get(name_key) or "") for c in candidates]
+        self.exact = {}
+        for i, name in enumerate(self.names):
+            self.exact.setdefault(name, i)
+        self.ids = {}
+        for i, cand in enumerate(candidates):
+            cand_id = cand.get(id_key)
+            if cand_id is not None:
+                self.ids.setdefault(str(cand_id).lower().strip(), i)
+        self.postings = {}
+        for i, name in enumerate(self.names):
+            for gram in trigrams(name):
+                self.postings.setdefault(gram, []).append(i)
+
+    def __len__(self):
+        return len(self.candidates)
+
+    # Incremental updates, only for indexes that own their candidate list (see catalog_index).
+    # Removed slots are tombstoned (blank name, no id) and never match; rebuild to compact.
+
+    def add(self, candidate):
+        i = len(self.candidates)
+        self.candidates.append(candidate)
+        name = normalize(candidate.get(self.name_key) or "")
+        self.names.append(name)
+        self.exact.setdefault(name, i)
+        if candidate.get(self.id_key) is not None:
+            self.ids.setdefault(str(candidate[self.id_key]).lower().strip(), i)
+        for gram in trigrams(name):
+            self.postings.setdefault(gram, []).append(i)
+        return i
+
+    def discard(self, i):
+        candidate = self.candidates[i]
+        if candidate is None:
+            return
+        if self.exact.get(self.names[i]) == i:
+            del self.exact[self.names[i]]
+        cand_id = str(candidate.get(self.id_key)).lower().strip()
+        if self.ids.get(cand_id) == i:
+            del self.ids[cand_id]
+        self.candidates[i] = None
+        self.names[i] = ""
+
+    def _containing(self, words):
+        """
+        Indexes whose name may contain every word (superset; callers verify). Intersects the
+        rarest inner trigrams first and stops once the set is small or the next posting is
+        much larger than it. None if no word is long enough to have a trigram.
+        """
+        grams = {w[i:i + 3] for w in words for i in range(len(w) - 2)}
+        if not grams:
+            return None
+        lists = sorted((self.postings.get(g, ()) for g in grams), key=len)
+        result = set(lists[0])
+        for posting in lists[1:]:
+            if len(result) <= 512 or len(posting) > 8 * len(result):
+                break
+            result.intersection_update(posting)
+        return result
+
+    def _fuzzy_candidates(self, query_grams, limit, budget=20000):
+        """Candidates sharing the most trigrams, counting the rarest postings first within a budget."""
+        counts = Counter()
+        spent = 0
+        for posting in sorted((self.postings.get(g, ()) for g in query_grams), key=len):
+            if spent and spent + len(posting) > budget:
+                break
+            counts.update(posting)
+            spent += len(posting)
+        return [i for i, _ in counts.most_common(limit)]
+
+    def search(self, text, k=5, min_score=DEFAULT_MIN_SCORE):
+        """Return up to k (score, candidate) pairs, best first."""
+        raw = str(text).lower().strip()
+        query = normalize(text)
+        scores = {}
+
+        for hit in (self.ids.get(raw), self.exact.get(query)):
+            if hit is not None:
+                scores[hit] = 1.0
+        if not query or len(scores) >= k:
+            return [(1.0, self.candidates[i]) for i in list(scores)[:k]]
+
+        words = query.split()
+        narrowed = self._containing(words)
+        for i in (range(len(self.names)) if narrowed is None else narrowed):
+            name = self.names[i]
+            if not name:
+                continue
+            score = _containment_score(query, words, name)
+            if score is not None and score > scores.get(i, 0.0):
+                scores[i] = score
+
+        # Typo tolerance is a fallback: only when nothing matched by id, name or words
+        if not scores:
+            query_grams = trigrams(query)
+            for i in self._fuzzy_candidates(query_grams, limit=max(k * 10, 50)):
+                if i in scores:
+                    continue
+                score = 0.79 * _dice(query_grams, trigrams(self.names[i]))
+                if score >= min_score:
+                    scores[i] = score
+
+        return _ranked(scores, self.names, self.candidates, k)
+
+    def best(self, text, min_score=DEFAULT_MIN_SCORE):
+        results = self.search(text, k=1, min_score=min_score)
+        return results[0][1] if results else None
+
+
+class LinearMatcher:
+    """MatchIndex's scoring as a single pass over the list, without building anything."""
+
+    def __init__(self, candidates, name_key="name", id_key="id"):
+        self.candidates = candidates
+        self.name_key = name_key
+        self.id_key = id_key
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def search(self, text, k=5, min_score=DEFAULT_MIN_SCORE):
+        raw = str(text).lower().strip()
+        query = normalize(text)
+        words = query.split()
+        names = {}  # Normalized lazily: only candidates that can score pay for normalize()
+        scores = {}
+        name_key, id_key = self.name_key, self.id_key
+        first = words[0] if words else ""
+        for i, cand in enumerate(self.candidates):
+            cand_id = cand.get(id_key)
+            if cand_id is not None and str(cand_id).lower().strip() == raw:
+                scores[i] = 1.0
+                names[i] = normalize(cand.get(name_key) or "")
+            elif query:
+                # Query words are alphanumeric, so a name missing one in its lowercased form
+                # cannot contain it once normalized either
+                low = str(cand.get(name_key) or "").lower()
+                if first in low and all(w in low for w in words):
+                    name = names[i] = normalize(low)
+                    score = _containment_score(query, words, name) if name else None
+                    if score is not None:
+                        scores[i] = score
+
+        if not scores and query:
+            query_grams = trigrams(query)
+            for i, cand in enumerate(self.candidates):
+                name = names[i] = normalize(cand.get(self.name_key) or "")
+                score = 0.79 * _dice(query_grams, trigrams(name))
+                if score >= min_score:
+                    scores[i] = score
+        return _ranked(scores, names, self.candidates, k)
+
+    def best(self, text, min_score=DEFAULT_MIN_SCORE):
+        results = self.search(text, k=1, min_score=min_score)
+        return results[0][1] if results else None
+
+
+# Lists shorter than this are always scanned; an index does not beat one pass over them
+MIN_INDEXED_CANDIDATES = 64
+
+# Indexes (and lists seen once) keyed by the identity of the candidate list. Entries keep a
+# reference to the list, so its id cannot be reused while cached; a new master-data
+# snapshot is a new list and starts over.
+_INDEX_CACHE_SIZE = 64
+_indexes = OrderedDict()
+_seen_once = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def index_for(candidates):
+    """
+    Matcher for a candidate list (treat the list as read-only): a LinearMatcher for small
+    lists and the first time a list is seen, a cached MatchIndex once it is seen again.
+    """
+    if len(candidates) < MIN_INDEXED_CANDIDATES:
+        return LinearMatcher(candidates)
+    key = id(candidates)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry.candidates is candidates and len(entry) == len(candidates):
+            _indexes.move_to_end(key)
+            return entry
+        if _seen_once.get(key) is not candidates:
+            _seen_once[key] = candidates
+            while len(_seen_once) > _INDEX_CACHE_SIZE:
+                _seen_once.popitem(last=False)
+            return LinearMatcher(candidates)
+        del _seen_once[key]
+    index = MatchIndex(candidates)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > _INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def clear_index_cache():
+    with _indexes_lock:
+        _indexes.clear()
+        _seen_once.clear()
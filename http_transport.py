@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+
+from urllib.parse import urlsplit
+
+import tracing
+
+# Shared HTTP transport for the SupplierX backend.
+# One pooled requests.Session per process: every MockAPI instance (and therefore
+# every POAgent / Streamlit session) reuses the same keep-alive connections
+# instead of paying a TCP+TLS handshake on each master-data lookup.
+#
+# requests (and urllib3 / certifi under it) is imported when the first transport is
+# built, not when this module is: it is ~100 ms of a cold start that serves no request.
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TransportConfig:
+    """Pool, timeout and retry settings. Defaults can be overridden via env."""
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, pool_block=None,
+                 connect_timeout=None, read_timeout=None,
+                 max_retries=None, backoff_factor=None, retry_statuses=RETRY_STATUSES):
+        # Number of distinct host pools kept alive
+        self.pool_connections = pool_connections if pool_connections is not None else int(os.getenv("SUPPLIERX_HTTP_POOL_SIZE", "4"))
+        # Max open connections per host
+        self.pool_maxsize = pool_maxsize if pool_maxsize is not None else int(os.getenv("SUPPLIERX_HTTP_MAX_PER_HOST", "16"))
+        # Block (instead of opening extra throwaway connections) when a host pool is exhausted
+        if pool_block is None:
+            pool_block = os.getenv("SUPPLIERX_HTTP_POOL_BLOCK", "true").lower() == "true"
+        self.pool_block = pool_block
+        self.connect_timeout = connect_timeout if connect_timeout is not None else float(os.getenv("SUPPLIERX_HTTP_CONNECT_TIMEOUT", "3.05"))
+        self.read_timeout = read_timeout if read_timeout is not None else float(os.getenv("SUPPLIERX_HTTP_READ_TIMEOUT", "30"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("SUPPLIERX_HTTP_MAX_RETRIES", "2"))
+        self.backoff_factor = backoff_factor if backoff_factor is not None else float(os.getenv("SUPPLIERX_HTTP_BACKOFF", "0.25"))
+        self.retry_statuses = tuple(retry_statuses)
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+
+class HTTPTransport:
+    """Thin wrapper around a pooled requests.Session with retry-with-backoff.
+
+    Retries are only attempted for requests flagged as idempotent (the listing /
+    dropdown endpoints). PO creation is never retried automatically.
+    """
+
+    def __init__(self, config=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.config = config or TransportConfig()
+        self._retry_errors = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.config.pool_connections,
+            pool_maxsize=self.config.pool_maxsize,
+            pool_block=self.config.pool_block,
+            max_retries=0,  # Retries are handled in request() so we can honour idempotency
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, url, idempotent=False, **kwargs):
+        kwargs.setdefault("timeout", self.config.timeout)
+        with tracing.span("http", method=method) as span:
+            if span:
+                span.set(endpoint=urlsplit(url).path)
+            response = self._request(method, url, idempotent, kwargs)
+            span.set(status=response.status_code)
+            return response
+
+    def _request(self, method, url, idempotent, kwargs):
+        attempts = 1 + (self.config.max_retries if idempotent else 0)
+
+        for attempt in range(attempts):
+            last_try = attempt == attempts - 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except self._retry_errors:
+                if last_try:
+                    raise
+            else:
+                if last_try or response.status_code not in self.config.retry_statuses:
+                    return response
+                response.close()
+
+            delay = self.config.backoff_factor * (2 ** attempt)
+            tracing.current_span().add("retries")
+            print(f"DEBUG: Retrying {method} {url} in {delay:.2f}s (attempt {attempt + 2}/{attempts})")
+            time.sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+
+def __getattr__(name):
+    # http_transport.HTTPError without importing requests up front (only evaluated in an
+    # except clause, i.e. after a transport has made a request)
+    if name == "HTTPError":
+        import requests
+        return requests.exceptions.HTTPError
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide shared transport, creating it on first use."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HTTPTransport()
+    return _transport
+
+
+def reset_transport(config=None):
+    """Close the shared transport and replace it (used by tests / benchmarks)."""
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = HTTPTransport(config) if config is not None else None
+    return _transport
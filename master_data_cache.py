@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# TTL + LRU cache for SupplierX reference data (orgs, plants, groups, terms, tax codes...).
+# Entries are keyed by (base_url, endpoint, payload) so filtered lookups such as
+# plants for org_ids=[40] are cached separately from the unfiltered list, and
+# clients pointed at different SupplierX instances never share entries.
+
+# Per-endpoint TTLs in seconds. Master data changes rarely; projects change more often.
+DEFAULT_TTLS = {
+    "/api/v1/supplier/purchaseOrg/listing": 3600,
+    "/api/v1/admin/purchaseGroup/list": 3600,
+    "/api/v1/admin/plants/list": 3600,
+    "/api/v1/admin/currency/getWithoutSlug": 86400,
+    "/api/admin/paymentTerms/list": 86400,
+    "/api/admin/IncoTerm/list": 86400,
+    "/api/v1/supplier/purchase-order/list-project": 900,
+    "/api/v1/supplier/purchase-order/tax-code-dropdown": 86400,
+}
+
+
+def _make_key(endpoint, payload, base_url=""):
+    return base_url + endpoint + "|" + json.dumps(payload or {}, sort_keys=True, default=str, separators=(",", ":"))
+
+
+def _estimate_size(value):
+    # Rough memory footprint: the JSON size is a stable, cheap proxy for the normalized lists
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class MasterDataCache:
+    """Thread-safe TTL + LRU cache bounded by entry count and approximate bytes.
+
+    Values handed out are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttls=None, default_ttl=None, max_entries=None, max_bytes=None):
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl if default_ttl is not None else float(os.getenv("SUPPLIERX_CACHE_DEFAULT_TTL", "600"))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("SUPPLIERX_CACHE_MAX_ENTRIES", "256"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("SUPPLIERX_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+        self._entries = OrderedDict()  # key -> (endpoint, expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, endpoint):
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, endpoint, payload=None, base_url=""):
+        """Return (found, value) for a cached entry without loading."""
+        key = _make_key(endpoint, payload, base_url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[3]
+
+    def get_or_load(self, endpoint, payload, loader, base_url=""):
+        """Return the cached value or call loader() and cache its (non-empty) result."""
+        found, value = self.get(endpoint, payload, base_url)
+        with self._lock:
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = loader()
+        # Empty results usually mean the backend call failed; don't pin them for a whole TTL
+        if value:
+            self.put(endpoint, payload, value, base_url)
+        return value
+
+    async def aget_or_load(self, endpoint, payload, loader, base_url=""):
+        """asyncio variant of get_or_load; loader is a coroutine function."""
+        found, value = self.get(endpoint, payload, base_url)
+        with self._lock:
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = await loader()
+        if value:
+            self.put(endpoint, payload, value, base_url)
+        return value
+
+    def put(self, endpoint, payload, value, base_url=""):
+        key = _make_key(endpoint, payload, base_url)
+        size = _estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (endpoint, time.monotonic() + self.ttl_for(endpoint), size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, endpoint=None, payload=None, base_url=""):
+        """Drop everything, every entry for an endpoint (on any base URL), or one (endpoint, payload) entry."""
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            if payload is not None:
+                key = _make_key(endpoint, payload, base_url)
+                if key in self._entries:
+                    self._remove(key)
+                return
+            for key in [k for k, e in self._entries.items() if e[0] == endpoint]:
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[2]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_master_data_cache():
+    """Return the process-wide master-data cache, or None if disabled via env."""
+    global _cache
+    if os.getenv("SUPPLIERX_MASTER_DATA_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = MasterDataCache()
+    return _cache
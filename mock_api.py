@@ -1,48 +1,311 @@
-import requests
 import os
 import json
-from dotenv import load_dotenv
+import threading
+from dotenv import find_dotenv, load_dotenv
+import http_transport
+from http_transport import get_transport
+from master_data_cache import get_master_data_cache
+from catalog_index import get_local_catalog
+from multipart_encoder import MultipartEncoder
+from single_flight import get_single_flight
+import tracing
 
 load_dotenv()
 
-BASE_URL = "https://dev.api.supplierx.aeonx.digital"
+BASE_URL = os.getenv("SUPPLIERX_BASE_URL", "https://dev.api.supplierx.aeonx.digital")
 API_TOKEN = os.getenv("SUPPLIERX_API_TOKEN")
 
+ALTERNATE_SUPPLIER_ENDPOINT = "/api/v1/supplier/supplier/additional-supplier-details/"
+SUPPLIERS_ENDPOINT = "/api/v1/supplier/supplier/sapRegisteredVendorsList"
+MATERIALS_ENDPOINT = "/api/v1/supplier/materials/list"
+SERVICES_ENDPOINT = "/api/supplier/services/list"
+CREATE_PO_ENDPOINT = "/api/v1/supplier/purchase-order/create"
+PURCHASE_ORGS_ENDPOINT = "/api/v1/supplier/purchaseOrg/listing"
+PURCHASE_GROUPS_ENDPOINT = "/api/v1/admin/purchaseGroup/list"
+PLANTS_ENDPOINT = "/api/v1/admin/plants/list"
+CURRENCIES_ENDPOINT = "/api/v1/admin/currency/getWithoutSlug"
+PAYMENT_TERMS_ENDPOINT = "/api/admin/paymentTerms/list"
+INCOTERMS_ENDPOINT = "/api/admin/IncoTerm/list"
+PROJECTS_ENDPOINT = "/api/v1/supplier/purchase-order/list-project"
+TAX_CODES_ENDPOINT = "/api/v1/supplier/purchase-order/tax-code-dropdown"
+
+
+# --- Response normalizers (raw backend JSON -> agent-facing dicts) ---
+
+def _org_filter_payload(org_ids):
+    payload = {"dropdown": "0"}
+    if org_ids:
+         # Ensure list of ints
+         if isinstance(org_ids, (str, int)): org_ids = [int(org_ids)]
+         payload["purchase_org_id"] = org_ids
+    return payload
+
+def _extract_rows(data):
+    # Helper to extract list from data -> data -> rows (or data -> data if list)
+    if isinstance(data, dict) and "data" in data:
+        raw = data["data"]
+        if isinstance(raw, dict) and "rows" in raw:
+            raw = raw["rows"]
+    else:
+        raw = data
+    if not isinstance(raw, list): raw = []
+    return raw
+
+def _normalize_suppliers(data):
+    print(f"DEBUG: Raw Response keys: {data.keys() if isinstance(data, dict) else 'Not a dict'}")
+    if isinstance(data, dict) and "data" in data:
+        print(f"DEBUG: 'data' field length: {len(data['data'])}")
+    
+    # Logic matches verifed test_supplier_list.py
+    items = []
+    if isinstance(data, dict) and "data" in data:
+        items = data["data"]
+    elif isinstance(data, list):
+        items = data
+
+    normalized = []
+    for item in items:
+        normalized.append({
+            "vendor_id": str(item.get("id", "")),  # UUID for API - CRITICAL FIX
+            "sap_code": str(item.get("sap_code", "")),  # SAP code for display
+            "name": item.get("supplier_name", ""),
+            "email": item.get("email", ""),
+            "contact": item.get("contact_no", "")
+        })
+    return normalized
+
+def _normalize_alternate_supplier(data):
+    # Extract first alternate supplier if available
+    if isinstance(data, dict) and "data" in data:
+        alt_suppliers = data["data"]
+        if isinstance(alt_suppliers, list) and len(alt_suppliers) > 0:
+            first_alt = alt_suppliers[0]
+            return {
+                "alternate_supplier_name": first_alt.get("alternate_supplier_name", ""),
+                "alternate_supplier_email": first_alt.get("alternate_supplier_email", ""),
+                "alternate_supplier_contact_number": first_alt.get("alternate_supplier_contact_number", "")
+            }
+    
+    # Return empty if no alternate supplier found
+    return {
+        "alternate_supplier_name": "",
+        "alternate_supplier_email": "",
+        "alternate_supplier_contact_number": ""
+    }
+
+def _normalize_materials(data):
+    normalized = []
+    for x in _extract_rows(data):
+        if isinstance(x, dict):
+            # User JSON: id=95948, code="453", name="CAP", unit={"code":"GM2"}
+            # FIX: Use internal ID (int) as material_id, keep code for display
+            mat_id = x.get("id") # Keep as original type (int)
+            mat_code = str(x.get("code", ""))
+            mat_name = x.get("name", x.get("description", ""))
+            
+            # Unit extraction
+            unit_val = "EA"
+            unit_id = 0
+            if isinstance(x.get("unit"), dict):
+                unit_val = x["unit"].get("code", "EA")
+                unit_id = x["unit"].get("id", 0)
+            elif isinstance(x.get("unit"), str):
+                unit_val = x["unit"]
+            
+            # Material Group extraction
+            mat_grp_id = 0
+            if isinstance(x.get("material_group"), dict):
+                mat_grp_id = x["material_group"].get("id", 0)
+            
+            # HSN extraction
+            hsn_id = 0
+            if isinstance(x.get("hsn_code"), dict):
+                hsn_id = x["hsn_code"].get("id", 0)
+
+            normalized.append({
+                "id": mat_id,
+                "code": mat_code,
+                "name": mat_name,
+                "price": float(x.get("price", 0)),
+                "unit": unit_val,
+                "unit_id": unit_id,
+                "material_group_id": mat_grp_id,
+                "tax_code": 119, # Default as per user payload example, or ask
+                "hsn_id": hsn_id
+            })
+    return normalized
+
+def _normalize_services(data):
+    normalized = []
+    for x in _extract_rows(data):
+        if isinstance(x, dict):
+             normalized.append({
+                "id": str(x.get("id", x.get("serviceCode"))),
+                "name": x.get("serviceDescription", x.get("name")),
+                "price": float(x.get("price", 0)),
+                "unit": x.get("uom", "AU")
+            })
+    return normalized
+
+def _normalize_purchase_orgs(data):
+    # Map: id -> id (int), description -> name
+    # User Example: {"id": 67, "code": "99", "description": "All", ...}
+    return [{"id": str(x.get("id", "")), "name": x.get("description", x.get("purchaseOrgName", ""))} for x in _extract_rows(data) if isinstance(x, dict)]
+
+def _normalize_purchase_groups(data):
+    # Mapping based on User provided JSON (id, code, name)
+    # Example: {"id": 426, "code": "SF", "name": "Service Freight", ...}
+    return [{"id": str(x.get("id", "")), "name": x.get("name", x.get("description", ""))} for x in _extract_rows(data) if isinstance(x, dict)]
+
+def _normalize_plants(data):
+    return [{"id": str(x.get("id", x.get("plantCode"))), "name": x.get("plantName", x.get("name"))} for x in _extract_rows(data) if isinstance(x, dict)]
+
+def _normalize_currencies(data):
+    # Check structure
+    items = []
+    if isinstance(data, dict) and "data" in data:
+        items = data["data"]
+    elif isinstance(data, list):
+        items = data
+    # Extract Code
+    return [str(x.get("currencyCode", x.get("id", ""))) for x in items if isinstance(x, dict)]
+
+def _normalize_payment_terms(data):
+    return [{"id": str(x.get("id", x.get("paymentTermCode"))), "name": x.get("description", x.get("name"))} for x in _extract_rows(data) if isinstance(x, dict)]
+
+def _normalize_incoterms(data):
+    return [{"id": str(x.get("id", x.get("incoTermCode"))), "name": x.get("description", x.get("name"))} for x in _extract_rows(data) if isinstance(x, dict)]
+
+def _normalize_projects(data):
+    return [{"project_code": str(x.get("projectCode", x.get("id"))), "project_name": x.get("projectName", x.get("name"))} for x in _extract_rows(data) if isinstance(x, dict)]
+
+def _normalize_tax_codes(data):
+    # Structure: error, message, data -> rows -> other_tax_codes (list)
+    items = []
+    if isinstance(data, dict) and "data" in data:
+        d = data["data"]
+        if isinstance(d, dict) and "rows" in d:
+            # Merge related and other? or just other
+            rows = d["rows"]
+            items.extend(rows.get("other_tax_codes", []))
+            items.extend(rows.get("related_tax_codes", []))
+    
+    normalized = []
+    for x in items:
+        if isinstance(x, dict):
+            normalized.append({
+                "id": str(x.get("id", x.get("code"))), 
+                "description": x.get("description", x.get("code")),
+                "rate": 0.0 # Not in response?
+            })
+    return normalized
+
+
+_DOTENV_PATH = find_dotenv()
+_env_mtime = None
+_env_lock = threading.Lock()
+
+
+def _reload_env():
+    # Re-read .env (the session key is rotated there) only when the file has changed
+    global _env_mtime
+    try:
+        mtime = os.stat(_DOTENV_PATH).st_mtime_ns if _DOTENV_PATH else None
+    except OSError:
+        mtime = None
+    if mtime == _env_mtime:
+        return
+    with _env_lock:
+        if mtime != _env_mtime:
+            load_dotenv(_DOTENV_PATH or None, override=True)
+            _env_mtime = mtime
+
+
+def _auth_headers():
+    _reload_env()
+    return {
+        "Authorization": f"Bearer {os.getenv('SUPPLIERX_API_TOKEN')}",
+        "x-session-key": os.getenv("SUPPLIERX_SESSION_KEY"),
+        "Content-Type": "application/json"
+    }
+
+
 class MockAPI: # Keeping class name same to avoid breaking agent_logic.py import
-    def __init__(self):
-        # Force reload .env to ensure we have the latest artifacts
-        load_dotenv(override=True)
-        
-        token = os.getenv("SUPPLIERX_API_TOKEN")
-        session_key = os.getenv("SUPPLIERX_SESSION_KEY")
-        
+    def __init__(self, transport=None, base_url=None, cache=None, catalog=None, single_flight=None):
+        _reload_env()
         print(f"DEBUG: Initializing MockAPI")
-        print(f"DEBUG: Token loaded: {bool(token)}")
-        print(f"DEBUG: Session loaded: {bool(session_key)}")
-        
-        self.headers = {
-            "Authorization": f"Bearer {token}",
-            "x-session-key": session_key,
-            "Content-Type": "application/json"
-        }
+        print(f"DEBUG: Token loaded: {bool(os.getenv('SUPPLIERX_API_TOKEN'))}")
+        print(f"DEBUG: Session loaded: {bool(os.getenv('SUPPLIERX_SESSION_KEY'))}")
+
+        # Pooled keep-alive session shared by every MockAPI in the process, fetched on first request
+        self._transport = transport
+        self.base_url = base_url or BASE_URL
+        # Shared TTL/LRU cache for reference data; pass cache=False to always hit the backend
+        self.cache = None if cache is False else (cache or get_master_data_cache())
+        # Local material/supplier search index (opt-in, see catalog_index); catalog=False disables
+        self.catalog = None if catalog is False else (catalog or get_local_catalog())
+        # Identical lookups in flight from other sessions share one request; single_flight=False disables
+        self.single_flight = None if single_flight is False else (single_flight or get_single_flight())
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            self._transport = get_transport()
+        return self._transport
+
+    @transport.setter
+    def transport(self, value):
+        self._transport = value
+
+    @property
+    def headers(self):
+        # Read per request so a shared, long-lived MockAPI picks up a rotated .env
+        return _auth_headers()
+
+    def _coalesced(self, method, endpoint, payload, call):
+        if self.single_flight is None:
+            return call()
+        key = (method, self.base_url + endpoint, json.dumps(payload, sort_keys=True, default=str))
+        span = tracing.current_span()
+        if span:
+            executed = []
+
+            def leader_call():
+                executed.append(True)
+                return call()
+            result = self.single_flight.do(key, leader_call)
+            span.set(coalesced=not executed)
+            return result
+        return self.single_flight.do(key, call)
 
     def _get(self, endpoint, params=None):
+        return self._coalesced("GET", endpoint, params, lambda: self._send_get(endpoint, params))
+
+    def _send_get(self, endpoint, params=None):
         try:
-            url = f"{BASE_URL}{endpoint}"
-            response = requests.get(url, headers=self.headers, params=params)
+            url = f"{self.base_url}{endpoint}"
+            response = self.transport.request("GET", url, idempotent=True, headers=self.headers, params=params)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"API Error ({endpoint}): {e}")
             return []
 
-    def _post(self, endpoint, payload):
+    def _post(self, endpoint, payload, idempotent=True):
+        # All _post callers are listing/search endpoints (POST only because the backend
+        # wants a JSON filter body), so they are safe to retry and to coalesce. create_po
+        # does not use this.
+        if not idempotent:
+            return self._send_post(endpoint, payload, idempotent)
+        return self._coalesced("POST", endpoint, payload, lambda: self._send_post(endpoint, payload, idempotent))
+
+    def _send_post(self, endpoint, payload, idempotent=True):
         try:
-            url = f"{BASE_URL}{endpoint}"
-            response = requests.post(url, headers=self.headers, json=payload)
+            url = f"{self.base_url}{endpoint}"
+            response = self.transport.request("POST", url, idempotent=idempotent, headers=self.headers, json=payload)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.HTTPError as e:
+        except http_transport.HTTPError as e:
             # Capture actual error response body
             error_body = ""
             try:
@@ -65,6 +328,19 @@ class MockAPI: # Keeping class name same to avoid breaking agent_logic.py import
             print(f"API Error ({endpoint}): {e}")
             return {"success": False, "error": True, "message": str(e)}
 
+    def _cached_post(self, endpoint, payload, normalize):
+        """POST a master-data listing and normalize it, served from the cache when warm."""
+        if self.cache is None:
+            return normalize(self._post(endpoint, payload))
+        loaded = []
+
+        def load():
+            loaded.append(endpoint)
+            return normalize(self._post(endpoint, payload))
+        result = self.cache.get_or_load(endpoint, payload, load, self.base_url)
+        tracing.current_span().set(endpoint=endpoint, cache_hit=not loaded)
+        return result
+
     # --- Wrapper Methods matching the original Interface ---
 
     def get_po_main_types(self):
@@ -95,6 +371,12 @@ class MockAPI: # Keeping class name same to avoid breaking agent_logic.py import
         # DIAGNOSTICS: Confirmed this is a POST request
         # Payload: {} or {"search": query}
         
+        if query and self.catalog is not None:
+            local = self.catalog.suppliers.search(query, k=limit or 10)
+            tracing.current_span().set(catalog_hit=bool(local))
+            if local:
+                return local
+
         payload = {}
         if query:
             payload["search"] = query
@@ -104,242 +386,79 @@ class MockAPI: # Keeping class name same to avoid breaking agent_logic.py import
         print(f"DEBUG: Headers Auth Present: {bool(self.headers.get('Authorization'))}")
         print(f"DEBUG: Session Key Present: {bool(self.headers.get('x-session-key'))}")
         
-        data = self._post("/api/v1/supplier/supplier/sapRegisteredVendorsList", payload)
-        print(f"DEBUG: Raw Response keys: {data.keys() if isinstance(data, dict) else 'Not a dict'}")
-        if isinstance(data, dict) and "data" in data:
-            print(f"DEBUG: 'data' field length: {len(data['data'])}")
-        
-        # Logic matches verifed test_supplier_list.py
-        items = []
-        if isinstance(data, dict) and "data" in data:
-            items = data["data"]
-        elif isinstance(data, list):
-            items = data
-
-        normalized = []
-        for item in items:
-            normalized.append({
-                "vendor_id": str(item.get("id", "")),  # UUID for API - CRITICAL FIX
-                "sap_code": str(item.get("sap_code", "")),  # SAP code for display
-                "name": item.get("supplier_name", ""),
-                "email": item.get("email", ""),
-                "contact": item.get("contact_no", "")
-            })
-        
-        if not query:
-            return normalized[:limit]
-        
-        return normalized[:limit]
+        data = self._post(SUPPLIERS_ENDPOINT, payload)
+        results = _normalize_suppliers(data)
+        if query and self.catalog is not None:
+            self.catalog.suppliers.upsert(results)
+        return results[:limit]
     
     def get_alternate_supplier_details(self, vendor_id):
         """Fetch alternate supplier contact details for a given vendor"""
-        endpoint = f"/api/v1/supplier/supplier/additional-supplier-details/{vendor_id}"
-        data = self._get(endpoint)
-        
-        # Extract first alternate supplier if available
-        if isinstance(data, dict) and "data" in data:
-            alt_suppliers = data["data"]
-            if isinstance(alt_suppliers, list) and len(alt_suppliers) > 0:
-                first_alt = alt_suppliers[0]
-                return {
-                    "alternate_supplier_name": first_alt.get("alternate_supplier_name", ""),
-                    "alternate_supplier_email": first_alt.get("alternate_supplier_email", ""),
-                    "alternate_supplier_contact_number": first_alt.get("alternate_supplier_contact_number", "")
-                }
-        
-        # Return empty if no alternate supplier found
-        return {
-            "alternate_supplier_name": "",
-            "alternate_supplier_email": "",
-            "alternate_supplier_contact_number": ""
-        }
+        endpoint = f"{ALTERNATE_SUPPLIER_ENDPOINT}{vendor_id}"
+        return _normalize_alternate_supplier(self._get(endpoint))
 
     def get_purchase_orgs(self):
         # API: /api/v1/supplier/purchaseOrg/listing
-        data = self._post("/api/v1/supplier/purchaseOrg/listing", {})
-        
-        # Helper to extract list from data -> data -> rows (or data -> data if list)
-        if isinstance(data, dict) and "data" in data:
-            raw = data["data"]
-            if isinstance(raw, dict) and "rows" in raw:
-                raw = raw["rows"]
-        else:
-            raw = data
-
-        if not isinstance(raw, list): raw = []
-            
-        # Map: id -> id (int), description -> name
-        # User Example: {"id": 67, "code": "99", "description": "All", ...}
-        return [{"id": str(x.get("id", "")), "name": x.get("description", x.get("purchaseOrgName", ""))} for x in raw if isinstance(x, dict)]
+        return self._cached_post(PURCHASE_ORGS_ENDPOINT, {}, _normalize_purchase_orgs)
 
     def get_purchase_groups(self, org_ids=None):
         # API: /api/v1/admin/purchaseGroup/list
         # Payload: {dropdown: "0", purchase_org_id: [40], user_id: ...}
         # Note: org_ids should be a list of ints.
         
-        payload = {"dropdown": "0"}
-        if org_ids:
-             # Ensure list of ints
-             if isinstance(org_ids, (str, int)): org_ids = [int(org_ids)]
-             payload["purchase_org_id"] = org_ids
-             # payload["user_id"] = 7391 # Optional? Let's try without forcing ID first or use session owner if known.
-             # Diagnostics showed 200 OK with empty body. Let's assume auth header handles user context 
-             # but payload filters.
-
-        data = self._post("/api/v1/admin/purchaseGroup/list", payload)
-        
-        if isinstance(data, dict) and "data" in data:
-            raw = data["data"]
-            if isinstance(raw, dict) and "rows" in raw:
-                raw = raw["rows"]
-        else:
-            raw = data
-            
-        if not isinstance(raw, list): raw = []
-
-        # Mapping based on User provided JSON (id, code, name)
-        # Example: {"id": 426, "code": "SF", "name": "Service Freight", ...}
-        return [{"id": str(x.get("id", "")), "name": x.get("name", x.get("description", ""))} for x in raw if isinstance(x, dict)]
+        # payload["user_id"] = 7391 # Optional? Let's try without forcing ID first or use session owner if known.
+        # Diagnostics showed 200 OK with empty body. Let's assume auth header handles user context 
+        # but payload filters.
+        payload = _org_filter_payload(org_ids)
+        return self._cached_post(PURCHASE_GROUPS_ENDPOINT, payload, _normalize_purchase_groups)
 
     def get_plants(self, org_ids=None):
         # API: /api/v1/admin/plants/list
         # Payload similar to groups likely
         
-        payload = {"dropdown": "0"}
-        if org_ids:
-             if isinstance(org_ids, (str, int)): org_ids = [int(org_ids)]
-             payload["purchase_org_id"] = org_ids
-
-        data = self._post("/api/v1/admin/plants/list", payload)
-        
-        if isinstance(data, dict) and "data" in data:
-            raw = data["data"]
-            if isinstance(raw, dict) and "rows" in raw:
-                raw = raw["rows"]
-        else:
-            raw = data
-            
-        if not isinstance(raw, list): raw = []
-
-        return [{"id": str(x.get("id", x.get("plantCode"))), "name": x.get("plantName", x.get("name"))} for x in raw if isinstance(x, dict)]
+        payload = _org_filter_payload(org_ids)
+        return self._cached_post(PLANTS_ENDPOINT, payload, _normalize_plants)
 
     def get_currencies(self):
         # API: /api/v1/admin/currency/getWithoutSlug
         # DIAGNOSTIC UPDATE: User test script succeeded with POST.
-        
-        data = self._post("/api/v1/admin/currency/getWithoutSlug", {})
-        
-        # Check structure
-        items = []
-        if isinstance(data, dict) and "data" in data:
-            items = data["data"]
-        elif isinstance(data, list):
-            items = data
-            
-        # Extract Code
-        return [str(x.get("currencyCode", x.get("id", ""))) for x in items if isinstance(x, dict)]
+        return self._cached_post(CURRENCIES_ENDPOINT, {}, _normalize_currencies)
 
     def get_payment_terms(self):
         # API: /api/admin/paymentTerms/list
         # Switch to POST
-        data = self._post("/api/admin/paymentTerms/list", {}) # Payload often empty or dropdown:0
-        
-        # Robust Extraction
-        if isinstance(data, dict) and "data" in data:
-            raw = data["data"]
-            if isinstance(raw, dict) and "rows" in raw: raw = raw["rows"]
-        else: raw = data
-        if not isinstance(raw, list): raw = []
-        
-        return [{"id": str(x.get("id", x.get("paymentTermCode"))), "name": x.get("description", x.get("name"))} for x in raw if isinstance(x, dict)]
+        # Payload often empty or dropdown:0
+        return self._cached_post(PAYMENT_TERMS_ENDPOINT, {}, _normalize_payment_terms)
 
     def get_incoterms(self):
         # API: /api/admin/IncoTerm/list
         # Switch to POST
-        data = self._post("/api/admin/IncoTerm/list", {})
-        
-        # Robust Extraction
-        if isinstance(data, dict) and "data" in data:
-            raw = data["data"]
-            if isinstance(raw, dict) and "rows" in raw: raw = raw["rows"]
-        else: raw = data
-        if not isinstance(raw, list): raw = []
-
-        return [{"id": str(x.get("id", x.get("incoTermCode"))), "name": x.get("description", x.get("name"))} for x in raw if isinstance(x, dict)]
+        return self._cached_post(INCOTERMS_ENDPOINT, {}, _normalize_incoterms)
 
     def get_projects(self):
         # API: /api/v1/supplier/purchase-order/list-project
         # Switch to POST
-        data = self._post("/api/v1/supplier/purchase-order/list-project", {})
-        
-        # Robust Extraction
-        if isinstance(data, dict) and "data" in data:
-            raw = data["data"]
-            if isinstance(raw, dict) and "rows" in raw: raw = raw["rows"]
-        else: raw = data
-        if not isinstance(raw, list): raw = []
-
-        return [{"project_code": str(x.get("projectCode", x.get("id"))), "project_name": x.get("projectName", x.get("name"))} for x in raw if isinstance(x, dict)]
+        return self._cached_post(PROJECTS_ENDPOINT, {}, _normalize_projects)
 
     def get_materials(self, plant_id=None, query=None):
         # API: /api/v1/supplier/materials/list
+        # Local index first (ranked, in memory); falls through to the backend when it is
+        # stale/missing or has no hit (e.g. a material created since the last refresh)
+        if self.catalog is not None:
+            local = self.catalog.materials.search(query, k=50) if query else self.catalog.materials.all()
+            tracing.current_span().set(catalog_hit=bool(local))
+            if local:
+                return local
+
         # Switch to POST
         payload = {}
         if query: payload["search"] = query
         
-        data = self._post("/api/v1/supplier/materials/list", payload)
-        
-        # Robust Extraction
-        if isinstance(data, dict) and "data" in data:
-            raw = data["data"]
-            if isinstance(raw, dict) and "rows" in raw: raw = raw["rows"]
-        else: raw = data
-        if not isinstance(raw, list): raw = []
-        
-        normalized = []
-        for x in raw:
-            if isinstance(x, dict):
-                # User JSON: id=95948, code="453", name="CAP", unit={"code":"GM2"}
-                # FIX: Use internal ID (int) as material_id, keep code for display
-                mat_id = x.get("id") # Keep as original type (int)
-                mat_code = str(x.get("code", ""))
-                mat_name = x.get("name", x.get("description", ""))
-                
-                # Unit extraction
-                unit_val = "EA"
-                unit_id = 0
-                if isinstance(x.get("unit"), dict):
-                    unit_val = x["unit"].get("code", "EA")
-                    unit_id = x["unit"].get("id", 0)
-                elif isinstance(x.get("unit"), str):
-                    unit_val = x["unit"]
-                
-                # Material Group extraction
-                mat_grp_id = 0
-                if isinstance(x.get("material_group"), dict):
-                    mat_grp_id = x["material_group"].get("id", 0)
-                
-                # HSN extraction
-                hsn_id = 0
-                if isinstance(x.get("hsn_code"), dict):
-                    hsn_id = x["hsn_code"].get("id", 0)
-
-                normalized.append({
-                    "id": mat_id,
-                    "code": mat_code,
-                    "name": mat_name,
-                    "price": float(x.get("price", 0)),
-                    "unit": unit_val,
-                    "unit_id": unit_id,
-                    "material_group_id": mat_grp_id,
-                    "tax_code": 119, # Default as per user payload example, or ask
-                    "hsn_id": hsn_id
-                })
-
-        if not query: return normalized
-        # If API search worked, we trust it. If not, fallback filter? 
-        # API search key "search" usually works.
-        return normalized
+        # If API search worked, we trust it. API search key "search" usually works.
+        results = _normalize_materials(self._post(MATERIALS_ENDPOINT, payload))
+        if query and self.catalog is not None:
+            self.catalog.materials.upsert(results)
+        return results
 
     def get_services(self, query=None):
         # API: /api/supplier/services/list
@@ -347,105 +466,35 @@ class MockAPI: # Keeping class name same to avoid breaking agent_logic.py import
         payload = {}
         if query: payload["search"] = query
         
-        data = self._post("/api/supplier/services/list", payload)
-        
-        if isinstance(data, dict) and "data" in data:
-            raw = data["data"]
-            if isinstance(raw, dict) and "rows" in raw: raw = raw["rows"]
-        else: raw = data
-        if not isinstance(raw, list): raw = []
-        
-        normalized = []
-        for x in raw:
-            if isinstance(x, dict):
-                 normalized.append({
-                    "id": str(x.get("id", x.get("serviceCode"))),
-                    "name": x.get("serviceDescription", x.get("name")),
-                    "price": float(x.get("price", 0)),
-                    "unit": x.get("uom", "AU")
-                })
-        
-        return normalized
+        return _normalize_services(self._post(SERVICES_ENDPOINT, payload))
     
     def get_tax_codes(self):
         # API: /api/v1/supplier/purchase-order/tax-code-dropdown
         # Found via diagnostics: It accepts POST (and GET?) but structure is complex
-        data = self._post("/api/v1/supplier/purchase-order/tax-code-dropdown", {})
-        
-        # Structure: error, message, data -> rows -> other_tax_codes (list)
-        items = []
-        if isinstance(data, dict) and "data" in data:
-            d = data["data"]
-            if isinstance(d, dict) and "rows" in d:
-                # Merge related and other? or just other
-                rows = d["rows"]
-                items.extend(rows.get("other_tax_codes", []))
-                items.extend(rows.get("related_tax_codes", []))
-        
-        normalized = []
-        for x in items:
-            if isinstance(x, dict):
-                normalized.append({
-                    "id": str(x.get("id", x.get("code"))), 
-                    "description": x.get("description", x.get("code")),
-                    "rate": 0.0 # Not in response?
-                })
-        return normalized
-
-    def _flatten_payload(self, y):
-        out = {}
-        def flatten(x, name=''):
-            if type(x) is dict:
-                for a in x:
-                    flatten(x[a], name + a + '.')
-            elif type(x) is list:
-                i = 0
-                for a in x:
-                    flatten(a, name[:-1] + '[' + str(i) + '].')
-                    i += 1
-            else:
-                out[name[:-1]] = x
-        flatten(y)
-        return out
+        return self._cached_post(TAX_CODES_ENDPOINT, {}, _normalize_tax_codes)
 
-    def create_po(self, payload):
-        # Flatten payload for Form-Data
-        # Expected format: line_items[0].short_text = "..."
-        
-        # 1. Format Values (Recursively)
-        # Convert bool -> "true"/"false", None -> ""
-        def format_payload_values(value):
-            if isinstance(value, dict):
-                return {k: format_payload_values(v) for k, v in value.items()}
-            elif isinstance(value, list):
-                return [format_payload_values(v) for v in value]
-            elif isinstance(value, bool):
-                return str(value).lower()
-            elif value is None:
-                return ""
-            return value
-
-        cleaned_payload = format_payload_values(payload)
-        
-        flat_data = self._flatten_payload(cleaned_payload)
-        
-        # Convert to Multipart format (forces multipart/form-data header)
-        multipart_data = {}
-        for k, v in flat_data.items():
-            multipart_data[k] = (None, str(v))
-        
-        # We need to send this as form-data
-        # Remove Content-Type so requests adds the boundary automatically
+    def _build_create_po_request(self, payload):
+        """Multipart form body for create_po; returns (headers, MultipartEncoder)."""
+        # Flattened as form fields, e.g. line_items[0].short_text = "...", streamed in one
+        # pass (bool -> "true"/"false", None -> "")
+        body = MultipartEncoder(payload)
+
+        # Sent as form-data with an exact Content-Length instead of JSON
         headers = self.headers.copy()
-        if "Content-Type" in headers:
-            del headers["Content-Type"]
-            
-        print(f"DEBUG: Sending Flattened Form Data keys: {list(flat_data.keys())}")
+        headers["Content-Type"] = body.content_type
+        headers["Content-Length"] = str(len(body))
+
+        tracing.current_span().set(body_bytes=len(body))
+        print(f"DEBUG: Sending multipart form data: {headers['Content-Length']} bytes")
+        return headers, body
+
+    def create_po(self, payload):
+        headers, body = self._build_create_po_request(payload)
             
         try:
-            url = f"{BASE_URL}/api/v1/supplier/purchase-order/create"
-            # USE files=multipart_data to force multipart encoding
-            response = requests.post(url, headers=headers, files=multipart_data)
+            url = f"{self.base_url}{CREATE_PO_ENDPOINT}"
+            # Body is streamed from the encoder; not idempotent: never retried automatically
+            response = self.transport.request("POST", url, headers=headers, data=body)
             print("Create PO Status Code:", response.status_code)
             print("Create PO Raw Response:", response.text)
             response.raise_for_status()
@@ -461,3 +510,17 @@ class MockAPI: # Keeping class name same to avoid breaking agent_logic.py import
                     
             print(f"API Error (Create PO): {err_msg}")
             return {"success": False, "error": True, "message": err_msg}
+
+
+_api = None
+_api_lock = threading.Lock()
+
+
+def get_api():
+    """Return the process-wide MockAPI (shared by every POAgent), creating it on first use."""
+    global _api
+    if _api is None:
+        with _api_lock:
+            if _api is None:
+                _api = MockAPI()
+    return _api
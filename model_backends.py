@@ -0,0 +1,382 @@
+"""
+Pluggable model backends for BedrockService.
+
+Every backend is client-shaped (invoke_model / invoke_model_with_response_stream, same
+return values as boto3's bedrock-runtime client), so _call_claude and _stream_claude work
+unchanged (SyntheticClient also has an ainvoke_model coroutine for AsyncBedrockService).
+Selected with BEDROCK_BACKEND:
+
+- live      : real bedrock-runtime client (default)
+- record    : live client, and every request hash -> response body is saved to disk
+- replay    : serve saved responses from the store; no network, no AWS credentials
+- synthetic : latency-shaped canned responses (base + per-output-token time)
+
+Recordings live in BEDROCK_RECORDINGS (default ./recordings/bedrock): an append-only
+file of zlib-compressed response bodies plus a JSON index of hash -> (offset, length).
+"""
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+import zlib
+
+from structured_output import parse_model_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: RecordingStore is then single-process (see its docstring)
+    fcntl = None
+
+DEFAULT_RECORDINGS_DIR = os.path.join("recordings", "bedrock")
+
+# Parses as a valid (no-op) analysis, fused analysis and response alike
+SYNTHETIC_REPLY = {
+    "intents": ["GENERAL_QUESTION"],
+    "actions": [],
+    "items_to_resolve": [],
+    "response_template": "{updates} {issues} {missing} {next_step}",
+    "response": "I've updated the details. What would you like to do next?",
+}
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def request_key(model_id, body):
+    """Stable hash of a model request (key order and whitespace insensitive)."""
+    if isinstance(body, (bytes, str)):
+        body = json.loads(body)
+    canonical = json.dumps({"model": model_id, "body": body}, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _reply_of(response_body):
+    """(text, tool name) of a response body; a tool_use block's input is returned as its JSON text."""
+    content = json.loads(response_body).get("content", [])
+    for block in content:
+        if block.get("type") == "tool_use":
+            return json.dumps(block["input"], separators=(",", ":"), ensure_ascii=False), block["name"]
+    return "".join(block.get("text", "") for block in content), None
+
+
+def _response(body_bytes):
+    return {"body": io.BytesIO(body_bytes), "contentType": "application/json"}
+
+
+def _stream_events(text, chunk_chars=40, on_chunk=None, tool_name=None):
+    """Bedrock-style response-stream events for a text reply (or a tool call whose input JSON is text)."""
+    if tool_name:
+        block = {"type": "tool_use", "id": "toolu_stream", "name": tool_name, "input": {}}
+        yield {"chunk": {"bytes": json.dumps({"type": "content_block_start", "index": 0, "content_block": block}).encode("utf-8")}}
+    for start in range(0, len(text), chunk_chars):
+        piece = text[start:start + chunk_chars]
+        if on_chunk:
+            on_chunk(piece)
+        if tool_name:
+            delta = {"type": "input_json_delta", "partial_json": piece}
+        else:
+            delta = {"type": "text_delta", "text": piece}
+        event = {"type": "content_block_delta", "index": 0, "delta": delta}
+        yield {"chunk": {"bytes": json.dumps(event).encode("utf-8")}}
+    yield {"chunk": {"bytes": json.dumps({"type": "message_stop"}).encode("utf-8")}}
+
+
+class RecordingStore:
+    """
+    Compact indexed store: responses.bin (zlib records) + index.json (hash -> [offset, length]).
+
+    Safe to share between processes (e.g. po_server workers on one response-cache dir):
+    put() appends and rewrites the index under an exclusive lock on store.lock, merging
+    what other processes added first, and a lookup that misses re-reads index.json when
+    it changed on disk. Without fcntl (Windows) the file lock is skipped and a store
+    directory must be used by one process at a time.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("BEDROCK_RECORDINGS", DEFAULT_RECORDINGS_DIR)
+        self.data_path = os.path.join(self.path, "responses.bin")
+        self.index_path = os.path.join(self.path, "index.json")
+        self._lock = threading.Lock()
+        self.index = {}
+        self._index_stamp = None
+        self._refresh()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return self._entry(key) is not None
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        """Merge in entries other processes wrote to index.json since it was last read."""
+        stamp = self._stamp()
+        if stamp is None or stamp == self._index_stamp:
+            return
+        # index.json is only ever replaced whole (os.replace), so this never sees a partial file
+        with open(self.index_path, encoding="utf-8") as f:
+            self.index.update(json.load(f))
+        self._index_stamp = stamp
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        with open(os.path.join(self.path, "store.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _entry(self, key):
+        entry = self.index.get(key)
+        if entry is None:
+            with self._lock:
+                self._refresh()
+                entry = self.index.get(key)
+        return entry
+
+    def get(self, key):
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        offset, length = entry
+        with open(self.data_path, "rb") as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length))
+
+    def put(self, key, body_bytes):
+        record = zlib.compress(body_bytes)
+        with self._lock:
+            if key in self.index:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            with self._file_lock():
+                self._refresh()
+                if key in self.index:
+                    return
+                with open(self.data_path, "ab") as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(record)
+                self.index[key] = [offset, len(record)]
+                # Write-then-rename so a crash (or a concurrent reader) never sees a truncated index
+                tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.index, f, separators=(",", ":"))
+                os.replace(tmp_path, self.index_path)
+                self._index_stamp = self._stamp()
+
+
+def create_live_client():
+    # boto3 is imported here, not at module import: it is the largest part of a cold start
+    # and the stub backends never need it
+    import boto3
+    return boto3.client(
+        'bedrock-runtime',
+        region_name=os.getenv('AWS_REGION'),
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_KEY')
+    )
+
+
+class RecordingClient:
+    """Passes requests to the live client and saves each response body under its request hash."""
+
+    def __init__(self, store=None, live_client=None):
+        self.store = store if store is not None else RecordingStore()
+        self._live = live_client
+
+    @property
+    def live(self):
+        if self._live is None:
+            self._live = create_live_client()
+        return self._live
+
+    def invoke_model(self, modelId, body):
+        key = request_key(modelId, body)
+        response_body = self.live.invoke_model(modelId=modelId, body=body)['body'].read()
+        self.store.put(key, response_body)
+        return _response(response_body)
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        # Recorded non-streaming so replay can serve both call styles from one entry
+        response_body = self.invoke_model(modelId, body)['body'].read()
+        text, tool_name = _reply_of(response_body)
+        return {"body": _stream_events(text, tool_name=tool_name)}
+
+
+class ReplayClient:
+    """Serves recorded responses; raises ReplayMissError for anything not in the store."""
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else RecordingStore()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, modelId, body):
+        key = request_key(modelId, body)
+        response_body = self.store.get(key)
+        if response_body is None:
+            self.misses += 1
+            raise ReplayMissError(f"No recorded response for request {key[:12]} in {self.store.path}")
+        self.hits += 1
+        return response_body
+
+    def invoke_model(self, modelId, body):
+        return _response(self._lookup(modelId, body))
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        text, tool_name = _reply_of(self._lookup(modelId, body))
+        return {"body": _stream_events(text, tool_name=tool_name)}
+
+
+class SyntheticClient:
+    """
+    Latency-shaped stand-in: time to first token is base_ms (+ up to jitter_ms) plus
+    prefill_ms per 1k uncached input tokens, then token_ms per output token.
+    responder(request_dict) -> reply text; defaults to SYNTHETIC_REPLY.
+
+    System blocks marked with cache_control are modelled as a prompt cache: the first
+    request writes the prefix, later identical prefixes are read from cache (no prefill
+    time) and reported as cache_read_input_tokens. Requests with a forced tool_choice get
+    the reply's JSON back as a tool_use block (compact, so fewer output tokens), like a
+    model answering through the tool. Tracks model_seconds so callers can subtract model
+    time.
+    """
+
+    def __init__(self, responder=None, base_ms=None, token_ms=None, jitter_ms=None, prefill_ms=None, seed=None):
+        self.responder = responder or (lambda request: json.dumps(SYNTHETIC_REPLY))
+        self.base_ms = base_ms if base_ms is not None else float(os.getenv("BEDROCK_SYNTHETIC_BASE_MS", "300"))
+        self.token_ms = token_ms if token_ms is not None else float(os.getenv("BEDROCK_SYNTHETIC_TOKEN_MS", "10"))
+        self.jitter_ms = jitter_ms if jitter_ms is not None else float(os.getenv("BEDROCK_SYNTHETIC_JITTER_MS", "0"))
+        self.prefill_ms = prefill_ms if prefill_ms is not None else float(os.getenv("BEDROCK_SYNTHETIC_PREFILL_MS", "0"))
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cached_prefixes = set()
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.model_seconds = 0.0
+
+    def _usage(self, request):
+        system = request.get("system", "")
+        messages_tokens = estimate_tokens(json.dumps(request.get("messages", [])))
+        if isinstance(system, str):
+            return {"input_tokens": estimate_tokens(system) + messages_tokens}
+        prefix = "".join(block.get("text", "") for block in system)
+        tokens = estimate_tokens(prefix)
+        if not any(block.get("cache_control") for block in system):
+            return {"input_tokens": tokens + messages_tokens}
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with self._lock:
+            hit = key in self._cached_prefixes
+            self._cached_prefixes.add(key)
+        if hit:
+            return {"input_tokens": messages_tokens, "cache_read_input_tokens": tokens}
+        return {"input_tokens": messages_tokens, "cache_creation_input_tokens": tokens}
+
+    def _reply(self, body):
+        request = json.loads(body)
+        text = self.responder(request)
+        tool_name = None
+        if request.get("tool_choice", {}).get("type") == "tool":
+            result, _ = parse_model_json(text)
+            if isinstance(result, dict):
+                text, tool_name = json.dumps(result, separators=(",", ":"), ensure_ascii=False), request["tool_choice"]["name"]
+        usage = self._usage(request)
+        usage["output_tokens"] = estimate_tokens(text)
+        prefill_tokens = usage["input_tokens"] + usage.get("cache_creation_input_tokens", 0)
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += usage["input_tokens"] + usage.get("cache_creation_input_tokens", 0) + usage.get("cache_read_input_tokens", 0)
+            self.output_tokens += usage["output_tokens"]
+            jitter = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return text, tool_name, usage, (self.base_ms + jitter + self.prefill_ms * prefill_tokens / 1000.0) / 1000.0
+
+    def _sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+            with self._lock:
+                self.model_seconds += seconds
+
+    def invoke_model(self, modelId, body):
+        text, tool_name, usage, first_token_s = self._reply(body)
+        self._sleep(first_token_s + self.token_ms * usage["output_tokens"] / 1000.0)
+        return self._invoke_response(text, tool_name, usage)
+
+    async def ainvoke_model(self, modelId, body):
+        """invoke_model for asyncio callers: the latency is awaited instead of blocking a thread."""
+        text, tool_name, usage, first_token_s = self._reply(body)
+        seconds = first_token_s + self.token_ms * usage["output_tokens"] / 1000.0
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+            with self._lock:
+                self.model_seconds += seconds
+        return self._invoke_response(text, tool_name, usage)
+
+    def _invoke_response(self, text, tool_name, usage):
+        if tool_name:
+            block = {"type": "tool_use", "id": f"toolu_synthetic_{self.calls}", "name": tool_name, "input": json.loads(text)}
+        else:
+            block = {"type": "text", "text": text}
+        return _response(json.dumps({"content": [block], "usage": usage}).encode("utf-8"))
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        text, tool_name, usage, first_token_s = self._reply(body)
+
+        def events():
+            yield {"chunk": {"bytes": json.dumps({"type": "message_start", "message": {"usage": usage}}).encode("utf-8")}}
+            self._sleep(first_token_s)
+            yield from _stream_events(text, on_chunk=lambda piece: self._sleep(self.token_ms * estimate_tokens(piece) / 1000.0), tool_name=tool_name)
+        return {"body": events()}
+
+
+def create_model_client(backend=None):
+    """Build the client for BEDROCK_BACKEND (live | record | replay | synthetic)."""
+    backend = (backend or os.getenv("BEDROCK_BACKEND", "live")).lower()
+    if backend == "live":
+        return create_live_client()
+    if backend == "record":
+        return RecordingClient()
+    if backend == "replay":
+        return ReplayClient()
+    if backend == "synthetic":
+        return SyntheticClient()
+    raise ValueError(f"Unknown BEDROCK_BACKEND '{backend}' (expected live, record, replay or synthetic)")
+
+
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_model_client(backend=None):
+    """Return the process-wide client for BEDROCK_BACKEND, creating it on first use.
+
+    boto3 clients are thread-safe and the stub clients lock their own state, so every
+    BedrockService in the process shares one client (and its connection pool) per backend.
+    """
+    backend = (backend or os.getenv("BEDROCK_BACKEND", "live")).lower()
+    client = _shared_clients.get(backend)
+    if client is None:
+        with _shared_clients_lock:
+            client = _shared_clients.get(backend)
+            if client is None:
+                client = _shared_clients[backend] = create_model_client(backend)
+    return client
@@ -0,0 +1,120 @@
+"""
+Streaming multipart/form-data encoder for create_po.
+
+The backend takes a PO as flat form fields ("line_items[0].quantity" = "2"). MockAPI used
+to build that body in four full copies: a value-formatted copy of the payload, a flat
+dict, a dict of (None, str) file tuples and finally the multipart body requests rendered
+in memory. MultipartEncoder walks the payload iteratively instead and encodes each field
+as it is reached, handing the body to the transport in chunk_size pieces.
+
+Field names, field order, value formatting (bools as "true"/"false", None as "") and the
+multipart framing are byte-for-byte what requests / urllib3 produced for the old
+files={name: (None, str(value))} request (tests/test_payload_repro.py checks this).
+len(encoder) is the exact body size, so the request is sent with a Content-Length rather
+than chunked.
+"""
+import binascii
+import os
+
+CHUNK_SIZE = 64 * 1024
+
+# urllib3 (WHATWG) escaping of a multipart header parameter: \n, \r and " are percent encoded
+_NAME_ESCAPES = {10: "%0A", 13: "%0D", 34: "%22"}
+
+
+def _dict_children(name, value):
+    for key in value:
+        yield name + key + ".", value[key]
+
+
+def _list_children(name, value):
+    base = name[:-1]
+    for i, item in enumerate(value):
+        yield f"{base}[{i}].", item
+
+
+def iter_fields(payload):
+    """
+    (name, value) string pairs of the flattened payload, in order. Dicts nest as
+    "key.sub", lists as "key[i]"; empty dicts and lists produce no field.
+    """
+    # Stack of lazy child iterators: memory stays O(depth), not O(fields)
+    stack = [iter((("", payload),))]
+    while stack:
+        for name, value in stack[-1]:
+            if isinstance(value, dict):
+                stack.append(_dict_children(name, value))
+                break
+            elif isinstance(value, list):
+                stack.append(_list_children(name, value))
+                break
+            elif value is True:
+                yield name[:-1], "true"
+            elif value is False:
+                yield name[:-1], "false"
+            elif value is None:
+                yield name[:-1], ""
+            else:
+                yield name[:-1], str(value)
+        else:
+            stack.pop()
+
+
+def _utf8_len(text):
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class MultipartEncoder:
+    """
+    Iterable multipart/form-data body of a PO payload (see module docstring).
+    Re-iterable; use content_type as the request's Content-Type header.
+    """
+
+    def __init__(self, payload, boundary=None, chunk_size=CHUNK_SIZE):
+        self.payload = payload
+        self.boundary = boundary or binascii.hexlify(os.urandom(16)).decode()
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.chunk_size = chunk_size
+        self._head = f'--{self.boundary}\r\nContent-Disposition: form-data; name="'.encode()
+        self._tail = f"--{self.boundary}--\r\n".encode()
+        self._length = None
+
+    def fields(self):
+        return iter_fields(self.payload)
+
+    def __len__(self):
+        # Sized without encoding the body: the framing is fixed, only names/values vary
+        if self._length is None:
+            per_field = len(self._head) + len('"\r\n\r\n') + len("\r\n")
+            total = len(self._tail)
+            for name, value in self.fields():
+                if '"' in name or "\n" in name or "\r" in name:
+                    name = name.translate(_NAME_ESCAPES)
+                total += per_field + _utf8_len(name) + _utf8_len(value)
+            self._length = total
+        return self._length
+
+    def __iter__(self):
+        head, chunk_size = self._head, self.chunk_size
+        buffer = bytearray()
+        for name, value in self.fields():
+            if '"' in name or "\n" in name or "\r" in name:
+                name = name.translate(_NAME_ESCAPES)
+            buffer += head
+            buffer += name.encode()
+            buffer += b'"\r\n\r\n'
+            buffer += value.encode()
+            buffer += b"\r\n"
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += self._tail
+        yield bytes(buffer)
+
+    async def aiter_chunks(self):
+        """The body as an async iterator (httpx.AsyncClient only streams async iterables)."""
+        for chunk in self:
+            yield chunk
+
+    def to_bytes(self):
+        return b"".join(self)
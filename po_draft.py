@@ -0,0 +1,548 @@
+"""
+Typed draft purchase order kept in state["payload"].
+
+PODraft (header) and LineItem are __slots__ records with the mapping interface the agent
+already uses (get, [], setdefault, update, in, items), so action application, rules and
+prompts work on them unchanged while a 1k-line draft takes a fraction of the memory of
+nested dicts. Unknown keys the model invents go to a per-record overflow dict.
+
+- Key aliases are canonical on write: purchase_group_id -> purchase_grp_id,
+  validity_end / validity_end_date -> validityEnd.
+- LineItems keeps a running total: each quantity/price change adjusts it by that line's
+  delta, so "total" is read, not recomputed over every line per turn.
+- to_context() is the compact projection sent to the model (empty values dropped) and
+  to_api_payload() the strict create-PO body; both are cached per line until that line
+  changes. to_dict() is a plain copy.
+"""
+import datetime
+from collections.abc import ItemsView, KeysView, Mapping, MutableMapping, ValuesView
+
+HEADER_FIELDS = (
+    "po_type", "vendor_id", "purchase_org_id", "plant_id", "purchase_grp_id",
+    "po_date", "validityEnd", "delivery_date", "currency", "line_items", "projects",
+    "is_epcg_applicable", "remarks", "is_pr_based", "is_rfq_based", "noc",
+    "payment_terms", "inco_terms", "datasupplier", "inco_terms_description",
+    "payment_terms_description", "alternate_supplier_name",
+    "alternate_supplier_email", "alternate_supplier_contact_number",
+)
+
+ITEM_FIELDS = (
+    "material_id", "short_text", "quantity", "price", "net_price", "material_group_id",
+    "unit_id", "tax_code", "tax", "delivery_date",
+)
+
+HEADER_ALIASES = {
+    "purchase_group_id": "purchase_grp_id",
+    "validity_end": "validityEnd",
+    "validity_end_date": "validityEnd",
+}
+
+# Whitelisted header keys of the create_po body, in the API's order
+API_HEADER_KEYS = (
+    "po_type", "vendor_id", "purchase_org_id", "plant_id", "purchase_grp_id",
+    "po_date", "validityEnd", "currency", "line_items", "projects",
+    "is_epcg_applicable", "remarks", "is_pr_based", "is_rfq_based", "noc",
+    "total", "payment_terms", "inco_terms", "datasupplier", "inco_terms_description",
+    "payment_terms_description", "alternate_supplier_name",
+    "alternate_supplier_email", "alternate_supplier_contact_number",
+)
+
+_MISSING = object()
+
+_ITEM_FIELD_SET = frozenset(ITEM_FIELDS)
+
+# Line fields the running total depends on
+_TOTAL_FIELDS = ("quantity", "price")
+
+
+# Helper for Date Format: "Fri Jan 23 2026 13:15:24 GMT+0530 (India Standard Time)"
+def format_date_api(date_val):
+    if not date_val: return ""
+    try:
+        # Try parsing YYYY-MM-DD
+        dt = datetime.datetime.strptime(str(date_val).split(" ")[0], "%Y-%m-%d")
+        # Set a default time if none (using fixed time from example or current)
+        # User example has 13:15:24. Let's use current time
+        now = datetime.datetime.now()
+        dt = dt.replace(hour=now.hour, minute=now.minute, second=now.second)
+        # Hardcoded timezone part as per user requirement to match "correct" payload
+        return dt.strftime(f"%a %b %d %Y %H:%M:%S GMT+0530 (India Standard Time)")
+    except:
+        return str(date_val) # Fallback
+
+
+def _empty(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _subtotal(quantity, price):
+    try:
+        return float(quantity or 0) * float(price or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class SlotRecord:
+    """
+    Mapping over declared slots plus an overflow dict for undeclared keys. Registered as a
+    MutableMapping rather than subclassing it, so isinstance checks on records stay cheap.
+    """
+
+    __slots__ = ("_extra",)
+    FIELDS = ()
+
+    def __init__(self, values=None, **kwargs):
+        self._extra = None
+        if values:
+            self.update(values)
+        if kwargs:
+            self.update(kwargs)
+
+    def _slot(self, key):
+        return key, key in self._field_set
+
+    def __getitem__(self, key):
+        key, declared = self._slot(key)
+        if declared:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key, default=None):
+        key, declared = self._slot(key)
+        if declared:
+            return getattr(self, key, default)
+        return self._extra.get(key, default) if self._extra is not None else default
+
+    def __contains__(self, key):
+        key, declared = self._slot(key)
+        if declared:
+            return getattr(self, key, _MISSING) is not _MISSING
+        return self._extra is not None and key in self._extra
+
+    def _store(self, key, value):
+        key, declared = self._slot(key)
+        if declared:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __setitem__(self, key, value):
+        self._store(key, value)
+
+    def __delitem__(self, key):
+        key, declared = self._slot(key)
+        if declared:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None or key not in self._extra:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def setdefault(self, key, default=None):
+        # Return the stored value: the record may convert what it stores (see PODraft)
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, default=_MISSING):
+        try:
+            value = self[key]
+        except KeyError:
+            if default is _MISSING:
+                raise
+            return default
+        del self[key]
+        return value
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def keys(self):
+        return KeysView(self)
+
+    def items(self):
+        return ItemsView(self)
+
+    def values(self):
+        return ValuesView(self)
+
+    def __eq__(self, other):
+        if not isinstance(other, (dict, SlotRecord, Mapping)):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    __hash__ = None
+
+    def clear(self):
+        for key in self.FIELDS:
+            if getattr(self, key, _MISSING) is not _MISSING:
+                delattr(self, key)
+        self._extra = None
+
+    def __iter__(self):
+        for key in self.FIELDS:
+            if getattr(self, key, _MISSING) is not _MISSING:
+                yield key
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def __reduce__(self):
+        # Rebuilt through __init__ so owners and running totals are wired up again
+        return (type(self), (dict(self.items()),))
+
+
+MutableMapping.register(SlotRecord)
+
+
+class LineItem(SlotRecord):
+    """One PO line. Quantity/price writes update the owning LineItems' running total."""
+
+    __slots__ = ITEM_FIELDS + ("_owner", "_sub", "_context", "_api")
+    FIELDS = ITEM_FIELDS
+    _field_set = _ITEM_FIELD_SET
+
+    def __init__(self, values=None, **kwargs):
+        self._owner = None
+        self._sub = 0.0
+        self._context = None
+        self._api = None
+        super().__init__(values, **kwargs)
+
+    @property
+    def subtotal(self):
+        return self._sub
+
+    def _changed(self):
+        self._context = self._api = None
+        sub = _subtotal(getattr(self, "quantity", 0), getattr(self, "price", 0))
+        if sub != self._sub:
+            if self._owner is not None:
+                self._owner._adjust(sub - self._sub)
+            self._sub = sub
+
+    def get(self, key, default=None):
+        if key in _ITEM_FIELD_SET:
+            return getattr(self, key, default)
+        return super().get(key, default)
+
+    def __setitem__(self, key, value):
+        if key in _ITEM_FIELD_SET:
+            setattr(self, key, value)
+        else:
+            self._store(key, value)
+        if key in _TOTAL_FIELDS:
+            self._changed()
+        else:
+            self._context = self._api = None
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self._store(key, value)
+        self._changed()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def to_context(self):
+        """Filled fields only; cached until the line changes (treat as read-only)."""
+        if self._context is None:
+            self._context = {k: v for k, v in self.items() if not _empty(v)}
+        return self._context
+
+    def to_api_line(self):
+        """api_line_item(self), cached until the line changes (treat as read-only)."""
+        if self._api is None:
+            self._api = api_line_item(self)
+        return self._api
+
+
+class LineItems(list):
+    """List of LineItem with a running total of quantity * price."""
+
+    __slots__ = ("_total",)
+
+    def __init__(self, items=()):
+        super().__init__()
+        self._total = 0.0
+        self.extend(items)
+
+    @property
+    def total(self):
+        # Incremental float updates drift in the last bits; drop that noise
+        return round(self._total, 6)
+
+    def _adjust(self, delta):
+        self._total += delta
+
+    def _adopt(self, item):
+        if not isinstance(item, LineItem) or (item._owner is not None and item._owner is not self):
+            if not isinstance(item, Mapping):
+                raise ValueError(f"Line item must be an object, got {type(item).__name__}")
+            item = LineItem(item)
+        item._owner = self
+        self._total += item._sub
+        return item
+
+    def _release(self, item):
+        if item._owner is self:
+            item._owner = None
+        self._total -= item._sub
+
+    def _recount(self):
+        # Slice assignment and the like: rare, so just start over
+        for item in self:
+            item._owner = self
+        self._total = sum(item._sub for item in self)
+
+    def append(self, item):
+        super().append(self._adopt(item))
+
+    def extend(self, items):
+        super().extend(self._adopt(item) for item in items)
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def insert(self, index, item):
+        super().insert(index, self._adopt(item))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            for item in list.__getitem__(self, index):
+                item._owner = None
+            super().__setitem__(index, [LineItem(item) for item in value])
+            self._recount()
+            return
+        self._release(self[index])
+        super().__setitem__(index, self._adopt(value))
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for item in list.__getitem__(self, index):
+                item._owner = None
+            super().__delitem__(index)
+            self._recount()
+            return
+        self._release(self[index])
+        super().__delitem__(index)
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self._release(item)
+        return item
+
+    def remove(self, item):
+        self.pop(self.index(item))
+
+    def clear(self):
+        for item in self:
+            item._owner = None
+        super().clear()
+        self._total = 0.0
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+
+class PODraft(SlotRecord):
+    """The PO header. "line_items" is always a LineItems; "total" is derived from it."""
+
+    __slots__ = HEADER_FIELDS
+    FIELDS = HEADER_FIELDS
+    _field_set = frozenset(HEADER_FIELDS)
+
+    def _slot(self, key):
+        key = HEADER_ALIASES.get(key, key)
+        return key, key in self._field_set
+
+    def __init__(self, values=None, **kwargs):
+        self.line_items = LineItems()
+        super().__init__(values, **kwargs)
+
+    @property
+    def total(self):
+        return self.line_items.total
+
+    def _store(self, key, value):
+        if key == "total":
+            return  # Derived from the line items
+        if key == "line_items":
+            value = value if isinstance(value, LineItems) else LineItems(value or ())
+        super()._store(key, value)
+
+    def __getitem__(self, key):
+        if key == "total" and self.line_items:
+            return self.line_items.total
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        if key == "total":
+            return self.line_items.total if self.line_items else default
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        if key == "total":
+            return bool(self.line_items)
+        return super().__contains__(key)
+
+    def setdefault(self, key, default=None):
+        if key == "line_items":
+            return self.line_items
+        return super().setdefault(key, default)
+
+    def __delitem__(self, key):
+        if key == "line_items":
+            self.line_items = LineItems()
+        elif key != "total":
+            super().__delitem__(key)
+
+    def clear(self):
+        super().clear()
+        self.line_items = LineItems()
+
+    def __iter__(self):
+        yield from super().__iter__()
+        if self.line_items:
+            yield "total"
+
+    def to_dict(self):
+        """Plain, JSON-ready copy of the whole draft."""
+        data = {k: v for k, v in self.items() if k != "line_items"}
+        data["line_items"] = [dict(item.items()) for item in self.line_items]
+        return data
+
+    def to_context(self):
+        """Filled header fields and compact line items, as sent to the model."""
+        context = {k: v for k, v in self.items() if k != "line_items" and not _empty(v)}
+        if self.line_items:
+            context["line_items"] = [item.to_context() for item in self.line_items]
+        return context
+
+    def to_api_payload(self):
+        """Strict create_po body from the cached per-line projections and the running total."""
+        return build_api_payload(self, total=self.line_items.total, api_line=LineItem.to_api_line)
+
+
+def api_line_item(item):
+    """(strict create-PO fields of one line except delivery_date, line total)."""
+    # Ensure numeric types
+    try: mat_grp = int(item.get("material_group_id", 1))
+    except: mat_grp = 1
+    try: u_id = int(item.get("unit_id", 1))
+    except: u_id = 1
+    try: tax_c = int(item.get("tax_code", 118)) # User example defaulted to 118
+    except: tax_c = 118
+    try: m_id = int(item.get("material_id"))
+    except: m_id = 0
+
+    qty = float(item.get("quantity", 0))
+    price = float(item.get("price", 0))
+    item_total = qty * price
+
+    clean_item = {
+        "material_id": m_id,
+        "quantity": str(qty).rstrip("0").rstrip(".") if qty.is_integer() else str(qty),
+        "price": str(price).rstrip("0").rstrip(".") if price.is_integer() else str(price),
+        "short_text": str(item.get("short_text", "") or "Item"),
+        "material_group_id": mat_grp,
+        "unit_id": u_id,
+        "tax_code": tax_c,
+        "control_code": "",
+        "subServices": "",
+        "short_desc": str(item.get("short_text", "") or "Item"),
+        "sub_total": f"{item_total:.2f}",
+        "tax": str(item.get("tax", "5")), # Defaulting to 5 as per example
+    }
+    return clean_item, item_total
+
+
+def build_api_payload(current_payload, total=None, api_line=api_line_item):
+    """
+    CONSTRUCT STRICT PAYLOAD (Whitelist approach) for create_po from a complete draft.
+    total is the precomputed line total (PODraft); without it the lines are summed.
+    """
+    api_payload = {}
+    for key in API_HEADER_KEYS:
+        val = current_payload.get(key)
+
+        # Date Formatting
+        if key in ["po_date", "validityEnd"] and val:
+            val = format_date_api(val)
+
+        # Handle Boolean/None defaults
+        if key not in ["line_items", "projects"]:
+             if val is None:
+                 api_payload[key] = ""
+             elif isinstance(val, bool):
+                 api_payload[key] = val # Sent as bool, mock_api will stringify
+             else:
+                 api_payload[key] = val
+        elif key in current_payload:
+            api_payload[key] = val
+
+    # Fix 'noc' if it is "No" -> ""
+    if api_payload.get("noc") == "No":
+        api_payload["noc"] = ""
+
+    # Ensure Defaults for critical fields
+    if "projects" not in api_payload: api_payload["projects"] = []
+    # Projects cleanup
+    clean_projects = []
+    for p in api_payload.get("projects", []):
+        clean_projects.append({
+            "project_code": p.get("project_code", ""),
+            "project_name": p.get("project_name", "")
+        })
+    if clean_projects:
+        api_payload["projects"] = clean_projects
+
+    # Payment Terms & Inco Terms defaults (from user example)
+    if not api_payload.get("payment_terms"): api_payload["payment_terms"] = "189"
+    if not api_payload.get("inco_terms"): api_payload["inco_terms"] = "13"
+
+    # 3. CLEAN LINE ITEMS
+    clean_items = []
+    header_del_date = current_payload.get("delivery_date")
+    # Most lines share the header delivery date; format each distinct date once
+    api_dates = {}
+
+    total_sum = 0.0
+
+    for item in api_payload.get("line_items", []):
+        clean_item, item_total = api_line(item)
+        total_sum += item_total
+
+        del_date = item.get("delivery_date") or header_del_date
+        if del_date not in api_dates:
+            api_dates[del_date] = format_date_api(del_date)
+        clean_items.append(dict(clean_item, delivery_date=api_dates[del_date]))
+
+    api_payload["line_items"] = clean_items
+
+    # 2.1 Final Total Calculation
+    api_payload["total"] = f"{(total_sum if total is None else total):.2f}"
+
+    return api_payload
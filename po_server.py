@@ -0,0 +1,384 @@
+"""
+Headless HTTP/JSON serving of POAgent, for embedding the agent without Streamlit.
+
+Routes (JSON bodies and responses):
+  POST /conversations                        -> 201 {"conversation_id", "current_step", "payload"}
+  POST /conversations/<id>/turns {"text": ...} -> 200 {..., "response"}
+  GET  /conversations/<id>/payload            -> 200 {"conversation_id", "current_step", "payload"}
+  GET  /health                                -> 200 {"workers": n, "alive": k}
+Unknown conversations answer 404, malformed requests 400, a turn that lost a race with
+another server's turn on the same conversation 409 (see below), requests lost with a
+worker that died 503 and a turn that does not finish within PO_AGENT_SERVER_TIMEOUT
+seconds 504.
+
+The front process is a stdlib ThreadingHTTPServer that only parses and forwards requests.
+Conversations live in a pool of worker processes (PO_AGENT_SERVER_WORKERS, default one
+per core). A conversation id always maps to the same worker (crc32 of the id), so its
+state stays in one process and its turns run in order under a per-conversation lock,
+while each worker runs up to PO_AGENT_SERVER_THREADS turns of different conversations
+at once (a turn mostly waits on the model and SupplierX). Responses carry the worker
+index in an X-PO-Worker header.
+
+A worker that dies (OOM, a crash in a native dependency) is restarted as soon as its
+exit is noticed; the requests it held answer 503 at once instead of waiting for the
+timeout. Its in-memory conversations are gone unless a conversation store is set, in
+which case the new worker reloads them on their next request.
+
+With PO_AGENT_CONVERSATION_DB set, workers save every turn to the conversation store
+(see conversation_store) and load ids they do not hold from it, so conversations survive
+restarts and several servers can share one store behind a load balancer. Before each
+request a worker checks the store and reloads a conversation that another server saved
+since (one indexed query), so turns always run on the latest state. Two turns of one
+conversation racing on two servers cannot both be saved: the loser's state is reloaded
+and it answers 409 for the client to resend. Each worker keeps at most
+PO_AGENT_SERVER_MAX_CONVERSATIONS (default 10000) conversations in memory.
+
+CLI: python po_server.py [--host 127.0.0.1] [--port 8080] [--workers N] [--threads N]
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from multiprocessing.connection import wait as wait_for_exit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from conversation_store import ConversationConflict
+
+_ROUTES = (
+    ("POST", re.compile(r"^/conversations/?$"), "create"),
+    ("POST", re.compile(r"^/conversations/(?P<cid>[\w-]+)/turns/?$"), "turn"),
+    ("GET", re.compile(r"^/conversations/(?P<cid>[\w-]+)/payload/?$"), "payload"),
+)
+
+
+def worker_for(conversation_id, workers):
+    """Worker index of a conversation; stable across processes and restarts."""
+    return zlib.crc32(conversation_id.encode("utf-8")) % workers
+
+
+def _default_agent():
+    from agent_logic import POAgent
+    return POAgent()
+
+
+class ConversationHost:
+    """
+    The conversations of one worker process and the operations on them. At most
+    max_conversations states are kept (least recently used first out); with a store an
+    evicted conversation is reloaded on its next request, without one it is gone.
+    """
+
+    def __init__(self, agent, store=None, max_conversations=None):
+        self.agent = agent
+        self.store = store
+        self.max_conversations = max_conversations or int(os.getenv("PO_AGENT_SERVER_MAX_CONVERSATIONS", "10000"))
+        self.states = OrderedDict()
+        self._locks = {}  # conversation id -> [lock, requests using it]
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _conversation_lock(self, conversation_id):
+        with self._lock:
+            entry = self._locks.get(conversation_id)
+            if entry is None:
+                entry = self._locks[conversation_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1] and conversation_id not in self.states:
+                    self._locks.pop(conversation_id, None)
+                self._evict()
+
+    def _evict(self):
+        # Call with _lock held; a conversation with a request in flight is never evicted
+        excess = len(self.states) - self.max_conversations
+        if excess <= 0:
+            return
+        victims = []
+        for conversation_id in self.states:
+            entry = self._locks.get(conversation_id)
+            if entry is None or not entry[1]:
+                victims.append(conversation_id)
+                if len(victims) == excess:
+                    break
+        for conversation_id in victims:
+            del self.states[conversation_id]
+            self._locks.pop(conversation_id, None)
+
+    def _keep(self, conversation_id, state):
+        with self._lock:
+            self.states[conversation_id] = state
+            self.states.move_to_end(conversation_id)
+
+    def _current_state(self, conversation_id):
+        """The conversation's state, reloaded if another process saved it since this one did."""
+        with self._lock:
+            state = self.states.get(conversation_id)
+            if state is not None:
+                self.states.move_to_end(conversation_id)
+        if self.store is not None and (state is None or not self.store.is_current(conversation_id, state)):
+            loaded = self.store.load(conversation_id)
+            if loaded is not None:
+                state = loaded
+                self._keep(conversation_id, state)
+        return state
+
+    def _save(self, conversation_id, state):
+        """True once saved; False if another process saved the conversation first (it is reloaded)."""
+        if self.store is None:
+            return True
+        try:
+            self.store.save(conversation_id, state)
+        except ConversationConflict:
+            with self._lock:
+                self.states.pop(conversation_id, None)
+            self._current_state(conversation_id)
+            return False
+        return True
+
+    def _view(self, conversation_id, state, **extra):
+        return dict(conversation_id=conversation_id, current_step=state["current_step"],
+                    payload=state["payload"].to_dict(), **extra)
+
+    def handle(self, op, conversation_id, body):
+        """(HTTP status, JSON-ready result) of one operation."""
+        with self._conversation_lock(conversation_id):
+            if op == "create":
+                state = self.agent.get_initial_state()
+                if not self._save(conversation_id, state):
+                    return 409, {"error": f"Conversation '{conversation_id}' already exists"}
+                self._keep(conversation_id, state)
+                return 201, self._view(conversation_id, state)
+
+            state = self._current_state(conversation_id)
+            if state is None:
+                return 404, {"error": f"Unknown conversation '{conversation_id}'"}
+
+            if op == "turn":
+                text = body.get("text") if isinstance(body, dict) else None
+                if not isinstance(text, str) or not text.strip():
+                    return 400, {"error": "Expected a JSON body with a non-empty \"text\""}
+                response = self.agent.process_input(text, state)
+                if not self._save(conversation_id, state):
+                    # Not replayed here: the turn may have had side effects (a submitted PO)
+                    return 409, {"error": "The conversation was updated by another server during this turn; "
+                                          "it has been reloaded, send the turn again"}
+                return 200, self._view(conversation_id, state, response=response)
+            return 200, self._view(conversation_id, state)
+
+
+def _worker_main(index, inbox, outbox, threads, agent_factory):
+    from conversation_store import get_conversation_store
+
+    host = ConversationHost((agent_factory or _default_agent)(), get_conversation_store())
+
+    def run(request_id, op, conversation_id, body):
+        try:
+            status, result = host.handle(op, conversation_id, body)
+        except Exception as e:
+            print(f"ERROR in worker {index} ({op} {conversation_id}): {e}")
+            status, result = 500, {"error": str(e)}
+        outbox.put((request_id, status, result))
+
+    print(f"DEBUG: PO worker {index} ready (pid {os.getpid()})")
+    with ThreadPoolExecutor(threads, thread_name_prefix=f"po-worker-{index}") as pool:
+        for message in iter(inbox.get, None):
+            pool.submit(run, *message)
+
+
+class POServer:
+    """Front HTTP server plus its worker processes; call serve_forever() or start()."""
+
+    def __init__(self, host="127.0.0.1", port=8080, workers=None, threads=None, timeout=None, agent_factory=None):
+        self.workers = workers or int(os.getenv("PO_AGENT_SERVER_WORKERS", "0")) or os.cpu_count() or 1
+        self.threads = threads or int(os.getenv("PO_AGENT_SERVER_THREADS", "8"))
+        self.timeout = timeout or float(os.getenv("PO_AGENT_SERVER_TIMEOUT", "120"))
+        # spawn: workers start from a clean interpreter, not a fork of a threaded server
+        self._context = multiprocessing.get_context("spawn")
+        self._agent_factory = agent_factory
+        self._outbox = self._context.Queue()
+        self._inboxes = [None] * self.workers
+        self._processes = [None] * self.workers
+        # Guards dispatch against a worker being replaced
+        self._workers_lock = threading.Lock()
+        self._closing = False
+        for index in range(self.workers):
+            self._spawn(index)
+
+        self._pending = {}  # request id -> (Future, worker index)
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._collector = threading.Thread(target=self._collect, name="po-server-results", daemon=True)
+        self._collector.start()
+        self._monitor = threading.Thread(target=self._watch, name="po-server-monitor", daemon=True)
+        self._monitor.start()
+
+        self.httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._serving = False
+
+    def _spawn(self, index):
+        # A fresh inbox: a worker killed inside get() can leave the old queue's lock held
+        inbox = self._context.Queue()
+        process = self._context.Process(target=_worker_main, args=(index, inbox, self._outbox, self.threads, self._agent_factory),
+                                        name=f"po-worker-{index}", daemon=True)
+        process.start()
+        self._inboxes[index], self._processes[index] = inbox, process
+
+    def _restart_if_dead(self, index):
+        """Replace a dead worker and fail the requests it held; call with _workers_lock held."""
+        process = self._processes[index]
+        if self._closing or process.is_alive():
+            return
+        print(f"ERROR: PO worker {index} (pid {process.pid}) exited with code {process.exitcode}; restarting it")
+        with self._pending_lock:
+            lost = [future for future, worker in self._pending.values() if worker == index]
+        for future in lost:
+            _resolve(future, (503, {"error": f"Worker {index} exited before answering; retry the request"}))
+        self._spawn(index)
+
+    def _watch(self):
+        while not self._closing:
+            # Wakes as soon as any worker exits
+            wait_for_exit([process.sentinel for process in self._processes], timeout=1.0)
+            with self._workers_lock:
+                for index in range(self.workers):
+                    self._restart_if_dead(index)
+
+    def alive_workers(self):
+        return sum(process.is_alive() for process in self._processes)
+
+    def call(self, op, conversation_id, body=None):
+        """Run op on the conversation's worker; returns (status, result, worker index)."""
+        worker = worker_for(conversation_id, self.workers)
+        request_id = next(self._request_ids)
+        future = Future()
+        with self._workers_lock:
+            self._restart_if_dead(worker)
+            with self._pending_lock:
+                self._pending[request_id] = (future, worker)
+            self._inboxes[worker].put((request_id, op, conversation_id, body))
+        try:
+            status, result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            status, result = 504, {"error": f"Worker {worker} did not answer within {self.timeout:.0f}s"}
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+        return status, result, worker
+
+    def _collect(self):
+        for request_id, status, result in iter(self._outbox.get, None):
+            with self._pending_lock:
+                entry = self._pending.get(request_id)
+            if entry is not None:
+                _resolve(entry[0], (status, result))
+
+    def start(self):
+        """Serve in a daemon thread (tests, embedding); returns self."""
+        self._serving = True
+        threading.Thread(target=self.httpd.serve_forever, name="po-server-http", daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        self._serving = True
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        with self._workers_lock:
+            self._closing = True
+        if self._serving:
+            self.httpd.shutdown()
+        self.httpd.server_close()
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._outbox.put(None)
+        self._collector.join(timeout=5)
+        self._monitor.join(timeout=5)
+
+
+def _resolve(future, value):
+    # A request can be answered by its worker and failed by the monitor; the first one wins
+    try:
+        future.set_result(value)
+    except InvalidStateError:
+        pass
+
+
+def _handler_for(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status, result, worker=None):
+            content = json.dumps(result, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            if worker is not None:
+                self.send_header("X-PO-Worker", str(worker))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def _dispatch(self):
+            path = self.path.split("?", 1)[0]
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+            if self.command == "GET" and path.rstrip("/") == "/health":
+                return self._reply(200, {"workers": server.workers, "alive": server.alive_workers()})
+            for method, pattern, op in _ROUTES:
+                match = pattern.match(path)
+                if match and method == self.command:
+                    break
+            else:
+                return self._reply(404, {"error": f"No route for {self.command} {path}"})
+            try:
+                body = json.loads(raw) if raw.strip() else {}
+            except ValueError:
+                return self._reply(400, {"error": "Body is not valid JSON"})
+            conversation_id = match.groupdict().get("cid") or uuid.uuid4().hex
+            self._reply(*server.call(op, conversation_id, body))
+
+        do_GET = _dispatch
+        do_POST = _dispatch
+
+        def log_message(self, format, *args):
+            print(f"DEBUG: po_server {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: PO_AGENT_SERVER_WORKERS or one per core)")
+    parser.add_argument("--threads", type=int, default=None, help="concurrent turns per worker (default: PO_AGENT_SERVER_THREADS or 8)")
+    args = parser.parse_args()
+
+    server = POServer(args.host, args.port, args.workers, args.threads)
+    print(f"PO agent serving on {server.base_url} with {server.workers} workers")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
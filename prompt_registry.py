@@ -0,0 +1,50 @@
+"""
+Registry of assembled system prompts.
+
+Each prompt is built once by its builder and reused until one of its source files
+changes (mtime / size), checked at most every PROMPT_RELOAD_CHECK_S seconds, so a turn
+costs a dict lookup instead of a path probe, a file read and string concatenation.
+"""
+import os
+import threading
+import time
+
+
+def _file_state(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+class PromptRegistry:
+    def __init__(self, check_interval=None):
+        self.check_interval = check_interval if check_interval is not None else float(os.getenv("PROMPT_RELOAD_CHECK_S", "2"))
+        self._entries = {}  # name -> [builder, files, text, file_states, checked_at]
+        self._lock = threading.RLock()  # builders may get() other prompts
+        self.builds = 0
+
+    def register(self, name, builder, files=()):
+        with self._lock:
+            self._entries[name] = [builder, tuple(files), None, None, 0.0]
+
+    def get(self, name):
+        entry = self._entries[name]
+        now = time.monotonic()
+        if entry[2] is not None and now - entry[4] < self.check_interval:
+            return entry[2]
+        with self._lock:
+            builder, files, text, states, _ = entry
+            current = tuple(_file_state(f) for f in files)
+            if text is None or current != states:
+                entry[2] = builder()
+                entry[3] = current
+                self.builds += 1
+            entry[4] = now
+            return entry[2]
+
+    def invalidate(self, name=None):
+        with self._lock:
+            for key in ([name] if name else list(self._entries)):
+                self._entries[key][2] = None
@@ -0,0 +1,190 @@
+"""
+Content-addressed cache for BedrockService._call_claude results.
+
+Calls run at temperature 0, so the same (model, system prompt, user content) gives the same
+result. Entries are keyed by a hash of the model id, the prompt and the normalized user
+content: whitespace is collapsed and volatile values - ISO dates and the API timestamps
+("Fri Jan 23 2026 13:15:24 GMT+0530 (India Standard Time)") - become placeholders. Results
+are stored with the same placeholders and filled with the caller's values on a hit, so
+"po date 2025-12-30" and "po date 2026-01-02" share one entry.
+
+Only methods listed in BEDROCK_RESPONSE_CACHE_METHODS are cached (free-text replies such as
+generate_response are not). The default is the single-value extractors, whose results
+carry dates through unchanged. The full-turn analyses (ANALYSIS_METHODS) are opt-in: they
+compare dates (e.g. validity end must not be before the PO date), and placeholders make
+"<v0> ... <v1>" the same entry whichever way round the dates are. Memory is bounded by entries and bytes with LRU eviction; set
+BEDROCK_RESPONSE_CACHE_DIR to add an on-disk tier (a model_backends.RecordingStore) shared
+across processes and restarts; entries another process stores are picked up on a miss.
+"""
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+
+DEFAULT_CACHED_METHODS = (
+    "analyze_intent", "extract_po_intent", "extract_date_with_context",
+    "extract_price_from_text", "extract_field_value",
+)
+# Opt in with BEDROCK_RESPONSE_CACHE_METHODS (see module docstring)
+ANALYSIS_METHODS = ("analyze_user_input", "analyze_and_respond")
+
+# API timestamps first so their date part is not matched on its own
+_VOLATILE_RE = re.compile(
+    r"[A-Z][a-z]{2} [A-Z][a-z]{2} \d{2} \d{4} \d{2}:\d{2}:\d{2} GMT[+-]\d{4}(?: \([^)]*\))?"
+    r"|\b\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?\b"
+)
+
+
+def normalize(text):
+    """Return (normalized text, volatile values in order of first appearance)."""
+    values = []
+
+    def placeholder(match):
+        value = match.group(0)
+        if value not in values:
+            values.append(value)
+        return f"<v{values.index(value)}>"
+
+    text = _VOLATILE_RE.sub(placeholder, text)
+    return re.sub(r"\s+", " ", text).strip(), values
+
+
+@functools.lru_cache(maxsize=64)
+def _prompt_digest(system_prompt):
+    # System prompts are a handful of long, reused strings; hash each once
+    return hashlib.sha256(system_prompt.encode("utf-8")).digest()
+
+
+def cache_key(model_id, system_prompt, normalized_text):
+    digest = hashlib.sha256(_prompt_digest(system_prompt))
+    for part in (str(model_id), normalized_text):
+        digest.update(b"\0")
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _to_template(result_text, values):
+    # Longest first so a timestamp is replaced before a date it happens to contain
+    for i in sorted(range(len(values)), key=lambda i: -len(values[i])):
+        result_text = result_text.replace(values[i], f"<v{i}>")
+    return result_text
+
+
+def _from_template(template, values):
+    return re.sub(r"<v(\d+)>", lambda m: values[int(m.group(1))] if int(m.group(1)) < len(values) else m.group(0), template)
+
+
+class ResponseCache:
+    """Thread-safe LRU of parsed model results (stored as JSON templates), with an optional disk tier."""
+
+    def __init__(self, max_entries=None, max_bytes=None, methods=None, disk_path=None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("BEDROCK_RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("BEDROCK_RESPONSE_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+        if methods is None:
+            env = os.getenv("BEDROCK_RESPONSE_CACHE_METHODS")
+            methods = [m.strip() for m in env.split(",") if m.strip()] if env else DEFAULT_CACHED_METHODS
+        self.methods = frozenset(methods)
+        disk_path = disk_path if disk_path is not None else os.getenv("BEDROCK_RESPONSE_CACHE_DIR")
+        self.disk = None
+        if disk_path:
+            from model_backends import RecordingStore
+            self.disk = RecordingStore(disk_path)
+
+        self._entries = OrderedDict()  # key -> template
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.method_hits = Counter()
+        self.method_misses = Counter()
+
+    def enabled_for(self, method):
+        return method in self.methods
+
+    def lookup(self, method, model_id, system_prompt, user_text):
+        """Return (key, values, result); result is None on a miss. key/values are passed to store()."""
+        normalized, values = normalize(user_text)
+        key = cache_key(model_id, system_prompt, normalized)
+        with self._lock:
+            template = self._entries.get(key)
+            if template is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.method_hits[method] += 1
+                return key, values, json.loads(_from_template(template, values))
+        if self.disk is not None and key in self.disk:
+            template = self.disk.get(key).decode("utf-8")
+            self._put(key, template)
+            with self._lock:
+                self.hits += 1
+                self.disk_hits += 1
+                self.method_hits[method] += 1
+            return key, values, json.loads(_from_template(template, values))
+        with self._lock:
+            self.misses += 1
+            self.method_misses[method] += 1
+        return key, values, None
+
+    def store(self, key, values, result):
+        # Failed calls come back as {"error": ...}; never pin those
+        if not isinstance(result, dict) or "error" in result:
+            return
+        template = _to_template(json.dumps(result, separators=(",", ":"), ensure_ascii=False), values)
+        self._put(key, template)
+        if self.disk is not None:
+            self.disk.put(key, template.encode("utf-8"))
+
+    def _put(self, key, template):
+        size = len(template)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            if size > self.max_bytes:
+                return
+            self._entries[key] = template
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, oldest = self._entries.popitem(last=False)
+                self._bytes -= len(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "by_method": {m: {"hits": self.method_hits[m], "misses": self.method_misses[m]}
+                              for m in sorted(set(self.method_hits) | set(self.method_misses))},
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache, or None if disabled via env."""
+    global _cache
+    if os.getenv("BEDROCK_RESPONSE_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,205 @@
+"""
+Deterministic rule-based NLU for simple turns ("yes, create it", "qty 5", "price 200",
+"plant 1001", "2025-12-30").
+
+RuleNLU.analyze returns the same {intents, actions, items_to_resolve} structure as
+BedrockService.analyze_user_input plus a confidence score. POAgent uses it as a fast path
+and only calls the model when the confidence is below its threshold. Rules only fire when
+they account for the whole utterance; anything else scores 0 and goes to the model.
+
+The substring checks in BedrockService.detect_intent_type ("no" matches "know") are too
+loose to act on without the model, so the patterns here are anchored.
+"""
+import datetime
+import re
+
+# Response template for fast-path turns, filled locally like a fused-turn template
+FAST_PATH_TEMPLATE = "{updates} {issues} {next_step}"
+
+CONFIRM_TRIGGERS = {"yes", "yeah", "yep", "ok", "okay", "sure", "confirm", "confirmed", "proceed", "create", "submit", "go"}
+CONFIRM_WORDS = CONFIRM_TRIGGERS | {"ahead", "please", "place", "raise", "it", "the", "po", "purchase", "order", "do", "now", "that"}
+CANCEL_TRIGGERS = {"cancel", "reset", "discard", "start"}
+CANCEL_WORDS = CANCEL_TRIGGERS | {"over", "the", "po", "it", "please", "everything", "purchase", "order", "this", "all"}
+
+PO_TYPES = {
+    "regular purchase": "regularPurchase",
+    "regular purchase po": "regularPurchase",
+    "regular po": "regularPurchase",
+    "regular": "regularPurchase",
+    "service": "service",
+    "service po": "service",
+}
+INDEPENDENT_PO = {"independent po", "independent", "independent purchase order"}
+
+# Entity fields resolved through the API: phrase -> (field_path, entity_type)
+ENTITY_FIELDS = (
+    (r"purchas(?:e|ing) org(?:ani[sz]ation)?|org(?:ani[sz]ation)?", "purchase_org_id", "org"),
+    (r"purchas(?:e|ing) group|group", "purchase_grp_id", "group"),
+    (r"supplier|vendor", "vendor_id", "supplier"),
+    (r"plant", "plant_id", "plant"),
+)
+DATE_FIELDS = (
+    (r"po date|purchase order date|order date", "po_date"),
+    (r"validity(?: end)?(?: date)?|valid (?:until|till|upto|up to)|validity end|expiry(?: date)?", "validityEnd"),
+    (r"delivery(?: date)?|deliver (?:by|on)", "delivery_date"),
+)
+# identify_missing_fields labels of the dates a bare "2025-12-30" can answer, in asking order
+MISSING_DATE_FIELDS = {"PO Date": "po_date", "validity end date": "validityEnd"}
+ITEM_FIELDS = (
+    (r"qty|quantity|units?", "quantity"),
+    (r"unit price|price|rate|cost", "price"),
+)
+
+_SET = r"(?:(?:please\s+)?(?:set|change|update|make|use)\s+)?(?:the\s+)?"
+_SEP = r"\s*(?:(?:to|is|as|of)\b|[=:])?\s*"
+_ITEM = r"(?:(?:for\s+)?(?:line\s*item|item|line)\s*#?\s*(?P<item{n}>\d+)\s*)?"
+_NUMBER = r"(?:rs\.?|₹|inr)?\s*(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?:rs|rupees?|inr|each|per unit|units?|nos?|pcs)?"
+_DATE = r"(?P<date>\d{4}-\d{2}-\d{2})"
+# Entity names: a few words, none of them structural
+_NAME = r"['\"]?(?P<name>(?!(?:for|item|line|with|from|to)\b)[\w.&/-]+(?:\s+(?!(?:for|item|line|with|from|to|and)\b)[\w.&/-]+){0,3})['\"]?"
+
+_ENTITY_RES = [(re.compile(rf"^{_SET}(?:{phrase}){_SEP}{_NAME}$", re.I), path, kind) for phrase, path, kind in ENTITY_FIELDS]
+_DATE_RES = [(re.compile(rf"^{_SET}(?:{phrase}){_SEP}{_DATE}$", re.I), path) for phrase, path in DATE_FIELDS]
+_ITEM_RES = [(re.compile(rf"^{_SET}{_ITEM.format(n=1)}(?:{phrase}){_SEP}{_ITEM.format(n=2)}{_SEP}{_NUMBER}\s*{_ITEM.format(n=3)}$", re.I), key)
+             for phrase, key in ITEM_FIELDS]
+_CURRENCY_RE = re.compile(rf"^{_SET}currency{_SEP}(?P<code>[a-z]{{3}})$", re.I)
+_MATERIAL_RE = re.compile(rf"^(?P<add>add\s+(?:a\s+)?(?:new\s+)?(?:line\s+item\s+)?)?(?:{_SET})?(?:material|item){_SEP}{_NAME}$", re.I)
+_BARE_DATE_RE = re.compile(rf"^{_DATE}$")
+_CLAUSE_SPLIT_RE = re.compile(r"\s*(?:,(?!\d)|;|\band\b|\balso\b)\s*", re.I)
+
+
+def _words(text):
+    return re.findall(r"[a-z]+", text.lower())
+
+
+def _valid_date(text):
+    try:
+        datetime.date.fromisoformat(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _number(text):
+    value = float(text.replace(",", ""))
+    return int(value) if value.is_integer() else value
+
+
+class RuleNLU:
+    def analyze(self, user_text, current_payload, missing_fields=()):
+        """
+        Return {"intents", "actions", "items_to_resolve", "confidence", "thought_process"} plus
+        "response_template" and "source": "rules".
+        confidence is 0.0 when no rule accounts for the whole utterance.
+        """
+        text = re.sub(r"\s+", " ", user_text or "").strip().rstrip(".!").strip()
+        result = {"intents": [], "actions": [], "items_to_resolve": [], "confidence": 0.0}
+        if not text:
+            return self._done(result, "empty input")
+
+        words = _words(text)
+        lowered = text.lower()
+        if words and set(words) <= CONFIRM_WORDS and set(words) & CONFIRM_TRIGGERS:
+            result["intents"] = ["CONFIRM_PO"]
+            # With fields missing, "yes" may mean "add what I mentioned earlier": leave that to the model
+            result["confidence"] = 0.95 if not missing_fields else 0.5
+            return self._done(result, "confirmation")
+        if words and set(words) <= CANCEL_WORDS and set(words) & CANCEL_TRIGGERS and (
+                "start" not in words or "over" in words):
+            result["intents"] = ["CANCEL_PO"]
+            result["confidence"] = 0.9
+            return self._done(result, "cancellation")
+        if lowered in INDEPENDENT_PO:
+            result["intents"] = ["SELECT_PO_TYPE"]
+            result["confidence"] = 0.9
+            return self._done(result, "PO category")
+        if lowered in PO_TYPES:
+            result["intents"] = ["UPDATE_PAYLOAD"]
+            result["actions"] = [{"operation": "UPDATE", "field_path": "po_type", "value": PO_TYPES[lowered]}]
+            result["confidence"] = 0.9
+            return self._done(result, "PO type")
+
+        # Field updates, possibly several: "qty 5, price 200"
+        items = current_payload.get("line_items") or []
+        confidence, rules = 1.0, []
+        for clause in _CLAUSE_SPLIT_RE.split(text):
+            if not clause:
+                continue
+            matched = self._clause(clause, items, missing_fields, result)
+            if matched is None:
+                result.update(intents=[], actions=[], items_to_resolve=[], confidence=0.0)
+                return self._done(result, f"no rule for '{clause}'")
+            rules.append(matched[0])
+            confidence = min(confidence, matched[1])
+        result["intents"] = ["UPDATE_PAYLOAD"]
+        result["confidence"] = confidence
+        return self._done(result, ", ".join(rules))
+
+    def _clause(self, clause, items, missing_fields, result):
+        """Apply one clause to result; returns (rule name, confidence) or None."""
+        actions, to_resolve = result["actions"], result["items_to_resolve"]
+
+        for regex, key in _ITEM_RES:
+            match = regex.match(clause)
+            if match:
+                explicit = match.group("item1") or match.group("item2") or match.group("item3")
+                if explicit:
+                    index, confidence = int(explicit) - 1, 0.95
+                    if index < 0 or index > len(items):
+                        return None
+                elif len(items) <= 1:
+                    index, confidence = 0, 0.9
+                else:
+                    # Several line items and none named
+                    index, confidence = len(items) - 1, 0.5
+                actions.append({"operation": "UPDATE", "field_path": f"line_items[{index}].{key}", "value": _number(match.group("number"))})
+                return key, confidence
+
+        for regex, path in _DATE_RES:
+            match = regex.match(clause)
+            if match and _valid_date(match.group("date")):
+                actions.append({"operation": "UPDATE", "field_path": path, "value": match.group("date")})
+                return path, 0.95
+
+        match = _BARE_DATE_RE.match(clause)
+        if match and _valid_date(match.group("date")):
+            # A bare date answers whichever date is still missing
+            missing = [MISSING_DATE_FIELDS[m] for m in missing_fields if m in MISSING_DATE_FIELDS]
+            path = missing[0] if missing else "po_date"
+            actions.append({"operation": "UPDATE", "field_path": path, "value": match.group("date")})
+            return path, 0.9 if len(missing) == 1 else 0.6
+
+        match = _CURRENCY_RE.match(clause)
+        if match:
+            actions.append({"operation": "UPDATE", "field_path": "currency", "value": match.group("code").upper()})
+            return "currency", 0.95
+
+        for regex, path, kind in _ENTITY_RES:
+            match = regex.match(clause)
+            if match:
+                name = match.group("name").strip()
+                actions.append({"operation": "UPDATE", "field_path": path, "value": name})
+                to_resolve.append({"entity_type": kind, "value": name})
+                return path, 0.9
+
+        match = _MATERIAL_RE.match(clause)
+        if match:
+            name = match.group("name").strip()
+            if match.group("add") or not items:
+                index, confidence = len(items), 0.9
+            elif not items[-1].get("material_id"):
+                index, confidence = len(items) - 1, 0.9
+            else:
+                # Replace the material or add a line? Ask the model
+                index, confidence = len(items), 0.5
+            actions.append({"operation": "UPDATE", "field_path": f"line_items[{index}].material_id", "value": name})
+            to_resolve.append({"entity_type": "material", "value": name})
+            return "material", confidence
+        return None
+
+    @staticmethod
+    def _done(result, rule):
+        result["source"] = "rules"
+        result["thought_process"] = f"Rule-based fast path: {rule}."
+        result["response_template"] = FAST_PATH_TEMPLATE
+        return result
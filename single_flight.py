@@ -0,0 +1,125 @@
+"""
+Single-flight coalescing of identical in-flight backend calls.
+
+When several sessions ask for the same thing at once (get_purchase_orgs(), get_plants for
+org 40, search_suppliers("tata")...) - typically right after a master-data cache entry
+expires - only the first caller (the leader) reaches SupplierX; callers arriving while it
+is in flight wait for it and get the same result (or exception). Nothing is cached: once
+the call returns, the next caller starts a new one.
+
+MockAPI and AsyncMockAPI route their idempotent _get / _post calls through the process-wide
+instance (get_single_flight), keyed by method, URL and payload. There is one in-flight
+entry per key, a concurrent.futures.Future: threads wait on it directly, asyncio tasks (on
+any event loop) through asyncio.wrap_future, so a sync session and an async one asking for
+the same thing share one backend call. An async leader runs the call in its own task, so
+cancelling one waiting task does not cancel it for the others.
+
+Results are shared between the callers and must be treated as read-only.
+Disable with SUPPLIERX_SINGLE_FLIGHT=off.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class _Call:
+    __slots__ = ("future", "loop", "task")
+
+    def __init__(self, loop=None):
+        self.future = Future()
+        # Running: a waiter that is cancelled (asyncio.wrap_future cancels its source) cannot cancel it
+        self.future.set_running_or_notify_cancel()
+        self.loop = loop  # Event loop of an async leader, None for a thread
+        self.task = None  # The async leader's task, referenced so it is not collected
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call, shared by threads and by tasks of any event loop
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    def _join(self, key, loop=None):
+        """(call, leader): the call in flight for key, or a new one that the caller must run."""
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call(loop)
+                self.executed += 1
+                return call, True
+            self.coalesced += 1
+            return call, False
+
+    def _finish(self, key, call, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            call.future.set_exception(error)
+        else:
+            call.future.set_result(result)
+
+    def do(self, key, fn):
+        """fn(), or the result of an identical call (same key) already in flight."""
+        call, leader = self._join(key)
+        if not leader:
+            if call.loop is not None and call.loop is _running_loop():
+                # Led by a task of the loop this thread is running: waiting would deadlock it
+                return fn()
+            return call.future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result)
+        return result
+
+    async def ado(self, key, coro_fn):
+        """asyncio variant of do(); coro_fn is a coroutine function."""
+        loop = asyncio.get_running_loop()
+        call, leader = self._join(key, loop)
+        if leader:
+            call.task = loop.create_task(coro_fn())
+            call.task.add_done_callback(lambda task: self._settle(key, call, task))
+        return await asyncio.wrap_future(call.future)
+
+    def _settle(self, key, call, task):
+        error = asyncio.CancelledError() if task.cancelled() else task.exception()
+        self._finish(key, call, None if error is not None else task.result(), error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "coalesced_rate": (self.coalesced / self.calls) if self.calls else 0.0,
+                "in_flight": len(self._calls),
+            }
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """Return the process-wide SingleFlight, or None if disabled via env."""
+    global _single_flight
+    if os.getenv("SUPPLIERX_SINGLE_FLIGHT", "on").lower() in ("off", "0", "false"):
+        return None
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
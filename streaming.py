@@ -0,0 +1,152 @@
+import json
+import re
+
+# Helpers for consuming model output while it is still being generated.
+
+
+class IncrementalJSONScanner:
+    """
+    Scans a streamed JSON object and reports each top-level field as soon as its
+    value is complete, e.g. "items_to_resolve" before "actions" has finished.
+    Any text before the first '{' (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self, on_field=None):
+        self.fields = {}
+        self.done = False
+        self._on_field = on_field
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._mode = "start"  # start | key | colon | value | scalar | after_value
+        self._key = None
+        self._token_start = None
+
+    def feed(self, chunk):
+        self._text += chunk
+        text = self._text
+        while self._pos < len(text) and not self.done:
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._close_top_level_string()
+            elif self._mode == "start":
+                if ch == "{":
+                    self._depth = 1
+                    self._mode = "key"
+            elif self._depth > 1:
+                # Inside a nested container value: only track nesting
+                if ch == '"':
+                    self._in_string = True
+                elif ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+                    if self._depth == 1:
+                        self._emit(text[self._token_start:self._pos + 1])
+            else:
+                self._step_top_level(ch)
+            self._pos += 1
+
+    def _step_top_level(self, ch):
+        if self._mode == "scalar" and ch in ",}":
+            self._emit(self._text[self._token_start:self._pos].strip())
+        if ch == '"':
+            self._in_string = True
+            self._token_start = self._pos
+        elif ch == ":" and self._mode == "colon":
+            self._mode = "value"
+        elif ch in "{[" and self._mode == "value":
+            self._token_start = self._pos
+            self._depth += 1
+        elif ch == ",":
+            self._mode = "key"
+        elif ch == "}":
+            self._depth = 0
+            self.done = True
+        elif self._mode == "value" and not ch.isspace():
+            self._token_start = self._pos
+            self._mode = "scalar"
+
+    def _close_top_level_string(self):
+        raw = self._text[self._token_start:self._pos + 1]
+        if self._mode == "key":
+            self._key = json.loads(raw)
+            self._mode = "colon"
+        elif self._mode == "value":
+            self._emit(raw)
+
+    def _emit(self, raw):
+        self._mode = "after_value"
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        self.fields[self._key] = value
+        if self._on_field:
+            self._on_field(self._key, value)
+
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JSONStringFieldStreamer:
+    """
+    Yields the decoded contents of one top-level string field (e.g. "response")
+    incrementally while the surrounding JSON object is still streaming.
+    """
+
+    def __init__(self, field):
+        self._pattern = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._text = ""
+        self._pos = None
+        self.found = False
+        self.done = False
+
+    def feed(self, chunk):
+        """Consume a chunk and return any newly decoded field text ("" if none)."""
+        self._text += chunk
+        if self._pos is None:
+            match = self._pattern.search(self._text)
+            if not match:
+                return ""
+            self._pos = match.end()
+            self.found = True
+
+        out = []
+        text = self._text
+        while self._pos < len(text) and not self.done:
+            ch = text[self._pos]
+            if ch == '"':
+                self.done = True
+                break
+            if ch != "\\":
+                out.append(ch)
+                self._pos += 1
+                continue
+            # Escape sequence: wait for the rest of it if it was split across chunks
+            if self._pos + 1 >= len(text):
+                break
+            code = text[self._pos + 1]
+            if code == "u":
+                if self._pos + 6 > len(text):
+                    break
+                length = 6
+                if 0xD800 <= int(text[self._pos + 2:self._pos + 6], 16) < 0xDC00:
+                    length = 12  # Surrogate pair: decode both halves together
+                    if self._pos + 12 > len(text):
+                        break
+                out.append(json.loads('"' + text[self._pos:self._pos + length] + '"'))
+                self._pos += length
+            else:
+                out.append(_ESCAPES.get(code, code))
+                self._pos += 2
+        return "".join(out)
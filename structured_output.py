@@ -0,0 +1,172 @@
+"""
+Structured output for model calls: Bedrock tool definitions and a tolerant JSON parser.
+
+With structured output on (BEDROCK_STRUCTURED_OUTPUT, default on) the analysis, PO-intent
+and response calls force a tool call whose input_schema matches the existing JSON format,
+so the result arrives as a parsed "tool_use" input instead of text to be scraped. Replies
+that still come back as text (models or stubs without tool support) go through
+parse_model_json, which also recovers the complete part of truncated or slightly
+malformed JSON instead of failing the turn.
+"""
+import json
+import re
+
+ENTITY_TYPES = ["supplier", "material", "plant", "org", "group", "project", "payment_term", "incoterm"]
+
+PO_TYPES = [
+    "regularPurchase", "service", "asset", "internalOrderMaterial", "internalOrderService", "network",
+    "networkService", "costCenterMaterial", "costCenterService", "projectService", "projectMaterial",
+    "stockTransferInter", "stockTransferIntra",
+]
+
+_ACTION = {
+    "type": "object",
+    "properties": {
+        "operation": {"type": "string", "enum": ["ADD", "UPDATE", "REMOVE"]},
+        "field_path": {"type": "string", "description": "payload key, e.g. vendor_id or line_items[0].quantity"},
+        "value": {"description": "extracted value (raw text for entities that still need resolving)"},
+    },
+    "required": ["operation", "field_path"],
+}
+
+# Property order follows the streaming order: intents, items_to_resolve, actions
+_ANALYSIS_PROPERTIES = {
+    "intents": {"type": "array", "items": {"type": "string"}},
+    "items_to_resolve": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"entity_type": {"type": "string", "enum": ENTITY_TYPES}, "value": {"type": "string"}},
+            "required": ["entity_type", "value"],
+        },
+    },
+    "actions": {"type": "array", "items": _ACTION},
+    "thought_process": {"type": "string"},
+}
+
+ANALYSIS_TOOL = {
+    "name": "record_analysis",
+    "description": "Record the intents, entities to resolve and payload actions for the latest user input.",
+    "input_schema": {"type": "object", "properties": _ANALYSIS_PROPERTIES, "required": ["intents", "items_to_resolve", "actions"]},
+}
+
+FUSED_ANALYSIS_TOOL = {
+    "name": "record_analysis",
+    "description": ANALYSIS_TOOL["description"] + " Include the response template.",
+    "input_schema": {
+        "type": "object",
+        "properties": dict(_ANALYSIS_PROPERTIES, response_template={"type": "string"}),
+        "required": ["intents", "items_to_resolve", "actions", "response_template"],
+    },
+}
+
+PO_INTENT_TOOL = {
+    "name": "record_po_intent",
+    "description": "Record every purchase order field mentioned in the message. Omit fields that are not mentioned.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "po_type": {"type": "string", "enum": PO_TYPES},
+            "material_name": {"type": "string"},
+            "quantity": {"type": "number"},
+            "supplier_name": {"type": "string"},
+            "price": {"type": "number"},
+            "po_date": {"type": "string", "description": "YYYY-MM-DD"},
+            "validity_end": {"type": "string", "description": "YYYY-MM-DD"},
+            "purchase_org": {"type": "string"},
+            "plant": {"type": "string"},
+            "purchase_group": {"type": "string"},
+            "delivery_date": {"type": "string"},
+            "tax_code": {"type": "string"},
+        },
+    },
+}
+
+RESPONSE_TOOL = {
+    "name": "record_response",
+    "description": "Record the reply shown to the user.",
+    "input_schema": {"type": "object", "properties": {"response": {"type": "string"}}, "required": ["response"]},
+}
+
+
+def tool_request_fields(tool):
+    """Request body fields that force the model to answer through tool."""
+    return {"tools": [tool], "tool_choice": {"type": "tool", "name": tool["name"]}}
+
+
+def _closers(text):
+    """Brackets (and a quote) needed to close text, or None if it is not a JSON prefix."""
+    stack, in_string, escape = [], False, False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if not stack or stack.pop() != ch:
+                return None
+    return ('"' if in_string else "") + "".join(reversed(stack))
+
+
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+# Top-level string fields whose cut-off text is still worth showing
+FREE_TEXT_FIELDS = ("response", "response_template", "thought_process")
+
+_OPEN_TEXT_FIELD_RE = re.compile(r'"(\w+)"\s*:\s*"(?:[^"\\]|\\.)*$')
+
+
+def parse_model_json(text, max_attempts=200):
+    """
+    Parse the JSON object in a model reply. Returns (result, status) with status "ok",
+    "repaired" (trailing commas fixed, or a truncated object cut back to its last complete
+    value) or "failed" (result is None).
+    """
+    if "```" in text:
+        fenced = text.split("```json" if "```json" in text else "```", 1)[1]
+        text = fenced.split("```", 1)[0]
+    start = text.find("{")
+    if start < 0:
+        return None, "failed"
+    text = text[start:]
+    end = text.rfind("}")
+    if end >= 0:
+        try:
+            return json.loads(text[:end + 1]), "ok"
+        except ValueError:
+            pass
+        try:
+            return json.loads(_TRAILING_COMMA_RE.sub(r"\1", text[:end + 1])), "repaired"
+        except ValueError:
+            pass
+
+    # Truncated (e.g. max_tokens): a cut-off free-text field is kept as far as it got;
+    # anything else is cut back to the last complete value. Half-written objects inside
+    # arrays (an action without its value) are dropped rather than guessed at.
+    closers = _closers(text)
+    match = _OPEN_TEXT_FIELD_RE.search(text)
+    if closers == '"}' and match and match.group(1) in FREE_TEXT_FIELDS:
+        try:
+            return json.loads(_TRAILING_COMMA_RE.sub(r"\1", text + closers)), "repaired"
+        except ValueError:
+            pass
+    cuts = [i for i, ch in enumerate(text) if ch in ",}]"]
+    for cut in reversed(cuts[-max_attempts:]):
+        prefix = text[:cut] if text[cut] == "," else text[:cut + 1]
+        closers = _closers(prefix)
+        if closers is None or closers.startswith('"') or (text[cut] == "," and closers.startswith("}]")):
+            continue
+        try:
+            result = json.loads(_TRAILING_COMMA_RE.sub(r"\1", prefix + closers))
+        except ValueError:
+            continue
+        if isinstance(result, dict):
+            return result, "repaired"
+    return None, "failed"
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import time
+import unittest
+
+import httpx
+
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY", "test")
+os.environ.setdefault("AWS_SECRET_KEY", "test")
+
+from async_agent import AsyncPOAgent  # noqa: E402
+from async_bedrock_service import AsyncBedrockService  # noqa: E402
+from async_mock_api import AsyncMockAPI  # noqa: E402
+import tracing  # noqa: E402
+from bedrock_service import BedrockService  # noqa: E402
+from model_backends import SyntheticClient  # noqa: E402
+
+CATALOG = {
+    "/api/v1/supplier/supplier/sapRegisteredVendorsList": {"data": [{"id": "v-1", "supplier_name": "Smartsaa"}]},
+    "/api/v1/supplier/purchaseOrg/listing": {"data": {"rows": [{"id": 40, "description": "Ashapura"}]}},
+    "/api/v1/admin/plants/list": {"data": {"rows": [{"id": "p-1", "plantName": "Ail Dhaneti"}]}},
+    "/api/v1/admin/purchaseGroup/list": {"data": {"rows": [{"id": 365, "name": "CPT"}]}},
+}
+
+ANALYSIS = {
+    "intents": ["UPDATE_PAYLOAD"],
+    "actions": [
+        {"operation": "UPDATE", "field_path": "vendor_id", "value": "Smartsaa"},
+        {"operation": "UPDATE", "field_path": "purchase_org_id", "value": "Ashapura"},
+        {"operation": "UPDATE", "field_path": "plant_id", "value": "Ail Dhaneti"},
+        {"operation": "UPDATE", "field_path": "purchase_grp_id", "value": "CPT"},
+    ],
+    "items_to_resolve": [
+        {"entity_type": "supplier", "value": "Smartsaa"},
+        {"entity_type": "org", "value": "Ashapura"},
+        {"entity_type": "plant", "value": "Ail Dhaneti"},
+        {"entity_type": "group", "value": "CPT"},
+    ],
+}
+
+
+class TestAsyncPOAgent(unittest.TestCase):
+    def test_turn_matches_sync_semantics(self):
+        seen = {"api": [], "model": []}
+
+        async def api_handler(request):
+            seen["api"].append((request.url.path, json.loads(request.content or b"{}")))
+            return httpx.Response(200, json=CATALOG.get(request.url.path, {"data": []}))
+
+        async def model_handler(request):
+            body = json.loads(request.content)
+            seen["model"].append(body)
+            self.assertIn("Authorization", request.headers)  # SigV4 signed
+            if body["messages"][0]["content"].startswith("Current Context:"):
+                text = json.dumps(ANALYSIS)
+            else:
+                text = json.dumps({"response": "Header set."})
+            return httpx.Response(200, json={"content": [{"type": "text", "text": text}]})
+
+        async def run():
+            api = AsyncMockAPI(client=httpx.AsyncClient(transport=httpx.MockTransport(api_handler)),
+                               base_url="http://supplierx.test", cache=False)
+            # No response cache: every conversation should reach the model
+            nlu = AsyncBedrockService(service=BedrockService(cache=False),
+                                      http_client=httpx.AsyncClient(transport=httpx.MockTransport(model_handler)))
+            agent = AsyncPOAgent(fused_turn=False, api=api, nlu=nlu)
+            states = [agent.get_initial_state() for _ in range(3)]
+            responses = await asyncio.gather(*(agent.process_input("one shot", s) for s in states))
+            await api.aclose()
+            await nlu.aclose()
+            return responses, states
+
+        responses, states = asyncio.run(run())
+
+        self.assertEqual(responses, ["Header set."] * 3)
+        for state in states:
+            payload = state["payload"]
+            self.assertEqual(payload["vendor_id"], "v-1")
+            self.assertEqual(payload["purchase_org_id"], 40)
+            self.assertEqual(payload["plant_id"], "p-1")
+            self.assertEqual(payload["purchase_grp_id"], 365)
+        # Plant/group lookups are filtered by the org resolved first
+        self.assertIn(("/api/v1/admin/plants/list", {"dropdown": "0", "purchase_org_id": [40]}), seen["api"])
+        self.assertEqual(seen["model"][0]["anthropic_version"], "bedrock-2023-05-31")
+        self.assertEqual(len(seen["model"]), 6)
+
+    def test_synthetic_backend_is_traced(self):
+        client = SyntheticClient(lambda request: json.dumps({"response": "Hi."}), base_ms=20, token_ms=0)
+
+        async def run():
+            nlu = AsyncBedrockService(service=BedrockService(client=client, cache=False), backend="synthetic")
+            agent = AsyncPOAgent(fused_turn=False, api=AsyncMockAPI(base_url="http://supplierx.test", cache=False), nlu=nlu)
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(agent.process_input("hello there", agent.get_initial_state()) for _ in range(10)))
+            return responses, time.perf_counter() - started, agent.last_trace
+
+        tracing.configure(enabled=True)
+        try:
+            responses, elapsed, trace = asyncio.run(run())
+        finally:
+            tracing.configure()
+
+        self.assertEqual(responses, ["Hi."] * 10)
+        self.assertEqual(client.calls, 20)
+        self.assertLess(elapsed, 0.3)  # latency is awaited, not slept on a thread per call
+        names = [s["name"] for s in trace.waterfall()]
+        self.assertEqual(names.count("llm"), 2)
+        self.assertIn("analyze.model", names)
+
+    def test_stream_turn(self):
+        def responder(request):
+            if request["messages"][0]["content"].startswith("Current Context:"):
+                return json.dumps(ANALYSIS)
+            return json.dumps({"response": "Header set, what is the material?"})
+
+        async def api_handler(request):
+            return httpx.Response(200, json=CATALOG.get(request.url.path, {"data": []}))
+
+        async def run():
+            api = AsyncMockAPI(client=httpx.AsyncClient(transport=httpx.MockTransport(api_handler)),
+                               base_url="http://supplierx.test", cache=False)
+            nlu = AsyncBedrockService(service=BedrockService(client=SyntheticClient(responder, base_ms=0, token_ms=0), cache=False))
+            agent = AsyncPOAgent(fused_turn=False, api=api, nlu=nlu)
+            state = agent.get_initial_state()
+            chunks = [chunk async for chunk in agent.process_input_stream("one shot", state)]
+            await api.aclose()
+            return chunks, state, agent.last_trace
+
+        tracing.configure(enabled=True)
+        try:
+            chunks, state, trace = asyncio.run(run())
+        finally:
+            tracing.configure()
+
+        spans = trace.waterfall()
+        self.assertEqual(spans[0]["attributes"]["stream"], True)
+        names = [s["name"] for s in spans]
+        for name in ("turn", "analyze.model", "resolve", "respond"):
+            self.assertIn(name, names)
+        self.assertEqual(names.count("lookup"), 4)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), "Header set, what is the material?")
+        self.assertEqual(state["payload"]["purchase_org_id"], 40)
+        self.assertEqual(state["payload"]["plant_id"], "p-1")
+        self.assertEqual(state["conversation_history"][-1]["content"], "".join(chunks))
+
+
+if __name__ == "__main__":
+    unittest.main()
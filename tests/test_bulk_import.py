@@ -0,0 +1,64 @@
+import io
+import unittest
+
+from bulk_import import BulkImporter, group_rows, load_rows, normalize_column
+from fake_supplierx import FakeSupplierX, SyntheticCatalog, in_process_transport
+from mock_api import MockAPI, MATERIALS_ENDPOINT, PLANTS_ENDPOINT, SUPPLIERS_ENDPOINT
+
+HEADER = {"supplier": "Smartsaa", "purchase_org": "Ashapura", "plant": "Ail Dhaneti", "purchase_group": "CPT",
+          "po_date": "2025-12-29", "validity_end": "2025-12-31"}
+
+
+class TestBulkImport(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeSupplierX(SyntheticCatalog(materials=200, suppliers=100))
+        api = MockAPI(transport=in_process_transport(self.fake), base_url="http://fake", cache=False, catalog=False)
+        self.importer = BulkImporter(api=api, concurrency=4)
+
+    def test_columns_and_grouping(self):
+        self.assertEqual([normalize_column(c) for c in ("Vendor", "Purchase Org", "Qty", "PO No")],
+                         ["supplier", "purchase_org", "quantity", "po_ref"])
+        rows = [dict(HEADER, material="Scooty"), dict(HEADER, material="Scooty"), dict(HEADER, plant="Other", material="Scooty")]
+        self.assertEqual([len(po.rows) for po in group_rows(rows)], [2, 1])
+        rows = [{"po_ref": 1, "supplier": "Smartsaa"}, {"po_ref": 2}, {"po_ref": 1}]
+        self.assertEqual([(po.ref, len(po.rows)) for po in group_rows(rows)], [(1, 2), (2, 1)])
+
+    def test_lookups_are_batched_and_rows_reported(self):
+        rows = [dict(HEADER, po_ref=f"PO{i % 5}", material="Scooty", quantity=i + 1) for i in range(20)]
+        rows.append(dict(HEADER, po_ref="BAD", material="No Such Thing", quantity=1))
+        report = self.importer.run(rows)
+
+        self.assertEqual((report.created, report.failed), (5, 1))
+        self.assertEqual(self.fake.calls[SUPPLIERS_ENDPOINT], 1)
+        self.assertEqual(self.fake.calls[PLANTS_ENDPOINT], 1)
+        self.assertEqual(self.fake.calls[MATERIALS_ENDPOINT], 2)
+        results = report.rows()
+        self.assertEqual([r["row"] for r in results], list(range(1, 22)))
+        self.assertEqual(results[0]["status"], "created")
+        self.assertEqual(results[0]["po_number"], results[5]["po_number"])
+        self.assertEqual((results[-1]["status"], results[-1]["message"]), ("invalid", "Could not find material 'No Such Thing'"))
+
+        form = self.fake.created[0]
+        self.assertEqual((form["po_type"], form["purchase_grp_id"], form["line_items[0].price"]), ("regularPurchase", "365", "50000"))
+        self.assertEqual(len([k for k in form if k.endswith(".material_id")]), 4)
+
+    def test_missing_fields_and_bad_numbers_are_not_submitted(self):
+        rows = [{"supplier": "Smartsaa", "material": "Scooty", "quantity": "two"}, {"supplier": "Smartsaa", "material": "Scooty", "quantity": 1, "price": 5}]
+        report = self.importer.run(rows)
+        self.assertEqual(report.created, 0)
+        self.assertIn("Row 1: invalid quantity 'two'", report.rows()[0]["message"])
+        self.assertFalse(self.fake.created)
+
+    def test_load_csv(self):
+        sheet = io.StringIO("PO No,Vendor,Org,Plant,Group,Date,Validity End,Material,Qty,Price\n"
+                            "7,Smartsaa,Ashapura,Ail Dhaneti,CPT,2025-12-29,2025-12-31,Scooty,2,\n"
+                            ",,,,,,,,,\n")
+        rows = load_rows(sheet, "orders.csv")
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]["row"], rows[0]["supplier"], rows[0]["quantity"], rows[0]["price"]), (2, "Smartsaa", "2", None))
+        self.assertEqual(load_rows(io.BytesIO(sheet.getvalue().encode("utf-8-sig")), "orders.csv"), rows)
+        self.assertEqual(self.importer.run(rows).created, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import time
+import unittest
+
+from catalog_index import CatalogIndex, LocalCatalog
+from fake_supplierx import FakeSupplierX, SyntheticCatalog, in_process_transport
+from mock_api import MockAPI, MATERIALS_ENDPOINT, SUPPLIERS_ENDPOINT
+
+
+class TestCatalogIndex(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeSupplierX(SyntheticCatalog(materials=5000, suppliers=2000))
+        transport = in_process_transport(self.fake)
+        loader_api = MockAPI(transport=transport, base_url="http://fake", cache=False, catalog=False)
+        self.catalog = LocalCatalog(loader_api)
+        self.catalog.load()
+        self.fake.reset_stats()
+        self.api = MockAPI(transport=transport, base_url="http://fake", cache=False, catalog=self.catalog)
+
+    def test_searches_are_served_locally(self):
+        self.assertEqual(self.api.get_materials(query="Scooty")[0]["id"], 95942)
+        self.assertEqual(self.api.search_suppliers("smartsaa")[0]["name"], "Smartsaa")
+        self.assertEqual(len(self.api.get_materials()), 5000)
+        self.assertEqual(self.fake.calls[MATERIALS_ENDPOINT] + self.fake.calls[SUPPLIERS_ENDPOINT], 0)
+
+    def test_prefix_and_query_speed(self):
+        self.assertEqual(self.catalog.materials.prefix("scoo")[0]["name"], "Scooty")
+        self.assertEqual(self.catalog.suppliers.prefix("smar")[0]["name"], "Smartsaa")
+        start = time.perf_counter()
+        for _ in range(100):
+            self.catalog.materials.search("Scooty")
+        self.assertLess((time.perf_counter() - start) / 100, 0.005)
+
+    def test_stale_index_falls_back_to_remote(self):
+        self.catalog.materials.max_staleness = 0
+        self.catalog.materials.refresh_interval = 3600  # keep the test free of background refreshes
+        time.sleep(0.001)
+        self.assertEqual(self.api.get_materials(query="Scooty")[0]["id"], 95942)
+        self.assertEqual(self.fake.calls[MATERIALS_ENDPOINT], 1)
+
+    def test_local_miss_falls_back_to_remote(self):
+        self.assertEqual(self.api.search_suppliers("no such vendor anywhere"), [])
+        self.assertEqual(self.fake.calls[SUPPLIERS_ENDPOINT], 1)
+
+    def test_incremental_refresh(self):
+        records = [{"id": i, "name": f"Item {i}"} for i in range(100)]
+        index = CatalogIndex("items", lambda: list(records), refresh_interval=3600, max_staleness=3600)
+        self.assertEqual(index.load(), 100)
+        self.assertEqual(index.load(), 0)
+
+        records[5] = {"id": 5, "name": "Renamed Widget"}
+        del records[7]
+        records.append({"id": 500, "name": "Brand New Gadget"})
+        self.assertEqual(index.load(), 3)
+        self.assertEqual(index.search("renamed widget")[0]["id"], 5)
+        self.assertEqual(index.prefix("brand new ga")[0]["id"], 500)
+        self.assertNotIn(7, [r["id"] for r in index.search("item 7")])
+        self.assertEqual(len(index.all()), 100)
+
+    def test_missing_index_starts_background_load(self):
+        index = CatalogIndex("items", lambda: [{"id": 1, "name": "Bolt"}], refresh_interval=3600, max_staleness=3600)
+        self.assertIsNone(index.search("bolt"))
+        for _ in range(100):
+            if index.loaded_at is not None:
+                break
+            time.sleep(0.01)
+        self.assertEqual(index.search("bolt")[0]["id"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
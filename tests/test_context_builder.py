@@ -0,0 +1,88 @@
+import json
+import unittest
+
+from context_builder import ContextBuilder
+from model_backends import estimate_tokens
+
+
+def parse(message):
+    header, body = message.split("\n", 1)
+    assert header == "Current Context:"
+    assert "\n" not in body
+    return json.loads(body)
+
+
+def payload(items=0):
+    return {
+        "po_type": "regularPurchase",
+        "vendor_id": "a888ee02-b479-45ba-899b-40daba67d7d7",
+        "currency": "INR",
+        "remarks": "",
+        "projects": [],
+        "line_items": [{"material_id": 95942 + i, "short_text": f"Steel pipe grade {i}", "quantity": i + 1,
+                        "price": 100.5, "unit_id": 208, "remarks": ""} for i in range(items)],
+    }
+
+
+def history(turns):
+    entries = []
+    for i in range(turns):
+        entries.append({"role": "user", "content": f"Add supplier Vendor{i} and material item{i}"})
+        entries.append({"role": "assistant", "content": "I've updated the purchase order. " * 40})
+    return entries
+
+
+class TestContextBuilder(unittest.TestCase):
+    def test_small_context_is_complete_and_minified(self):
+        context = parse(ContextBuilder(max_tokens=2500).build("Add 5 Scooty", payload(2), history(2)))
+        self.assertEqual(context["latest_user_input"], "Add 5 Scooty")
+        self.assertEqual(len(context["current_payload"]["line_items"]), 2)
+        self.assertNotIn("remarks", context["current_payload"])
+        self.assertNotIn("remarks", context["current_payload"]["line_items"][0])
+        self.assertEqual(len(context["conversation_history"]), 4)
+        self.assertNotIn("payload_changes", context)
+
+    def test_payload_changes_since_last_turn(self):
+        builder = ContextBuilder(max_tokens=2500)
+        state = {}
+        current = payload(2)
+        builder.build("first", current, [], state)
+        current["plant_id"] = "25b8ef1f"
+        current["line_items"][1]["quantity"] = 9
+        current["line_items"].append({"material_id": 1, "quantity": 1})
+        del current["vendor_id"]
+        context = parse(builder.build("second", current, [], state))
+        self.assertEqual(context["payload_changes"], {
+            "fields": {"plant_id": "25b8ef1f", "vendor_id": None},
+            "line_items": [1, 2],
+        })
+        self.assertNotIn("payload_changes", parse(builder.build("third", current, [], state)))
+
+    def test_long_conversations_and_large_pos_stay_within_budget(self):
+        builder = ContextBuilder(max_tokens=2500)
+        state = {}
+        current = payload(500)
+        builder.build("turn", current, [], state)
+        current["line_items"][250]["price"] = 99
+        message = builder.build("Change item 251 price to 99", current, history(50), state)
+        self.assertLessEqual(estimate_tokens(message), 2500 * 1.05)
+
+        context = parse(message)
+        shown = context["current_payload"]["line_items"]
+        self.assertEqual(context["current_payload"]["line_items_total"], 500)
+        self.assertEqual(context["current_payload"]["line_items_omitted"], 500 - len(shown))
+        self.assertIn(250, [item["index"] for item in shown])
+        self.assertIn(499, [item["index"] for item in shown])
+        # Verbose replies are clipped; older user requests survive in the summary
+        self.assertTrue(all(len(e["content"]) <= 400 for e in context["conversation_history"]))
+        self.assertIn("Add supplier Vendor44 and material item44", context["earlier_conversation"]["user_requests"])
+
+    def test_context_size_is_bounded_in_conversation_length(self):
+        builder = ContextBuilder(max_tokens=2500)
+        sizes = [estimate_tokens(builder.build("next", payload(300), history(turns))) for turns in (50, 200, 1000)]
+        self.assertLessEqual(max(sizes), 2500 * 1.05)
+        self.assertLess(max(sizes) - min(sizes), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from agent_logic import POAgent
+from conversation_store import ConversationConflict, ConversationStore, SQLiteConversationStore
+
+
+class TestConversationStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "conversations.db")
+        self.state = POAgent(api=object(), nlu=object()).get_initial_state()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def turn(self, i):
+        payload = self.state["payload"]
+        payload["vendor_id"] = f"v-{i % 2}"
+        payload["line_items"].append({"material_id": 100 + i, "quantity": i + 1, "price": 10.0})
+        if i:
+            payload["line_items"][0]["quantity"] = i * 10
+        self.state["conversation_history"] += [{"role": "user", "content": f"turn {i}"}, {"role": "assistant", "content": "ok"}]
+        self.state["last_analysis"] = {"intents": ["UPDATE"], "turn": i}
+
+    def assertSameState(self, loaded):
+        self.assertEqual(loaded["payload"].to_dict(), self.state["payload"].to_dict())
+        for field in ("current_step", "conversation_history", "last_analysis"):
+            self.assertEqual(loaded[field], self.state[field])
+
+    def test_deltas_resume_in_another_process(self):
+        store = SQLiteConversationStore(self.path, snapshot_every=3)
+        for i in range(7):
+            self.turn(i)
+            store.save("c1", self.state)
+        store.save("c1", self.state)  # Unchanged: nothing written
+        self.assertEqual((store.stats["snapshots"], store.stats["deltas"]), (2, 5))
+
+        other = SQLiteConversationStore(self.path)
+        self.assertIsNone(other.load("missing"))
+        self.assertSameState(other.load("c1"))
+        # Rows before the latest snapshot are compacted away
+        self.assertEqual([kind for _, kind, _ in other._read("c1")], ["snapshot", "delta", "delta"])
+
+        # A delta only carries what changed
+        del self.state["payload"]["vendor_id"]
+        self.state["conversation_history"] = self.state["conversation_history"][-2:]
+        store.save("c1", self.state)
+        seq, kind, data = other._read("c1")[-1]
+        self.assertEqual(kind, "delta")
+        self.assertEqual(set(json.loads(data)), {"unset", "history"})
+        self.assertSameState(SQLiteConversationStore(self.path).load("c1"))
+
+    def test_stale_save_raises_and_overwrites_nothing(self):
+        first, second = SQLiteConversationStore(self.path), SQLiteConversationStore(self.path)
+        self.turn(0)
+        first.save("c1", self.state)
+        self.assertTrue(first.is_current("c1", self.state))
+        resumed = second.load("c1")
+        resumed["payload"]["remarks"] = "from replica 2"
+        second.save("c1", resumed)
+        self.assertFalse(first.is_current("c1", self.state))
+
+        self.turn(1)  # Replica 1 still has its old baseline
+        with self.assertRaises(ConversationConflict):
+            first.save("c1", self.state)
+        self.assertEqual(first.stats["conflicts"], 1)
+        self.assertEqual(SQLiteConversationStore(self.path).load("c1")["payload"]["remarks"], "from replica 2")
+
+        # The caller reloads and reapplies its turn on top of the other replica's
+        self.state = first.load("c1")
+        self.turn(1)
+        first.save("c1", self.state)
+        loaded = SQLiteConversationStore(self.path).load("c1")
+        self.assertSameState(loaded)
+        self.assertEqual(loaded["payload"]["remarks"], "from replica 2")
+
+    def test_stale_delta_after_other_replica_snapshot(self):
+        first, second = SQLiteConversationStore(self.path), SQLiteConversationStore(self.path, snapshot_every=1)
+        for i in range(2):
+            self.turn(i)
+            first.save("c1", self.state)
+        resumed = second.load("c1")
+        for remarks in ("a", "b", "c"):  # snapshot, delta, snapshot: the rows replica 1 built on are gone
+            resumed["payload"]["remarks"] = remarks
+            second.save("c1", resumed)
+        self.assertEqual(second.stats["snapshots"], 2)
+
+        self.turn(2)  # Replica 1's baseline is two compactions old
+        with self.assertRaises(ConversationConflict):
+            first.save("c1", self.state)
+        self.assertEqual(SQLiteConversationStore(self.path).load("c1")["payload"]["remarks"], "c")
+        # The baseline was dropped, so retrying without reloading still conflicts
+        with self.assertRaises(ConversationConflict):
+            first.save("c1", self.state)
+
+    def test_second_copy_in_one_process_cannot_overwrite(self):
+        store = SQLiteConversationStore(self.path)
+        self.turn(0)
+        store.save("c1", self.state)
+        tab_a, tab_b = store.load("c1"), store.load("c1")
+        tab_a["payload"]["remarks"] = "tab a"
+        store.save("c1", tab_a)
+        self.assertFalse(store.is_current("c1", tab_b))
+        tab_b["payload"]["remarks"] = "tab b"
+        with self.assertRaises(ConversationConflict):
+            store.save("c1", tab_b)
+        self.assertEqual(store.load("c1")["payload"]["remarks"], "tab a")
+
+    def test_backend_must_implement_hooks(self):
+        class Incomplete(ConversationStore):
+            def _read(self, conversation_id):
+                return []
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+if __name__ == "__main__":
+    unittest.main()
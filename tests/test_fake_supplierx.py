@@ -0,0 +1,94 @@
+import asyncio
+import time
+import unittest
+
+from async_mock_api import AsyncMockAPI
+from fake_supplierx import (
+    FakeSupplierX, FaultProfile, SyntheticCatalog, httpx_transport, in_process_transport, serve,
+)
+from http_transport import TransportConfig
+from mock_api import MockAPI, MATERIALS_ENDPOINT
+
+PO_PAYLOAD = {
+    "po_type": "Regular Purchase", "vendor_id": "a888ee02-b479-45ba-899b-40daba67d7d7",
+    "purchase_org_id": 40, "plant_id": "p-1", "purchase_grp_id": 365,
+    "line_items": [{"material_id": 95942, "quantity": 5, "price": 50000}],
+}
+
+
+class TestFakeSupplierX(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeSupplierX(SyntheticCatalog(materials=2000, suppliers=1000))
+        self.api = MockAPI(transport=in_process_transport(self.fake), base_url="http://fake", cache=False)
+
+    def test_catalog_is_deterministic_and_sized(self):
+        a, b = SyntheticCatalog(materials=500, seed=7), SyntheticCatalog(materials=500, seed=7)
+        self.assertEqual(a.search_materials(limit=500), b.search_materials(limit=500))
+        self.assertEqual(len(a.search_materials()), 500)
+
+    def test_fixtures_resolve_through_mock_api(self):
+        self.assertEqual(self.api.search_suppliers("Smartsaa")[0]["name"], "Smartsaa")
+        self.assertIn("Ashapura", [o["name"] for o in self.api.get_purchase_orgs()])
+        self.assertIn("Ail Dhaneti", [p["name"] for p in self.api.get_plants(org_ids=[40])])
+        self.assertIn("365", [str(g["id"]) for g in self.api.get_purchase_groups(org_ids=[40])])
+        scooty = self.api.get_materials(query="scooty")
+        self.assertEqual(scooty[0]["id"], 95942)
+        self.assertEqual(len(self.api.get_materials()), 2000)
+
+    def test_every_listing_endpoint_returns_rows(self):
+        for method in ("get_currencies", "get_payment_terms", "get_incoterms", "get_projects", "get_tax_codes", "get_services"):
+            self.assertTrue(getattr(self.api, method)(), method)
+        self.assertTrue(self.api.get_alternate_supplier_details("a888ee02-b479-45ba-899b-40daba67d7d7"))
+
+    def test_create_po_parses_multipart(self):
+        result = self.api.create_po(PO_PAYLOAD)
+        self.assertTrue(result["success"])
+        self.assertEqual(self.fake.created[0]["line_items[0].material_id"], "95942")
+
+        result = self.api.create_po({"po_type": "Regular Purchase", "line_items": []})
+        self.assertFalse(result["success"])
+
+    def test_error_injection_is_retried(self):
+        self.fake.faults = FaultProfile(error_rate=1.0, per_endpoint={MATERIALS_ENDPOINT: {"error_rate": 0.0}})
+        config = TransportConfig(max_retries=2, backoff_factor=0)
+        api = MockAPI(transport=in_process_transport(self.fake, config), base_url="http://fake", cache=False)
+        self.assertEqual(api.get_purchase_orgs(), [])
+        self.assertEqual(self.fake.calls["/api/v1/supplier/purchaseOrg/listing"], 3)
+        self.assertTrue(api.get_materials(query="scooty"))
+
+    def test_latency_injection(self):
+        self.fake.faults = FaultProfile(latency_ms=30)
+        start = time.perf_counter()
+        self.api.get_currencies()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.03)
+
+    def test_http_server_mode(self):
+        server = serve(self.fake)
+        try:
+            api = MockAPI(base_url=server.base_url, cache=False)
+            self.assertEqual(api.search_suppliers("Smartsaa")[0]["name"], "Smartsaa")
+            self.assertTrue(api.create_po(PO_PAYLOAD)["success"])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_httpx_transport(self):
+        import httpx
+
+        async def run():
+            client = httpx.AsyncClient(transport=httpx_transport(self.fake))
+            api = AsyncMockAPI(client=client, base_url="http://fake", cache=False)
+            try:
+                orgs = await api.get_purchase_orgs()
+                result = await api.create_po(PO_PAYLOAD)
+            finally:
+                await api.aclose()
+            return orgs, result
+
+        orgs, result = asyncio.run(run())
+        self.assertIn("Ashapura", [o["name"] for o in orgs])
+        self.assertTrue(result["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from agent_logic import POAgent
+from field_paths import compile_field_path
+
+SCOOTY = {"found": True, "id": 95942, "details": {"id": 95942, "name": "Scooty", "price": 50, "material_group_id": 520, "unit_id": 208}}
+
+
+class TestFieldPaths(unittest.TestCase):
+    def test_aliases_and_steps(self):
+        self.assertEqual(compile_field_path("supplier").path, "vendor_id")
+        field = compile_field_path("line_items[3].material")
+        self.assertEqual((field.path, field.steps, field.key, field.item_index), ("line_items[3].material_id", (("line_items", 3),), "material_id", 3))
+        self.assertIs(compile_field_path("line_items[3].material"), field)
+
+    def test_set_creates_containers_and_coerces(self):
+        payload = {}
+        field = compile_field_path("line_items[1].plant_id")
+        self.assertTrue(field.set(payload, field.coerce("1001")))
+        self.assertEqual(payload, {"line_items": [{}, {"plant_id": 1001}]})
+        self.assertIs(compile_field_path("is_pr_based").coerce("False"), False)
+        self.assertFalse(compile_field_path("line_items[0]").set(payload, {}))
+
+    def test_malformed_index_is_rejected(self):
+        with self.assertRaises(ValueError):
+            compile_field_path("line_items[first].quantity")
+        with self.assertRaises(ValueError):
+            compile_field_path(None)
+
+
+class TestApplyActions(unittest.TestCase):
+    def setUp(self):
+        # Action application is pure; skip client construction
+        self.agent = POAgent.__new__(POAgent)
+        self.payload = {"line_items": []}
+
+    def test_batch(self):
+        actions = [
+            {"operation": "UPDATE", "field_path": "org", "value": "40"},
+            {"operation": "ADD", "field_path": "line_items", "value": {"quantity": 2}},
+            {"operation": "UPDATE", "field_path": "line_items[0].material", "value": "Scooty"},
+            {"operation": "UPDATE", "field_path": "line_items[x].price", "value": 10},
+            {"operation": "UPDATE", "field_path": "line_items[0].price", "value": 55},
+        ]
+        results = self.agent._apply_actions(self.payload, actions, {"scooty": SCOOTY})
+        self.assertEqual(results, [
+            "Updated purchase_org_id to 40",
+            "Added new line item.",
+            "Updated material_id to 95942",
+            "Failed to update line_items[x].price: Invalid index 'x' in field path 'line_items[x].price'",
+            "Updated price to 55",
+        ])
+        item = self.payload["line_items"][0]
+        self.assertEqual((item["quantity"], item["short_text"], item["unit_id"], item["price"]), (2, "Scooty", 208, 55))
+        self.assertEqual(self.payload["purchase_org_id"], 40)
+
+    def test_resolved_material_on_add(self):
+        self.agent._apply_action(self.payload, {"operation": "ADD", "field_path": "line_items", "value": "scooty "}, {"scooty": SCOOTY})
+        self.assertEqual(self.payload["line_items"][0]["material_id"], 95942)
+        self.assertEqual(self.payload["line_items"][0]["price"], 50.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from agent_logic import POAgent
+
+
+class TestFusedTurnTemplate(unittest.TestCase):
+    def setUp(self):
+        # Template rendering is pure; skip client construction
+        self.agent = POAgent.__new__(POAgent)
+
+    def test_fills_placeholders(self):
+        response = self.agent._render_response_template(
+            "{updates} {issues} {next_step}",
+            ["Updated vendor_id to 17", "Updated quantity to 2", "Note: Could not find 'cpt' in the database."],
+            ["purchase group"],
+        )
+        self.assertEqual(response, "I've updated the supplier and quantity. Note: Could not find 'cpt' in the database. I still need: purchase group.")
+
+    def test_ready_and_success(self):
+        self.assertTrue(self.agent._render_response_template("{next_step}", [], []).startswith("Everything is ready."))
+        response = self.agent._render_response_template("{issues} {next_step}", ["SUCCESS: PO Created! Number: PO-1"], [])
+        self.assertEqual(response, "PO Created! Number: PO-1")
+
+    def test_unusable_template_falls_back(self):
+        self.assertIsNone(self.agent._render_response_template(None, [], []))
+        self.assertIsNone(self.agent._render_response_template("{updates} done", [], []))
+        self.assertIsNone(self.agent._render_response_template("{supplier_name} {next_step}", [], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
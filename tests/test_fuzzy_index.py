@@ -0,0 +1,65 @@
+import unittest
+
+from agent_logic import POAgent
+from fuzzy_index import LinearMatcher, MatchIndex, clear_index_cache, index_for
+
+PLANTS = [
+    {"id": "p-2", "name": "Ail Dhaneti Warehouse"},
+    {"id": "p-1", "name": "Ail Dhaneti"},
+    {"id": "p-3", "name": "Mundra Port"},
+    {"id": "p-4", "name": "Pune-Chakan Plant"},
+]
+GROUPS = [{"id": 366, "name": "CPT Mumbai"}, {"id": 365, "name": "CPT"}, {"id": 40, "name": "Raw Material"}]
+
+
+class TestMatchIndex(unittest.TestCase):
+    def setUp(self):
+        clear_index_cache()
+
+    def test_id_and_exact_name_rank_first(self):
+        index = MatchIndex(GROUPS)
+        self.assertEqual(index.best("365")["name"], "CPT")
+        self.assertEqual(index.best("40")["name"], "Raw Material")
+        # Exact name beats an earlier substring hit
+        self.assertEqual(index.best("cpt")["id"], 365)
+        self.assertEqual(MatchIndex(PLANTS).best("ail dhaneti")["id"], "p-1")
+
+    def test_substring_words_and_typos(self):
+        index = MatchIndex(PLANTS)
+        self.assertEqual(index.best("mundra")["id"], "p-3")
+        self.assertEqual(index.best("chakan pune")["id"], "p-4")
+        self.assertEqual(index.best("pune chakan")["id"], "p-4")
+        self.assertEqual(index.best("Ail Dhanti")["id"], "p-1")
+        self.assertIsNone(index.best("Bangalore"))
+
+    def test_ranked_top_k_with_scores(self):
+        results = MatchIndex(PLANTS).search("dhaneti", k=3)
+        self.assertEqual([c["id"] for _, c in results], ["p-1", "p-2"])
+        self.assertGreater(results[0][0], results[1][0])
+        self.assertTrue(all(0 < score <= 1 for score, _ in results))
+
+    def test_index_only_for_reused_lists(self):
+        self.assertIsInstance(index_for(PLANTS), LinearMatcher)
+        plants = [{"id": f"p-{i}", "name": f"Plant {i}"} for i in range(200)] + PLANTS
+        # First sighting is scanned; the index is built when the same list comes back
+        self.assertIsInstance(index_for(plants), LinearMatcher)
+        self.assertIsInstance(index_for(plants), MatchIndex)
+        self.assertIs(index_for(plants), index_for(plants))
+        # A fresh list per lookup (master-data cache off) never pays for an index
+        for _ in range(3):
+            self.assertIsInstance(index_for(list(plants)), LinearMatcher)
+
+    def test_linear_matcher_scores_like_index(self):
+        for candidates in (PLANTS, GROUPS):
+            for text in ("365", "cpt", "ail dhaneti", "mundra", "pune chakan", "Ail Dhanti", "dhaneti", "Bangalore", ""):
+                self.assertEqual(LinearMatcher(candidates).search(text), MatchIndex(candidates).search(text), text)
+
+    def test_agent_fuzzy_match_uses_index(self):
+        agent = POAgent.__new__(POAgent)
+        self.assertEqual(agent._fuzzy_match("CPT", GROUPS)["id"], 365)
+        self.assertIsNone(agent._fuzzy_match("CPT", []))
+        self.assertEqual(agent._pick_match("plant", "ail dhaneti", PLANTS)["id"], "p-1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from http_transport import HTTPTransport, TransportConfig
+from mock_api import MockAPI
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.hits += 1
+        if self.server.failures_left > 0:
+            self.server.failures_left -= 1
+            status, body = 503, b"{}"
+        else:
+            status, body = 200, json.dumps({"data": {"rows": [{"id": 40, "description": "Ashapura"}]}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHTTPTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        self.server.connections = 0
+        self.server.hits = 0
+        self.server.failures_left = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.transport = HTTPTransport(TransportConfig(max_retries=2, backoff_factor=0))
+        self.api = MockAPI(transport=self.transport, base_url=self.base_url, cache=False)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            self.assertEqual(self.api.get_purchase_orgs(), [{"id": "40", "name": "Ashapura"}])
+        self.assertEqual(self.server.hits, 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_listing_calls_retry_on_503(self):
+        self.server.failures_left = 2
+        self.assertEqual(len(self.api.get_purchase_orgs()), 1)
+        self.assertEqual(self.server.hits, 3)
+
+    def test_create_po_is_not_retried(self):
+        self.server.failures_left = 1
+        result = self.api.create_po({"po_type": "regularPurchase"})
+        self.assertEqual(self.server.hits, 1)
+        self.assertNotIn("data", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
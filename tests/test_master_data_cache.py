@@ -0,0 +1,84 @@
+import time
+import unittest
+
+from master_data_cache import MasterDataCache
+from mock_api import MockAPI
+
+
+class CountingAPI(MockAPI):
+    """MockAPI whose backend is an in-memory dict, counting every round trip."""
+
+    def __init__(self, cache):
+        super().__init__(cache=cache)
+        self.calls = []
+
+    def _post(self, endpoint, payload, idempotent=True):
+        self.calls.append((endpoint, payload))
+        org = (payload.get("purchase_org_id") or [0])[0]
+        return {"data": {"rows": [{"id": org * 100 + 1, "description": "Ashapura", "name": "CPT", "plantName": "Ail Dhaneti"}]}}
+
+
+class TestMasterDataCache(unittest.TestCase):
+    def test_warm_session_skips_backend(self):
+        api = CountingAPI(MasterDataCache())
+        for _ in range(3):
+            api.get_purchase_orgs()
+            api.get_plants(org_ids=[40])
+            api.get_purchase_groups(org_ids=40)
+        self.assertEqual(len(api.calls), 3)
+        self.assertEqual(api.cache.stats()["hits"], 6)
+
+    def test_keyed_by_payload(self):
+        api = CountingAPI(MasterDataCache())
+        self.assertEqual(api.get_plants(org_ids=[40])[0]["id"], "4001")
+        self.assertEqual(api.get_plants(org_ids=[41])[0]["id"], "4101")
+        self.assertEqual(api.get_plants()[0]["id"], "1")
+        self.assertEqual(len(api.calls), 3)
+
+    def test_keyed_by_base_url(self):
+        cache = MasterDataCache()
+        dev, fake = CountingAPI(cache), CountingAPI(cache)
+        fake.base_url = "http://fake"
+        dev.get_purchase_orgs()
+        fake.get_purchase_orgs()
+        dev.get_purchase_orgs()
+        self.assertEqual((len(dev.calls), len(fake.calls)), (1, 1))
+
+    def test_ttl_expiry(self):
+        cache = MasterDataCache(ttls={"/api/v1/admin/plants/list": 0.05})
+        api = CountingAPI(cache)
+        api.get_plants()
+        time.sleep(0.06)
+        api.get_plants()
+        self.assertEqual(len(api.calls), 2)
+
+    def test_lru_eviction_and_invalidation(self):
+        cache = MasterDataCache(max_entries=2)
+        cache.put("a", {}, [1])
+        cache.put("b", {}, [2])
+        cache.get("a")
+        cache.put("c", {}, [3])
+        self.assertFalse(cache.get("b")[0])
+        self.assertTrue(cache.get("a")[0])
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        cache.invalidate("a")
+        self.assertFalse(cache.get("a")[0])
+        cache.invalidate()
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_byte_bound(self):
+        cache = MasterDataCache(max_bytes=100)
+        cache.put("a", {}, ["x" * 60])
+        cache.put("b", {}, ["y" * 60])
+        self.assertFalse(cache.get("a")[0])
+        self.assertLessEqual(cache.stats()["bytes"], 100)
+
+    def test_empty_results_not_cached(self):
+        cache = MasterDataCache()
+        cache.get_or_load("a", {}, lambda: [])
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
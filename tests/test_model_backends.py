@@ -0,0 +1,133 @@
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from bedrock_service import BedrockService
+from model_backends import (
+    RecordingClient, RecordingStore, ReplayClient, ReplayMissError, SyntheticClient,
+    create_model_client, get_model_client, request_key,
+)
+
+
+def put_many(path, prefix, count):
+    # Module level so spawned processes can run it
+    store = RecordingStore(path)
+    for i in range(count):
+        store.put(f"{prefix}-{i}", f"body {prefix} {i}".encode())
+
+
+class FakeLiveClient:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, modelId, body):
+        self.calls += 1
+        text = json.dumps({"response": f"reply {self.calls}"})
+        return {"body": io.BytesIO(json.dumps({"content": [{"type": "text", "text": text}]}).encode())}
+
+
+class TestModelBackends(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def service(self, client):
+        service = BedrockService(client=client)
+        service.model_id = "test-model"
+        return service
+
+    def test_request_key_ignores_key_order(self):
+        a = json.dumps({"system": "s", "messages": [], "temperature": 0})
+        b = json.dumps({"temperature": 0, "messages": [], "system": "s"}, indent=2)
+        self.assertEqual(request_key("m", a), request_key("m", b))
+        self.assertNotEqual(request_key("m", a), request_key("other", a))
+
+    def test_record_then_replay_without_live_client(self):
+        live = FakeLiveClient()
+        recorder = self.service(RecordingClient(RecordingStore(self.path), live_client=live))
+        first = recorder._call_claude("system", "hello")
+        second = recorder._call_claude("system", "again")
+        self.assertEqual(live.calls, 2)
+
+        # Fresh store instance reads the index back from disk
+        replay = ReplayClient(RecordingStore(self.path))
+        service = self.service(replay)
+        self.assertEqual(service._call_claude("system", "hello"), first)
+        self.assertEqual(service._call_claude("system", "again"), second)
+        self.assertEqual("".join(service._stream_claude("system", "hello")), json.dumps(first))
+        self.assertEqual(replay.hits, 3)
+
+    def test_replay_miss(self):
+        replay = ReplayClient(RecordingStore(self.path))
+        body = json.dumps(self.service(replay)._build_request("system", "unknown"))
+        with self.assertRaises(ReplayMissError):
+            replay.invoke_model(modelId="test-model", body=body)
+        self.assertIn("error", self.service(replay)._call_claude("system", "unknown"))
+
+    def test_store_shared_between_processes(self):
+        first, second = RecordingStore(self.path), RecordingStore(self.path)
+        first.put("a", b"from first")
+        second.put("b", b"from second")  # Must not drop "a" from index.json
+        self.assertEqual(first.get("b"), b"from second")  # Picked up on a miss
+        self.assertEqual(len(RecordingStore(self.path)), 2)
+
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=put_many, args=(self.path, f"w{n}", 25)) for n in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+        store = RecordingStore(self.path)
+        self.assertEqual(len(store), 102)
+        self.assertEqual(store.get("w3-24"), b"body w3 24")
+
+    def test_synthetic_latency_shape(self):
+        client = SyntheticClient(responder=lambda request: json.dumps({"response": "x" * 400}), base_ms=20, token_ms=0.2)
+        start = time.perf_counter()
+        result = self.service(client)._call_claude("system", "hi")
+        elapsed = time.perf_counter() - start
+        self.assertEqual(result["response"], "x" * 400)
+        self.assertGreaterEqual(elapsed, 0.04)  # 20 ms + ~100 tokens * 0.2 ms
+        self.assertEqual(client.calls, 1)
+        self.assertGreater(client.model_seconds, 0.03)
+
+    def test_backend_from_env_skips_boto3(self):
+        with mock.patch.dict(os.environ, {"BEDROCK_BACKEND": "synthetic"}), \
+                mock.patch("boto3.client", side_effect=AssertionError("boto3 client created")):
+            service = BedrockService()
+            self.assertIsInstance(service.client, SyntheticClient)
+        with self.assertRaises(ValueError):
+            create_model_client("nope")
+
+    def test_agent_import_defers_heavy_clients(self):
+        code = ("import sys, agent_logic, async_agent; async_agent.AsyncPOAgent(); "
+                "print(sorted(m for m in ('boto3', 'botocore', 'requests', 'pandas') if m in sys.modules))")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(out.strip().splitlines()[-1], "[]")
+
+    def test_sessions_share_process_clients(self):
+        from agent_logic import POAgent
+        with mock.patch.dict(os.environ, {"BEDROCK_BACKEND": "synthetic"}):
+            first, second = POAgent(), POAgent()
+            self.assertIs(first.api, second.api)
+            self.assertIs(first.nlu, second.nlu)
+            self.assertIs(BedrockService().client, get_model_client())
+            self.assertIsNot(get_model_client(), get_model_client("replay"))
+        # Conversation state stays per session
+        self.assertIsNot(first.nlu_stats, second.nlu_stats)
+        self.assertIsNot(first.get_initial_state()["payload"], second.get_initial_state()["payload"])
+
+
+if __name__ == "__main__":
+    unittest.main()
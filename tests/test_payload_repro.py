@@ -4,6 +4,8 @@ import os
 import json
 from dotenv import load_dotenv
 
+from multipart_encoder import MultipartEncoder
+
 load_dotenv()
 
 BASE_URL = "https://dev.api.supplierx.aeonx.digital"
@@ -37,11 +39,10 @@ def flatten_payload(y):
     flatten(y)
     return out
 
-def test_repro():
+def repro_payload():
     # Exact payload reconstructed from User Logs + Agent Logic processing
     # Note: Agent adds missing fields like control_code during processing
-    
-    payload = {
+    return {
         "po_type": "regularPurchase",
         "vendor_id": "a888ee02-b479-45ba-899b-40daba67d7d7",
         "purchase_org_id": 40,
@@ -86,6 +87,9 @@ def test_repro():
         "total": "306"
     }
 
+def test_repro():
+    payload = repro_payload()
+
     # Prepare for sending
     cleaned = format_payload_values(payload)
     
@@ -116,5 +120,26 @@ def test_repro():
     except Exception as e:
         print(e)
         
+def test_streaming_encoder_matches_requests_multipart():
+    # MockAPI.create_po streams MultipartEncoder; it must send exactly the body
+    # requests builds from the flattened files= dict above
+    payload = repro_payload()
+    payload["line_items"].append({
+        "material_id": 95948, "quantity": 2.5, "price": None, "short_text": "Ø 20mm \"pipe\"\r\n",
+        "is_service": True, "tax": {"code": 118, "lines": [{"rate": 0}, []], "meta": {}},
+    })
+    payload['odd"key'] = False
+
+    multipart_data = {k: (None, str(v)) for k, v in flatten_payload(format_payload_values(payload)).items()}
+    prepared = requests.Request("POST", "http://fake/create", files=multipart_data).prepare()
+    boundary = prepared.headers["Content-Type"].split("boundary=")[1]
+
+    encoder = MultipartEncoder(payload, boundary=boundary, chunk_size=256)
+    assert encoder.content_type == prepared.headers["Content-Type"]
+    assert [name for name, _ in encoder.fields()] == list(multipart_data)
+    assert encoder.to_bytes() == prepared.body
+    assert len(encoder) == len(prepared.body)
+    assert len(list(encoder)) > 1  # streamed in chunks
+
 if __name__ == "__main__":
     test_repro()
@@ -0,0 +1,79 @@
+import copy
+import json
+import pickle
+import unittest
+
+from agent_logic import POAgent
+from po_draft import LineItem, LineItems, PODraft, build_api_payload
+
+
+def line(i):
+    return {"material_id": 95000 + i, "short_text": f"Material {i}", "quantity": i + 1, "price": 10.0}
+
+
+class TestPODraft(unittest.TestCase):
+    def setUp(self):
+        self.draft = PODraft({"currency": "INR", "line_items": [line(0), line(1)]})
+
+    def test_mapping_interface_and_aliases(self):
+        self.draft["purchase_group_id"] = 365
+        self.draft["validity_end"] = "2025-12-31"
+        self.draft["buyer_note"] = "urgent"
+        self.assertEqual(self.draft["purchase_grp_id"], 365)
+        self.assertIn("purchase_group_id", self.draft)
+        self.assertNotIn("purchase_group_id", list(self.draft))
+        self.assertEqual(self.draft.get("validityEnd"), "2025-12-31")
+        self.assertEqual(self.draft.pop("buyer_note"), "urgent")
+        self.assertIsNone(self.draft.get("plant_id"))
+        self.assertIsInstance(self.draft["line_items"][0], LineItem)
+        self.assertEqual(self.draft["line_items"][0], line(0))
+        json.dumps(self.draft.to_dict())
+
+    def test_running_total(self):
+        self.assertEqual(self.draft["total"], 30.0)
+        items = self.draft.setdefault("line_items", [])
+        items.append({"quantity": "3", "price": 2.5})
+        items[0]["quantity"] = 4
+        items[1].update(price=1)
+        self.assertEqual(self.draft["total"], 40 + 2 + 7.5)
+        del items[2]
+        items.pop(0)
+        self.assertEqual(self.draft["total"], 2.0)
+        items[0:1] = [line(5)]
+        self.assertEqual(self.draft["total"], 60.0)
+        items.clear()
+        self.assertNotIn("total", self.draft)
+
+    def test_copies_keep_their_own_totals(self):
+        clone = copy.deepcopy(self.draft)
+        clone["line_items"][0]["quantity"] = 100
+        self.assertEqual((self.draft["total"], clone["total"]), (30.0, 1020.0))
+        self.assertEqual(pickle.loads(pickle.dumps(self.draft)), self.draft)
+        # Lines owned by another list are copied, not shared
+        other = LineItems(self.draft["line_items"])
+        other[0]["quantity"] = 5
+        self.assertEqual((self.draft["total"], other.total), (30.0, 70.0))
+
+    def test_context_projection_drops_empty_values(self):
+        self.draft["remarks"] = ""
+        self.draft["line_items"][0]["tax_code"] = None
+        context = self.draft.to_context()
+        self.assertNotIn("remarks", context)
+        self.assertEqual(context["line_items"][0], line(0))
+        self.draft["line_items"][0]["quantity"] = 9
+        self.assertEqual(self.draft.to_context()["line_items"][0]["quantity"], 9)
+
+    def test_api_payload_matches_dict_payload(self):
+        state = POAgent(api=object(), nlu=object()).get_initial_state()
+        state["payload"]["line_items"].extend([line(0), line(1)])
+        plain = state["payload"].to_dict()
+        self.assertEqual(state["payload"].to_api_payload(), build_api_payload(plain))
+        state["payload"]["line_items"][1]["price"] = 12.5
+        plain["line_items"][1]["price"] = 12.5
+        api_payload = state["payload"].to_api_payload()
+        self.assertEqual(api_payload, build_api_payload(plain))
+        self.assertEqual(api_payload["total"], "35.00")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from agent_logic import POAgent
+from conversation_store import SQLiteConversationStore
+from fake_supplierx import FakeSupplierX, SyntheticCatalog, in_process_transport
+from mock_api import MockAPI
+from po_server import ConversationHost, POServer, worker_for
+
+
+class CrashableAgent(POAgent):
+    def process_input(self, user_text, state):
+        if user_text == "exit worker":
+            os._exit(1)  # Stands in for an OOM kill or a native crash
+        return super().process_input(user_text, state)
+
+
+def fake_agent():
+    # Module level so spawned workers can unpickle it
+    api = MockAPI(transport=in_process_transport(FakeSupplierX(SyntheticCatalog(materials=50, suppliers=20))),
+                  base_url="http://fake", cache=False, catalog=False)
+    return CrashableAgent(api=api, nlu=object())
+
+
+def request(url, body=None, method=None):
+    data = json.dumps(body).encode("utf-8") if isinstance(body, dict) else body
+    req = urllib.request.Request(url, data=data, method=method or ("POST" if data is not None else "GET"))
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, response.headers.get("X-PO-Worker"), json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get("X-PO-Worker"), json.loads(e.read())
+
+
+class TestPOServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = POServer(port=0, workers=2, threads=4, agent_factory=fake_agent).start()
+        cls.url = cls.server.base_url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def test_conversations_are_routed_to_their_worker(self):
+        ids = []
+        for _ in range(6):
+            status, worker, created = request(self.url + "/conversations", {})
+            self.assertEqual(status, 201)
+            self.assertEqual(int(worker), worker_for(created["conversation_id"], 2))
+            ids.append(created["conversation_id"])
+
+        for cid in ids:
+            status, worker, turn = request(f"{self.url}/conversations/{cid}/turns", {"text": "supplier Smartsaa"})
+            self.assertEqual(status, 200)
+            self.assertEqual(int(worker), worker_for(cid, 2))
+            self.assertTrue(turn["response"])
+            status, _, view = request(f"{self.url}/conversations/{cid}/payload")
+            self.assertEqual(view["payload"]["vendor_id"], turn["payload"]["vendor_id"])
+            self.assertTrue(view["payload"]["vendor_id"])
+        self.assertEqual(request(self.url + "/health")[2], {"workers": 2, "alive": 2})
+
+    def test_dead_worker_is_restarted(self):
+        cid = request(self.url + "/conversations", {})[2]["conversation_id"]
+        started = time.monotonic()
+        status, worker, _ = request(f"{self.url}/conversations/{cid}/turns", {"text": "exit worker"})
+        self.assertEqual(status, 503)
+        self.assertEqual(int(worker), worker_for(cid, 2))
+        self.assertLess(time.monotonic() - started, 10)  # Not the 120 s timeout
+
+        # Its conversations were in memory only; new ones on that worker work again
+        self.assertEqual(request(f"{self.url}/conversations/{cid}/payload")[0], 404)
+        while True:
+            status, worker, created = request(self.url + "/conversations", {})
+            if int(worker) == worker_for(cid, 2):
+                break
+        self.assertEqual(status, 201)
+        self.assertEqual(request(f"{self.url}/conversations/{created['conversation_id']}/turns", {"text": "supplier Smartsaa"})[0], 200)
+        self.assertEqual(request(self.url + "/health")[2], {"workers": 2, "alive": 2})
+
+    def test_errors(self):
+        self.assertEqual(request(f"{self.url}/conversations/nope/payload")[0], 404)
+        self.assertEqual(request(f"{self.url}/conversations/nope/turns", {"text": "hi"})[0], 404)
+        self.assertEqual(request(f"{self.url}/unknown")[0], 404)
+        cid = request(self.url + "/conversations", {})[2]["conversation_id"]
+        self.assertEqual(request(f"{self.url}/conversations/{cid}/turns", {"text": " "})[0], 400)
+        self.assertEqual(request(f"{self.url}/conversations/{cid}/turns", b"{not json")[0], 400)
+
+
+class TestConversationHost(unittest.TestCase):
+    def test_resume_from_store_after_restart(self):
+        workdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(workdir, "conversations.db")
+            host = ConversationHost(fake_agent(), SQLiteConversationStore(path))
+            host.handle("create", "c1", {})
+            host.handle("turn", "c1", {"text": "supplier Smartsaa"})
+
+            restarted = ConversationHost(fake_agent(), SQLiteConversationStore(path))
+            status, view = restarted.handle("payload", "c1", {})
+            self.assertEqual(status, 200)
+            self.assertEqual(view["payload"], host.states["c1"]["payload"].to_dict())
+            self.assertEqual(len(restarted.states["c1"]["conversation_history"]), 2)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def test_hosts_sharing_a_store_run_turns_on_the_latest_state(self):
+        workdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(workdir, "conversations.db")
+            first = ConversationHost(fake_agent(), SQLiteConversationStore(path))
+            second = ConversationHost(fake_agent(), SQLiteConversationStore(path))
+            first.handle("create", "c1", {})
+            self.assertEqual(second.handle("turn", "c1", {"text": "supplier Smartsaa"})[0], 200)
+            status, view = first.handle("turn", "c1", {"text": "supplier Tata"})  # first still holds the initial state
+            self.assertEqual(status, 200)
+            self.assertEqual(len(first.states["c1"]["conversation_history"]), 4)
+            self.assertEqual(view["payload"], second.handle("payload", "c1", {})[1]["payload"])
+
+            # A turn that loses the race to save is not written over the other one
+            process_input = first.agent.process_input
+
+            def racing(text, state):
+                second.handle("turn", "c1", {"text": "supplier Reliance"})
+                return process_input(text, state)
+
+            first.agent.process_input = racing
+            status, _ = first.handle("turn", "c1", {"text": "supplier Infosys"})
+            self.assertEqual(status, 409)
+            history = first.states["c1"]["conversation_history"]
+            self.assertEqual([m["content"] for m in history if m["role"] == "user"][-1], "supplier Reliance")
+            first.agent.process_input = process_input
+            self.assertEqual(first.handle("turn", "c1", {"text": "supplier Infosys"})[0], 200)
+            self.assertEqual(len(SQLiteConversationStore(path).load("c1")["conversation_history"]), 8)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def test_least_recently_used_conversations_are_evicted(self):
+        workdir = tempfile.mkdtemp()
+        try:
+            host = ConversationHost(fake_agent(), SQLiteConversationStore(os.path.join(workdir, "conversations.db")),
+                                    max_conversations=2)
+            for conversation_id in ("c1", "c2", "c3"):
+                host.handle("create", conversation_id, {})
+            host.handle("payload", "missing", {})
+            self.assertEqual(list(host.states), ["c2", "c3"])
+            self.assertEqual(set(host._locks), {"c2", "c3"})
+            self.assertEqual(host.handle("payload", "c1", {})[0], 200)  # Reloaded from the store
+            self.assertEqual(list(host.states), ["c3", "c1"])
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
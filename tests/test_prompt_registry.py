@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+
+from bedrock_service import BedrockService, PROMPTS, FUSED_TURN_INSTRUCTIONS, PROMPT_CACHE_MIN_CHARS
+from model_backends import SyntheticClient
+from prompt_registry import PromptRegistry
+
+
+class TestPromptRegistry(unittest.TestCase):
+    def test_builds_once_and_reloads_on_file_change(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".md", delete=False) as f:
+            f.write("v1")
+        try:
+            registry = PromptRegistry(check_interval=0)
+
+            def build():
+                with open(f.name, encoding="utf-8") as fh:
+                    return fh.read() + " + instructions"
+            registry.register("p", build, [f.name])
+            self.assertEqual(registry.get("p"), "v1 + instructions")
+            registry.get("p")
+            self.assertEqual(registry.builds, 1)
+
+            with open(f.name, "w", encoding="utf-8") as fh:
+                fh.write("version 2")
+            self.assertEqual(registry.get("p"), "version 2 + instructions")
+            self.assertEqual(registry.builds, 2)
+        finally:
+            os.unlink(f.name)
+
+    def test_check_interval_skips_stat(self):
+        registry = PromptRegistry(check_interval=3600)
+        registry.register("p", lambda: "text", ["/does/not/exist"])
+        for _ in range(3):
+            registry.get("p")
+        self.assertEqual(registry.builds, 1)
+
+    def test_agent_prompts(self):
+        self.assertTrue(PROMPTS.get("analysis").startswith(PROMPTS.get("response")[:0]))
+        self.assertIn("JSON", PROMPTS.get("analysis"))
+        self.assertEqual(PROMPTS.get("analysis_fused"), PROMPTS.get("analysis") + FUSED_TURN_INSTRUCTIONS)
+        self.assertIs(PROMPTS.get("analysis"), PROMPTS.get("analysis"))
+
+
+class TestPromptCacheBlocks(unittest.TestCase):
+    def service(self, client=None):
+        service = BedrockService(client=client)
+        service.model_id = "test-model"
+        return service
+
+    def test_long_system_prompt_is_cacheable(self):
+        service = self.service()
+        body = service._build_request(PROMPTS.get("analysis"), "context")
+        self.assertGreaterEqual(len(PROMPTS.get("analysis")), PROMPT_CACHE_MIN_CHARS)
+        self.assertEqual(body["system"][0]["cache_control"], {"type": "ephemeral"})
+        self.assertEqual(body["system"][0]["text"], PROMPTS.get("analysis"))
+
+        # Short prompts and disabled caching send a plain string
+        self.assertEqual(service._build_request("short", "x")["system"], "short")
+        service.prompt_cache = False
+        self.assertIsInstance(service._build_request(PROMPTS.get("analysis"), "x")["system"], str)
+
+    def test_repeated_turns_read_the_cached_prefix(self):
+        client = SyntheticClient(responder=lambda request: json.dumps({"response": "ok"}), base_ms=0, token_ms=0)
+        service = self.service(client)
+        service._call_claude(PROMPTS.get("analysis"), "turn 1")
+        first = dict(service.usage)
+        service._call_claude(PROMPTS.get("analysis"), "turn 2")
+        self.assertGreater(first["cache_creation_input_tokens"], 0)
+        self.assertEqual(first["cache_read_input_tokens"], 0)
+        self.assertEqual(service.usage["cache_read_input_tokens"], first["cache_creation_input_tokens"])
+
+        # Streaming calls report usage through message_start
+        "".join(service._stream_claude(PROMPTS.get("analysis"), "turn 3"))
+        self.assertEqual(service.usage["cache_read_input_tokens"], 2 * first["cache_creation_input_tokens"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import tempfile
+import unittest
+
+from bedrock_service import BedrockService
+from model_backends import SyntheticClient
+from response_cache import ANALYSIS_METHODS, ResponseCache, normalize
+
+
+def echo_date(request):
+    # Stands in for the model: echoes the first ISO date of the user message
+    content = request["messages"][0]["content"]
+    if "price" in request["system"]:
+        return json.dumps({"price": 42})
+    if "date extraction" in request["system"]:
+        return json.dumps({"date": content.split()[-1], "purpose": "po_date"})
+    return json.dumps({"response": f"Reply to {content[:20]}"})
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.client = SyntheticClient(responder=echo_date, base_ms=0, token_ms=0)
+        self.cache = ResponseCache(disk_path="")
+        self.service = BedrockService(client=self.client, cache=self.cache)
+        self.service.model_id = "test-model"
+
+    def test_normalize(self):
+        text, values = normalize("PO  date 2025-12-30,\n valid  2025-12-31 (Fri Jan 23 2026 13:15:24 GMT+0530 (India Standard Time))")
+        self.assertEqual(text, "PO date <v0>, valid <v1> (<v2>)")
+        self.assertEqual(values, ["2025-12-30", "2025-12-31", "Fri Jan 23 2026 13:15:24 GMT+0530 (India Standard Time)"])
+
+    def test_dates_are_templated(self):
+        first = self.service.extract_date_with_context("po date 2025-12-30", "What is the PO date?")
+        second = self.service.extract_date_with_context("po   date 2026-01-05", "What is the PO date?")
+        self.assertEqual(first["date"], "2025-12-30")
+        self.assertEqual(second["date"], "2026-01-05")
+        self.assertEqual(self.client.calls, 1)
+        # A different prompt (last question) is a different entry
+        self.service.extract_date_with_context("po date 2025-12-30", "When should it be delivered?")
+        self.assertEqual(self.client.calls, 2)
+
+    def test_only_opted_in_methods_are_cached(self):
+        for _ in range(2):
+            self.assertEqual(self.service.extract_price_from_text("around forty two"), 42)
+            self.service.generate_response("hi", {}, [], {}, [])
+        self.assertEqual(self.client.calls, 3)
+        stats = self.cache.stats()
+        self.assertEqual(stats["by_method"]["extract_price_from_text"], {"hits": 1, "misses": 1})
+        self.assertNotIn("generate_response", stats["by_method"])
+
+        service = BedrockService(client=self.client, cache=ResponseCache(methods=(), disk_path=""))
+        service.extract_price_from_text("around forty two")
+        service.extract_price_from_text("around forty two")
+        self.assertEqual(self.client.calls, 5)
+
+    def test_full_analysis_is_opt_in(self):
+        # Swapping the PO date and the validity end must not reuse the earlier analysis
+        self.assertFalse(self.cache.enabled_for("analyze_user_input"))
+        self.assertFalse(self.cache.enabled_for("analyze_and_respond"))
+        self.assertTrue(ResponseCache(methods=ANALYSIS_METHODS, disk_path="").enabled_for("analyze_user_input"))
+
+    def test_errors_are_not_cached(self):
+        self.cache.store("k", [], {"error": "throttled"})
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2, disk_path="")
+        for i in range(3):
+            key, values, _ = cache.lookup("m", "model", "prompt", f"input {i}")
+            cache.store(key, values, {"value": i})
+        self.assertIsNone(cache.lookup("m", "model", "prompt", "input 0")[2])
+        self.assertEqual(cache.lookup("m", "model", "prompt", "input 2")[2], {"value": 2})
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["evictions"]), (2, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 5)
+
+    def test_disk_tier_survives_restarts(self):
+        with tempfile.TemporaryDirectory() as path:
+            cache = ResponseCache(disk_path=path)
+            key, values, _ = cache.lookup("m", "model", "prompt", "valid until 2025-12-31")
+            cache.store(key, values, {"date": "2025-12-31"})
+
+            restarted = ResponseCache(disk_path=path)
+            result = restarted.lookup("m", "model", "prompt", "valid until 2026-02-28")[2]
+            self.assertEqual(result, {"date": "2026-02-28"})
+            self.assertEqual(restarted.stats()["disk_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
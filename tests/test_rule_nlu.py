@@ -0,0 +1,114 @@
+import json
+import os
+import unittest
+
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from agent_logic import POAgent  # noqa: E402
+from bedrock_service import BedrockService  # noqa: E402
+from fake_supplierx import FakeSupplierX, SyntheticCatalog, in_process_transport  # noqa: E402
+from mock_api import CREATE_PO_ENDPOINT, MockAPI  # noqa: E402
+from model_backends import SyntheticClient  # noqa: E402
+from rule_nlu import RuleNLU  # noqa: E402
+
+ONE_SHOT = {
+    "intents": ["UPDATE_PAYLOAD"],
+    "actions": [
+        {"operation": "UPDATE", "field_path": "po_type", "value": "regularPurchase"},
+        {"operation": "UPDATE", "field_path": "vendor_id", "value": "Smartsaa"},
+        {"operation": "UPDATE", "field_path": "purchase_org_id", "value": "Ashapura"},
+        {"operation": "UPDATE", "field_path": "plant_id", "value": "Ail Dhaneti"},
+        {"operation": "UPDATE", "field_path": "purchase_grp_id", "value": "CPT"},
+        {"operation": "UPDATE", "field_path": "line_items[0].material_id", "value": "Scooty"},
+        {"operation": "UPDATE", "field_path": "line_items[0].quantity", "value": 2},
+        {"operation": "UPDATE", "field_path": "line_items[0].price", "value": 50000},
+        {"operation": "UPDATE", "field_path": "po_date", "value": "2025-12-30"},
+    ],
+    "items_to_resolve": [
+        {"entity_type": "supplier", "value": "Smartsaa"},
+        {"entity_type": "org", "value": "Ashapura"},
+        {"entity_type": "plant", "value": "Ail Dhaneti"},
+        {"entity_type": "group", "value": "CPT"},
+        {"entity_type": "material", "value": "Scooty"},
+    ],
+}
+
+
+class TestRuleNLU(unittest.TestCase):
+    def setUp(self):
+        self.rules = RuleNLU()
+        self.one_item = {"line_items": [{"material_id": 95942, "quantity": 2, "price": 50000}]}
+
+    def test_simple_turns(self):
+        cases = [
+            ("change the quantity to 5", [("line_items[0].quantity", 5)], []),
+            ("qty 5, price Rs 1,200.50", [("line_items[0].quantity", 5), ("line_items[0].price", 1200.5)], []),
+            ("plant 1001", [("plant_id", "1001")], [("plant", "1001")]),
+            ("purchase org Ashapura", [("purchase_org_id", "Ashapura")], [("org", "Ashapura")]),
+            ("valid until 2025-12-31", [("validityEnd", "2025-12-31")], []),
+            ("currency usd", [("currency", "USD")], []),
+        ]
+        for text, actions, resolve in cases:
+            result = self.rules.analyze(text, self.one_item)
+            self.assertGreaterEqual(result["confidence"], 0.85, text)
+            self.assertEqual([(a["field_path"], a["value"]) for a in result["actions"]], actions, text)
+            self.assertEqual([(r["entity_type"], r["value"]) for r in result["items_to_resolve"]], resolve, text)
+
+    def test_confirmation_depends_on_missing_fields(self):
+        self.assertEqual(self.rules.analyze("Yes, create it.", self.one_item)["intents"], ["CONFIRM_PO"])
+        self.assertGreaterEqual(self.rules.analyze("Yes, create it.", self.one_item)["confidence"], 0.85)
+        # "yes" with fields missing may mean "add what I said earlier"
+        self.assertLess(self.rules.analyze("yes", self.one_item, ["plant"])["confidence"], 0.85)
+
+    def test_bare_date_answers_the_missing_date(self):
+        result = self.rules.analyze("2025-12-31", self.one_item, ["validity end date"])
+        self.assertEqual(result["actions"][0]["field_path"], "validityEnd")
+        self.assertLess(self.rules.analyze("2025-12-31", self.one_item, ["PO Date", "validity end date"])["confidence"], 0.85)
+
+    def test_ambiguous_or_unknown_turns_go_to_the_model(self):
+        two_items = {"line_items": [{"material_id": 1}, {"material_id": 2}]}
+        self.assertLess(self.rules.analyze("price 200", two_items)["confidence"], 0.85)
+        self.assertGreaterEqual(self.rules.analyze("item 2 price 200", two_items)["confidence"], 0.85)
+        for text in ("Create a PO for supplier Smartsaa with 2 Scooty", "yes add them", "no", "what is the plant?", "qty 5 and something else"):
+            self.assertEqual(self.rules.analyze(text, self.one_item)["confidence"], 0.0, text)
+
+
+class TestAgentFastPath(unittest.TestCase):
+    def test_simple_turns_skip_the_model(self):
+        def responder(request):
+            content = request["messages"][0]["content"]
+            return json.dumps(ONE_SHOT if content.startswith("Current Context:") else {"response": "Header set."})
+
+        client = SyntheticClient(responder=responder, base_ms=0, token_ms=0)
+        fake = FakeSupplierX(SyntheticCatalog(materials=100, suppliers=50))
+        api = MockAPI(transport=in_process_transport(fake), base_url="http://supplierx.local", cache=False, catalog=False)
+        agent = POAgent(fused_turn=False, api=api, nlu=BedrockService(client=client))
+        state = agent.get_initial_state()
+
+        agent.process_input("Create a regular purchase PO for Smartsaa ...", state)
+        self.assertEqual(client.calls, 2)
+        response = agent.process_input("2025-12-31", state)
+        self.assertIn("validity end date", response)
+        agent.process_input("change the quantity to 5", state)
+        response = agent.process_input("Yes, create it.", state)
+
+        self.assertEqual(client.calls, 2)
+        self.assertEqual(state["payload"]["line_items"][0]["quantity"], 5)
+        self.assertIn("PO Created", response)
+        stats = agent.fast_path_stats()
+        self.assertEqual((stats["turns"], stats["fast_path_turns"]), (4, 3))
+
+        # A second confirmation of the submitted (still complete) draft creates nothing
+        for text in ("ok", "yes, create it"):
+            self.assertIn("already been submitted", agent.process_input(text, state))
+        self.assertEqual(fake.calls[CREATE_PO_ENDPOINT], 1)
+        agent.process_input("start over", state)
+        self.assertEqual(state["current_step"], "ACTIVE")
+
+    def test_fast_path_can_be_disabled(self):
+        agent = POAgent(api=object(), nlu=object(), fast_path=False)
+        self.assertIsNone(agent._fast_path_analysis("qty 5", agent.get_initial_state()))
+
+
+if __name__ == "__main__":
+    unittest.main()
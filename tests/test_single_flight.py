@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from async_mock_api import AsyncMockAPI
+from fake_supplierx import FakeSupplierX, FaultProfile, SyntheticCatalog, httpx_transport, in_process_transport
+from mock_api import MockAPI, PLANTS_ENDPOINT, PURCHASE_ORGS_ENDPOINT, SUPPLIERS_ENDPOINT
+from single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_threads_share_one_call_and_its_error(self):
+        flight = SingleFlight()
+        runs = []
+        barrier = threading.Barrier(8)
+
+        def slow(value):
+            runs.append(value)
+            time.sleep(0.05)
+            if value == "boom":
+                raise ValueError(value)
+            return [value]
+
+        def call(value):
+            barrier.wait()
+            try:
+                return flight.do(("k", value), lambda: slow(value))
+            except ValueError as e:
+                return e
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(call, ["a"] * 4 + ["boom"] * 4))
+        self.assertEqual(sorted(runs), ["a", "boom"])
+        self.assertTrue(all(r is results[0] for r in results[:4]))
+        self.assertTrue(all(isinstance(r, ValueError) for r in results[4:]))
+        self.assertEqual(flight.stats()["coalesced"], 6)
+        # Nothing is cached once the call is over
+        flight.do(("k", "a"), lambda: slow("a"))
+        self.assertEqual(runs.count("a"), 2)
+
+    def test_asyncio_tasks_share_one_call(self):
+        flight = SingleFlight()
+        runs = []
+
+        async def slow():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        async def main():
+            waiter = asyncio.ensure_future(flight.ado("k", slow))
+            others = [flight.ado("k", slow) for _ in range(9)]
+            await asyncio.sleep(0)
+            waiter.cancel()  # The shared call keeps running for the others
+            return await asyncio.gather(*others)
+
+        self.assertEqual(asyncio.run(main()), ["ok"] * 9)
+        self.assertEqual(runs, [1])
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    def test_threads_and_tasks_share_one_call(self):
+        flight = SingleFlight()
+        runs = []
+
+        def slow_sync():
+            runs.append("thread")
+            time.sleep(0.1)
+            return "ok"
+
+        async def slow_async():
+            runs.append("task")
+            await asyncio.sleep(0.1)
+            return "ok"
+
+        async def task_leads():
+            leader = asyncio.ensure_future(flight.ado("k", slow_async))
+            await asyncio.sleep(0.01)
+            follower = asyncio.get_running_loop().run_in_executor(None, flight.do, "k", slow_sync)
+            return await asyncio.gather(leader, follower)
+
+        def thread_leads():
+            with ThreadPoolExecutor(1) as pool:
+                leader = pool.submit(flight.do, "k", slow_sync)
+                time.sleep(0.01)
+                return [asyncio.run(flight.ado("k", slow_async)), leader.result()]
+
+        self.assertEqual(asyncio.run(task_leads()), ["ok", "ok"])
+        self.assertEqual(thread_leads(), ["ok", "ok"])
+        self.assertEqual(runs, ["task", "thread"])
+        self.assertEqual((flight.stats()["coalesced"], flight.stats()["in_flight"]), (2, 0))
+
+        # A sync call on the loop thread does not wait for that loop's own task
+        async def blocking_call_on_loop():
+            leader = asyncio.ensure_future(flight.ado("k", slow_async))
+            await asyncio.sleep(0.01)
+            return [flight.do("k", slow_sync), await leader]
+
+        self.assertEqual(asyncio.run(blocking_call_on_loop()), ["ok", "ok"])
+
+
+class TestMockAPICoalescing(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeSupplierX(SyntheticCatalog(materials=200, suppliers=100), FaultProfile(latency_ms=50))
+
+    def test_concurrent_sessions_hit_backend_once(self):
+        flight = SingleFlight()
+        api = MockAPI(transport=in_process_transport(self.fake), base_url="http://fake", cache=False, catalog=False, single_flight=flight)
+        barrier = threading.Barrier(24)
+        calls = [api.get_purchase_orgs, lambda: api.get_plants(org_ids=[40]), lambda: api.search_suppliers("Smartsaa")]
+
+        def session(i):
+            barrier.wait()
+            return calls[i % 3]()
+
+        with ThreadPoolExecutor(24) as pool:
+            results = list(pool.map(session, range(24)))
+        self.assertTrue(all(results))
+        self.assertEqual(results[0], results[3])
+        self.assertEqual([self.fake.calls[e] for e in (PURCHASE_ORGS_ENDPOINT, PLANTS_ENDPOINT, SUPPLIERS_ENDPOINT)], [1, 1, 1])
+        self.assertEqual(flight.stats()["coalesced"], 21)
+
+        # Different payloads are not merged, and create_po is never coalesced
+        api.get_plants(org_ids=[41])
+        self.assertEqual(self.fake.calls[PLANTS_ENDPOINT], 2)
+
+    def test_async_tasks_hit_backend_once(self):
+        async def main():
+            async with httpx.AsyncClient(transport=httpx_transport(self.fake)) as client:
+                api = AsyncMockAPI(client=client, base_url="http://fake", cache=False, catalog=False, single_flight=SingleFlight())
+                return await asyncio.gather(*[api.get_plants(org_ids=[40]) for _ in range(20)])
+
+        results = asyncio.run(main())
+        self.assertTrue(results[0])
+        self.assertEqual(self.fake.calls[PLANTS_ENDPOINT], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import os
+import unittest
+
+from streaming import IncrementalJSONScanner, JSONStringFieldStreamer
+
+os.environ.setdefault("AWS_REGION", "us-east-1")
+from agent_logic import POAgent  # noqa: E402
+from bedrock_service import BedrockService  # noqa: E402
+from mock_api import MockAPI  # noqa: E402
+
+
+def chunked(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class FakeStreamingClient:
+    """Bedrock client double that streams canned JSON replies in small deltas."""
+
+    def __init__(self, analysis, response):
+        self.analysis = analysis
+        self.response = response
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        request = json.loads(body)
+        if request["messages"][0]["content"].startswith("Current Context:"):
+            text = "```json\n" + json.dumps(self.analysis) + "\n```"
+        else:
+            text = json.dumps({"response": self.response})
+        events = [{"chunk": {"bytes": json.dumps({"type": "content_block_delta", "delta": {"type": "text_delta", "text": c}}).encode()}}
+                  for c in chunked(text)]
+        return {"body": iter(events)}
+
+
+class StaticAPI(MockAPI):
+    def __init__(self):
+        super().__init__(cache=False)
+        self.lookups = 0
+
+    def _post(self, endpoint, payload, idempotent=True):
+        self.lookups += 1
+        return {"data": [{"id": "v-1", "supplier_name": "Smartsaa"}]}
+
+
+class TestIncrementalParsing(unittest.TestCase):
+    def test_scanner_reports_fields_in_order(self):
+        seen = []
+        scanner = IncrementalJSONScanner(lambda key, value: seen.append((key, value)))
+        obj = {"intents": ["X"], "items_to_resolve": [{"value": "a}\\"}], "n": 1.5, "ok": True, "actions": []}
+        for chunk in chunked(json.dumps(obj), 2):
+            scanner.feed(chunk)
+        self.assertEqual(seen, list(obj.items()))
+        self.assertTrue(scanner.done)
+
+    def test_items_to_resolve_available_before_object_ends(self):
+        scanner = IncrementalJSONScanner()
+        scanner.feed('{"items_to_resolve": [{"entity_type": "supplier", "value": "Tata"}], "actions": [{"op')
+        self.assertEqual(scanner.fields["items_to_resolve"][0]["value"], "Tata")
+        self.assertNotIn("actions", scanner.fields)
+
+    def test_string_field_streamer_decodes_escapes_across_chunks(self):
+        streamer = JSONStringFieldStreamer("response")
+        text = json.dumps({"response": 'Line "one"\nprice ₹ 5'}, ensure_ascii=True)
+        out = "".join(streamer.feed(c) for c in chunked(text, 1))
+        self.assertEqual(out, 'Line "one"\nprice ₹ 5')
+
+
+class TestAgentStreaming(unittest.TestCase):
+    def test_process_input_stream(self):
+        client = FakeStreamingClient(
+            {"intents": ["UPDATE"], "items_to_resolve": [{"entity_type": "supplier", "value": "Smartsaa"}],
+             "actions": [{"operation": "UPDATE", "field_path": "vendor_id", "value": "Smartsaa"}]},
+            "Supplier set.",
+        )
+        agent = POAgent(fused_turn=False, api=StaticAPI(), nlu=BedrockService(client=client), fast_path=False)
+        state = agent.get_initial_state()
+        chunks = list(agent.process_input_stream("supplier smartsaa", state))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), "Supplier set.")
+        self.assertEqual(state["payload"]["vendor_id"], "v-1")
+        self.assertEqual(agent.api.lookups, 1)
+        self.assertEqual(state["conversation_history"][-1]["content"], "Supplier set.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import json
+import tempfile
+import unittest
+
+from bedrock_service import BedrockService
+from model_backends import RecordingClient, RecordingStore, ReplayClient, SyntheticClient
+from structured_output import ANALYSIS_TOOL, parse_model_json
+
+ANALYSIS = {
+    "intents": ["ADD_ITEM"],
+    "items_to_resolve": [{"entity_type": "material", "value": "Scooty"}],
+    "actions": [
+        {"operation": "ADD", "field_path": "line_items", "value": {"material": "Scooty", "quantity": 2}},
+        {"operation": "UPDATE", "field_path": "po_date", "value": "2025-12-30"},
+    ],
+    "thought_process": "Add the item and set the date.",
+}
+
+
+class TextClient:
+    """Always answers with the given text, whatever the request asks for."""
+
+    def __init__(self, text):
+        self.text = text
+        self.requests = []
+
+    def invoke_model(self, modelId, body):
+        self.requests.append(json.loads(body))
+        return {"body": io.BytesIO(json.dumps({"content": [{"type": "text", "text": self.text}]}).encode())}
+
+
+class TestParseModelJson(unittest.TestCase):
+    def test_well_formed(self):
+        text = "Here is the analysis:\n```json\n" + json.dumps(ANALYSIS, indent=2) + "\n```\nLet me know."
+        self.assertEqual(parse_model_json(text), (ANALYSIS, "ok"))
+
+    def test_trailing_comma(self):
+        self.assertEqual(parse_model_json('{"intents": ["A",], "actions": [],}'), ({"intents": ["A"], "actions": []}, "repaired"))
+
+    def test_truncated_reply_keeps_complete_values(self):
+        text = json.dumps(ANALYSIS)
+        cut = text.index('{"operation": "UPDATE"') + 20
+        result, status = parse_model_json(text[:cut])
+        self.assertEqual(status, "repaired")
+        self.assertEqual(result["items_to_resolve"], ANALYSIS["items_to_resolve"])
+        # The half-written second action is dropped, not applied without its value
+        self.assertEqual(result["actions"], ANALYSIS["actions"][:1])
+
+    def test_truncated_string_value(self):
+        self.assertEqual(parse_model_json('{"response": "Supplier set. Which pl'), ({"response": "Supplier set. Which pl"}, "repaired"))
+        # A cut-off entity name would resolve to the wrong record
+        self.assertEqual(parse_model_json('{"quantity": 2, "supplier_name": "Smart'), ({"quantity": 2}, "repaired"))
+
+    def test_no_json(self):
+        self.assertEqual(parse_model_json("Sorry, I cannot help with that."), (None, "failed"))
+
+
+class TestStructuredOutput(unittest.TestCase):
+    def service(self, client):
+        service = BedrockService(client=client, cache=False)
+        service.model_id = "test-model"
+        return service
+
+    def test_tool_call_is_forced(self):
+        service = self.service(None)
+        request = service._build_request("system", "hello", ANALYSIS_TOOL)
+        self.assertEqual(request["tool_choice"], {"type": "tool", "name": "record_analysis"})
+        self.assertEqual(request["tools"], [ANALYSIS_TOOL])
+        self.assertNotIn("tools", service._build_request("system", "hello"))
+
+        service.structured_output = False
+        self.assertNotIn("tools", service._build_request("system", "hello", ANALYSIS_TOOL))
+
+    def test_tool_use_result(self):
+        client = SyntheticClient(responder=lambda request: "```json\n" + json.dumps(ANALYSIS, indent=2) + "\n```", base_ms=0, token_ms=0)
+        service = self.service(client)
+        self.assertEqual(service.analyze_user_input("add 2 scooty", {}, []), ANALYSIS)
+        self.assertEqual(service.parse_stats["tool_use"], 1)
+        tool_tokens = client.output_tokens
+
+        service.structured_output = False
+        self.assertEqual(service.analyze_user_input("add 2 scooty", {}, []), ANALYSIS)
+        self.assertEqual(service.parse_stats["ok"], 1)
+        self.assertLess(tool_tokens, client.output_tokens - tool_tokens)
+
+    def test_truncated_text_is_recovered_instead_of_an_error(self):
+        client = TextClient(json.dumps(ANALYSIS)[:-40])
+        service = self.service(client)
+        result = service.analyze_user_input("add 2 scooty", {}, [])
+        self.assertNotIn("error", result)
+        self.assertEqual(result["items_to_resolve"], ANALYSIS["items_to_resolve"])
+        self.assertEqual(service.parse_stats, {"tool_use": 0, "ok": 0, "repaired": 1, "failed": 0})
+
+        client.text = "I could not work that out."
+        self.assertIn("error", service.analyze_user_input("add 2 scooty", {}, []))
+        self.assertEqual(service.parse_stats["failed"], 1)
+
+    def test_streamed_tool_input(self):
+        client = SyntheticClient(responder=lambda request: json.dumps(ANALYSIS), base_ms=0, token_ms=0)
+        seen = []
+        result = self.service(client).analyze_user_input_stream("add 2 scooty", {}, [], on_items_to_resolve=seen.append)
+        self.assertEqual(result, ANALYSIS)
+        self.assertEqual(seen, [ANALYSIS["items_to_resolve"]])
+
+    def test_replayed_tool_call_streams(self):
+        with tempfile.TemporaryDirectory() as path:
+            live = SyntheticClient(responder=lambda request: json.dumps({"response": "Supplier set."}), base_ms=0, token_ms=0)
+            self.service(RecordingClient(RecordingStore(path), live_client=live)).generate_response("hi", {}, [], {}, [])
+            replay = self.service(ReplayClient(RecordingStore(path)))
+            self.assertEqual("".join(replay.generate_response_stream("hi", {}, [], {}, [])), "Supplier set.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import tracing
+from agent_logic import POAgent
+from fake_supplierx import FakeSupplierX, SyntheticCatalog, in_process_transport
+from mock_api import MockAPI
+
+
+class StubNLU:
+    def analyze_user_input(self, user_text, current_payload, conversation_history, context_state=None):
+        return {
+            "intents": ["UPDATE_PO"],
+            "items_to_resolve": [{"entity_type": "supplier", "value": "Smartsaa"}, {"entity_type": "material", "value": "Scooty"}],
+            "actions": [{"operation": "UPDATE", "field_path": "vendor_id", "value": "Smartsaa"},
+                        {"operation": "ADD", "field_path": "line_items", "value": "Scooty"}],
+        }
+
+    def generate_response(self, user_text, analysis, execution_results, current_payload, missing_fields):
+        return "Done."
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+        self.tracer = tracing.configure(enabled=True, path=self.path)
+
+    def tearDown(self):
+        tracing.configure()
+
+    def test_disabled_is_a_noop(self):
+        tracing.configure(enabled=False)
+        with tracing.trace("turn") as turn, tracing.span("lookup") as span:
+            span.set(endpoint="/x")
+            span.add("input_tokens", 3)
+        self.assertIs(turn, tracing.NOOP_SPAN)
+        self.assertIs(span, tracing.NOOP_SPAN)
+        self.assertIsNone(turn.trace)
+        self.assertIs(tracing.span("orphan"), tracing.NOOP_SPAN)
+
+    def test_nesting_threads_errors_and_export(self):
+        def lookup():
+            with tracing.span("lookup"):
+                pass
+
+        with tracing.trace("turn", chars=5) as turn:
+            with tracing.span("resolve"):
+                worker = threading.Thread(target=tracing.bind(lookup))
+                worker.start()
+                worker.join()
+            with self.assertRaises(KeyError):
+                with tracing.span("apply_actions") as span:
+                    span.add("input_tokens", 2)
+                    span.add("input_tokens", 3)
+                    raise KeyError("quantity")
+        self.assertIs(tracing.current_span(), tracing.NOOP_SPAN)
+
+        rows = {row["name"]: row for row in turn.trace.waterfall()}
+        self.assertEqual([rows[n]["depth"] for n in ("turn", "resolve", "lookup", "apply_actions")], [0, 1, 2, 1])
+        self.assertEqual(rows["lookup"]["parent_id"], rows["resolve"]["span_id"])
+        self.assertEqual(rows["apply_actions"]["attributes"], {"input_tokens": 5})
+        self.assertEqual(rows["apply_actions"]["error"], "KeyError: 'quantity'")
+
+        with open(self.path) as f:
+            exported = [json.loads(line) for line in f]
+        self.assertEqual(len(exported), 1)
+        self.assertEqual(exported[0]["trace_id"], turn.trace.trace_id)
+        self.assertEqual(len(exported[0]["spans"]), 4)
+        self.assertIs(self.tracer.recent[-1], turn.trace)
+
+    def test_process_input_trace(self):
+        fake = FakeSupplierX(SyntheticCatalog(materials=200, suppliers=100))
+        api = MockAPI(transport=in_process_transport(fake), base_url="http://fake", cache=None, catalog=False)
+        agent = POAgent(api=api, nlu=StubNLU(), fast_path=False)
+        agent.process_input("Smartsaa, one Scooty", agent.get_initial_state())
+
+        spans = agent.last_trace.waterfall()
+        names = [s["name"] for s in spans]
+        for name in ("turn", "analyze.model", "resolve", "lookup", "http", "apply_actions", "respond"):
+            self.assertIn(name, names)
+        lookups = [s for s in spans if s["name"] == "lookup"]
+        self.assertEqual(sorted(s["attributes"]["entity"] for s in lookups), ["material", "supplier"])
+        self.assertTrue(all(s["attributes"]["found"] for s in lookups))
+        http = [s for s in spans if s["name"] == "http"]
+        self.assertEqual({s["depth"] for s in http}, {3})
+        self.assertEqual(http[0]["attributes"]["status"], 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
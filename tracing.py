@@ -0,0 +1,233 @@
+"""
+Per-turn tracing for POAgent.
+
+POAgent.process_input opens a trace per turn (tracing.trace) and the stages inside it
+open child spans (tracing.span): model analysis, each entity lookup and the HTTP calls
+under it, action application, payload construction, create_po and the response. Spans
+carry attributes such as endpoint, cache_hit or token counts; code below a span can
+annotate it with tracing.current_span().set(...) / .add(...).
+
+Enable with PO_AGENT_TRACING=on (or configure(enabled=True)). Finished traces are kept
+in memory (Tracer.recent, POAgent.last_trace) and, with PO_AGENT_TRACE_FILE set,
+appended to that file as one JSON line per trace.
+
+Disabled (the default), trace() and span() return a shared no-op span and record
+nothing. Spans outside a trace are no-ops too, so MockAPI calls made outside a turn
+(e.g. bulk import) are not traced.
+
+The current span lives in a contextvar, so asyncio tasks inherit it. Work handed to a
+thread pool does not; wrap the callable with bind() to keep its spans in the trace.
+"""
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+_current = contextvars.ContextVar("po_agent_span", default=None)
+# Span ids only need to be unique within the process (traces get a uuid)
+_span_ids = itertools.count(1)
+
+
+class _NoopSpan:
+    """Returned when tracing is off or no trace is active; every operation does nothing."""
+
+    __slots__ = ()
+    trace = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __bool__(self):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "attributes", "start", "end", "error", "thread", "_token")
+
+    def __init__(self, trace, name, parent, attributes):
+        self.trace = trace
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.start = None
+        self.end = None
+        self.error = None
+        self.thread = None
+        self._token = None
+
+    def __enter__(self):
+        self.thread = threading.current_thread().name
+        self._token = _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None and exc_type is not GeneratorExit:
+            self.error = f"{exc_type.__name__}: {exc}"
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # Closed from another context (e.g. an abandoned generator finalized later)
+            pass
+        self.trace._finish(self)
+        return False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    @property
+    def duration_ms(self):
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def to_dict(self, origin):
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "offset_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "thread": self.thread,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """The spans of one turn; the root span is the trace itself."""
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+        self.root = Span(self, name, None, attributes)
+
+    @property
+    def name(self):
+        return self.root.name
+
+    @property
+    def duration_ms(self):
+        return self.root.duration_ms
+
+    def _finish(self, span):
+        with self._lock:
+            self.spans.append(span)
+        if span is self.root:
+            self.tracer._export(self)
+
+    def to_dict(self):
+        origin = self.root.start
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.root.attributes,
+            "spans": [s.to_dict(origin) for s in spans],
+        }
+
+    def waterfall(self):
+        """Span rows in start order with their nesting depth, for a waterfall view."""
+        rows = self.to_dict()["spans"]
+        depth = {}
+        for row in rows:
+            row["depth"] = depth[row["span_id"]] = depth.get(row["parent_id"], -1) + 1
+        return rows
+
+
+class Tracer:
+    def __init__(self, enabled=None, path=None, keep=None):
+        if enabled is None:
+            enabled = os.getenv("PO_AGENT_TRACING", "off").lower() in ("on", "1", "true")
+        self.enabled = enabled
+        self.path = path if path is not None else os.getenv("PO_AGENT_TRACE_FILE", "")
+        self.recent = deque(maxlen=keep or int(os.getenv("PO_AGENT_TRACE_KEEP", "50")))
+        self._write_lock = threading.Lock()
+
+    def trace(self, name, **attributes):
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current.get()
+        if parent is not None:
+            # Nested turn (e.g. a turn replayed inside another): a span of the outer trace
+            return Span(parent.trace, name, parent, attributes)
+        return Trace(self, name, attributes).root
+
+    def _export(self, trace):
+        self.recent.append(trace)
+        if self.path:
+            line = json.dumps(trace.to_dict(), default=str)
+            with self._write_lock:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+
+_tracer = Tracer()
+
+
+def configure(enabled=None, path=None, keep=None):
+    """Replace the process-wide tracer (settings default to the environment)."""
+    global _tracer
+    _tracer = Tracer(enabled, path, keep)
+    return _tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+def trace(name, **attributes):
+    """Root span of a new trace (a child span if a trace is already active)."""
+    return _tracer.trace(name, **attributes)
+
+
+def span(name, **attributes):
+    """Child span of the current span; a no-op when tracing is off or no trace is active."""
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent, attributes)
+
+
+def current_span():
+    return _current.get() or NOOP_SPAN
+
+
+def bind(fn):
+    """fn running under the current span in whatever thread calls it (for thread pools)."""
+    parent = _current.get()
+    if parent is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run